@@ -0,0 +1,10 @@
+# benchmarks/__init__.py
+
+"""
+Suite de benchmarks de CastellaScript.
+
+Contiene el corpus de programas Castella (reales y sintéticos) y los scripts que
+miden el rendimiento del pipeline de traducción. Todos los scripts escriben sus
+resultados en el mismo formato JSON (ver `comun.py`), de modo que cualquier par
+de ejecuciones puede compararse con `castella_bench comparar`.
+"""
@@ -0,0 +1,142 @@
+# benchmarks/bench_asincrono.py
+
+"""
+Benchmark de E/S concurrente con `asincrono funcion` y `esperar` frente a E/S bloqueante.
+
+Arranca un servidor HTTP local de prueba (asyncio, en un hilo) que responde cada
+petición tras una latencia fija, y ejecuta con `castella_embebido` dos programas
+Castella que hacen las mismas peticiones:
+
+  * `secuencial`: `urllib.request.urlopen` en un bucle `para` (una petición tras otra).
+  * `concurrente`: corrutinas con `asyncio.open_connection`, lanzadas a la vez con
+    `asyncio.gather` y limitadas por un semáforo (`asincrono con`); el programa las
+    espera con un `esperar` de nivel superior.
+
+Métricas:
+  * `asincrono.<variante>`: tiempo de hacer todas las peticiones.
+  * `asincrono.<variante>.rendimiento`: peticiones por segundo.
+  * `asincrono.concurrente.relativo`: tiempo respecto a la versión secuencial (%).
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_asincrono --salida asincrono.json
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+
+from .comun import guardar_resultados, medir, metrica
+
+CUERPO_RESPUESTA = b"castella"
+
+
+class ServidorPrueba:
+    """
+    Servidor HTTP/1.0 mínimo que responde a cualquier petición tras `latencia` segundos.
+    """
+
+    def __init__(self, latencia: float):
+        self.latencia = latencia
+        self.puerto = None
+        self._bucle = asyncio.new_event_loop()
+        self._listo = threading.Event()
+        self._hilo = threading.Thread(target=self._ejecutar, name="servidor-prueba", daemon=True)
+
+    async def _atender(self, lector, escritor):
+        while (await lector.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        await asyncio.sleep(self.latencia)
+        escritor.write(b"HTTP/1.0 200 OK\r\nContent-Length: %d\r\n\r\n%s" % (len(CUERPO_RESPUESTA), CUERPO_RESPUESTA))
+        await escritor.drain()
+        escritor.close()
+
+    def _ejecutar(self):
+        asyncio.set_event_loop(self._bucle)
+        servidor = self._bucle.run_until_complete(asyncio.start_server(self._atender, "127.0.0.1", 0, backlog=1024))
+        self.puerto = servidor.sockets[0].getsockname()[1]
+        self._listo.set()
+        self._bucle.run_forever()
+        servidor.close()
+
+    def __enter__(self):
+        self._hilo.start()
+        self._listo.wait()
+        return self
+
+    def __exit__(self, *excepcion):
+        self._bucle.call_soon_threadsafe(self._bucle.stop)
+        self._hilo.join()
+
+
+def _programas(puerto: int, peticiones: int, concurrencia: int) -> dict:
+    """
+    Programas Castella de cada variante; ambos dejan las respuestas en `respuestas`.
+    """
+    secuencial = (
+        "importar urllib.request;\n"
+        "let respuestas = [];\n"
+        f"para i en range({peticiones}) {{\n"
+        f"    respuestas.append(urllib.request.urlopen(\"http://127.0.0.1:{puerto}/\" + str(i)).read());\n"
+        "}\n"
+    )
+    concurrente = (
+        "importar asyncio;\n"
+        "asincrono funcion pedir(i, limite) {\n"
+        "    asincrono con limite {\n"
+        f"        lector, escritor = esperar asyncio.open_connection(\"127.0.0.1\", {puerto});\n"
+        "        escritor.write((\"GET /\" + str(i) + \" HTTP/1.0\\r\\n\\r\\n\").encode());\n"
+        "        esperar escritor.drain();\n"
+        "        let datos = esperar lector.read();\n"
+        "        escritor.close();\n"
+        "        retornar datos.split(\"\\r\\n\\r\\n\".encode(), 1)[1];\n"
+        "    }\n"
+        "}\n"
+        "asincrono funcion pedir_todas() {\n"
+        f"    let limite = asyncio.Semaphore({concurrencia});\n"
+        f"    retornar esperar asyncio.gather(*[pedir(i, limite) para i en range({peticiones})]);\n"
+        "}\n"
+        "let respuestas = list(esperar pedir_todas());\n"
+    )
+    return {"secuencial": secuencial, "concurrente": concurrente}
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_embebido import ejecutar
+
+    parser = argparse.ArgumentParser(description="Benchmark de E/S concurrente con asincrono/esperar.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--peticiones", type=int, default=200, help="Peticiones por medición.")
+    parser.add_argument("--concurrencia", type=int, default=50, help="Peticiones simultáneas (versión asíncrona).")
+    parser.add_argument("--latencia", type=float, default=0.01, help="Latencia simulada del servidor (s).")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Menos peticiones y una repetición (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 1 if args.rapido else args.repeticiones
+    peticiones = 40 if args.rapido else args.peticiones
+    metricas = {}
+
+    with ServidorPrueba(args.latencia) as servidor:
+        for variante, codigo in _programas(servidor.puerto, peticiones, args.concurrencia).items():
+            respuestas = ejecutar(codigo)["respuestas"]
+            if respuestas != [CUERPO_RESPUESTA] * peticiones:
+                raise RuntimeError(f"La variante `{variante}` no recibió todas las respuestas.")
+            tiempo = medir(lambda: ejecutar(codigo), repeticiones=repeticiones)
+            metricas[f"asincrono.{variante}"] = tiempo
+            metricas[f"asincrono.{variante}.rendimiento"] = metrica(peticiones / tiempo["valor"], "peticiones/s")
+            print(f"    {variante}: {tiempo['valor']:.3f} s ({peticiones / tiempo['valor']:.0f} peticiones/s)")
+
+    base, tiempo = metricas["asincrono.secuencial"]["valor"], metricas["asincrono.concurrente"]["valor"]
+    if base and tiempo > 0:
+        metricas["asincrono.concurrente.relativo"] = metrica(tiempo / base * 100, "%")
+
+    guardar_resultados(metricas, args.salida, suite="asincrono")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# benchmarks/bench_biblioteca.py
+
+"""
+Benchmark del modo biblioteca (`--biblioteca`): llamar a Castella en el proceso frente a lanzar un proceso por llamada.
+
+Genera un paquete con `generar_biblioteca` a partir de un módulo de servicio y mide:
+
+  * `llamada.en_proceso`: una llamada a la función Castella importada en este proceso.
+  * `llamada.subproceso`: lanzar un intérprete que importa el paquete, llama a la
+    función e imprime el resultado (cota inferior del coste de lanzar el binario de
+    PyInstaller por llamada, que además se descomprime en cada arranque).
+  * `importacion.pyc` / `importacion.fuente`: arrancar un intérprete e importar el
+    paquete con el bytecode precompilado o sin él (compilando los .py en cada arranque).
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_biblioteca --salida biblioteca.json
+"""
+
+import argparse
+import importlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Dict
+
+from .comun import guardar_resultados, medir, metrica, silenciar_salida
+
+# Módulo de servicio: una función de puntuación pequeña, como las que llama un servicio por petición.
+SERVICIO = (
+    "funcion puntuar(valores: Lista[float], umbral: float) -> float {\n"
+    "    let total : float = 0.0;\n"
+    "    para v en valores {\n"
+    "        si (v > umbral) { total += v - umbral; }\n"
+    "    }\n"
+    "    retornar round(total / len(valores), 6);\n"
+    "}\n"
+)
+
+NOMBRE_PAQUETE = "bench_castella"
+
+# Llamadas por medición en el proceso (una sola llamada es demasiado breve para el reloj).
+LLAMADAS = 1000
+
+# Segundos máximos por proceso.
+TIEMPO_MAXIMO = 120
+
+
+def lanzar(codigo: str, directorio: str, entorno_extra: Dict[str, str] = None) -> str:
+    """
+    Ejecuta `python -c codigo` con `directorio` en PYTHONPATH y devuelve su salida estándar.
+    """
+    entorno = dict(os.environ, PYTHONPATH=directorio, **(entorno_extra or {}))
+    proceso = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True,
+                             env=entorno, timeout=TIEMPO_MAXIMO)
+    if proceso.returncode != 0:
+        raise RuntimeError(f"El proceso terminó con código {proceso.returncode}:\n{proceso.stderr}")
+    return proceso.stdout
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_biblioteca import generar_biblioteca
+
+    parser = argparse.ArgumentParser(description="Benchmark del modo biblioteca frente a un proceso por llamada.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--repeticiones", type=int, default=10, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Menos repeticiones (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 3 if args.rapido else args.repeticiones
+    valores = [i * 0.01 for i in range(200)]
+    llamada = f"import {NOMBRE_PAQUETE}.servicio as s; print(s.puntuar({valores!r}, 0.5))"
+    metricas = {}
+
+    with tempfile.TemporaryDirectory(prefix="castella_biblioteca_") as directorio:
+        fuente = os.path.join(directorio, "servicio.castella")
+        with open(fuente, "w", encoding="utf-8") as archivo:
+            archivo.write(SERVICIO)
+        destino = os.path.join(directorio, "con_pyc")
+        with silenciar_salida():
+            ruta_paquete = generar_biblioteca([fuente], NOMBRE_PAQUETE, destino)
+        if not ruta_paquete:
+            print("No se pudo generar el paquete.")
+            return 1
+
+        # Copia sin bytecode, importada con PYTHONDONTWRITEBYTECODE para que no se cree.
+        sin_pyc = os.path.join(directorio, "sin_pyc")
+        shutil.copytree(destino, sin_pyc, ignore=shutil.ignore_patterns("__pycache__"))
+
+        print("--- importacion ---")
+        importar = f"import {NOMBRE_PAQUETE}.servicio"
+        metricas["biblioteca.importacion.pyc"] = medir(lambda: lanzar(importar, destino), repeticiones=repeticiones)
+        metricas["biblioteca.importacion.fuente"] = medir(
+            lambda: lanzar(importar, sin_pyc, {"PYTHONDONTWRITEBYTECODE": "1"}), repeticiones=repeticiones)
+        print(f"    pyc: {metricas['biblioteca.importacion.pyc']['valor'] * 1000:.1f} ms, "
+              f"fuente: {metricas['biblioteca.importacion.fuente']['valor'] * 1000:.1f} ms")
+
+        print("--- llamada ---")
+        salida_subproceso = lanzar(llamada, destino).strip()
+        sys.path.insert(0, destino)
+        try:
+            servicio = importlib.import_module(f"{NOMBRE_PAQUETE}.servicio")
+            if str(servicio.puntuar(valores, 0.5)) != salida_subproceso:
+                raise RuntimeError("La llamada en el proceso y en un subproceso dan resultados distintos.")
+
+            def en_proceso():
+                for _ in range(LLAMADAS):
+                    servicio.puntuar(valores, 0.5)
+
+            lote = medir(en_proceso, repeticiones=repeticiones)
+        finally:
+            sys.path.remove(destino)
+            for nombre in [nombre for nombre in sys.modules if nombre.split(".")[0] == NOMBRE_PAQUETE]:
+                del sys.modules[nombre]
+
+        metricas["biblioteca.llamada.en_proceso"] = metrica(lote["valor"] / LLAMADAS, "s")
+        metricas["biblioteca.llamada.subproceso"] = medir(lambda: lanzar(llamada, destino), repeticiones=repeticiones)
+        base = metricas["biblioteca.llamada.subproceso"]["valor"]
+        tiempo = metricas["biblioteca.llamada.en_proceso"]["valor"]
+        if base and tiempo > 0:
+            print(f"    en el proceso: {tiempo * 1e6:.1f} us por llamada ({base / tiempo:.0f}x respecto a un subproceso)")
+            metricas["biblioteca.llamada.en_proceso.relativo"] = metrica(tiempo / base * 100, "%")
+
+    guardar_resultados(metricas, args.salida, suite="biblioteca")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# benchmarks/bench_cache_disco.py
+
+"""
+Benchmark del decorador `@cache_disco` de castella_runtime.
+
+Ejecuta con `castella_embebido` un programa Castella que llama a una simulación
+costosa (devuelve una `Matriz` grande) con varios parámetros, en cuatro variantes:
+
+  * `sin`: sin caché.
+  * `frio`: con `@cache_disco` y el directorio de la caché vacío (calcula y escribe).
+  * `caliente`: con `@cache_disco` y los resultados ya en disco (lee los `.npy`).
+  * `caliente_mmap`: igual, con `mmap=verdadero` (los arreglos se mapean en memoria).
+
+Cada ejecución es un programa nuevo, como una segunda ejecución del script: la caché
+sobrevive porque está en disco, no en el proceso.
+
+Métricas:
+  * `cache_disco.<variante>`: tiempo del programa.
+  * `cache_disco.<variante>.relativo`: tiempo respecto a `sin` (%).
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_cache_disco --salida cache_disco.json
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+
+from .comun import guardar_resultados, medir, metrica
+
+
+def _programa(decorador: str, pasos: int, tamano: int, parametros: int) -> str:
+    """
+    Programa Castella de la carga, con `decorador` delante de la simulación.
+    """
+    return (
+        f"{decorador}\n"
+        "funcion simular(semilla: int, pasos: int, tamano: int) -> Matriz {\n"
+        "    let estado : Matriz = np.linspace(0.0, 1.0, tamano) + semilla;\n"
+        "    para i en range(pasos) { estado = np.sin(estado) * 0.5 + np.cos(estado * 0.3); }\n"
+        "    retornar estado;\n"
+        "}\n"
+        "let resultado = 0.0;\n"
+        f"para semilla en range({parametros}) {{ resultado = resultado + float(simular(semilla, {pasos}, {tamano}).sum()); }}\n"
+    )
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_embebido import ejecutar
+    from ..castella_traductor import traducir
+
+    parser = argparse.ArgumentParser(description="Benchmark del decorador @cache_disco.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--pasos", type=int, default=200, help="Pasos de cada simulación.")
+    parser.add_argument("--tamano", type=int, default=500000, help="Elementos del estado de cada simulación.")
+    parser.add_argument("--parametros", type=int, default=8, help="Simulaciones (semillas) por programa.")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Carga más pequeña y una repetición (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 1 if args.rapido else args.repeticiones
+    pasos, tamano = (20, 100000) if args.rapido else (args.pasos, args.tamano)
+    directorio = tempfile.mkdtemp(prefix="castella-bench-cache-")
+    metricas = {}
+
+    def vaciar_y_ejecutar(codigo: str):
+        shutil.rmtree(directorio, ignore_errors=True)
+        return ejecutar(codigo)
+
+    variantes = {
+        "sin": ("", ejecutar),
+        "frio": (f'@cache_disco(directorio="{directorio}")', vaciar_y_ejecutar),
+        "caliente": (f'@cache_disco(directorio="{directorio}")', ejecutar),
+        "caliente_mmap": (f'@cache_disco(directorio="{directorio}", mmap=verdadero)', ejecutar),
+    }
+    # Con mapa de fuente (como en `ejecutar`) los decoradores llevan la marca de su línea:
+    # `@cache_disco` tiene que recibir igualmente la versión de la función, o los resultados
+    # guardados sobrevivirían a un cambio del programa.
+    traduccion = traducir(_programa(variantes["frio"][0], pasos, tamano, args.parametros), con_mapa=True)
+    traduccion.lanzar()
+    if 'version="' not in traduccion.codigo_python:
+        raise RuntimeError("La traducción con mapa de fuente no pasa la versión a @cache_disco.")
+
+    try:
+        resultados = {}
+        for variante, (decorador, funcion) in variantes.items():
+            codigo = _programa(decorador, pasos, tamano, args.parametros)
+            resultados[variante] = funcion(codigo)["resultado"]
+            metricas[f"cache_disco.{variante}"] = medir(lambda: funcion(codigo), repeticiones=repeticiones)
+            print(f"    {variante}: {metricas[f'cache_disco.{variante}']['valor']:.4f} s")
+        if len(set(resultados.values())) != 1:
+            raise RuntimeError(f"Las variantes dan resultados distintos: {resultados}")
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    base = metricas["cache_disco.sin"]["valor"]
+    for variante in ("frio", "caliente", "caliente_mmap"):
+        tiempo = metricas[f"cache_disco.{variante}"]["valor"]
+        if base and tiempo > 0:
+            metricas[f"cache_disco.{variante}.relativo"] = metrica(tiempo / base * 100, "%")
+
+    guardar_resultados(metricas, args.salida, suite="cache_disco")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+# benchmarks/bench_compacta.py
+
+"""
+Benchmark de `clase compacta` (instancias con `__slots__`) frente a clases normales.
+
+Ejecuta con `castella_embebido` dos cargas de una simulación de partículas, con la
+misma clase declarada como `clase` y como `clase compacta`:
+
+  * `creacion`: crea una lista de partículas (memoria y tiempo de construcción).
+  * `acceso`: avanza varios pasos leyendo y escribiendo los atributos de cada partícula.
+
+Métricas:
+  * `compacta.creacion.<variante>.tiempo` / `.memoria_pico`: construcción de las
+    partículas (`normal` o `compacta`); el pico se mide con tracemalloc.
+  * `compacta.acceso.<variante>`: tiempo de los pasos de simulación.
+  * `compacta.<medida>.compacta.relativo`: clase compacta respecto a la normal (%).
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_compacta --salida compacta.json
+"""
+
+import argparse
+import sys
+import tracemalloc
+
+from .comun import guardar_resultados, medir, metrica
+
+
+def _clase(modificador: str) -> str:
+    """
+    Declaración Castella de la partícula (`modificador` es "" o "compacta").
+    """
+    return (
+        f"clase {modificador} Particula {{\n"
+        "    x: float = 0.0;\n"
+        "    y: float = 0.0;\n"
+        "    vx: float = 0.0;\n"
+        "    vy: float = 0.0;\n"
+        "    masa: float = 1.0;\n"
+        "    funcion __init__(self, x: float, y: float) { self.x = x; self.y = y; self.vx = 1.0 - y; self.vy = x; }\n"
+        "}\n"
+    )
+
+
+def _programas(modificador: str, particulas: int, pasos: int) -> dict:
+    """
+    Programas Castella de cada carga para una variante de la clase.
+    """
+    creacion = (
+        _clase(modificador)
+        + "let particulas = [];\n"
+        + f"para i en range({particulas}) {{ particulas.append(Particula(i * 0.001, 1.0 - i * 0.001)); }}\n"
+        + "let total = len(particulas);\n"
+    )
+    acceso = (
+        _clase(modificador)
+        + "let particulas = [];\n"
+        + f"para i en range({particulas // 10}) {{ particulas.append(Particula(i * 0.001, 1.0 - i * 0.001)); }}\n"
+        + f"para paso en range({pasos}) {{\n"
+        + "    para p en particulas { p.x = p.x + p.vx * 0.01; p.y = p.y + p.vy * 0.01; p.vy = p.vy - 0.0981 * p.masa; }\n"
+        + "}\n"
+        + "let total = 0.0;\n"
+        + "para p en particulas { total = total + p.x + p.y; }\n"
+    )
+    return {"creacion": creacion, "acceso": acceso}
+
+
+def _memoria_pico(funcion) -> int:
+    """
+    Bytes máximos asignados mientras se ejecuta `funcion` (medidos con tracemalloc).
+    """
+    tracemalloc.start()
+    try:
+        funcion()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_embebido import ejecutar
+
+    parser = argparse.ArgumentParser(description="Benchmark de clase compacta frente a clases normales.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--particulas", type=int, default=1_000_000, help="Partículas creadas (carga creacion).")
+    parser.add_argument("--pasos", type=int, default=20, help="Pasos de simulación (carga acceso, con una décima parte de las partículas).")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Cargas más pequeñas y una repetición (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 1 if args.rapido else args.repeticiones
+    particulas, pasos = (50_000, 5) if args.rapido else (args.particulas, args.pasos)
+    metricas = {}
+
+    for carga in ("creacion", "acceso"):
+        print(f"--- {carga} ---")
+        totales = {}
+        for variante, modificador in (("normal", ""), ("compacta", "compacta")):
+            codigo = _programas(modificador, particulas, pasos)[carga]
+            totales[variante] = ejecutar(codigo)["total"]
+            nombre = f"compacta.{carga}.{variante}" + (".tiempo" if carga == "creacion" else "")
+            metricas[nombre] = medir(lambda: ejecutar(codigo), repeticiones=repeticiones)
+            mensaje = f"    {variante}: {metricas[nombre]['valor']:.3f} s"
+            if carga == "creacion":
+                pico = _memoria_pico(lambda: ejecutar(codigo)) / 2**20
+                metricas[f"compacta.creacion.{variante}.memoria_pico"] = metrica(pico, "MiB")
+                mensaje += f", pico {pico:.1f} MiB"
+            print(mensaje)
+        if totales["normal"] != totales["compacta"]:
+            raise RuntimeError(f"La carga `{carga}` da resultados distintos con la clase normal y la compacta.")
+
+    for medida in ("creacion.{}.tiempo", "creacion.{}.memoria_pico", "acceso.{}"):
+        base = metricas[f"compacta.{medida.format('normal')}"]["valor"]
+        valor = metricas[f"compacta.{medida.format('compacta')}"]["valor"]
+        if base and valor > 0:
+            metricas[f"compacta.{medida.format('compacta')}.relativo"] = metrica(valor / base * 100, "%")
+
+    guardar_resultados(metricas, args.salida, suite="compacta")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# benchmarks/bench_cython.py
+
+"""
+Benchmark comparativo de los backends de Python y de Cython (`--cython`).
+
+Usa los núcleos de simulación de `bench_rapido`. Para cada uno:
+
+  * `python`: ejecuta el Python traducido en un proceso aparte.
+  * `cython`: compila el programa con `castella_cython.construir_extension` y
+    ejecuta en un proceso aparte la importación del módulo de extensión.
+  * `compilacion`: tiempo de traducir y compilar con Cython (incluye el compilador de C).
+
+Antes de medir se comprueba que ambos backends imprimen lo mismo.
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_cython --salida cython.json
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from .bench_rapido import NUCLEOS
+from .comun import guardar_resultados, medir, metrica, silenciar_salida
+
+# Raíz del paquete: el código generado importa `castella_runtime` desde aquí.
+DIRECTORIO_PAQUETE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Segundos máximos por ejecución.
+TIEMPO_MAXIMO = 600
+
+
+def ejecutar(comando: List[str], directorio: str) -> str:
+    """
+    Ejecuta un comando de Python en un proceso aparte y devuelve su salida estándar.
+
+    Raises:
+        RuntimeError: Si el proceso termina con error.
+    """
+    entorno = dict(os.environ, PYTHONPATH=DIRECTORIO_PAQUETE + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proceso = subprocess.run([sys.executable] + comando, cwd=directorio, capture_output=True, text=True,
+                             env=entorno, timeout=TIEMPO_MAXIMO)
+    if proceso.returncode != 0:
+        raise RuntimeError(f"{' '.join(comando)} terminó con código {proceso.returncode}:\n{proceso.stderr}")
+    return proceso.stdout
+
+
+def medir_nucleo(nombre: str, codigo_castella: str, directorio: str, repeticiones: int) -> Dict[str, dict]:
+    """
+    Compila un núcleo con Cython y mide ambos backends.
+    """
+    from ..castella_cython import construir_extension, nombre_modulo_extension
+    from ..castella_parser import traducir_a_python
+
+    with silenciar_salida():
+        codigo_python = traducir_a_python(codigo_castella)
+    script_python = os.path.join(directorio, f"{nombre}.py")
+    with open(script_python, "w", encoding="utf-8") as archivo:
+        archivo.write(codigo_python)
+
+    modulo = nombre_modulo_extension(nombre)
+    inicio = time.perf_counter()
+    with silenciar_salida() as registro:
+        ruta_extension = construir_extension(codigo_castella, modulo, directorio)
+    duracion_compilacion = time.perf_counter() - inicio
+    for linea in registro.getvalue().splitlines():
+        if "Cython" in linea or "Funciones tipadas" in linea or "sin tipos" in linea:
+            print(f"    {linea.strip()}")
+    if not ruta_extension:
+        raise RuntimeError(f"'{nombre}': Cython no pudo compilar el programa.")
+
+    salida_python = ejecutar([script_python], directorio)
+    salida_cython = ejecutar(["-c", f"import {modulo}"], directorio)
+    if salida_python != salida_cython:
+        raise RuntimeError(f"'{nombre}': la salida con Cython ({salida_cython.strip()!r}) difiere de Python ({salida_python.strip()!r}).")
+
+    return {
+        "python": medir(lambda: ejecutar([script_python], directorio), repeticiones=repeticiones),
+        "cython": medir(lambda: ejecutar(["-c", f"import {modulo}"], directorio), repeticiones=repeticiones),
+        "compilacion": metrica(duracion_compilacion, "s"),
+    }
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark comparativo de los backends de Python y Cython.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--nucleos", help="Núcleos a medir, separados por comas (por defecto, todos).")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Menos repeticiones (para CI).")
+    args = parser.parse_args(argv)
+
+    from ..castella_cython import cython_disponible
+    if not cython_disponible():
+        print("Este benchmark necesita Cython y un compilador de C: pip install cython")
+        return 1
+
+    nombres = args.nucleos.split(",") if args.nucleos else list(NUCLEOS)
+    repeticiones = 2 if args.rapido else args.repeticiones
+    metricas = {}
+    with tempfile.TemporaryDirectory(prefix="castella_bench_cython_") as directorio:
+        for nombre in nombres:
+            print(f"--- {nombre} ---")
+            resultados = medir_nucleo(nombre, NUCLEOS[nombre], directorio, repeticiones)
+            for variante, resultado in resultados.items():
+                metricas[f"cython.{nombre}.{variante}"] = resultado
+            base, tiempo = resultados["python"]["valor"], resultados["cython"]["valor"]
+            if base and tiempo > 0:
+                print(f"    cython: {base / tiempo:.2f}x respecto a Python (compilación: {resultados['compilacion']['valor']:.1f} s)")
+                metricas[f"cython.{nombre}.cython.relativo"] = metrica(tiempo / base * 100, "%")
+
+    guardar_resultados(metricas, args.salida, suite="cython")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# benchmarks/bench_embebido.py
+
+"""
+Benchmark de la API de incrustación (`castella_embebido`) y su caché de código compilado.
+
+Evalúa un conjunto de reglas Castella pequeñas, como las de un servicio que decide
+sobre cada petición:
+
+  * `evaluar.fallo`: `evaluar` con la caché vacía (parseo con Lark, transformación y `compile()`).
+  * `evaluar.acierto`: `evaluar` con el código ya en la caché (sólo hash, búsqueda y `exec`).
+  * `mezcla.<capacidad>`: una secuencia de evaluaciones con reglas repetidas y una caché
+    de esa capacidad; se reporta también la tasa de aciertos resultante.
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_embebido --salida embebido.json
+"""
+
+import argparse
+import random
+import sys
+from typing import Dict, List
+
+from .comun import guardar_resultados, medir, metrica
+
+REGLAS: List[str] = [
+    "edad >= 18 y pais == 'AR'",
+    "precio * (1 + iva) > 100",
+    "len(items) > 3 o total > 500",
+    "no bloqueado y intentos < 5",
+    "max(precio, total) / (edad + 1)",
+    "pais en ['AR', 'UY', 'CL'] y total > 50",
+]
+
+ENTORNO = {"edad": 30, "pais": "AR", "precio": 80.0, "iva": 0.21, "items": [1, 2, 3, 4],
+           "total": 620.0, "bloqueado": False, "intentos": 2}
+
+# Evaluaciones por secuencia de `mezcla` y capacidades medidas.
+EVALUACIONES_MEZCLA = 2000
+CAPACIDADES_MEZCLA = (0, 8, 64)
+
+
+def secuencia_mezcla(cantidad: int, semilla: int = 7) -> List[str]:
+    """
+    Reglas con repetición sesgada (unas pocas muy frecuentes y muchas raras), como en
+    un servicio real: las raras son variantes de las reglas base con otro umbral.
+    """
+    generador = random.Random(semilla)
+    secuencia = []
+    for _ in range(cantidad):
+        if generador.random() < 0.8:
+            secuencia.append(generador.choice(REGLAS))
+        else:
+            secuencia.append(f"total > {generador.randrange(1000)}")
+    return secuencia
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_embebido import CacheCodigo, evaluar
+
+    parser = argparse.ArgumentParser(description="Benchmark de la caché de código de castella_embebido.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--repeticiones", type=int, default=10, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Menos repeticiones (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 3 if args.rapido else args.repeticiones
+    metricas = {}
+
+    # Fallos: una caché nueva por evaluación. Aciertos: la misma caché, ya poblada.
+    def todas_sin_cache():
+        for regla in REGLAS:
+            evaluar(regla, ENTORNO, cache=CacheCodigo(0))
+
+    cache = CacheCodigo(len(REGLAS))
+
+    def todas_con_cache():
+        for regla in REGLAS:
+            evaluar(regla, ENTORNO, cache=cache)
+
+    fallo = medir(todas_sin_cache, repeticiones=repeticiones)
+    acierto = medir(todas_con_cache, repeticiones=repeticiones)
+    metricas["embebido.evaluar.fallo"] = metrica(fallo["valor"] / len(REGLAS), "s")
+    metricas["embebido.evaluar.acierto"] = metrica(acierto["valor"] / len(REGLAS), "s")
+    base, tiempo = metricas["embebido.evaluar.fallo"]["valor"], metricas["embebido.evaluar.acierto"]["valor"]
+    print(f"--- evaluar ---\n    fallo: {base * 1e6:.0f} us, acierto: {tiempo * 1e6:.1f} us")
+    if base and tiempo > 0:
+        metricas["embebido.evaluar.acierto.relativo"] = metrica(tiempo / base * 100, "%")
+
+    print("--- mezcla ---")
+    secuencia = secuencia_mezcla(EVALUACIONES_MEZCLA // (4 if args.rapido else 1))
+    for capacidad in CAPACIDADES_MEZCLA:
+        cache_mezcla = CacheCodigo(capacidad)
+
+        def ejecutar_mezcla():
+            for regla in secuencia:
+                evaluar(regla, ENTORNO, cache=cache_mezcla)
+
+        resultado = medir(ejecutar_mezcla, repeticiones=max(1, repeticiones // 3), calentamiento=0)
+        estadisticas = cache_mezcla.estadisticas()
+        metricas[f"embebido.mezcla.{capacidad}"] = resultado
+        metricas[f"embebido.mezcla.{capacidad}.tasa_aciertos"] = metrica(estadisticas["tasa_aciertos"] * 100, "%")
+        print(f"    capacidad {capacidad}: {resultado['valor']:.3f} s, "
+              f"aciertos {estadisticas['tasa_aciertos']:.0%}, expulsiones {estadisticas['expulsiones']}")
+
+    guardar_resultados(metricas, args.salida, suite="embebido")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
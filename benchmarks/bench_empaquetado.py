@@ -0,0 +1,146 @@
+# benchmarks/bench_empaquetado.py
+
+"""
+Benchmark de los formatos de salida de `generar_binario` (`--formato`).
+
+Para cada formato (onefile, onedir, zipapp) y cada programa:
+
+  * `construccion`: tiempo de `generar_binario` (traducción + empaquetado).
+  * `arranque`: tiempo de pared de lanzar el artefacto en un proceso nuevo hasta que
+    termina (mediana de varias ejecuciones). Con onefile incluye la extracción del
+    paquete a un directorio temporal, que se repite en cada arranque.
+  * `tamano`: bytes en disco del artefacto (con onedir, el directorio completo).
+
+Los formatos onefile y onedir necesitan PyInstaller; zipapp necesita que el Python
+que lo ejecuta tenga instaladas las dependencias del programa (NumPy, Matplotlib).
+Las cachés del sistema operativo no se vacían entre ejecuciones: `arranque` mide
+procesos nuevos, no disco frío.
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_empaquetado --salida empaquetado.json
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from .comun import guardar_resultados, medir, metrica, silenciar_salida
+
+# Programas cortos: el coste de arranque domina sobre la ejecución.
+PROGRAMAS: Dict[str, str] = {
+    "hola": "imprimir(\"hola\");\n",
+    "numerico": (
+        "importar numpy;\n"
+        "let a : Matriz = numpy.linspace(0.0, 1.0, 1000);\n"
+        "imprimir(round(float((a * a).sum()), 6));\n"
+    ),
+}
+
+# Segundos máximos por arranque.
+TIEMPO_MAXIMO = 120
+
+
+def tamano_en_disco(ruta: str) -> int:
+    """
+    Bytes de un archivo o, si es un directorio, de todos sus archivos.
+    """
+    if os.path.isfile(ruta):
+        return os.path.getsize(ruta)
+    total = 0
+    for carpeta, _, archivos in os.walk(ruta):
+        total += sum(os.path.getsize(os.path.join(carpeta, archivo)) for archivo in archivos)
+    return total
+
+
+def comando_arranque(formato: str, ruta: str) -> List[str]:
+    """
+    Comando para lanzar el artefacto de un formato.
+    """
+    if formato == "zipapp":
+        return [sys.executable, ruta]
+    return [ruta]
+
+
+def construir(codigo_castella: str, nombre: str, formato: str, directorio: str) -> str:
+    """
+    Genera el artefacto en `directorio` (PyInstaller trabaja en el directorio actual).
+
+    Raises:
+        RuntimeError: Si la generación falló.
+    """
+    from ..castella_backend import generar_binario
+
+    anterior = os.getcwd()
+    os.chdir(directorio)
+    try:
+        with silenciar_salida():
+            ruta = generar_binario(codigo_castella, nombre, formato=formato)
+    finally:
+        os.chdir(anterior)
+    if not ruta:
+        raise RuntimeError(f"No se pudo generar '{nombre}' con --formato={formato}.")
+    return ruta
+
+
+def medir_formato(formato: str, repeticiones: int) -> Dict[str, dict]:
+    """
+    Construye y lanza cada programa con un formato.
+    """
+    metricas = {}
+    for programa, codigo in PROGRAMAS.items():
+        directorio = tempfile.mkdtemp(prefix=f"castella_{formato}_")
+        try:
+            inicio = time.perf_counter()
+            ruta = construir(codigo, programa, formato, directorio)
+            metricas[f"empaquetado.{formato}.{programa}.construccion"] = metrica(time.perf_counter() - inicio, "s")
+
+            # Con onedir, `ruta` es el lanzador y el programa está en `<nombre>.dist`.
+            artefacto = os.path.join(directorio, programa + ".dist") if formato == "onedir" else ruta
+            metricas[f"empaquetado.{formato}.{programa}.tamano"] = metrica(tamano_en_disco(artefacto), "bytes")
+
+            comando = comando_arranque(formato, ruta)
+
+            def arrancar():
+                subprocess.run(comando, capture_output=True, check=True, timeout=TIEMPO_MAXIMO)
+
+            resultado = medir(arrancar, repeticiones=repeticiones)
+            metricas[f"empaquetado.{formato}.{programa}.arranque"] = resultado
+            print(f"    {programa}: arranque {resultado['valor'] * 1000:.0f} ms")
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+    return metricas
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_backend import FORMATOS_SALIDA
+
+    parser = argparse.ArgumentParser(description="Benchmark de construcción y arranque por formato de salida.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--formatos", default=",".join(FORMATOS_SALIDA), help="Formatos a medir, separados por comas.")
+    parser.add_argument("--repeticiones", type=int, default=10, help="Arranques medidos por artefacto.")
+    parser.add_argument("--rapido", action="store_true", help="Menos repeticiones (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 3 if args.rapido else args.repeticiones
+    metricas = {}
+    for formato in args.formatos.split(","):
+        print(f"--- {formato} ---")
+        if formato != "zipapp" and shutil.which("pyinstaller") is None:
+            print("    PyInstaller no está instalado; se omite.")
+            continue
+        metricas.update(medir_formato(formato, repeticiones))
+
+    guardar_resultados(metricas, args.salida, suite="empaquetado")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+# benchmarks/bench_en_vivo.py
+
+"""
+Benchmark del coste de vigilar una simulación con `graficar_en_vivo`.
+
+Ejecuta con `castella_embebido` una simulación de un oscilador amortiguado de
+`pasos` pasos (sin pantalla: `graficar` en modo `archivo`) y compara:
+
+  * `sin`: la simulación sola.
+  * `en_vivo`: añadiendo posición y velocidad a un gráfico en vivo en cada paso.
+  * `cuadros`: igual, escribiendo además cada actualización como imagen PNG.
+
+Métricas (por variante):
+  * `en_vivo.<variante>`: tiempo de ejecución del programa (incluye cerrar el gráfico).
+  * `en_vivo.<variante>.relativo`: tiempo respecto a `sin` (%).
+  * `en_vivo.cuadros.cuadros`: imágenes escritas por la variante `cuadros`.
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_en_vivo --salida en_vivo.json
+"""
+
+import argparse
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+
+from .comun import guardar_resultados, medir, metrica
+
+
+def generar_programa(pasos: int, en_vivo: bool) -> str:
+    """
+    Simulación de `pasos` pasos; con `en_vivo`, cada paso se añade al gráfico
+    `graficar_en_vivo(2, archivo=archivo)` (`archivo` lo define quien la ejecuta).
+    """
+    lineas = [
+        "let posicion = 1.0;\n",
+        "let velocidad = 0.0;\n",
+        "let dt = 0.001;\n",
+    ]
+    if en_vivo:
+        lineas.append("let g = graficar_en_vivo([\"posicion\", \"velocidad\"], archivo=archivo);\n")
+    lineas += [
+        f"para i en range({pasos}) {{\n",
+        "    velocidad += (-posicion - 0.1 * velocidad) * dt;\n",
+        "    posicion += velocidad * dt;\n",
+    ]
+    if en_vivo:
+        lineas.append("    g.agregar(posicion, velocidad, x=i * dt);\n")
+    lineas.append("}\n")
+    if en_vivo:
+        lineas.append("g.cerrar();\n")
+    return "".join(lineas)
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_embebido import ejecutar
+    from ..castella_ejecucion import asegurar_runtime_importable
+
+    parser = argparse.ArgumentParser(description="Benchmark del coste de graficar_en_vivo.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--pasos", type=int, default=2_000_000, help="Pasos de la simulación.")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Menos pasos y una repetición (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 1 if args.rapido else args.repeticiones
+    pasos = 200_000 if args.rapido else args.pasos
+    # El código generado importa `castella_runtime` como paquete de nivel superior: hay que
+    # configurar ese mismo módulo.
+    asegurar_runtime_importable()
+    graficos = importlib.import_module("castella_runtime.graficos")
+
+    directorio = tempfile.mkdtemp(prefix="castella-bench-en-vivo-")
+    cuadros = os.path.join(directorio, "cuadros")
+    metricas = {}
+    try:
+        graficos.configurar("archivo", directorio=directorio)
+        variantes = (
+            ("sin", generar_programa(pasos, False), None),
+            ("en_vivo", generar_programa(pasos, True), None),
+            ("cuadros", generar_programa(pasos, True), os.path.join(cuadros, "cuadro_{:05d}.png")),
+        )
+        for variante, programa, archivo in variantes:
+            nombre = f"en_vivo.{variante}"
+            metricas[nombre] = medir(lambda: ejecutar(programa, {"archivo": archivo}), repeticiones=repeticiones)
+            print(f"    {variante}: {metricas[nombre]['valor']:.3f} s")
+        # Los cuadros de cada repetición sobrescriben los de la anterior.
+        metricas["en_vivo.cuadros.cuadros"] = metrica(len(os.listdir(cuadros)), "cuadros")
+    finally:
+        graficos.configurar()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    base = metricas["en_vivo.sin"]["valor"]
+    for variante in ("en_vivo", "cuadros"):
+        valor = metricas[f"en_vivo.{variante}"]["valor"]
+        if base and valor > 0:
+            metricas[f"en_vivo.{variante}.relativo"] = metrica(valor / base * 100, "%")
+
+    guardar_resultados(metricas, args.salida, suite="en_vivo")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
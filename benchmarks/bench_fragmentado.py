@@ -0,0 +1,74 @@
+# benchmarks/bench_fragmentado.py
+
+"""
+Benchmark de la traducción fragmentada en paralelo (`castella_fragmentos`).
+
+Traduce un programa sintético muy grande (100.000 líneas por defecto) sin fragmentar
+y repartido entre 1, 2, 4 y todos los procesos disponibles, y comprueba que el código
+generado es idéntico en todos los casos.
+
+  * `fragmentado.secuencial`: traducción completa con `castella_traductor`.
+  * `fragmentado.<n>procesos`: traducción fragmentada con `n` procesos
+    (incluye arrancar los procesos y construir un parser en cada uno).
+  * `fragmentado.<n>procesos.relativo`: tiempo respecto a la secuencial (%).
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_fragmentado --salida fragmentado.json
+"""
+
+import argparse
+import os
+import sys
+
+from .comun import guardar_resultados, medir, metrica
+from .corpus import generar_programa
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_fragmentos import traducir_fragmentado
+    from ..castella_traductor import traducir
+
+    parser = argparse.ArgumentParser(description="Benchmark de la traducción fragmentada en paralelo.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--lineas", type=int, default=100_000, help="Líneas aproximadas del programa.")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Programa más pequeño y una repetición (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 1 if args.rapido else args.repeticiones
+    lineas = 10_000 if args.rapido else args.lineas
+    programa = generar_programa(lineas)
+    # Fragmentos pequeños en modo rápido para que también se reparta el programa reducido.
+    lineas_minimas = 500 if args.rapido else 2000
+    metricas = {}
+
+    referencia = traducir(programa)
+    if not referencia.exito:
+        print("    El programa del corpus no se pudo traducir.")
+        return 1
+    metricas["fragmentado.secuencial"] = medir(lambda: traducir(programa), repeticiones=repeticiones)
+    base = metricas["fragmentado.secuencial"]["valor"]
+    print(f"    secuencial: {base:.2f} s")
+
+    procesos_cpu = os.cpu_count() or 1
+    for procesos in sorted({1, 2, 4, procesos_cpu}):
+        def fragmentado():
+            return traducir_fragmentado(programa, procesos, lineas_minimas=lineas_minimas)
+
+        if fragmentado().codigo_python != referencia.codigo_python:
+            raise RuntimeError(f"Con {procesos} proceso(s) el código generado difiere de la traducción completa.")
+        resultado = medir(fragmentado, repeticiones=repeticiones)
+        metricas[f"fragmentado.{procesos}procesos"] = resultado
+        if base and resultado["valor"] > 0:
+            metricas[f"fragmentado.{procesos}procesos.relativo"] = metrica(resultado["valor"] / base * 100, "%")
+        print(f"    {procesos} proceso(s): {resultado['valor']:.2f} s ({base / resultado['valor']:.2f}x)")
+
+    guardar_resultados(metricas, args.salida, suite="fragmentado")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# benchmarks/bench_graficar.py
+
+"""
+Benchmark del tiempo de dibujo de `graficar` con series grandes.
+
+Ejecuta con `castella_embebido` un programa que grafica una señal ruidosa de `n`
+puntos en modo `archivo` (PNG con el backend Agg, sin ventana) y compara:
+
+  * `completo`: sin reducir la serie (`--graficar-puntos=0`).
+  * `minmax`, `lttb`: reducida a PUNTOS_POR_DEFECTO puntos con cada método.
+
+Métricas (por tamaño de serie y variante):
+  * `graficar.<n>.<variante>`: tiempo de `graficar` (reducción, dibujo y escritura del PNG).
+  * `graficar.<n>.<variante>.relativo`: tiempo respecto a `completo` (%).
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_graficar --salida graficar.json
+"""
+
+import argparse
+import importlib
+import shutil
+import sys
+import tempfile
+
+from .comun import guardar_resultados, medir, metrica
+
+TAMANOS = (100_000, 1_000_000, 10_000_000)
+TAMANOS_RAPIDO = (100_000, 1_000_000)
+
+PROGRAMA = "graficar(x, y);\n"
+
+
+def _serie(n: int):
+    """
+    Señal de `n` puntos: una senoide con ruido y algunos picos aislados.
+    """
+    import numpy as np
+    generador = np.random.default_rng(0)
+    x = np.linspace(0.0, 100.0, n)
+    y = np.sin(x) + generador.normal(0.0, 0.1, n)
+    y[generador.integers(0, n, 10)] += 5.0
+    return x, y
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_embebido import ejecutar
+    from ..castella_ejecucion import asegurar_runtime_importable
+
+    parser = argparse.ArgumentParser(description="Benchmark del tiempo de dibujo de graficar.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--tamanos", type=int, nargs="+", help=f"Puntos de cada serie (por defecto {TAMANOS}).")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Series más pequeñas y una repetición (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 1 if args.rapido else args.repeticiones
+    tamanos = args.tamanos or (TAMANOS_RAPIDO if args.rapido else TAMANOS)
+    # El código generado importa `castella_runtime` como paquete de nivel superior: hay que
+    # configurar ese mismo módulo.
+    asegurar_runtime_importable()
+    graficos = importlib.import_module("castella_runtime.graficos")
+
+    directorio = tempfile.mkdtemp(prefix="castella-bench-graficar-")
+    metricas = {}
+    try:
+        for n in tamanos:
+            print(f"--- {n} puntos ---")
+            x, y = _serie(n)
+            for variante, configuracion in (("completo", {"puntos": 0}), ("minmax", {"metodo": "minmax"}),
+                                            ("lttb", {"metodo": "lttb"})):
+                graficos.configurar("archivo", directorio=directorio, **configuracion)
+                nombre = f"graficar.{n}.{variante}"
+                metricas[nombre] = medir(lambda: ejecutar(PROGRAMA, {"x": x, "y": y}), repeticiones=repeticiones)
+                print(f"    {variante}: {metricas[nombre]['valor']:.3f} s")
+            base = metricas[f"graficar.{n}.completo"]["valor"]
+            for variante in ("minmax", "lttb"):
+                valor = metricas[f"graficar.{n}.{variante}"]["valor"]
+                if base and valor > 0:
+                    metricas[f"graficar.{n}.{variante}.relativo"] = metrica(valor / base * 100, "%")
+    finally:
+        graficos.configurar()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    guardar_resultados(metricas, args.salida, suite="graficar")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# benchmarks/bench_imprimir.py
+
+"""
+Benchmark del rendimiento de `imprimir` con la salida en búfer (`--imprimir`).
+
+Traduce un programa Castella que imprime muchas líneas de varios valores y lo
+ejecuta en un proceso nuevo con la salida estándar conectada a una tubería:
+
+  * `print`: traducción normal (`print` con el búfer de Python).
+  * `print_sin_bufer`: traducción normal con `python -u`, que escribe cada línea en
+    cuanto se imprime (como en un terminal).
+  * `linea`, `bloque`, `tiempo`: con `--imprimir=<modo>` (ver castella_salida).
+
+Métricas (por variante):
+  * `imprimir.<variante>`: tiempo de ejecución del programa.
+  * `imprimir.<variante>.lineas_por_segundo`: líneas impresas por segundo.
+  * `imprimir.<variante>.relativo`: tiempo respecto a `print` (%).
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_imprimir --salida imprimir.json
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from .comun import guardar_resultados, medir, metrica, silenciar_salida
+
+# Variante -> (modo de --imprimir o None, argumentos extra del intérprete).
+VARIANTES = {
+    "print": (None, []),
+    "print_sin_bufer": (None, ["-u"]),
+    "linea": ("linea", []),
+    "bloque": ("bloque", []),
+    "tiempo": ("tiempo", []),
+}
+
+
+def generar_programa(lineas: int) -> str:
+    """
+    Programa Castella que imprime `lineas` líneas de cuatro valores.
+    """
+    return (
+        f"para i en range({lineas}) {{\n"
+        "    imprimir(i, i * 0.5, \"fila\", i % 7);\n"
+        "}\n"
+    )
+
+
+def _ejecutar(ruta: str, argumentos: list) -> str:
+    """
+    Ejecuta el programa en un proceso nuevo y devuelve lo que imprime.
+
+    Raises:
+        RuntimeError: Si el programa falla.
+    """
+    proceso = subprocess.run([sys.executable, *argumentos, ruta], capture_output=True, text=True)
+    if proceso.returncode != 0:
+        raise RuntimeError(f"El programa '{ruta}' falló:\n{proceso.stderr}")
+    return proceso.stdout
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_parser import traducir_a_python
+    from ..castella_salida import configuracion_salida, instrumentar_salida
+
+    parser = argparse.ArgumentParser(description="Benchmark de imprimir con la salida en búfer.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--lineas", type=int, default=1_000_000, help="Líneas impresas por el programa.")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Menos líneas y una repetición (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 1 if args.rapido else args.repeticiones
+    lineas = 50_000 if args.rapido else args.lineas
+    with silenciar_salida():
+        codigo = traducir_a_python(generar_programa(lineas))
+
+    directorio = tempfile.mkdtemp(prefix="castella-bench-imprimir-")
+    metricas = {}
+    try:
+        # El paquete castella_runtime tiene que poder importarse desde el programa.
+        shutil.copytree(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "castella_runtime"),
+                        os.path.join(directorio, "castella_runtime"))
+        salidas = {}
+        for variante, (modo, argumentos) in VARIANTES.items():
+            ruta = os.path.join(directorio, f"{variante}.py")
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                archivo.write(codigo if modo is None else instrumentar_salida(codigo, configuracion_salida(modo)))
+            salidas[variante] = _ejecutar(ruta, argumentos)
+            metricas[f"imprimir.{variante}"] = medir(lambda: _ejecutar(ruta, argumentos), repeticiones=repeticiones)
+            tiempo = metricas[f"imprimir.{variante}"]["valor"]
+            if tiempo > 0:
+                metricas[f"imprimir.{variante}.lineas_por_segundo"] = metrica(lineas / tiempo, "lineas/s")
+            print(f"    {variante}: {tiempo:.3f} s")
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    if len(set(salidas.values())) != 1:
+        raise RuntimeError("Las variantes imprimen resultados distintos.")
+
+    base = metricas["imprimir.print"]["valor"]
+    for variante in VARIANTES:
+        valor = metricas[f"imprimir.{variante}"]["valor"]
+        if variante != "print" and base and valor > 0:
+            metricas[f"imprimir.{variante}.relativo"] = metrica(valor / base * 100, "%")
+
+    guardar_resultados(metricas, args.salida, suite="imprimir")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# benchmarks/bench_literales.py
+
+"""
+Benchmark de los literales grandes en archivos de datos (`--literales-externos`).
+
+Genera un programa Castella con tablas grandes escritas como literales (una lista de
+números, un diccionario y un `np.array([...])`) y lo traduce de dos formas:
+
+  * `inline`: los literales se quedan en el código generado.
+  * `externos`: los literales se guardan en archivos de datos (`castella_literales`).
+
+Métricas (por variante):
+  * `literales.traduccion.<variante>`: traducción (más la externalización en `externos`).
+  * `literales.pyc.<variante>`: tamaño del bytecode compilado del programa (KiB).
+  * `literales.arranque_fuente.<variante>`: ejecutar el `.py` en un proceso nuevo
+    (incluye compilarlo, como al ejecutar una traducción con `--traducir`).
+  * `literales.arranque_pyc.<variante>`: ejecutar el `.pyc` ya compilado en un proceso
+    nuevo (como dentro de un binario).
+  * `literales.memoria.<variante>`: pico de memoria residente del proceso (MiB; sólo
+    en sistemas con el módulo `resource`).
+  * `literales.<medida>.externos.relativo`: variante `externos` respecto a `inline` (%).
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_literales --salida literales.json
+"""
+
+import argparse
+import os
+import py_compile
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from .comun import guardar_resultados, medir, metrica, silenciar_salida
+
+# Ejecuta un programa (.py o .pyc) e imprime al final el pico de memoria residente (KiB en Linux).
+_LANZADOR = (
+    "import runpy, sys\n"
+    "runpy.run_path(sys.argv[1], run_name='__main__')\n"
+    "try:\n"
+    "    import resource\n"
+    "    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+    "except ImportError:\n"
+    "    print(0)\n"
+)
+
+
+def generar_programa(elementos: int) -> str:
+    """
+    Programa Castella con tres tablas de `elementos` valores escritas como literales.
+    """
+    numeros = ",\n    ".join(f"{i * 0.37:.6f}" for i in range(elementos))
+    claves = ",\n    ".join(f'"clave_{i}": [{i}, "valor_{i}"]' for i in range(elementos))
+    enteros = ", ".join(str(i % 997) for i in range(elementos))
+    return (
+        f"let tabla = [\n    {numeros}\n];\n"
+        f"let indice = {{\n    {claves}\n}};\n"
+        f"let pesos : Matriz = np.array([{enteros}]);\n"
+        "imprimir(len(tabla) + len(indice) + int(pesos.sum()));\n"
+    )
+
+
+def _ejecutar(ruta: str) -> tuple:
+    """
+    Ejecuta el programa en un proceso nuevo: `(salida_del_programa, pico_rss_en_bytes)`.
+
+    Raises:
+        RuntimeError: Si el programa falla.
+    """
+    proceso = subprocess.run([sys.executable, "-c", _LANZADOR, ruta], capture_output=True, text=True)
+    if proceso.returncode != 0:
+        raise RuntimeError(f"El programa '{ruta}' falló:\n{proceso.stderr}")
+    lineas = proceso.stdout.strip().splitlines()
+    return "\n".join(lineas[:-1]), int(lineas[-1]) * 1024
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_literales import externalizar_literales
+    from ..castella_parser import traducir_a_python
+
+    parser = argparse.ArgumentParser(description="Benchmark de los literales en archivos de datos.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--elementos", type=int, default=100_000, help="Valores de cada tabla.")
+    parser.add_argument("--umbral", type=int, default=64, help="Umbral de --literales-externos (KiB).")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Tablas más pequeñas y una repetición (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 1 if args.rapido else args.repeticiones
+    programa = generar_programa(10_000 if args.rapido else args.elementos)
+    directorio = tempfile.mkdtemp(prefix="castella-bench-literales-")
+    metricas = {}
+
+    def traducir():
+        with silenciar_salida():
+            return traducir_a_python(programa)
+
+    def traducir_externos():
+        return externalizar_literales(traducir(), os.path.join(directorio, "externos", "programa.datos"),
+                                      args.umbral * 1024)
+
+    try:
+        salidas = {}
+        for variante, traduccion in (("inline", traducir), ("externos", traducir_externos)):
+            print(f"--- {variante} ---")
+            metricas[f"literales.traduccion.{variante}"] = medir(traduccion, repeticiones=repeticiones)
+            codigo = traduccion()
+            if variante == "externos":
+                codigo, archivos = codigo
+                print(f"    {len(archivos)} literales externalizados")
+            carpeta = os.path.join(directorio, variante)
+            os.makedirs(carpeta, exist_ok=True)
+            fuente = os.path.join(carpeta, "programa.py")
+            with open(fuente, "w", encoding="utf-8") as archivo:
+                archivo.write(codigo)
+            # El paquete castella_runtime tiene que poder importarse desde el programa.
+            shutil.copytree(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "castella_runtime"),
+                            os.path.join(carpeta, "castella_runtime"), dirs_exist_ok=True)
+            bytecode = py_compile.compile(fuente, cfile=os.path.join(carpeta, "programa.pyc"), doraise=True)
+            metricas[f"literales.pyc.{variante}"] = metrica(os.path.getsize(bytecode) / 1024, "KiB")
+
+            salidas[variante], pico = _ejecutar(bytecode)
+            metricas[f"literales.arranque_fuente.{variante}"] = medir(lambda: _ejecutar(fuente), repeticiones=repeticiones)
+            metricas[f"literales.arranque_pyc.{variante}"] = medir(lambda: _ejecutar(bytecode), repeticiones=repeticiones)
+            if pico:
+                metricas[f"literales.memoria.{variante}"] = metrica(pico / 2**20, "MiB")
+            for medida in ("traduccion", "pyc", "arranque_fuente", "arranque_pyc", "memoria"):
+                if f"literales.{medida}.{variante}" in metricas:
+                    print(f"    {medida}: {metricas[f'literales.{medida}.{variante}']['valor']:.3f}")
+        if salidas["inline"] != salidas["externos"]:
+            raise RuntimeError(f"Las variantes dan resultados distintos: {salidas}")
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    for medida in ("traduccion", "pyc", "arranque_fuente", "arranque_pyc", "memoria"):
+        if f"literales.{medida}.inline" not in metricas or f"literales.{medida}.externos" not in metricas:
+            continue
+        base, valor = metricas[f"literales.{medida}.inline"]["valor"], metricas[f"literales.{medida}.externos"]["valor"]
+        if base and valor > 0:
+            metricas[f"literales.{medida}.externos.relativo"] = metrica(valor / base * 100, "%")
+
+    guardar_resultados(metricas, args.salida, suite="literales")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# benchmarks/bench_memorizar.py
+
+"""
+Benchmark del decorador `@memorizar` de castella_runtime.
+
+Ejecuta con `castella_embebido` dos cargas Castella con y sin `@memorizar`:
+
+  * `recursiva`: Fibonacci recursivo (los subproblemas se repiten exponencialmente).
+  * `matriz`: una función costosa sobre un arreglo `Matriz`, llamada repetidamente
+    con copias del mismo contenido (la clave se calcula con un hash del contenido).
+  * `memmap`: la misma función sobre un arreglo cargado con `np.load(..., mmap_mode="r")`,
+    como los literales de `--literales-externos`.
+
+Con `@memorizar`, ninguna llamada puede quedar sin caché por su argumento (`no_cacheables`).
+
+Métricas:
+  * `memorizar.<carga>.<variante>`: tiempo de la carga (`sin` o `con` memorización).
+  * `memorizar.<carga>.con.relativo`: tiempo con memorización respecto a sin ella (%).
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_memorizar --salida memorizar.json
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+from .comun import guardar_resultados, medir, metrica
+
+# Función memorizada de cada carga.
+FUNCIONES = {"recursiva": "fib", "matriz": "espectro", "memmap": "espectro"}
+
+
+def _programas(n_fibonacci: int, llamadas: int) -> dict:
+    """
+    Programas Castella de cada carga: {carga: código con `DECORADOR` en lugar del decorador}.
+    """
+    recursiva = (
+        "DECORADOR\n"
+        "funcion fib(n: int) -> int {\n"
+        "    si (n < 2) { retornar n; }\n"
+        "    retornar fib(n - 1) + fib(n - 2);\n"
+        "}\n"
+        f"let resultado = fib({n_fibonacci});\n"
+    )
+    matriz = (
+        "DECORADOR\n"
+        "funcion espectro(senal: Matriz) -> float {\n"
+        "    retornar float(np.abs(np.fft.fft(senal)).max());\n"
+        "}\n"
+        "let base : Matriz = np.sin(np.arange(65536) * 0.01);\n"
+        "let resultado = 0.0;\n"
+        f"para i en range({llamadas}) {{ resultado = espectro(base.copy()); }}\n"
+    )
+    # `ruta` la define quien ejecuta el programa.
+    memmap = (
+        "DECORADOR\n"
+        "funcion espectro(senal: Matriz) -> float {\n"
+        "    retornar float(np.abs(np.fft.fft(senal)).max());\n"
+        "}\n"
+        "let base : Matriz = np.load(ruta, mmap_mode=\"r\");\n"
+        "let resultado = 0.0;\n"
+        f"para i en range({llamadas}) {{ resultado = espectro(base); }}\n"
+    )
+    return {"recursiva": recursiva, "matriz": matriz, "memmap": memmap}
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_embebido import ejecutar
+
+    parser = argparse.ArgumentParser(description="Benchmark del decorador @memorizar.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--fibonacci", type=int, default=24, help="Argumento de Fibonacci (carga recursiva).")
+    parser.add_argument("--llamadas", type=int, default=200, help="Llamadas repetidas (carga matriz).")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Cargas más pequeñas y una repetición (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 1 if args.rapido else args.repeticiones
+    programas = _programas(18 if args.rapido else args.fibonacci, 20 if args.rapido else args.llamadas)
+    metricas = {}
+
+    import numpy as np
+    directorio = tempfile.mkdtemp(prefix="castella-bench-memorizar-")
+    entorno = {"ruta": os.path.join(directorio, "base.npy")}
+    np.save(entorno["ruta"], np.sin(np.arange(65536) * 0.01))
+    try:
+        for carga, plantilla in programas.items():
+            print(f"--- {carga} ---")
+            resultados = {}
+            for variante, decorador in (("sin", ""), ("con", "@memorizar(max=256)")):
+                codigo = plantilla.replace("DECORADOR", decorador)
+                espacio = ejecutar(codigo, dict(entorno))
+                resultados[variante] = espacio["resultado"]
+                if decorador and espacio[FUNCIONES[carga]].estadisticas()["no_cacheables"]:
+                    raise RuntimeError(f"La carga `{carga}` tiene llamadas que @memorizar no pudo cachear.")
+                metricas[f"memorizar.{carga}.{variante}"] = medir(lambda: ejecutar(codigo, dict(entorno)),
+                                                                  repeticiones=repeticiones)
+                print(f"    {variante}: {metricas[f'memorizar.{carga}.{variante}']['valor']:.4f} s")
+            if resultados["sin"] != resultados["con"]:
+                raise RuntimeError(f"La carga `{carga}` da resultados distintos con y sin @memorizar.")
+            base, tiempo = metricas[f"memorizar.{carga}.sin"]["valor"], metricas[f"memorizar.{carga}.con"]["valor"]
+            if base and tiempo > 0:
+                metricas[f"memorizar.{carga}.con.relativo"] = metrica(tiempo / base * 100, "%")
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    guardar_resultados(metricas, args.salida, suite="memorizar")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+# benchmarks/bench_optimizador.py
+
+"""
+Verificación diferencial y benchmark de tiempo de ejecución de los niveles -O.
+
+  * `verificar`: traduce cada programa con -O0 y con los niveles optimizados,
+    ejecuta cada versión en un proceso aparte y comprueba que la salida estándar,
+    el código de salida y el tipo de la excepción final (si la hay) coinciden.
+    Termina con código 1 si alguna versión optimizada se comporta distinto.
+  * `ejecutar`: mide el tiempo de ejecución del Python generado con cada nivel
+    (compilado una sola vez; sólo se mide `exec`) y guarda los resultados en el
+    formato de `comun.py`, comparable con `castella_bench comparar`.
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_optimizador verificar
+    python -m CastellaScript.benchmarks.bench_optimizador ejecutar --salida optimizador.json
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+from .comun import guardar_resultados, medir, metrica, silenciar_salida
+from .corpus import CONSTRUCCIONES, cargar_programas_reales, fragmento
+
+# Raíz del paquete: el código generado importa `castella_runtime` desde aquí.
+DIRECTORIO_PAQUETE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Segundos máximos por ejecución en la verificación diferencial.
+TIEMPO_MAXIMO = 60
+
+# Programas con oportunidades para cada pasada: constantes en bucles calientes,
+# código tras `retornar`/`romper`, ramas con condiciones literales y bucles
+# elemento a elemento sobre arreglos `Matriz` (vectorizados con -O2).
+PROGRAMAS_OPTIMIZABLES: Dict[str, str] = {
+    "constantes_en_bucle": (
+        "let total = 0.0;\n"
+        "para i en range(200000) {\n"
+        "    total += i * (3.14159265 / 180.0) + (2 ** 10 - 1) % 7 - (1 << 4);\n"
+        "}\n"
+        "imprimir(total);\n"
+    ),
+    "ramas_literales": (
+        "let cuenta = 0;\n"
+        "para i en range(200000) {\n"
+        "    si (falso) { imprimir(\"nunca\", i); }\n"
+        "    sino si (1 + 1 == 3) { cuenta -= 1; }\n"
+        "    sino { cuenta += 1; }\n"
+        "    si (verdadero) { cuenta += 2; }\n"
+        "    mientras (0) { cuenta = 0; }\n"
+        "}\n"
+        "imprimir(cuenta);\n"
+        "funcion rama_local() {\n"
+        "    si (falso) { cuenta = 0; }\n"
+        "    retornar cuenta;\n"
+        "}\n"
+        "rama_local();\n"
+    ),
+    "codigo_inalcanzable": (
+        "funcion signo(x) {\n"
+        "    si (x < 0) { retornar -1; } sino { retornar 1; }\n"
+        "    imprimir(\"inalcanzable\");\n"
+        "}\n"
+        "funcion local_tras_retornar() {\n"
+        "    retornar valor;\n"
+        "    let valor = 1;\n"
+        "}\n"
+        "let suma = 0;\n"
+        "para i en range(200000) {\n"
+        "    suma += signo(i - 100000);\n"
+        "    continuar;\n"
+        "    suma += 1000;\n"
+        "}\n"
+        "imprimir(suma);\n"
+        "local_tras_retornar();\n"
+    ),
+    "plegado_numerico": (
+        "let a = 2 ** 3 ** 2;\n"
+        "let b = -7 // 2 + -7 % 3;\n"
+        "let c = 3 + 4j;\n"
+        "let d = (3 + 4j) * 2 - 1.5;\n"
+        "let e = ~5 ^ 3 & 6 | 1 << 3 >> 1;\n"
+        "imprimir(a, b, c, d, e);\n"
+        "let f = 1 / 0;\n"
+    ),
+    "vectorizable": (
+        "importar numpy;\n"
+        "let n = 200000;\n"
+        "let a : Matriz = numpy.arange(n) * 0.5;\n"
+        "let b : Matriz = numpy.linspace(0.0, 1.0, n);\n"
+        "let c : Matriz = numpy.zeros(n);\n"
+        "let previo : Matriz = numpy.zeros(n);\n"
+        "para i en range(n) { c[i] = a[i] * b[i] + 2.0; c[i] += abs(a[i] - b[i]) * i; }\n"
+        "para i en range(1, n) { previo[i] = previo[i - 1] + a[i]; }\n"
+        "imprimir(c.sum(), previo[n - 1], i);\n"
+    ),
+    "vectorizable_enteros": (
+        "importar numpy;\n"
+        "let n = 200000;\n"
+        "let a : Matriz = numpy.arange(n) * 0.5;\n"
+        "let c : Matriz = numpy.zeros(n, dtype=int);\n"
+        "let d : Matriz = numpy.zeros(n);\n"
+        "para i en range(n) { d[i] = a[i] + 1.0; c[i] += a[i] * 3; c[i] //= 2; }\n"
+        "imprimir(c.dtype, c.sum(), d.sum());\n"
+    ),
+}
+
+
+def traducir(codigo_castella: str, nivel: int) -> str:
+    """
+    Traduce con el nivel de optimización indicado, descartando lo que imprime el traductor.
+    """
+    with silenciar_salida():
+        from ..castella_parser import traducir_a_python
+        return traducir_a_python(codigo_castella, nivel)
+
+
+def ejecutar_en_proceso(codigo_python: str) -> Dict[str, object]:
+    """
+    Ejecuta código Python en un proceso aparte y resume su comportamiento observable.
+
+    Returns:
+        Un diccionario con `salida` (stdout), `codigo` (código de salida) y `excepcion`
+        (tipo de la excepción final según stderr si el proceso falló, p. ej. "ZeroDivisionError").
+    """
+    entorno = dict(os.environ, PYTHONPATH=DIRECTORIO_PAQUETE + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    try:
+        proceso = subprocess.run([sys.executable, "-"], input=codigo_python, capture_output=True,
+                                 text=True, env=entorno, timeout=TIEMPO_MAXIMO)
+    except subprocess.TimeoutExpired:
+        return {"salida": None, "codigo": None, "excepcion": "tiempo agotado"}
+    excepcion = None
+    if proceso.returncode != 0:
+        lineas = proceso.stderr.strip().splitlines()
+        excepcion = lineas[-1].split(":", 1)[0] if lineas else ""
+    return {"salida": proceso.stdout, "codigo": proceso.returncode, "excepcion": excepcion}
+
+
+def verificar_equivalencia(codigo_castella: str, niveles=(1, 2)) -> List[str]:
+    """
+    Compara la ejecución de -O0 con la de cada nivel de `niveles`.
+
+    Returns:
+        Una lista de descripciones de las diferencias (vacía si todo coincide).
+    """
+    referencia = ejecutar_en_proceso(traducir(codigo_castella, 0))
+    diferencias = []
+    for nivel in niveles:
+        resultado = ejecutar_en_proceso(traducir(codigo_castella, nivel))
+        for campo in ("salida", "codigo", "excepcion"):
+            if resultado[campo] != referencia[campo]:
+                diferencias.append(f"-O{nivel}: '{campo}' difiere ({referencia[campo]!r} con -O0, {resultado[campo]!r} con -O{nivel})")
+    return diferencias
+
+
+def _programas_verificacion() -> Dict[str, str]:
+    programas = {f"optimizable.{nombre}": codigo for nombre, codigo in PROGRAMAS_OPTIMIZABLES.items()}
+    programas.update({f"construccion.{nombre}": fragmento(nombre, 0) for nombre in sorted(CONSTRUCCIONES)})
+    programas.update({f"real.{nombre}": codigo for nombre, codigo in cargar_programas_reales().items()})
+    return programas
+
+
+def verificar(args) -> int:
+    """
+    Ejecuta la verificación diferencial sobre los programas de referencia.
+    """
+    niveles = [int(n) for n in args.niveles.split(",")]
+    fallos = 0
+    for nombre, codigo in _programas_verificacion().items():
+        try:
+            diferencias = verificar_equivalencia(codigo, niveles)
+        except Exception as e:
+            diferencias = [f"la traducción falló: {type(e).__name__}: {e}"]
+        estado = "ok" if not diferencias else "DIFERENTE"
+        print(f"{nombre:<40} {estado}")
+        for diferencia in diferencias:
+            print(f"    {diferencia}")
+        fallos += bool(diferencias)
+    print(f"\n{fallos} programa(s) con comportamiento distinto entre niveles.")
+    return 1 if fallos else 0
+
+
+def medir_ejecucion(codigo_python: str, repeticiones: int) -> dict:
+    """
+    Mide `exec` del código ya compilado, con la salida silenciada.
+    """
+    if DIRECTORIO_PAQUETE not in sys.path:
+        sys.path.insert(0, DIRECTORIO_PAQUETE)
+    codigo_objeto = compile(codigo_python, "<castella:benchmark>", "exec")
+
+    def ejecutar_una_vez():
+        with silenciar_salida():
+            try:
+                exec(codigo_objeto, {"__name__": "__main__"})
+            except Exception:
+                pass # Los programas que terminan en excepción se miden igual en todos los niveles.
+
+    return medir(ejecutar_una_vez, repeticiones=repeticiones)
+
+
+def ejecutar(args) -> int:
+    """
+    Mide el tiempo de ejecución de cada programa optimizable con cada nivel.
+    """
+    niveles = [int(n) for n in args.niveles.split(",")]
+    repeticiones = 3 if args.rapido else args.repeticiones
+    metricas = {}
+    for nombre, codigo in PROGRAMAS_OPTIMIZABLES.items():
+        print(f"--- {nombre} ---")
+        tiempos = {}
+        for nivel in niveles:
+            codigo_python = traducir(codigo, nivel)
+            resultado = medir_ejecucion(codigo_python, repeticiones)
+            resultado["lineas_python"] = codigo_python.count("\n") + 1
+            metricas[f"optimizador.{nombre}.O{nivel}"] = resultado
+            tiempos[nivel] = resultado["valor"]
+        base = tiempos.get(0)
+        for nivel, tiempo in tiempos.items():
+            if nivel and base and tiempo > 0:
+                print(f"    -O{nivel}: {base / tiempo:.2f}x respecto a -O0")
+                metricas[f"optimizador.{nombre}.O{nivel}.relativo"] = metrica(tiempo / base * 100, "%")
+
+    guardar_resultados(metricas, args.salida, suite="optimizador")
+    return 0
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    parser = argparse.ArgumentParser(description="Verificación y benchmark de los niveles de optimización.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_verificar = subcomandos.add_parser("verificar", help="Comprueba que -O1/-O2 se comportan igual que -O0.")
+    p_verificar.add_argument("--niveles", default="1,2", help="Niveles a comparar con -O0 (separados por comas).")
+    p_verificar.set_defaults(funcion=verificar)
+
+    p_ejecutar = subcomandos.add_parser("ejecutar", help="Mide el tiempo de ejecución por nivel.")
+    p_ejecutar.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    p_ejecutar.add_argument("--niveles", default="0,1,2", help="Niveles a medir (separados por comas).")
+    p_ejecutar.add_argument("--repeticiones", type=int, default=7, help="Repeticiones por medición.")
+    p_ejecutar.add_argument("--rapido", action="store_true", help="Menos repeticiones (para CI).")
+    p_ejecutar.set_defaults(funcion=ejecutar)
+
+    args = parser.parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+# benchmarks/bench_paralelo.py
+
+"""
+Benchmark de los bucles `paralelo para` frente al `para` secuencial.
+
+Ejecuta (con `castella_embebido`, ya compilado) dos cargas Castella:
+
+  * `cpu`: cada iteración calcula una suma de Python puro; se compara `para` con
+    `paralelo para` en procesos, con resultados en orden y con una reducción.
+  * `es`: cada iteración espera un tiempo fijo (simula E/S); se compara `para` con
+    `paralelo("hilos")`.
+
+Métricas:
+  * `paralelo.<carga>.secuencial`, `paralelo.<carga>.<variante>`: tiempo de la carga.
+  * `paralelo.<carga>.<variante>.relativo`: tiempo respecto al secuencial (%).
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_paralelo --salida paralelo.json
+"""
+
+import argparse
+import sys
+
+from .comun import guardar_resultados, medir, metrica
+
+
+def _programas(elementos: int, trabajo: int, espera: float) -> dict:
+    """
+    Programas Castella de cada carga y variante: {carga: {variante: código}}.
+    """
+    cuerpo_cpu = (
+        f"    let total = 0;\n"
+        f"    para i en range({trabajo}) {{ total += (i * x) % 7; }}\n"
+        f"    retornar total;\n"
+    )
+    cuerpo_es = f"    time.sleep({espera});\n    retornar x;\n"
+    return {
+        "cpu": {
+            "secuencial": (
+                "let resultados = [];\n"
+                f"para x en range({elementos}) {{\n"
+                "    let total = 0;\n"
+                f"    para i en range({trabajo}) {{ total += (i * x) % 7; }}\n"
+                "    resultados.append(total);\n"
+                "}\n"
+            ),
+            "procesos": f"paralelo para x en range({elementos}) -> resultados {{\n{cuerpo_cpu}}}\n",
+            "reduccion": f"paralelo(reducir=\"suma\") para x en range({elementos}) -> resultados {{\n{cuerpo_cpu}}}\n",
+        },
+        "es": {
+            "secuencial": (
+                "importar time;\n"
+                "let resultados = [];\n"
+                f"para x en range({elementos}) {{ time.sleep({espera}); resultados.append(x); }}\n"
+            ),
+            "hilos": f"importar time;\nparalelo(\"hilos\", 16) para x en range({elementos}) -> resultados {{\n{cuerpo_es}}}\n",
+        },
+    }
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_embebido import ejecutar
+
+    parser = argparse.ArgumentParser(description="Benchmark de `paralelo para` frente al bucle secuencial.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--elementos", type=int, default=64, help="Iteraciones del bucle.")
+    parser.add_argument("--trabajo", type=int, default=200_000, help="Operaciones por iteración (carga cpu).")
+    parser.add_argument("--espera", type=float, default=0.02, help="Segundos de espera por iteración (carga es).")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Menos trabajo y una repetición (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 1 if args.rapido else args.repeticiones
+    trabajo = 20_000 if args.rapido else args.trabajo
+    programas = _programas(args.elementos, trabajo, args.espera)
+    metricas = {}
+
+    for carga, variantes in programas.items():
+        print(f"--- {carga} ---")
+        referencia = ejecutar(variantes["secuencial"])["resultados"]
+        base = None
+        for variante, codigo in variantes.items():
+            resultado = ejecutar(codigo)["resultados"]
+            esperado = sum(referencia) if variante == "reduccion" else referencia
+            if resultado != esperado:
+                raise RuntimeError(f"`{variante}` ({carga}) no da el mismo resultado que el bucle secuencial.")
+            tiempo = medir(lambda: ejecutar(codigo), repeticiones=repeticiones)
+            metricas[f"paralelo.{carga}.{variante}"] = tiempo
+            if variante == "secuencial":
+                base = tiempo["valor"]
+            elif base and tiempo["valor"] > 0:
+                metricas[f"paralelo.{carga}.{variante}.relativo"] = metrica(tiempo["valor"] / base * 100, "%")
+            print(f"    {variante}: {tiempo['valor']:.3f} s")
+
+    guardar_resultados(metricas, args.salida, suite="paralelo")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
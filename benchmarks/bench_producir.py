@@ -0,0 +1,112 @@
+# benchmarks/bench_producir.py
+
+"""
+Benchmark de funciones generadoras (`producir`) frente a funciones que devuelven listas.
+
+Ejecuta con `castella_embebido` una tubería de simulación en dos versiones:
+
+  * `lista`: cada etapa construye y devuelve la lista completa de valores.
+  * `producir`: cada etapa es una función generadora (`producir` / `producir desde`),
+    así que sólo hay un valor en vuelo por etapa.
+
+Métricas:
+  * `producir.<variante>.tiempo`: tiempo de ejecutar la tubería.
+  * `producir.<variante>.memoria_pico`: pico de memoria asignada durante la ejecución
+    (tracemalloc).
+  * `producir.producir.<medida>.relativo`: versión generadora respecto a la de listas (%).
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_producir --salida producir.json
+"""
+
+import argparse
+import sys
+import tracemalloc
+
+from .comun import guardar_resultados, medir, metrica
+
+
+def _programas(pasos: int) -> dict:
+    """
+    Programas Castella de cada variante; ambos dejan la suma final en `total`.
+    """
+    lista = (
+        "funcion simular(n) {\n"
+        "    let estados = [];\n"
+        "    let x = 0.5;\n"
+        "    para i en range(n) { x = 3.7 * x * (1.0 - x); estados.append(x); }\n"
+        "    retornar estados;\n"
+        "}\n"
+        "funcion escalar(valores, factor) {\n"
+        "    let resultado = [];\n"
+        "    para v en valores { resultado.append(v * factor); }\n"
+        "    retornar resultado;\n"
+        "}\n"
+        f"let total = sum(escalar(simular({pasos}), 2.0));\n"
+    )
+    generadora = (
+        "funcion simular(n) {\n"
+        "    let x = 0.5;\n"
+        "    para i en range(n) { x = 3.7 * x * (1.0 - x); producir x; }\n"
+        "}\n"
+        "funcion escalar(valores, factor) {\n"
+        "    para v en valores { producir v * factor; }\n"
+        "}\n"
+        "funcion tuberia(n) {\n"
+        "    producir desde escalar(simular(n), 2.0);\n"
+        "}\n"
+        f"let total = sum(tuberia({pasos}));\n"
+    )
+    return {"lista": lista, "producir": generadora}
+
+
+def _memoria_pico(funcion) -> int:
+    """
+    Bytes máximos asignados mientras se ejecuta `funcion` (medidos con tracemalloc).
+    """
+    tracemalloc.start()
+    try:
+        funcion()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_embebido import ejecutar
+
+    parser = argparse.ArgumentParser(description="Benchmark de funciones generadoras frente a listas.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--pasos", type=int, default=2_000_000, help="Valores que produce la simulación.")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Simulación más corta y una repetición (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 1 if args.rapido else args.repeticiones
+    pasos = 100_000 if args.rapido else args.pasos
+    metricas = {}
+
+    totales = {}
+    for variante, codigo in _programas(pasos).items():
+        totales[variante] = ejecutar(codigo)["total"]
+        metricas[f"producir.{variante}.tiempo"] = medir(lambda: ejecutar(codigo), repeticiones=repeticiones)
+        metricas[f"producir.{variante}.memoria_pico"] = metrica(_memoria_pico(lambda: ejecutar(codigo)) / 2**20, "MiB")
+        print(f"    {variante}: {metricas[f'producir.{variante}.tiempo']['valor']:.3f} s, "
+              f"pico {metricas[f'producir.{variante}.memoria_pico']['valor']:.1f} MiB")
+    if totales["lista"] != totales["producir"]:
+        raise RuntimeError("La tubería generadora no da el mismo resultado que la de listas.")
+
+    for medida in ("tiempo", "memoria_pico"):
+        base, valor = metricas[f"producir.lista.{medida}"]["valor"], metricas[f"producir.producir.{medida}"]["valor"]
+        if base and valor > 0:
+            metricas[f"producir.producir.{medida}.relativo"] = metrica(valor / base * 100, "%")
+
+    guardar_resultados(metricas, args.salida, suite="producir")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
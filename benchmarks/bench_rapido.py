@@ -0,0 +1,249 @@
+# benchmarks/bench_rapido.py
+
+"""
+Benchmark de la compilación con Numba (`--rapido` / `@rapido`) sobre núcleos de simulación.
+
+Cada núcleo es un programa Castella cuya función principal tiene todos sus
+parámetros anotados con tipos numéricos, así que `--rapido` la compila con Numba.
+El programa se traduce con y sin `rapido`, se escribe en un directorio temporal y
+se ejecuta en un proceso aparte (el tiempo incluye arrancar Python e importar NumPy):
+
+  * `python`: traducción sin `rapido` (referencia).
+  * `numba_frio`: con `rapido` y la caché de Numba vacía (incluye compilar).
+  * `numba_cache`: con `rapido` y la caché de disco ya poblada por una ejecución previa.
+
+Antes de medir se comprueba que las tres variantes imprimen lo mismo.
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_rapido --salida rapido.json
+"""
+
+import argparse
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Dict
+
+from .comun import guardar_resultados, medir, metrica, silenciar_salida
+
+# Raíz del paquete: el código generado importa `castella_runtime` desde aquí.
+DIRECTORIO_PAQUETE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Segundos máximos por ejecución.
+TIEMPO_MAXIMO = 600
+
+NUCLEOS: Dict[str, str] = {
+    # Ecuación del calor en 1-D con diferencias finitas (plantilla de 3 puntos).
+    "difusion_calor": (
+        "importar numpy;\n"
+        "funcion difusion(u: Matriz, pasos: int, alfa: float) -> Matriz {\n"
+        "    let n : int = len(u);\n"
+        "    let siguiente : Matriz = u.copy();\n"
+        "    para paso en range(pasos) {\n"
+        "        para i en range(1, n - 1) {\n"
+        "            siguiente[i] = u[i] + alfa * (u[i - 1] - 2.0 * u[i] + u[i + 1]);\n"
+        "        }\n"
+        "        let temporal : Matriz = u;\n"
+        "        u = siguiente;\n"
+        "        siguiente = temporal;\n"
+        "    }\n"
+        "    retornar u;\n"
+        "}\n"
+        "let u : Matriz = numpy.zeros(4000);\n"
+        "u[2000] = 100.0;\n"
+        "imprimir(round(difusion(u, 2000, 0.25).sum(), 6));\n"
+    ),
+    # N cuerpos en 2-D con integración de Euler semi-implícita, O(n^2) por paso.
+    "n_cuerpos": (
+        "importar numpy;\n"
+        "funcion gravitacion(x: Matriz, y: Matriz, vx: Matriz, vy: Matriz, masa: Matriz, pasos: int, dt: float) -> float {\n"
+        "    let n : int = len(x);\n"
+        "    para paso en range(pasos) {\n"
+        "        para i en range(n) {\n"
+        "            let ax : float = 0.0;\n"
+        "            let ay : float = 0.0;\n"
+        "            para j en range(n) {\n"
+        "                si (i != j) {\n"
+        "                    let dx : float = x[j] - x[i];\n"
+        "                    let dy : float = y[j] - y[i];\n"
+        "                    let d2 : float = dx * dx + dy * dy + 0.01;\n"
+        "                    let f : float = masa[j] / (d2 * math.sqrt(d2));\n"
+        "                    ax += f * dx;\n"
+        "                    ay += f * dy;\n"
+        "                }\n"
+        "            }\n"
+        "            vx[i] += ax * dt;\n"
+        "            vy[i] += ay * dt;\n"
+        "        }\n"
+        "        para i en range(n) {\n"
+        "            x[i] += vx[i] * dt;\n"
+        "            y[i] += vy[i] * dt;\n"
+        "        }\n"
+        "    }\n"
+        "    let energia : float = 0.0;\n"
+        "    para i en range(n) { energia += 0.5 * masa[i] * (vx[i] * vx[i] + vy[i] * vy[i]); }\n"
+        "    retornar energia;\n"
+        "}\n"
+        "let n = 200;\n"
+        "let x : Matriz = numpy.cos(numpy.arange(n) * 0.7) * 10.0;\n"
+        "let y : Matriz = numpy.sin(numpy.arange(n) * 1.3) * 10.0;\n"
+        "let vx : Matriz = numpy.zeros(n);\n"
+        "let vy : Matriz = numpy.zeros(n);\n"
+        "let masa : Matriz = numpy.ones(n);\n"
+        "imprimir(round(gravitacion(x, y, vx, vy, masa, 50, 0.001), 6));\n"
+    ),
+    # Conjunto de Mandelbrot: bucle `mientras` con salida temprana por punto.
+    "mandelbrot": (
+        "funcion mandelbrot(ancho: int, alto: int, iteraciones: int) -> int {\n"
+        "    let dentro : int = 0;\n"
+        "    para fila en range(alto) {\n"
+        "        para columna en range(ancho) {\n"
+        "            let cr : float = -2.0 + 3.0 * columna / ancho;\n"
+        "            let ci : float = -1.5 + 3.0 * fila / alto;\n"
+        "            let zr : float = 0.0;\n"
+        "            let zi : float = 0.0;\n"
+        "            let k : int = 0;\n"
+        "            mientras (k < iteraciones y zr * zr + zi * zi <= 4.0) {\n"
+        "                let nuevo : float = zr * zr - zi * zi + cr;\n"
+        "                zi = 2.0 * zr * zi + ci;\n"
+        "                zr = nuevo;\n"
+        "                k += 1;\n"
+        "            }\n"
+        "            si (k == iteraciones) { dentro += 1; }\n"
+        "        }\n"
+        "    }\n"
+        "    retornar dentro;\n"
+        "}\n"
+        "imprimir(mandelbrot(300, 200, 100));\n"
+    ),
+    # Monte Carlo con un generador congruencial propio (resultado determinista
+    # e idéntico en Python y en Numba, que no comparten el estado de `random`).
+    "montecarlo_pi": (
+        "funcion estimar_pi(muestras: int, semilla: int) -> float {\n"
+        "    let estado : int = semilla;\n"
+        "    let aciertos : int = 0;\n"
+        "    para k en range(muestras) {\n"
+        "        estado = (1103515245 * estado + 12345) % 2147483648;\n"
+        "        let px : float = estado / 2147483648.0;\n"
+        "        estado = (1103515245 * estado + 12345) % 2147483648;\n"
+        "        let py : float = estado / 2147483648.0;\n"
+        "        si (px * px + py * py <= 1.0) { aciertos += 1; }\n"
+        "    }\n"
+        "    retornar 4.0 * aciertos / muestras;\n"
+        "}\n"
+        "imprimir(estimar_pi(2000000, 42));\n"
+    ),
+}
+
+
+def traducir(codigo_castella: str, rapido: bool) -> str:
+    """
+    Traduce con o sin `rapido`, descartando lo que imprime el traductor.
+    """
+    with silenciar_salida():
+        from ..castella_parser import traducir_a_python
+        return traducir_a_python(codigo_castella, rapido=rapido)
+
+
+def ejecutar_script(ruta_script: str, directorio_cache: str) -> str:
+    """
+    Ejecuta un script generado en un proceso aparte con la caché de Numba indicada.
+
+    Returns:
+        La salida estándar del programa.
+
+    Raises:
+        RuntimeError: Si el programa termina con error.
+    """
+    entorno = dict(os.environ, NUMBA_CACHE_DIR=directorio_cache,
+                   PYTHONPATH=DIRECTORIO_PAQUETE + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proceso = subprocess.run([sys.executable, ruta_script], capture_output=True, text=True,
+                             env=entorno, timeout=TIEMPO_MAXIMO)
+    if proceso.returncode != 0:
+        raise RuntimeError(f"'{os.path.basename(ruta_script)}' terminó con código {proceso.returncode}:\n{proceso.stderr}")
+    # Los avisos de castella_runtime.rapido (función rechazada por Numba) van a stderr.
+    for linea in proceso.stderr.splitlines():
+        if linea.startswith("[castella rapido]"):
+            print(f"    {linea}")
+    return proceso.stdout
+
+
+def medir_nucleo(nombre: str, codigo_castella: str, directorio: str, repeticiones: int) -> Dict[str, dict]:
+    """
+    Mide las tres variantes de un núcleo y comprueba que producen la misma salida.
+    """
+    script_python = os.path.join(directorio, f"{nombre}_python.py")
+    script_rapido = os.path.join(directorio, f"{nombre}_rapido.py")
+    codigo_rapido = traducir(codigo_castella, rapido=True)
+    if "_castella_rapido" not in codigo_rapido:
+        raise RuntimeError(f"'{nombre}': --rapido no decoró ninguna función.")
+    with open(script_python, "w", encoding="utf-8") as archivo:
+        archivo.write(traducir(codigo_castella, rapido=False))
+    with open(script_rapido, "w", encoding="utf-8") as archivo:
+        archivo.write(codigo_rapido)
+
+    cache = os.path.join(directorio, f"{nombre}_cache")
+
+    def vaciar_cache():
+        shutil.rmtree(cache, ignore_errors=True)
+        os.makedirs(cache)
+
+    vaciar_cache()
+    salida_python = ejecutar_script(script_python, cache)
+    salida_rapido = ejecutar_script(script_rapido, cache)
+    if salida_python != salida_rapido:
+        raise RuntimeError(f"'{nombre}': la salida con Numba ({salida_rapido.strip()!r}) difiere de Python ({salida_python.strip()!r}).")
+
+    def en_frio():
+        vaciar_cache()
+        ejecutar_script(script_rapido, cache)
+
+    resultados = {
+        "python": medir(lambda: ejecutar_script(script_python, cache), repeticiones=repeticiones, calentamiento=0),
+        "numba_frio": medir(en_frio, repeticiones=repeticiones, calentamiento=0),
+    }
+    # El calentamiento puebla la caché de disco; las repeticiones la reutilizan.
+    resultados["numba_cache"] = medir(lambda: ejecutar_script(script_rapido, cache), repeticiones=repeticiones)
+    return resultados
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark de --rapido (Numba) sobre núcleos de simulación.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--nucleos", help="Núcleos a medir, separados por comas (por defecto, todos).")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Menos repeticiones (para CI).")
+    args = parser.parse_args(argv)
+
+    if importlib.util.find_spec("numba") is None:
+        print("Este benchmark necesita Numba: pip install numba")
+        return 1
+
+    nombres = args.nucleos.split(",") if args.nucleos else list(NUCLEOS)
+    repeticiones = 2 if args.rapido else args.repeticiones
+    metricas = {}
+    with tempfile.TemporaryDirectory(prefix="castella_rapido_") as directorio:
+        for nombre in nombres:
+            print(f"--- {nombre} ---")
+            resultados = medir_nucleo(nombre, NUCLEOS[nombre], directorio, repeticiones)
+            for variante, resultado in resultados.items():
+                metricas[f"rapido.{nombre}.{variante}"] = resultado
+            base = resultados["python"]["valor"]
+            for variante in ("numba_frio", "numba_cache"):
+                tiempo = resultados[variante]["valor"]
+                if base and tiempo > 0:
+                    print(f"    {variante}: {base / tiempo:.2f}x respecto a Python")
+                    metricas[f"rapido.{nombre}.{variante}.relativo"] = metrica(tiempo / base * 100, "%")
+
+    guardar_resultados(metricas, args.salida, suite="rapido")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# benchmarks/bench_servicio.py
+
+"""
+Benchmark del pool de trabajadores (`castella_servicio.PoolCastella`) frente a un proceso por trabajo.
+
+Ejecuta un trabajo Castella corto de dos formas:
+
+  * `frio`: traduce el trabajo una vez y lanza un intérprete nuevo por ejecución
+    (paga el arranque y las importaciones del preámbulo en cada trabajo).
+  * `pool`: entrega el trabajo a un `PoolCastella` ya arrancado.
+
+Para cada una mide la latencia de un trabajo (uno tras otro) y el rendimiento con
+tantos trabajos simultáneos como trabajadores.
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_servicio --salida servicio.json
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .comun import guardar_resultados, medir, metrica, silenciar_salida
+
+# Raíz del paquete: el código generado importa `castella_runtime` desde aquí.
+DIRECTORIO_PAQUETE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TRABAJO = (
+    "let datos : Matriz = np.arange(1000) * 0.5;\n"
+    "imprimir(round(float(datos.mean()), 3));\n"
+)
+
+# Segundos máximos por trabajo.
+TIEMPO_MAXIMO = 120
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_parser import traducir_a_python
+    from ..castella_servicio import PoolCastella
+
+    parser = argparse.ArgumentParser(description="Benchmark del pool de trabajadores frente a un proceso por trabajo.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--trabajadores", type=int, default=4, help="Procesos del pool.")
+    parser.add_argument("--trabajos", type=int, default=100, help="Trabajos por medición de rendimiento.")
+    parser.add_argument("--repeticiones", type=int, default=10, help="Repeticiones de la medición de latencia.")
+    parser.add_argument("--rapido", action="store_true", help="Menos trabajos y repeticiones (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 3 if args.rapido else args.repeticiones
+    trabajos = 20 if args.rapido else args.trabajos
+    metricas = {}
+
+    with silenciar_salida():
+        codigo_python = traducir_a_python(TRABAJO)
+    entorno = dict(os.environ, MPLBACKEND="Agg",
+                   PYTHONPATH=DIRECTORIO_PAQUETE + os.pathsep + os.environ.get("PYTHONPATH", ""))
+
+    with tempfile.TemporaryDirectory(prefix="castella_servicio_") as directorio:
+        script = os.path.join(directorio, "trabajo.py")
+        with open(script, "w", encoding="utf-8") as archivo:
+            archivo.write(codigo_python)
+
+        def en_frio():
+            subprocess.run([sys.executable, script], capture_output=True, check=True, env=entorno, timeout=TIEMPO_MAXIMO)
+
+        print("--- frio ---")
+        metricas["servicio.frio.latencia"] = medir(en_frio, repeticiones=repeticiones)
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.trabajadores) as ejecutor:
+            list(ejecutor.map(lambda _: en_frio(), range(trabajos)))
+        metricas["servicio.frio.rendimiento"] = metrica(trabajos / (time.perf_counter() - inicio), "trabajos/s")
+        print(f"    latencia {metricas['servicio.frio.latencia']['valor'] * 1000:.0f} ms, "
+              f"{metricas['servicio.frio.rendimiento']['valor']:.1f} trabajos/s")
+
+    print("--- pool ---")
+    inicio = time.perf_counter()
+    with PoolCastella(trabajadores=args.trabajadores, tiempo_maximo=TIEMPO_MAXIMO) as pool:
+        metricas["servicio.pool.arranque"] = metrica(time.perf_counter() - inicio, "s")
+
+        def en_pool():
+            resultado = pool.ejecutar(TRABAJO)
+            if not resultado.exito:
+                raise RuntimeError(f"El trabajo falló en el pool:\n{resultado.errores}")
+
+        metricas["servicio.pool.latencia"] = medir(en_pool, repeticiones=repeticiones)
+        inicio = time.perf_counter()
+        resultados = pool.mapear([TRABAJO] * trabajos)
+        metricas["servicio.pool.rendimiento"] = metrica(trabajos / (time.perf_counter() - inicio), "trabajos/s")
+        if not all(resultado.exito for resultado in resultados):
+            raise RuntimeError("Algún trabajo falló en el pool.")
+        estado = pool.metricas()
+    print(f"    arranque {metricas['servicio.pool.arranque']['valor']:.2f} s, "
+          f"latencia {metricas['servicio.pool.latencia']['valor'] * 1000:.1f} ms, "
+          f"{metricas['servicio.pool.rendimiento']['valor']:.1f} trabajos/s, "
+          f"p95 {estado['latencia_p95'] * 1000:.1f} ms, reciclados {estado['reciclados']}")
+
+    base, tiempo = metricas["servicio.frio.latencia"]["valor"], metricas["servicio.pool.latencia"]["valor"]
+    if base and tiempo > 0:
+        metricas["servicio.pool.latencia.relativo"] = metrica(tiempo / base * 100, "%")
+
+    guardar_resultados(metricas, args.salida, suite="servicio")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
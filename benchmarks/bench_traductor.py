@@ -0,0 +1,74 @@
+# benchmarks/bench_traductor.py
+
+"""
+Benchmark de `castella_traductor` traduciendo desde varios hilos a la vez.
+
+Traduce el mismo lote de programas con 1, 2, 4 y 8 hilos, con un parser
+compartido y con un parser por hilo, y comprueba que todas las traducciones
+coinciden con la de un solo hilo. El parseo y la transformación son Python puro
+(retienen el GIL), así que el rendimiento no escala con los hilos: la métrica
+sirve para vigilar que la API concurrente no añade contención ni corrompe resultados.
+
+  * `traductor.<modo>.<n>hilos`: tiempo de traducir el lote completo.
+  * `traductor.<modo>.construccion`: tiempo de crear el traductor (construye el parser).
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.bench_traductor --salida traductor.json
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .comun import guardar_resultados, medir, metrica
+from .corpus import generar_programa
+
+HILOS = (1, 2, 4, 8)
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    from ..castella_traductor import MODOS_PARSER, TraductorCastella
+
+    parser = argparse.ArgumentParser(description="Benchmark de la traducción concurrente con castella_traductor.")
+    parser.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    parser.add_argument("--programas", type=int, default=64, help="Programas por lote.")
+    parser.add_argument("--lineas", type=int, default=200, help="Líneas aproximadas por programa.")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Repeticiones por medición.")
+    parser.add_argument("--rapido", action="store_true", help="Lotes más pequeños y menos repeticiones (para CI).")
+    args = parser.parse_args(argv)
+
+    repeticiones = 2 if args.rapido else args.repeticiones
+    programas = [generar_programa(args.lineas) for _ in range(16 if args.rapido else args.programas)]
+    metricas = {}
+
+    for modo in MODOS_PARSER:
+        print(f"--- {modo} ---")
+        inicio = time.perf_counter()
+        traductor = TraductorCastella(parser=modo)
+        metricas[f"traductor.{modo}.construccion"] = metrica(time.perf_counter() - inicio, "s")
+        referencia = [traductor.traducir(programa).codigo_python for programa in programas]
+        if None in referencia:
+            print("    Algún programa del corpus no se pudo traducir.")
+            return 1
+
+        for hilos in HILOS:
+            with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+                def lote():
+                    return [resultado.codigo_python for resultado in ejecutor.map(traductor.traducir, programas)]
+
+                if lote() != referencia:
+                    raise RuntimeError(f"Con {hilos} hilos ({modo}) las traducciones difieren de las de un solo hilo.")
+                resultado = medir(lote, repeticiones=repeticiones)
+            metricas[f"traductor.{modo}.{hilos}hilos"] = resultado
+            print(f"    {hilos} hilo(s): {resultado['valor']:.3f} s ({len(programas) / resultado['valor']:.1f} programas/s)")
+
+    guardar_resultados(metricas, args.salida, suite="traductor")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
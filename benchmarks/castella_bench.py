@@ -0,0 +1,238 @@
+# benchmarks/castella_bench.py
+
+"""
+Benchmarks del pipeline de traducción Castella -> Python.
+
+Mide, sobre el corpus de `benchmarks/corpus.py`:
+  * la construcción del parser de Lark a partir de GRAMATICA,
+  * el tiempo de parseo y de transformación por construcción de la gramática,
+  * el tiempo de extremo a extremo de `traducir_a_python` (programas reales y
+    sintéticos de 10 a 100k líneas),
+  * el sobrecoste de generar el mapa de fuente (`traducir_con_mapa`) frente a
+    `traducir_a_python` (objetivo: menos del 10%),
+  * la memoria pico de la traducción (medida con tracemalloc en una pasada aparte,
+    para que el trazado de memoria no contamine los tiempos).
+
+Uso (desde el directorio que contiene el paquete CastellaScript):
+    python -m CastellaScript.benchmarks.castella_bench ejecutar --salida base.json
+    python -m CastellaScript.benchmarks.castella_bench ejecutar --rapido --salida nuevo.json
+    python -m CastellaScript.benchmarks.castella_bench comparar base.json nuevo.json
+
+`comparar` termina con código de salida 1 si alguna métrica empeora más que el umbral.
+"""
+
+import argparse
+import sys
+import tracemalloc
+
+from lark import Lark
+
+from ..castella_grammar import GRAMATICA
+from ..castella_transformer import CastellaTransformer
+from .comun import (
+    UMBRAL_REGRESION, cargar_resultados, comparar_resultados, guardar_resultados,
+    medir, metrica, silenciar_salida,
+)
+from .corpus import (
+    CONSTRUCCIONES, TAMANOS_CORPUS, cargar_programas_reales,
+    generar_programa, generar_programa_construccion,
+)
+
+# Copias de cada fragmento usadas para medir una construcción.
+REPETICIONES_POR_CONSTRUCCION = 200
+
+
+def _traducir_silencioso(codigo: str) -> str:
+    """
+    Ejecuta `traducir_a_python` descartando todo lo que imprime.
+    """
+    # Importación diferida: castella_parser construye el parser global al importarse
+    # e imprime mensajes, lo que no debe ocurrir durante la medición de construcción.
+    with silenciar_salida():
+        from ..castella_parser import traducir_a_python
+        return traducir_a_python(codigo)
+
+
+def medir_construccion_parser(repeticiones: int) -> dict:
+    """
+    Mide la construcción del parser LALR tal y como la hace `castella_parser`.
+    """
+    return {
+        "parser.construccion": medir(
+            lambda: Lark(GRAMATICA, start="start", parser="lalr", propagate_positions=True),
+            repeticiones=repeticiones,
+        ),
+    }
+
+
+def medir_construcciones(repeticiones: int, copias: int) -> dict:
+    """
+    Mide por separado el parseo (texto -> árbol) y la transformación (árbol -> Python)
+    de cada construcción de la gramática.
+
+    Los valores se reportan por copia del fragmento para que sean comparables
+    aunque cambie el número de copias.
+    """
+    parser_arbol = Lark(GRAMATICA, start="start", parser="lalr")
+    metricas = {}
+
+    for nombre in sorted(CONSTRUCCIONES):
+        codigo = generar_programa_construccion(nombre, copias)
+        arbol = parser_arbol.parse(codigo)
+
+        parseo = medir(lambda: parser_arbol.parse(codigo), repeticiones=repeticiones)
+        transformacion = medir(lambda: CastellaTransformer().transform(arbol), repeticiones=repeticiones)
+
+        for etapa, resultado in (("parseo", parseo), ("transformacion", transformacion)):
+            metricas[f"construccion.{nombre}.{etapa}"] = metrica(
+                resultado["valor"] / copias, "s",
+                minimo=resultado["minimo"] / copias,
+                repeticiones=resultado["repeticiones"],
+                copias=copias,
+            )
+    return metricas
+
+
+def _corpus_extremo(tamanos) -> dict:
+    """
+    Devuelve los programas del corpus de extremo a extremo: reales y sintéticos.
+    """
+    programas = {f"real.{nombre}": codigo for nombre, codigo in cargar_programas_reales().items()}
+    for lineas in tamanos:
+        programas[f"sintetico.{lineas}_lineas"] = generar_programa(lineas)
+    return programas
+
+
+def medir_extremo_a_extremo(tamanos, repeticiones: int) -> dict:
+    """
+    Mide `traducir_a_python` completo (parseo, transformación y formateo final).
+    """
+    metricas = {}
+    for nombre, codigo in _corpus_extremo(tamanos).items():
+        # Los programas grandes se repiten menos para acotar la duración total.
+        reps = repeticiones if codigo.count("\n") < 10_000 else max(1, repeticiones // 3)
+        resultado = medir(lambda: _traducir_silencioso(codigo), repeticiones=reps)
+        resultado["lineas"] = codigo.count("\n")
+        metricas[f"extremo.{nombre}"] = resultado
+    return metricas
+
+
+def _traducir_con_mapa_silencioso(codigo: str):
+    """
+    Ejecuta `traducir_con_mapa` descartando todo lo que imprime.
+    """
+    with silenciar_salida():
+        from ..castella_parser import traducir_con_mapa
+        return traducir_con_mapa(codigo)
+
+
+def medir_mapa_fuente(tamanos, repeticiones: int, extremo: dict) -> dict:
+    """
+    Mide la traducción con mapa de fuente y su sobrecoste relativo a `extremo.<programa>`.
+    """
+    metricas = {}
+    _traducir_con_mapa_silencioso("let x = 1;\n") # Construye el parser con posiciones fuera de la medición.
+    for nombre, codigo in _corpus_extremo(tamanos).items():
+        reps = repeticiones if codigo.count("\n") < 10_000 else max(1, repeticiones // 3)
+        resultado = medir(lambda: _traducir_con_mapa_silencioso(codigo), repeticiones=reps)
+        resultado["lineas"] = codigo.count("\n")
+        metricas[f"mapa_fuente.{nombre}"] = resultado
+        base = extremo.get(f"extremo.{nombre}")
+        if base and base["valor"] > 0:
+            sobrecoste = (resultado["valor"] - base["valor"]) / base["valor"] * 100
+            metricas[f"mapa_fuente.{nombre}.sobrecoste"] = metrica(sobrecoste, "%")
+    return metricas
+
+
+def medir_memoria_pico(tamanos) -> dict:
+    """
+    Mide la memoria pico asignada durante `traducir_a_python` con tracemalloc.
+    """
+    metricas = {}
+    _traducir_silencioso("let x = 1;\n") # Construye el parser global fuera de la medición.
+    for nombre, codigo in _corpus_extremo(tamanos).items():
+        tracemalloc.start()
+        try:
+            _traducir_silencioso(codigo)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        metricas[f"memoria.{nombre}"] = metrica(pico, "bytes", lineas=codigo.count("\n"))
+    return metricas
+
+
+def ejecutar(args) -> int:
+    """
+    Ejecuta la suite completa (o la reducida con --rapido) y guarda los resultados.
+    """
+    tamanos = [t for t in TAMANOS_CORPUS if t <= args.max_lineas]
+    repeticiones = 3 if args.rapido else args.repeticiones
+    copias = REPETICIONES_POR_CONSTRUCCION // 4 if args.rapido else REPETICIONES_POR_CONSTRUCCION
+
+    metricas = {}
+    print("--- Midiendo construcción del parser ---")
+    metricas.update(medir_construccion_parser(repeticiones))
+    print("--- Midiendo parseo y transformación por construcción ---")
+    metricas.update(medir_construcciones(repeticiones, copias))
+    print(f"--- Midiendo traducción de extremo a extremo (tamaños: {tamanos}) ---")
+    metricas.update(medir_extremo_a_extremo(tamanos, repeticiones))
+    print("--- Midiendo sobrecoste del mapa de fuente ---")
+    metricas.update(medir_mapa_fuente(tamanos, repeticiones, metricas))
+    if not args.sin_memoria:
+        print("--- Midiendo memoria pico ---")
+        metricas.update(medir_memoria_pico(tamanos))
+
+    guardar_resultados(metricas, args.salida, suite="traduccion")
+    return 0
+
+
+def comparar(args) -> int:
+    """
+    Compara dos archivos de resultados e imprime una tabla con los cambios.
+    """
+    base = cargar_resultados(args.base)
+    nuevo = cargar_resultados(args.nuevo)
+    filas = comparar_resultados(base, nuevo, umbral=args.umbral)
+
+    ancho = max((len(fila[0]) for fila in filas), default=10)
+    print(f"{'métrica':<{ancho}}  {'base':>12}  {'nuevo':>12}  {'cambio':>8}  estado")
+    regresiones = 0
+    for nombre, valor_base, valor_nuevo, cambio, estado in filas:
+        if estado == "igual" and not args.todo:
+            continue
+        marca = " <<<" if estado == "regresion" else ""
+        print(f"{nombre:<{ancho}}  {valor_base:>12.6g}  {valor_nuevo:>12.6g}  {cambio:>+8.1%}  {estado}{marca}")
+        regresiones += estado == "regresion"
+
+    print(f"\n{regresiones} regresión(es) por encima del umbral de {args.umbral:.0%}.")
+    return 1 if regresiones else 0
+
+
+def main(argv=None) -> int:
+    """
+    Punto de entrada de la línea de comandos de los benchmarks.
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks del traductor Castella.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_ejecutar = subcomandos.add_parser("ejecutar", help="Ejecuta la suite y guarda resultados JSON.")
+    p_ejecutar.add_argument("--salida", help="Archivo JSON de salida (por defecto, stdout).")
+    p_ejecutar.add_argument("--repeticiones", type=int, default=7, help="Repeticiones por medición.")
+    p_ejecutar.add_argument("--max-lineas", type=int, default=max(TAMANOS_CORPUS), help="Tamaño máximo del corpus sintético.")
+    p_ejecutar.add_argument("--rapido", action="store_true", help="Menos repeticiones y copias (para CI).")
+    p_ejecutar.add_argument("--sin-memoria", action="store_true", help="Omite la medición de memoria pico.")
+    p_ejecutar.set_defaults(funcion=ejecutar)
+
+    p_comparar = subcomandos.add_parser("comparar", help="Compara dos ejecuciones y marca regresiones.")
+    p_comparar.add_argument("base", help="Resultados de referencia.")
+    p_comparar.add_argument("nuevo", help="Resultados a evaluar.")
+    p_comparar.add_argument("--umbral", type=float, default=UMBRAL_REGRESION, help="Cambio relativo considerado regresión (0.10 = 10%%).")
+    p_comparar.add_argument("--todo", action="store_true", help="Muestra también las métricas sin cambios.")
+    p_comparar.set_defaults(funcion=comparar)
+
+    args = parser.parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+# benchmarks/comun.py
+
+"""
+Utilidades compartidas por los scripts de benchmarks.
+
+Define el formato JSON estable de los resultados, la medición de tiempos
+(mediana y mínimo sobre varias repeticiones) y la comparación entre dos
+ejecuciones para detectar regresiones.
+"""
+
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Versión del formato de resultados. Incrementar si cambia la estructura del JSON.
+VERSION_FORMATO = 1
+
+# Umbral por defecto (fracción) a partir del cual un empeoramiento cuenta como regresión.
+UMBRAL_REGRESION = 0.10
+
+
+def describir_entorno() -> Dict[str, str]:
+    """
+    Recoge información del entorno de ejecución para adjuntarla a los resultados.
+
+    Returns:
+        Un diccionario con las versiones de Python, Lark y la plataforma.
+    """
+    try:
+        import lark
+        version_lark = lark.__version__
+    except ImportError:
+        version_lark = "no instalada"
+
+    return {
+        "python": platform.python_version(),
+        "implementacion": platform.python_implementation(),
+        "plataforma": platform.platform(),
+        "lark": version_lark,
+    }
+
+
+@contextlib.contextmanager
+def silenciar_salida():
+    """
+    Redirige stdout y stderr a un buffer descartable.
+
+    `traducir_a_python` imprime el código generado y mensajes de progreso;
+    sin silenciarlo, la escritura en la terminal dominaría las mediciones.
+    """
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+        yield buffer
+
+
+def medir(funcion: Callable[[], Any], repeticiones: int = 5, calentamiento: int = 1) -> Dict[str, Any]:
+    """
+    Mide el tiempo de pared de `funcion` varias veces.
+
+    Args:
+        funcion: Callable sin argumentos a medir.
+        repeticiones: Número de ejecuciones medidas.
+        calentamiento: Ejecuciones previas descartadas (cachés, imports perezosos).
+
+    Returns:
+        Una métrica con la mediana como `valor`, el mínimo y el número de repeticiones.
+    """
+    for _ in range(calentamiento):
+        funcion()
+
+    tiempos = []
+    for _ in range(max(1, repeticiones)):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    return metrica(statistics.median(tiempos), "s", minimo=min(tiempos), repeticiones=len(tiempos))
+
+
+def metrica(valor: float, unidad: str, **extra: Any) -> Dict[str, Any]:
+    """
+    Construye una entrada de métrica en el formato estándar.
+
+    Args:
+        valor: El valor representativo (para tiempos, la mediana).
+        unidad: Unidad del valor ("s", "bytes", "trabajos/s", ...).
+        **extra: Campos adicionales (mínimo, repeticiones, tamaño de la entrada...).
+
+    Returns:
+        Un diccionario `{"valor": ..., "unidad": ..., ...}`.
+    """
+    entrada = {"valor": valor, "unidad": unidad}
+    entrada.update(extra)
+    return entrada
+
+
+def guardar_resultados(metricas: Dict[str, Dict[str, Any]], ruta: Optional[str], suite: str) -> Dict[str, Any]:
+    """
+    Escribe los resultados en JSON con claves ordenadas (salida estable y diffeable).
+
+    Args:
+        metricas: Diccionario plano `nombre_metrica -> métrica`.
+        ruta: Archivo de salida. Si es None, los resultados se imprimen por stdout.
+        suite: Nombre de la suite que produjo los resultados.
+
+    Returns:
+        El documento completo que se escribió.
+    """
+    documento = {
+        "version_formato": VERSION_FORMATO,
+        "suite": suite,
+        "entorno": describir_entorno(),
+        "metricas": metricas,
+    }
+    texto = json.dumps(documento, indent=2, sort_keys=True, ensure_ascii=False)
+    if ruta:
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            archivo.write(texto + "\n")
+        print(f"Resultados guardados en '{ruta}' ({len(metricas)} métricas).")
+    else:
+        print(texto)
+    return documento
+
+
+def cargar_resultados(ruta: str) -> Dict[str, Any]:
+    """
+    Lee un archivo de resultados y valida su versión de formato.
+
+    Raises:
+        ValueError: Si el archivo no tiene el formato esperado.
+    """
+    with open(ruta, "r", encoding="utf-8") as archivo:
+        documento = json.load(archivo)
+    if not isinstance(documento, dict) or "metricas" not in documento:
+        raise ValueError(f"El archivo '{ruta}' no contiene resultados de benchmarks de Castella.")
+    if documento.get("version_formato") != VERSION_FORMATO:
+        raise ValueError(f"Versión de formato incompatible en '{ruta}': {documento.get('version_formato')} (esperada {VERSION_FORMATO}).")
+    return documento
+
+
+def comparar_resultados(base: Dict[str, Any], nuevo: Dict[str, Any],
+                        umbral: float = UMBRAL_REGRESION) -> List[Tuple[str, float, float, float, str]]:
+    """
+    Compara dos documentos de resultados métrica a métrica.
+
+    Todas las métricas se interpretan como "menor es mejor" salvo las que tienen
+    unidades de rendimiento (terminadas en "/s"), donde mayor es mejor.
+
+    Args:
+        base: Resultados de referencia.
+        nuevo: Resultados a evaluar.
+        umbral: Cambio relativo a partir del cual se marca una regresión o mejora.
+
+    Returns:
+        Una lista ordenada de tuplas `(nombre, valor_base, valor_nuevo, cambio_relativo, estado)`,
+        donde `estado` es "regresion", "mejora", "igual", "nueva" o "eliminada".
+    """
+    metricas_base = base["metricas"]
+    metricas_nuevas = nuevo["metricas"]
+    filas = []
+
+    for nombre in sorted(set(metricas_base) | set(metricas_nuevas)):
+        if nombre not in metricas_nuevas:
+            filas.append((nombre, metricas_base[nombre]["valor"], float("nan"), 0.0, "eliminada"))
+            continue
+        if nombre not in metricas_base:
+            filas.append((nombre, float("nan"), metricas_nuevas[nombre]["valor"], 0.0, "nueva"))
+            continue
+
+        valor_base = metricas_base[nombre]["valor"]
+        valor_nuevo = metricas_nuevas[nombre]["valor"]
+        if not valor_base:
+            filas.append((nombre, valor_base, valor_nuevo, 0.0, "igual"))
+            continue
+
+        cambio = (valor_nuevo - valor_base) / valor_base
+        # Para métricas de rendimiento (p. ej. "trabajos/s") un valor mayor es mejor.
+        if str(metricas_nuevas[nombre].get("unidad", "")).endswith("/s"):
+            cambio = -cambio
+
+        if cambio > umbral:
+            estado = "regresion"
+        elif cambio < -umbral:
+            estado = "mejora"
+        else:
+            estado = "igual"
+        filas.append((nombre, valor_base, valor_nuevo, cambio, estado))
+
+    return filas
+
+
+def silenciosamente(funcion: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Envuelve `funcion` para que se ejecute con la salida estándar silenciada.
+    """
+    def envoltura(*args, **kwargs):
+        with silenciar_salida():
+            return funcion(*args, **kwargs)
+    return envoltura
+
+
+def salir_si_faltan(*modulos: str):
+    """
+    Termina el script con un mensaje claro si falta alguna dependencia opcional.
+    """
+    faltantes = []
+    for nombre in modulos:
+        try:
+            __import__(nombre)
+        except ImportError:
+            faltantes.append(nombre)
+    if faltantes:
+        print(f"Error: Este benchmark requiere los módulos: {', '.join(faltantes)}.")
+        print(f"Instálalos con: pip install {' '.join(faltantes)}")
+        sys.exit(1)
@@ -0,0 +1,182 @@
+# benchmarks/corpus.py
+
+"""
+Corpus de programas Castella para los benchmarks.
+
+Incluye:
+  * `CONSTRUCCIONES`: un fragmento mínimo por cada construcción de `castella_grammar`,
+    usado para medir parseo y transformación por construcción.
+  * `generar_programa`: programas sintéticos de tamaño arbitrario (de unas pocas
+    líneas hasta 100k) que mezclan todas las construcciones.
+  * `cargar_programas_reales`: los programas escritos a mano en `benchmarks/programas/`.
+
+Los fragmentos usan el marcador `@N` para generar nombres únicos al repetirlos.
+"""
+
+import os
+from typing import Dict, List
+
+# Directorio con los programas "reales" del corpus.
+DIRECTORIO_PROGRAMAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "programas")
+
+# Tamaños (en líneas) del corpus sintético escalado.
+TAMANOS_CORPUS = [10, 1_000, 10_000, 100_000]
+
+# Un fragmento por construcción de la gramática. Cada fragmento es autocontenido
+# (declara lo que usa) para poder repetirse cualquier número de veces.
+CONSTRUCCIONES: Dict[str, str] = {
+    # --- Sentencias simples ---
+    "declaration": "let valor_@N : int = 42;\n",
+    "asignacion": "let obj_@N = ninguno;\nobj_@N = [1, 2, 3];\n",
+    "unpack_assignment": "a_@N, b_@N = (1, 2);\n",
+    "augmented_assignment": "let acum_@N = 0;\nacum_@N += 5;\nacum_@N **= 2;\nacum_@N //= 3;\n",
+    "print_stmt": "imprimir(\"iteracion\", @N, 3.5);\n",
+    "graficar": "graficar([1, 2, 3], [4, 5, 6]);\n",
+    "call_stmt": "len([1, 2, 3]);\n",
+    "return_stmt": "funcion devolver_@N() { retornar @N; }\n",
+    "pass_break_continue": (
+        "para k_@N en range(3) {\n"
+        "    si (k_@N == 1) { continuar; }\n"
+        "    si (k_@N == 2) { romper; }\n"
+        "    pasar;\n"
+        "}\n"
+    ),
+    # --- Control de flujo ---
+    "if_stmt": (
+        "let x_@N = @N;\n"
+        "si (x_@N > 10) { imprimir(\"grande\"); }\n"
+        "sino si (x_@N > 5) { imprimir(\"medio\"); }\n"
+        "sino { imprimir(\"chico\"); }\n"
+    ),
+    "for_stmt": "let total_@N = 0;\npara i_@N en range(10) { total_@N += i_@N; }\n",
+    "while_stmt": "let n_@N = 3;\nmientras (n_@N > 0) { n_@N -= 1; }\n",
+    "try_stmt": (
+        "intentar { let r_@N = 1 / 0; }\n"
+        "capturar ZeroDivisionError como error_@N { imprimir(error_@N); }\n"
+        "finalmente { pasar; }\n"
+    ),
+    "with_stmt": "con open(\"datos.txt\") como archivo_@N { imprimir(archivo_@N.read()); }\n",
+    # --- Definiciones ---
+    "func_def": (
+        "funcion calcular_@N(a: int, b: float = 2.0, *resto, **opciones) -> float {\n"
+        "    retornar a * b;\n"
+        "}\n"
+    ),
+    "class_def": (
+        "clase Punto_@N desde object {\n"
+        "    dimension: int = 2;\n"
+        "    funcion iniciar(self, x: float, y: float) {\n"
+        "        self.x = x;\n"
+        "        self.y = y;\n"
+        "    }\n"
+        "    funcion norma(self) -> float { retornar (self.x ** 2 + self.y ** 2) ** 0.5; }\n"
+        "}\n"
+    ),
+    "decorator": "@staticmethod\nfuncion decorada_@N() { pasar; }\n",
+    "docstring": "/* Comentario de bloque numero @N usado como docstring. */\n",
+    # --- Importaciones ---
+    "import_module": "importar os.path;\n",
+    "from_import": "desde math importar sqrt como raiz, pi;\ndesde os importar *;\n",
+    # --- Tipos ---
+    "type_hints": (
+        "let lista_@N : Lista[int] = [];\n"
+        "let dicc_@N : Diccionario[str, int] = {};\n"
+        "let tupla_@N : Tupla[int, float] = (1, 2.0);\n"
+        "let conj_@N : Conjunto[str] = {\"a\"};\n"
+        "let opc_@N : Opcional[int] = ninguno;\n"
+        "let union_@N : Union[int, str] = 1;\n"
+        "let matriz_@N : Matriz = ninguno;\n"
+        "let tensor_@N : Tensor = ninguno;\n"
+        "let fn_@N : Llamable = ninguno;\n"
+        "let ref_@N : 'Punto' = ninguno;\n"
+        "let res_@N : Resultado = ninguno;\n"
+    ),
+    # --- Expresiones ---
+    "ternary": "let t_@N = @N > 3 ? \"si\" : \"no\";\n",
+    "bool_ops": "let b_@N = verdadero y no falso o (1 en [1, 2]) y (ninguno es ninguno) y (2 no en [1]) y (1 es no ninguno);\n",
+    "comparison": "let c_@N = 1 < 2 y 2 <= 3 y 4 >= 3 y 5 > 1 y 1 == 1 y 1 != 2;\n",
+    "bitwise_shift": "let bits_@N = (@N | 4) ^ (3 & 1) << 2 >> 1;\nlet inv_@N = ~@N;\n",
+    "arithmetic": "let ar_@N = (1 + 2 - 3) * 4 / 5 % 6 // 7 ** 2;\nlet neg_@N = -@N + +1;\n",
+    "matmul": "let mm_@N = ninguno;\nmm_@N = [[1]] @ [[2]];\nmm_@N @= [[1]];\n",
+    "access": "let acc_@N = \"abc\".upper().lower()[0:2:1];\nlet idx_@N = [1, 2, 3][1];\n",
+    "call_arguments": "let llam_@N = dict(*[], a=1, **{});\n",
+    "literals": (
+        "let lit_@N = [1, 2.5, \"texto\", verdadero, falso, ninguno];\n"
+        "let dic_@N = {\"clave\": 1, \"otra\": [1, 2]};\n"
+        "let tup_@N = (1, 2, 3);\n"
+        "let set_@N = {1, 2, 3};\n"
+    ),
+    "comprehensions": (
+        "let lc_@N = [x * 2 para x en range(10) si x % 2 == 0];\n"
+        "let dc_@N = {x: x * x para x en range(5)};\n"
+        "let sc_@N = {x para x en range(5)};\n"
+        "let ge_@N = sum((x para x en range(5)));\n"
+    ),
+    "lambda_expr": "let f_@N = lambda a, b = 2: a + b;\n",
+    "new_instance": "let inst_@N = nueva object();\n",
+    "complex_literal": "let z_@N = 3 + 4j;\nlet w_@N = 1.5 - 2j;\nlet im_@N = 5j;\n",
+}
+
+
+def fragmento(nombre: str, indice: int) -> str:
+    """
+    Devuelve el fragmento de la construcción `nombre` con nombres únicos para `indice`.
+    """
+    return CONSTRUCCIONES[nombre].replace("@N", str(indice))
+
+
+def generar_programa_construccion(nombre: str, repeticiones: int) -> str:
+    """
+    Genera un programa que repite una sola construcción `repeticiones` veces.
+
+    Args:
+        nombre: Clave de `CONSTRUCCIONES`.
+        repeticiones: Número de copias del fragmento.
+
+    Returns:
+        El código fuente Castella resultante.
+    """
+    return "".join(fragmento(nombre, i) for i in range(repeticiones))
+
+
+def generar_programa(lineas_objetivo: int) -> str:
+    """
+    Genera un programa sintético que mezcla todas las construcciones hasta
+    alcanzar (aproximadamente) `lineas_objetivo` líneas.
+
+    El recorrido de las construcciones es determinista, de modo que dos llamadas
+    con el mismo tamaño producen exactamente el mismo programa.
+
+    Args:
+        lineas_objetivo: Número de líneas deseado.
+
+    Returns:
+        El código fuente Castella resultante.
+    """
+    nombres = sorted(CONSTRUCCIONES)
+    partes: List[str] = []
+    lineas = 0
+    indice = 0
+    while lineas < lineas_objetivo:
+        texto = fragmento(nombres[indice % len(nombres)], indice)
+        partes.append(texto)
+        lineas += texto.count("\n")
+        indice += 1
+    return "".join(partes)
+
+
+def cargar_programas_reales() -> Dict[str, str]:
+    """
+    Lee los programas `.castella` de `benchmarks/programas/`.
+
+    Returns:
+        Un diccionario `nombre_archivo -> código fuente`, ordenado por nombre.
+    """
+    programas = {}
+    if not os.path.isdir(DIRECTORIO_PROGRAMAS):
+        return programas
+    for nombre in sorted(os.listdir(DIRECTORIO_PROGRAMAS)):
+        if nombre.endswith(".castella"):
+            with open(os.path.join(DIRECTORIO_PROGRAMAS, nombre), "r", encoding="utf-8") as archivo:
+                programas[nombre] = archivo.read()
+    return programas
@@ -6,16 +6,20 @@ Contiene funciones para generar ejecutables binarios a partir de código Python
 También incluye utilidades relacionadas con dependencias y limpieza.
 """
 
+import importlib.util # Para comprobar si Numba está instalado sin importarlo.
 import os
+import py_compile # Bytecode precompilado para las aplicaciones zip.
 import shutil # Para operaciones de archivos de alto nivel como copiar, mover, borrar árboles de directorios.
 import subprocess # Para ejecutar comandos externos como PyInstaller y UPX.
 import sys # Para acceder a información del sistema como el ejecutable de Python y la plataforma.
+import tempfile # Directorio de compilación del módulo Cython (--cython).
+import zipapp # Formato de salida .pyz.
 import re # Se mantuvo la importación ya que estaba en la función original, aunque podría no ser estrictamente necesaria para la limpieza final.
 
 # Importar la función de traducción del módulo del parser.
 # El backend necesita traducir el código Castella antes de empaquetarlo.
 try:
-    from .castella_parser import traducir_a_python
+    from .castella_parser import traducir_a_python, traducir_con_mapa
 except ImportError as e:
     # Si falla la importación, reportar el error ya que este módulo depende del parser.
     print("\nError de Importación en castella_backend:")
@@ -24,6 +28,22 @@ except ImportError as e:
     print(f"Detalle: {e}")
     sys.exit(1) # Salir con un código de error.
 
+# Directorio que contiene el paquete `castella_runtime`. Se pasa a PyInstaller con
+# --paths para que el código generado pueda importarlo dentro del binario.
+DIRECTORIO_RUNTIME = os.path.dirname(os.path.abspath(__file__))
+
+# Formatos de salida de generar_binario:
+#   onefile: un solo ejecutable (PyInstaller --onefile). Cada arranque descomprime el
+#            paquete completo (NumPy, Matplotlib...) en un directorio temporal.
+#   onedir: directorio con el ejecutable y sus dependencias ya extraídas, más un lanzador
+#           en la ruta de salida. Arranca sin descomprimir nada.
+#   zipapp: aplicación zip de Python (.pyz) con el programa y castella_runtime, para
+#           entornos que ya tienen instalado Python y las dependencias.
+FORMATOS_SALIDA = ("onefile", "onedir", "zipapp")
+
+# Directorio (junto al programa, dentro del binario) de los literales de --literales-externos.
+NOMBRE_DATOS_LITERALES = "castella_datos"
+
 
 from typing import Optional # Importar para la anotación de tipo de retorno Optional.
 
@@ -115,7 +135,14 @@ def limpiar_archivos_temp(temp_py_file_path: str, pyinstaller_build_dir_name: st
 
 
 # === GENERADOR DE BINARIOS ===
-def generar_binario(codigo_castella: str, nombre_binario_salida: str) -> Optional[str]:
+def generar_binario(codigo_castella: str, nombre_binario_salida: str,
+                    perfiladores: Optional[dict[str, Optional[str]]] = None,
+                    nombre_fuente: str = "programa.castella",
+                    nivel_optimizacion: int = 0, rapido: bool = False,
+                    cython: bool = False, formato: str = "onefile",
+                    umbral_literales: Optional[int] = None,
+                    salida: Optional[dict] = None,
+                    graficos: Optional[dict] = None) -> Optional[str]:
     """
     Traduce código Castella a Python y genera un ejecutable binario autónomo
     utilizando PyInstaller.
@@ -127,18 +154,47 @@ def generar_binario(codigo_castella: str, nombre_binario_salida: str) -> Optiona
         codigo_castella: La cadena de texto con el código fuente en Castella.
         nombre_binario_salida: El nombre deseado para el archivo ejecutable final.
                                Puede incluir una ruta.
+        perfiladores: Perfiladores que el binario activa sobre su propia ejecución
+                      ("perfilar" = tiempo con cProfile, "memoria" = tracemalloc), cada uno
+                      con el prefijo de sus archivos de salida (None = sólo reporte).
+                      Los reportes se imprimen en términos de Castella al terminar.
+        nombre_fuente: Nombre del archivo Castella original (usado en los reportes del perfil).
+        nivel_optimizacion: Nivel de optimización de la traducción (0, 1 o 2; ver castella_optimizador).
+        rapido: Compila con Numba las funciones con parámetros numéricos (`--rapido`).
+        cython: Compila el programa con Cython como módulo de extensión y empaqueta
+                éste en lugar del Python traducido (`--cython`, ver castella_cython).
+                Si no compila, se usa el Python traducido.
+        formato: Formato de salida, uno de FORMATOS_SALIDA (por defecto "onefile").
+        umbral_literales: Si no es None, los literales constantes de al menos este tamaño
+                          (bytes) se guardan en archivos de datos incluidos en el binario
+                          en lugar de compilarse en el programa (`--literales-externos`,
+                          ver castella_literales).
+        salida: Si no es None, configuración de la salida en búfer de `imprimir` que el
+                binario activa al arrancar (`--imprimir`, ver castella_salida).
+        graficos: Si no es None, configuración de `graficar` en el binario (`--graficar`,
+                  ver castella_graficos).
 
     Returns:
-        La ruta absoluta al archivo binario generado exitosamente, o None si
-        el proceso de generación falló en algún paso.
+        La ruta absoluta al archivo binario generado exitosamente (con "onedir", la del
+        lanzador; con "zipapp", la del .pyz), o None si el proceso de generación
+        falló en algún paso.
     """
+    if formato not in FORMATOS_SALIDA:
+        print(f"Error: Formato de salida no válido: '{formato}'. Opciones: {', '.join(FORMATOS_SALIDA)}.")
+        return None
 
     # 1. Traducir el código Castella a Python.
     # La función traducir_a_python maneja sus propios errores y los relanza.
     try:
         print("\n--- Paso 1: Traducción de Castella a Python ---")
         # Llama a la función del módulo castella_parser.
-        codigo_python = traducir_a_python(codigo_castella)
+        # Con perfilado se necesita además el mapa de fuente para reportar ubicaciones Castella.
+        mapa_fuente = None
+        if perfiladores:
+            codigo_python, mapa_fuente = traducir_con_mapa(codigo_castella, nombre_fuente, nivel_optimizacion=nivel_optimizacion,
+                                                           rapido=rapido)
+        else:
+            codigo_python = traducir_a_python(codigo_castella, nivel_optimizacion, rapido)
 
         # Verificar si la traducción produjo código Python significativo.
         # Si la entrada Castella estaba vacía o solo con comentarios, traducir_a_python
@@ -206,6 +262,81 @@ def generar_binario(codigo_castella: str, nombre_binario_salida: str) -> Optiona
                   print(f"Advertencia al intentar limpiar el directorio '{pyinstaller_dist_dir_name}': {e}")
 
 
+    # Con --literales-externos, los literales grandes se guardan en un directorio de datos
+    # (NOMBRE_DATOS_LITERALES) que se empaqueta junto al programa.
+    directorio_literales = None
+    if umbral_literales is not None:
+        from .castella_literales import externalizar_literales, LINEAS_INSERTADAS
+        directorio_literales = os.path.join(tempfile.mkdtemp(prefix="castella_literales_"), NOMBRE_DATOS_LITERALES)
+        codigo_python, archivos = externalizar_literales(codigo_python, directorio_literales, umbral_literales)
+        if archivos:
+            print(f"{len(archivos)} literales grandes guardados como datos del binario.")
+            if mapa_fuente is not None:
+                mapa_fuente = mapa_fuente.desplazar(LINEAS_INSERTADAS)
+        else:
+            shutil.rmtree(os.path.dirname(directorio_literales), ignore_errors=True)
+            directorio_literales = None
+
+    # Con --imprimir, anteponer las líneas que activan la salida en búfer (antes de instrumentar
+    # los perfiladores, que desplazan el mapa de fuente por su cuenta).
+    if salida is not None:
+        from .castella_salida import instrumentar_salida, LINEAS_INSERTADAS as LINEAS_SALIDA
+        codigo_python = instrumentar_salida(codigo_python, salida)
+        if mapa_fuente is not None:
+            mapa_fuente = mapa_fuente.desplazar(LINEAS_SALIDA)
+
+    # Con --graficar/--graficar-puntos, anteponer la configuración de `graficar`.
+    if graficos is not None:
+        from .castella_graficos import instrumentar_graficos, LINEAS_INSERTADAS as LINEAS_GRAFICOS
+        codigo_python = instrumentar_graficos(codigo_python, graficos)
+        if mapa_fuente is not None:
+            mapa_fuente = mapa_fuente.desplazar(LINEAS_GRAFICOS)
+
+    # Con --perfilar/--memoria, anteponer las líneas que activan los perfiladores en el binario.
+    if perfiladores:
+        from .castella_perfilador import instrumentar_script
+        nombre_script = "__main__.py" if formato == "zipapp" else temp_py_file_name
+        codigo_python = instrumentar_script(codigo_python, mapa_fuente, nombre_script, perfiladores)
+        print(f"Perfilado activado en el binario: {', '.join(perfiladores)}.")
+
+    # Con --cython, el programa se compila como módulo de extensión y el script
+    # temporal sólo lo importa. Si no compila, se empaqueta el Python traducido.
+    directorio_cython = None
+    modulo_cython = None
+    if cython:
+        if perfiladores:
+            print("Advertencia: --cython no es compatible con --perfilar/--memoria; se usará el backend de Python.")
+        elif formato == "zipapp":
+            # Python no puede importar módulos de extensión desde un archivo zip.
+            print("Advertencia: --cython no es compatible con el formato zipapp; se usará el backend de Python.")
+        else:
+            from .castella_cython import construir_extension, nombre_modulo_extension, script_lanzador
+            print("\n--- Paso 1b: Compilación con Cython ---")
+            directorio_cython = tempfile.mkdtemp(prefix="castella_cython_")
+            nombre_modulo = nombre_modulo_extension(pyinstaller_project_name)
+            try:
+                ruta_extension = construir_extension(codigo_castella, nombre_modulo, directorio_cython, nivel_optimizacion)
+            except Exception:
+                print("La traducción a Cython falló. Se usará el backend de Python.")
+                ruta_extension = None
+            if ruta_extension:
+                codigo_python = script_lanzador(codigo_python, nombre_modulo)
+                if salida is not None:
+                    # La extensión usa el `print` normal, pero escribe en la salida en búfer.
+                    codigo_python = instrumentar_salida(codigo_python, salida)
+                if graficos is not None:
+                    codigo_python = instrumentar_graficos(codigo_python, graficos)
+                modulo_cython = nombre_modulo
+
+    # La aplicación zip no usa PyInstaller.
+    if formato == "zipapp":
+        print("\n--- Paso 2: Empaquetar como aplicación zip (.pyz) ---")
+        try:
+            return generar_zipapp(codigo_python, nombre_binario_salida, directorio_literales)
+        finally:
+            if directorio_literales:
+                shutil.rmtree(os.path.dirname(directorio_literales), ignore_errors=True)
+
     try:
         print("\n--- Paso 2: Guardar código Python temporal ---")
         # Escribir el código Python traducido al archivo temporal.
@@ -228,20 +359,34 @@ def generar_binario(codigo_castella: str, nombre_binario_salida: str) -> Optiona
 
         # Construir el comando para ejecutar PyInstaller.
         # -m PyInstaller: Ejecuta PyInstaller como un módulo del intérprete actual.
-        # --onefile: Empaqueta todo en un solo archivo ejecutable.
+        # --onefile / --onedir: Un solo archivo ejecutable, o un directorio con el ejecutable
+        #                      y sus dependencias (según `formato`).
         # --clean: Limpia la caché y los directorios temporales de PyInstaller antes de la construcción.
         # --name <nombre>: Define el nombre base del archivo de salida y otros directorios temporales.
         # --distpath .: Especifica el directorio de salida para el binario final. "." significa el directorio actual.
+        #              Con onedir se usa "dist" y el directorio se mueve después junto al lanzador.
+        # --paths <dir>: Permite a PyInstaller encontrar e incluir `castella_runtime`.
         # <script_entrada>: El script Python a empaquetar (nuestro archivo temporal).
         command = [
             python_executable,
             "-m", "PyInstaller",
-            "--onefile",
+            "--onedir" if formato == "onedir" else "--onefile",
             "--clean",
             "--name", pyinstaller_project_name,
-            "--distpath", ".", # Salida directa al directorio actual.
-            temp_py_file_name
+            "--distpath", pyinstaller_dist_dir_name if formato == "onedir" else ".", # Onefile: salida directa al directorio actual.
+            "--paths", DIRECTORIO_RUNTIME,
         ]
+        # castella_runtime.rapido importa Numba bajo demanda, así que PyInstaller no lo
+        # detecta por sí solo. Sin Numba instalado el binario ejecuta las funciones como Python.
+        if "castella_runtime.rapido" in codigo_python and importlib.util.find_spec("numba") is not None:
+            command += ["--hidden-import", "numba"]
+        # El módulo compilado con Cython se busca en su directorio de compilación.
+        if modulo_cython:
+            command += ["--paths", directorio_cython, "--hidden-import", modulo_cython]
+        # Los datos de los literales externalizados van junto al script dentro del binario.
+        if directorio_literales:
+            command += ["--add-data", f"{directorio_literales}{os.pathsep}{NOMBRE_DATOS_LITERALES}"]
+        command.append(temp_py_file_name)
 
         print(f"Ejecutando comando: {' '.join(command)}")
 
@@ -264,6 +409,10 @@ def generar_binario(codigo_castella: str, nombre_binario_salida: str) -> Optiona
              print("PyInstaller STDERR:\n", process.stderr)
         print("PyInstaller completado exitosamente.")
 
+        if formato == "onedir":
+            return instalar_onedir(os.path.join(pyinstaller_dist_dir_name, pyinstaller_project_name),
+                                   pyinstaller_project_name, nombre_binario_salida)
+
         # 4. Localizar el ejecutable generado y moverlo/renombrarlo si es necesario.
         # Con --onefile y --distpath ., PyInstaller deja el ejecutable directamente
         # en el directorio actual con el nombre especificado por --name (más la extensión del sistema).
@@ -353,9 +502,123 @@ def generar_binario(codigo_castella: str, nombre_binario_salida: str) -> Optiona
         print("\n--- Limpiando archivos temporales de PyInstaller (fase final) ---")
         # Llamar a la función de limpieza con el nombre del archivo temporal usado.
         limpiar_archivos_temp(temp_py_file_name, pyinstaller_build_dir_name)
+        if directorio_cython:
+            shutil.rmtree(directorio_cython, ignore_errors=True)
+        if directorio_literales:
+            shutil.rmtree(os.path.dirname(directorio_literales), ignore_errors=True)
         print("-----------------------------------------------------------------")
 
 
+def instalar_onedir(directorio_generado: str, nombre_proyecto: str, nombre_binario_salida: str) -> Optional[str]:
+    """
+    Coloca la salida de `PyInstaller --onedir` junto al destino y escribe su lanzador.
+
+    El directorio queda en `<salida>.dist` y el lanzador (script de shell, o `.cmd`
+    en Windows) en la ruta de salida pedida.
+
+    Args:
+        directorio_generado: Directorio que generó PyInstaller (`dist/<proyecto>`).
+        nombre_proyecto: Nombre del ejecutable dentro del directorio (sin extensión).
+        nombre_binario_salida: Ruta de salida pedida por el usuario.
+
+    Returns:
+        La ruta absoluta del lanzador, o None si algo falló.
+    """
+    ejecutable = nombre_proyecto + ('.exe' if sys.platform.startswith('win') else '')
+    if not os.path.isfile(os.path.join(directorio_generado, ejecutable)):
+        print(f"Error: No se encontró el ejecutable esperado '{ejecutable}' en '{directorio_generado}' después de la construcción de PyInstaller.")
+        return None
+
+    base_salida = os.path.abspath(nombre_binario_salida)
+    if base_salida.lower().endswith('.exe'):
+        base_salida = base_salida[:-4]
+    destino = base_salida + ".dist"
+    try:
+        if os.path.isdir(destino):
+            shutil.rmtree(destino)
+        shutil.move(directorio_generado, destino)
+        ruta_lanzador = escribir_lanzador(nombre_binario_salida, os.path.join(os.path.basename(destino), ejecutable))
+    except OSError as e:
+        print(f"Error al instalar el directorio generado en '{destino}': {e}")
+        return None
+
+    # Quitar el directorio 'dist' de PyInstaller si quedó vacío.
+    try:
+        os.rmdir(os.path.dirname(os.path.abspath(directorio_generado)))
+    except OSError:
+        pass
+    print(f"\nDirectorio del programa: '{destino}'")
+    print(f"Lanzador: '{ruta_lanzador}'")
+    return ruta_lanzador
+
+
+def escribir_lanzador(ruta_lanzador: str, ejecutable_relativo: str) -> str:
+    """
+    Escribe un lanzador que ejecuta `ejecutable_relativo` (relativo al lanzador)
+    con los mismos argumentos.
+
+    Returns:
+        La ruta absoluta del lanzador (en Windows, con extensión `.cmd`).
+    """
+    if sys.platform.startswith('win'):
+        ruta_lanzador = os.path.splitext(ruta_lanzador)[0] + ".cmd"
+        contenido = f'@"%~dp0{ejecutable_relativo}" %*\r\n'
+    else:
+        contenido = f'#!/bin/sh\nexec "$(dirname "$0")/{ejecutable_relativo}" "$@"\n'
+    with open(ruta_lanzador, "w", encoding="utf-8", newline="") as archivo:
+        archivo.write(contenido)
+    os.chmod(ruta_lanzador, 0o755)
+    return os.path.abspath(ruta_lanzador)
+
+
+def generar_zipapp(codigo_python: str, nombre_binario_salida: str,
+                   directorio_datos: Optional[str] = None) -> Optional[str]:
+    """
+    Empaqueta el programa como aplicación zip de Python (`.pyz`).
+
+    El archivo contiene el programa (`__main__.py`) y `castella_runtime`, pero no el
+    intérprete ni las dependencias (NumPy, Matplotlib...), que deben estar instaladas.
+    Incluye el bytecode ya compilado (.pyc) junto a cada .py: zipimport no puede
+    escribir cachés dentro del archivo y, sin él, cada arranque recompilaría todo.
+
+    Args:
+        codigo_python: Código Python generado.
+        nombre_binario_salida: Ruta de salida (se usa la extensión `.pyz`).
+        directorio_datos: Directorio de literales externalizados (ver castella_literales),
+                          que se incluye junto a `__main__.py` con su mismo nombre.
+
+    Returns:
+        La ruta absoluta del `.pyz`, o None si falló.
+    """
+    ruta_salida = nombre_binario_salida
+    raiz, extension = os.path.splitext(ruta_salida)
+    if extension.lower() != ".pyz":
+        ruta_salida = (raiz if extension.lower() == ".exe" else ruta_salida) + ".pyz"
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="castella_zipapp_") as directorio:
+            with open(os.path.join(directorio, "__main__.py"), "w", encoding="utf-8") as archivo:
+                archivo.write(codigo_python)
+            shutil.copytree(os.path.join(DIRECTORIO_RUNTIME, "castella_runtime"),
+                            os.path.join(directorio, "castella_runtime"),
+                            ignore=shutil.ignore_patterns("__pycache__", "*.pyc"))
+            if directorio_datos:
+                shutil.copytree(directorio_datos, os.path.join(directorio, os.path.basename(directorio_datos)))
+            for carpeta, _, archivos in os.walk(directorio):
+                for nombre in archivos:
+                    if nombre.endswith(".py"):
+                        fuente = os.path.join(carpeta, nombre)
+                        # dfile: nombre que verán los tracebacks (no la ruta temporal).
+                        py_compile.compile(fuente, cfile=fuente + "c", dfile=os.path.relpath(fuente, directorio), doraise=True)
+            zipapp.create_archive(directorio, ruta_salida, interpreter="/usr/bin/env python3", compressed=True)
+    except (OSError, py_compile.PyCompileError, zipapp.ZipAppError) as e:
+        print(f"Error al generar la aplicación zip '{ruta_salida}': {e}")
+        return None
+
+    print(f"\nAplicación zip generada: '{ruta_salida}' (requiere Python {sys.version_info.major}.{sys.version_info.minor} y las dependencias del programa).")
+    return os.path.abspath(ruta_salida)
+
+
 def comprimir_binario(nombre_binario_path: str):
     """
     Comprime un archivo binario existente usando la herramienta UPX.
@@ -422,4 +685,4 @@ def comprimir_binario(nombre_binario_path: str):
         traceback.print_exc()
 
 # No se incluye `if __name__ == "__main__":` en este archivo, ya que es un módulo
-# diseñado para ser importado. La lógica principal de ejecución está en `castella_compiler.py`.
\ No newline at end of file
+# diseñado para ser importado. La lógica principal de ejecución está en `castella_compiler.py`.
\ No newline at end of file
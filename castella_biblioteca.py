@@ -0,0 +1,286 @@
+# castella_biblioteca.py
+
+"""
+Modo biblioteca: compila un proyecto Castella a un paquete de Python importable (`--biblioteca`).
+
+Cada archivo `.castella` se traduce a un módulo del paquete (los subdirectorios se
+convierten en subpaquetes) y se precompila a `.pyc`, de modo que un servicio en
+Python puede importar las funciones Castella y llamarlas en su propio proceso, sin
+lanzar un binario por llamada:
+
+    proyecto/                   destino/
+        calculo.castella   =>       mi_paquete/__init__.py
+        util/texto.castella             mi_paquete/calculo.py (+ .map, __pycache__/)
+                                        mi_paquete/util/texto.py
+                                    castella_runtime/
+
+    import mi_paquete.calculo
+    mi_paquete.calculo.puntuar(datos)
+
+Como en cualquier módulo de Python, las sentencias de nivel superior de cada archivo
+se ejecutan al importarlo. Las importaciones entre módulos del proyecto
+(`importar calculo;`, `desde util.texto importar limpiar;`) se reescriben para que
+apunten al paquete generado.
+"""
+
+import ast
+import compileall
+import os
+import py_compile
+import re
+import shutil
+import sys
+from typing import Dict, Iterable, List, Optional
+
+try:
+    from .castella_parser import traducir_con_mapa
+    from .castella_transformer import CastellaTransformer
+except ImportError as e:
+    print("\nError de Importación en castella_biblioteca:")
+    print("No se pudo importar 'traducir_con_mapa' desde 'castella_parser.py' o 'CastellaTransformer' desde 'castella_transformer.py'.")
+    print(f"Detalle: {e}")
+    sys.exit(1)
+
+# Directorio que contiene `castella_runtime`, que se copia junto al paquete.
+DIRECTORIO_RUNTIME = os.path.dirname(os.path.abspath(__file__))
+
+# Primera línea del `__init__.py` generado: identifica los paquetes que se pueden regenerar.
+CABECERA_PAQUETE = "# Paquete generado por CastellaScript (--biblioteca)."
+
+_PATRON_IDENTIFICADOR = re.compile(r"[A-Za-z_]\w*$")
+
+
+def _modulos_reservados() -> frozenset:
+    """
+    Módulos de primer nivel que importa todo código generado (el preámbulo y castella_runtime).
+    """
+    nombres = {"castella_runtime"}
+    for nodo in ast.walk(ast.parse(CastellaTransformer().preambulo())):
+        if isinstance(nodo, ast.Import):
+            nombres.update(alias.name.split(".")[0] for alias in nodo.names)
+        elif isinstance(nodo, ast.ImportFrom) and nodo.module:
+            nombres.add(nodo.module.split(".")[0])
+    return frozenset(nombres)
+
+
+# Un módulo del proyecto con uno de estos nombres haría que `reescribir_importaciones`
+# desviara al paquete las importaciones del preámbulo (`import math`).
+MODULOS_RESERVADOS = _modulos_reservados()
+
+
+def modulos_proyecto(entradas: Iterable[str]) -> Dict[str, str]:
+    """
+    Reúne los módulos de un proyecto Castella.
+
+    Args:
+        entradas: Archivos `.castella` o directorios (se recorren recursivamente; la
+                  ruta relativa de cada archivo determina su módulo, p. ej.
+                  `util/texto.castella` -> `util.texto`).
+
+    Returns:
+        Nombre de módulo (con puntos) -> ruta del archivo `.castella`, en orden.
+
+    Raises:
+        ValueError: Si una entrada no existe, si un nombre no es un identificador
+                    válido de Python o coincide con un módulo que importa el código
+                    generado (`MODULOS_RESERVADOS`), o si dos archivos producen el mismo módulo.
+    """
+    modulos: Dict[str, str] = {}
+
+    def agregar(nombre_modulo: str, ruta: str):
+        for parte in nombre_modulo.split("."):
+            if not _PATRON_IDENTIFICADOR.match(parte):
+                raise ValueError(f"'{ruta}': '{parte}' no es un nombre de módulo válido de Python.")
+        primero = nombre_modulo.split(".")[0]
+        if primero in MODULOS_RESERVADOS:
+            raise ValueError(f"'{ruta}': '{primero}' es un módulo que importa el código generado; "
+                             "cambie el nombre del archivo o del directorio.")
+        if nombre_modulo in modulos:
+            raise ValueError(f"Los archivos '{modulos[nombre_modulo]}' y '{ruta}' producen el mismo módulo '{nombre_modulo}'.")
+        modulos[nombre_modulo] = ruta
+
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            for carpeta, subcarpetas, archivos in os.walk(entrada):
+                subcarpetas.sort()
+                for archivo in sorted(archivos):
+                    if archivo.endswith(".castella"):
+                        relativa = os.path.relpath(os.path.join(carpeta, archivo), entrada)
+                        agregar(os.path.splitext(relativa)[0].replace(os.sep, "."), os.path.join(carpeta, archivo))
+        elif os.path.isfile(entrada):
+            agregar(os.path.splitext(os.path.basename(entrada))[0], entrada)
+        else:
+            raise ValueError(f"La entrada '{entrada}' no existe.")
+    if not modulos:
+        raise ValueError("No se encontró ningún archivo .castella en las entradas.")
+    return modulos
+
+
+def reescribir_importaciones(codigo_python: str, nombre_paquete: str, locales: Iterable[str]) -> str:
+    """
+    Hace que las importaciones de módulos del proyecto apunten al paquete generado.
+
+    `import calculo` pasa a `from paquete import calculo`, `import util.texto` a
+    `import paquete.util.texto; from paquete import util` (enlaza el mismo nombre)
+    y `from util.texto import f` a `from paquete.util.texto import f`. Cada
+    importación se reescribe en su propia línea, así el mapa de fuente sigue siendo válido.
+
+    Args:
+        codigo_python: Código generado de un módulo.
+        nombre_paquete: Nombre del paquete generado.
+        locales: Nombres de primer nivel de los módulos y subpaquetes del proyecto.
+
+    Returns:
+        El código con las importaciones reescritas.
+    """
+    locales = set(locales)
+    lineas = codigo_python.splitlines(keepends=True)
+    reemplazos = []
+    for nodo in ast.walk(ast.parse(codigo_python)):
+        if isinstance(nodo, ast.Import):
+            if not any(alias.name.split(".")[0] in locales for alias in nodo.names):
+                continue
+            sentencias = []
+            for alias in nodo.names:
+                primero = alias.name.split(".")[0]
+                if primero not in locales:
+                    sentencias.append(f"import {alias.name}" + (f" as {alias.asname}" if alias.asname else ""))
+                elif alias.asname:
+                    sentencias.append(f"import {nombre_paquete}.{alias.name} as {alias.asname}")
+                elif "." in alias.name:
+                    sentencias.append(f"import {nombre_paquete}.{alias.name}; from {nombre_paquete} import {primero}")
+                else:
+                    sentencias.append(f"from {nombre_paquete} import {primero}")
+            reemplazos.append((nodo, "; ".join(sentencias)))
+        elif isinstance(nodo, ast.ImportFrom) and nodo.level == 0 and nodo.module and nodo.module.split(".")[0] in locales:
+            nombres = ", ".join(alias.name + (f" as {alias.asname}" if alias.asname else "") for alias in nodo.names)
+            reemplazos.append((nodo, f"from {nombre_paquete}.{nodo.module} import {nombres}"))
+
+    # De abajo hacia arriba para no desplazar las columnas de los reemplazos pendientes.
+    for nodo, texto in sorted(reemplazos, key=lambda r: (r[0].lineno, r[0].col_offset), reverse=True):
+        if nodo.lineno != nodo.end_lineno:
+            continue # El transformer emite cada importación en una línea.
+        linea = lineas[nodo.lineno - 1]
+        lineas[nodo.lineno - 1] = linea[:nodo.col_offset] + texto + linea[nodo.end_col_offset:]
+    return "".join(lineas)
+
+
+def codigo_init(nombre_paquete: str, submodulos: List[str]) -> str:
+    """
+    Genera el `__init__.py` de un paquete o subpaquete.
+
+    Los submódulos no se importan al importar el paquete (sus sentencias de nivel
+    superior se ejecutarían): se cargan al accederlos como atributo (PEP 562).
+    """
+    return (
+        f"{CABECERA_PAQUETE}\n"
+        f'"""Módulos Castella de {nombre_paquete}: {", ".join(submodulos)}."""\n'
+        "\n"
+        "import importlib\n"
+        "\n"
+        f"__all__ = {submodulos!r}\n"
+        "\n"
+        "\n"
+        "def __getattr__(nombre):\n"
+        "    if nombre in __all__:\n"
+        "        return importlib.import_module(f\"{__name__}.{nombre}\")\n"
+        "    raise AttributeError(f\"el módulo {__name__!r} no tiene el atributo {nombre!r}\")\n"
+    )
+
+
+def generar_biblioteca(entradas: Iterable[str], nombre_paquete: str, directorio_destino: str = ".",
+                       nivel_optimizacion: int = 0, rapido: bool = False) -> Optional[str]:
+    """
+    Traduce un proyecto Castella a un paquete de Python con bytecode precompilado.
+
+    El paquete se escribe en `<directorio_destino>/<nombre_paquete>` (si ya existía un
+    paquete generado con ese nombre, se reemplaza) y `castella_runtime` se copia en
+    `<directorio_destino>`, que es el directorio que hay que añadir a `sys.path` (o a
+    PYTHONPATH) del servicio.
+
+    Args:
+        entradas: Archivos `.castella` o directorios del proyecto (ver `modulos_proyecto`).
+        nombre_paquete: Nombre del paquete de Python generado.
+        directorio_destino: Directorio donde se crea el paquete.
+        nivel_optimizacion: Nivel de optimización de la traducción.
+        rapido: Compila con Numba las funciones numéricas.
+
+    Returns:
+        La ruta absoluta del paquete generado, o None si falló.
+    """
+    if not _PATRON_IDENTIFICADOR.match(nombre_paquete):
+        print(f"Error: '{nombre_paquete}' no es un nombre de paquete válido de Python.")
+        return None
+    try:
+        modulos = modulos_proyecto(entradas)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+
+    ruta_paquete = os.path.join(directorio_destino, nombre_paquete)
+    if os.path.exists(ruta_paquete):
+        ruta_init = os.path.join(ruta_paquete, "__init__.py")
+        generado = False
+        if os.path.isfile(ruta_init):
+            with open(ruta_init, encoding="utf-8") as archivo:
+                generado = archivo.readline().rstrip("\n") == CABECERA_PAQUETE
+        if not generado:
+            print(f"Error: '{ruta_paquete}' ya existe y no es un paquete generado por --biblioteca. No se sobrescribe.")
+            return None
+        shutil.rmtree(ruta_paquete)
+
+    # Nombres de primer nivel del proyecto (módulos y subpaquetes) para reescribir importaciones.
+    locales = {nombre.split(".")[0] for nombre in modulos}
+    # Paquete (con puntos, "" para la raíz) -> submódulos y subpaquetes directos.
+    paquetes: Dict[str, List[str]] = {"": []}
+
+    print(f"\n--- Generando el paquete '{nombre_paquete}' ({len(modulos)} módulo(s)) ---")
+    for nombre_modulo, ruta_castella in modulos.items():
+        partes = nombre_modulo.split(".")
+        for nivel in range(len(partes)):
+            padre = ".".join(partes[:nivel])
+            paquetes.setdefault(padre, [])
+            if partes[nivel] not in paquetes[padre]:
+                paquetes[padre].append(partes[nivel])
+
+        ruta_python = os.path.join(ruta_paquete, *partes) + ".py"
+        try:
+            with open(ruta_castella, "r", encoding="utf-8") as archivo:
+                codigo_castella = archivo.read()
+            codigo_python, mapa = traducir_con_mapa(codigo_castella, os.path.basename(ruta_castella),
+                                                    os.path.basename(ruta_python), nivel_optimizacion=nivel_optimizacion,
+                                                    rapido=rapido)
+        except Exception as e:
+            print(f"La traducción de '{ruta_castella}' falló: {type(e).__name__}: {e}")
+            return None
+
+        os.makedirs(os.path.dirname(ruta_python), exist_ok=True)
+        with open(ruta_python, "w", encoding="utf-8") as archivo:
+            archivo.write(reescribir_importaciones(codigo_python, nombre_paquete, locales))
+        mapa.guardar(ruta_python + ".map")
+        print(f"  {ruta_castella} -> {nombre_paquete}.{nombre_modulo}")
+
+    for paquete, submodulos in paquetes.items():
+        ruta_init = os.path.join(ruta_paquete, *filter(None, paquete.split(".")), "__init__.py")
+        with open(ruta_init, "w", encoding="utf-8") as archivo:
+            archivo.write(codigo_init(".".join(filter(None, [nombre_paquete, paquete])), submodulos))
+
+    destino_runtime = os.path.join(directorio_destino, "castella_runtime")
+    origen_runtime = os.path.join(DIRECTORIO_RUNTIME, "castella_runtime")
+    if os.path.abspath(destino_runtime) != os.path.abspath(origen_runtime):
+        shutil.copytree(origen_runtime, destino_runtime, dirs_exist_ok=True,
+                        ignore=shutil.ignore_patterns("__pycache__", "*.pyc"))
+
+    # Los .pyc basados en hash siguen siendo válidos al copiar el paquete a otra máquina
+    # (los basados en la fecha de modificación se invalidarían y se recompilarían).
+    modo = py_compile.PycInvalidationMode.CHECKED_HASH
+    exito = compileall.compile_dir(ruta_paquete, quiet=1, invalidation_mode=modo)
+    if os.path.isdir(destino_runtime):
+        exito = compileall.compile_dir(destino_runtime, quiet=1, invalidation_mode=modo) and exito
+    if not exito:
+        print("Error: no se pudo precompilar el paquete generado.")
+        return None
+
+    print(f"\nPaquete generado en '{ruta_paquete}'. Añade '{os.path.abspath(directorio_destino)}' a sys.path y usa:")
+    print(f"    import {nombre_paquete}.{next(iter(modulos))}")
+    return os.path.abspath(ruta_paquete)
@@ -9,15 +9,34 @@ lee el archivo de entrada y orquesta el proceso de traducción y empaquetado.
 import sys # Para acceder a los argumentos de línea de comandos y salir del programa.
 import os  # Para operar con rutas de archivos y directorios (ej. os.path.splitext, os.path.basename, os.getcwd).
 import shutil # Importar para operaciones como os.path.isfile o shutil.which (aunque check_dependency lo usa internamente).
+from typing import Optional
 
 # Importar las funciones clave y utilidades de nuestros módulos de backend y parser.
 # Usamos importaciones relativas ya que se espera que estos archivos estén juntos en un paquete.
 try:
     # Importar la función principal para generar el binario y la función para comprimir.
-    from .castella_backend import generar_binario, comprimir_binario, check_dependency
+    from .castella_backend import generar_binario, comprimir_binario, check_dependency, FORMATOS_SALIDA
     # Importar traducir_a_python (aunque generar_binario la llama internamente,
     # mantener la importación podría ser útil si se añade una opción solo de traducción).
     from .castella_parser import traducir_a_python # Importada aquí para verificación de dependencia 'lark' también.
+    # Traducción con mapa de fuente, usada por --traducir.
+    from .castella_parser import traducir_con_mapa
+    # Ejecución directa (sin binario), usada por --ejecutar.
+    from .castella_ejecucion import ejecutar_programa
+    # Niveles de optimización aceptados por -O.
+    from .castella_optimizador import NIVELES_OPTIMIZACION
+    # Paquete de Python importable a partir de varios módulos, usado por --biblioteca.
+    from .castella_biblioteca import generar_biblioteca
+    # Traducción en paralelo de archivos grandes, usada por --traducir --fragmentar.
+    from .castella_fragmentos import traducir_fragmentado
+    # Literales grandes en archivos de datos, usada por --literales-externos.
+    from .castella_literales import externalizar_literales, LINEAS_INSERTADAS, UMBRAL_POR_DEFECTO
+    # Salida de `imprimir` en búfer, usada por --imprimir.
+    from .castella_salida import configuracion_salida, instrumentar_salida, describir as describir_salida
+    from .castella_salida import LINEAS_INSERTADAS as LINEAS_SALIDA
+    # Gráficos en archivos y reducción de series, usada por --graficar y --graficar-puntos.
+    from .castella_graficos import configuracion_graficos, instrumentar_graficos
+    from .castella_graficos import LINEAS_INSERTADAS as LINEAS_GRAFICOS
 except ImportError as e:
     # Si falla la importación de cualquier módulo nuestro, el programa no puede continuar.
     print("\nError de Importación:")
@@ -32,6 +51,259 @@ except ImportError as e:
 # ya que los usamos a través de las funciones importadas de los otros módulos,
 # y sus dependencias se verifican en los módulos correspondientes o en check_dependency.
 
+# Opciones `--nombre` que acepta la línea de comandos (ver `main`).
+OPCIONES_VALIDAS = (
+    "biblioteca", "cython", "destino", "ejecutar", "formato", "fragmentar", "graficar",
+    "graficar-puntos", "imprimir", "literales-externos", "memoria", "perfilar",
+    "perfilar-reglas", "rapido", "traducir",
+)
+
+
+def separar_opciones(argumentos: list[str]) -> tuple[list[str], dict[str, Optional[str]]]:
+    """
+    Separa los argumentos posicionales de las opciones de línea de comandos.
+
+    Las opciones tienen la forma `--nombre` o `--nombre=valor`; el nivel de
+    optimización se indica como `-O0`, `-O1` o `-O2` (se guarda como opción "O").
+    Los argumentos posicionales (archivo de entrada, nombre de salida, compresión)
+    conservan su orden.
+
+    Args:
+        argumentos: La lista de argumentos (normalmente sys.argv[1:]).
+
+    Returns:
+        Una tupla (posicionales, opciones), donde opciones mapea el nombre de la
+        opción (sin guiones) a su valor, o a None si se dio sin valor.
+
+    Raises:
+        ValueError: Si una opción no está en `OPCIONES_VALIDAS` (p. ej. `--ejecuta`,
+                    que si no acabaría generando un binario completo).
+    """
+    posicionales = []
+    opciones = {}
+    for argumento in argumentos:
+        if argumento.startswith("--") and len(argumento) > 2:
+            nombre, _, valor = argumento[2:].partition("=")
+            if nombre not in OPCIONES_VALIDAS:
+                raise ValueError(f"Opción desconocida: --{nombre}. Opciones: "
+                                 + ", ".join(f"--{opcion}" for opcion in OPCIONES_VALIDAS))
+            opciones[nombre] = valor if valor else None
+        elif argumento.startswith("-O"):
+            opciones["O"] = argumento[2:]
+        else:
+            posicionales.append(argumento)
+    return posicionales, opciones
+
+
+def perfilar_reglas(codigo_castella: str, ruta_trace: Optional[str]) -> bool:
+    """
+    Traduce el código con el transformer instrumentado y muestra el coste por regla.
+
+    Args:
+        codigo_castella: El código fuente Castella.
+        ruta_trace: Si se indica, se escribe también un Chrome Trace en esta ruta.
+
+    Returns:
+        True si la traducción se completó, False en caso contrario.
+    """
+    # Importación diferida: la instrumentación sólo se carga cuando se solicita.
+    from .castella_instrumentacion import perfilar_traduccion
+
+    print("\n--- Perfilando la traducción regla a regla ---")
+    try:
+        _, perfil = perfilar_traduccion(codigo_castella, registrar_eventos=ruta_trace is not None)
+    except Exception as e:
+        print(f"La traducción falló durante el perfilado: {type(e).__name__}: {e}")
+        return False
+
+    print(perfil.tabla(ordenar_por="propio", limite=30))
+    if ruta_trace:
+        perfil.guardar_chrome_trace(ruta_trace)
+        print(f"\nChrome Trace guardado en '{ruta_trace}' (ábrelo en chrome://tracing o https://ui.perfetto.dev).")
+    return True
+
+
+def nivel_optimizacion(opciones: dict[str, Optional[str]]) -> int:
+    """
+    Obtiene el nivel de optimización de las opciones (`-O0` por defecto).
+
+    Raises:
+        ValueError: Si el nivel indicado no es válido.
+    """
+    valor = opciones.get("O") or "0"
+    if not valor.isdigit() or int(valor) not in NIVELES_OPTIMIZACION:
+        raise ValueError(f"Nivel de optimización no válido: -O{valor}. Opciones: "
+                         + ", ".join(f"-O{nivel}" for nivel in NIVELES_OPTIMIZACION))
+    return int(valor)
+
+
+def formato_salida(opciones: dict[str, Optional[str]]) -> str:
+    """
+    Obtiene el formato del binario de las opciones (`--formato=onefile` por defecto).
+
+    Raises:
+        ValueError: Si el formato indicado no es válido.
+    """
+    valor = opciones.get("formato") or "onefile"
+    if valor not in FORMATOS_SALIDA:
+        raise ValueError(f"Formato de salida no válido: --formato={valor}. Opciones: {', '.join(FORMATOS_SALIDA)}")
+    return valor
+
+
+def procesos_fragmentado(opciones: dict[str, Optional[str]]) -> Optional[int]:
+    """
+    Obtiene los procesos de `--fragmentar[=procesos]` (None si no se pidió; 0 = uno por CPU).
+
+    Raises:
+        ValueError: Si el número de procesos no es válido.
+    """
+    if "fragmentar" not in opciones:
+        return None
+    valor = opciones["fragmentar"] or "0"
+    if not valor.isdigit():
+        raise ValueError(f"Número de procesos no válido: --fragmentar={valor}")
+    return int(valor)
+
+
+def umbral_literales(opciones: dict[str, Optional[str]]) -> Optional[int]:
+    """
+    Obtiene el umbral en bytes de `--literales-externos[=KiB]` (None si no se pidió).
+
+    Raises:
+        ValueError: Si el tamaño indicado no es válido.
+    """
+    if "literales-externos" not in opciones:
+        return None
+    valor = opciones["literales-externos"]
+    if valor is None:
+        return UMBRAL_POR_DEFECTO
+    if not valor.isdigit() or int(valor) < 1:
+        raise ValueError(f"Tamaño de literal no válido: --literales-externos={valor} (KiB, entero positivo)")
+    return int(valor) * 1024
+
+
+def salida_imprimir(opciones: dict[str, Optional[str]]) -> Optional[dict]:
+    """
+    Obtiene la configuración de `--imprimir[=modo[:valor]]` (None si no se pidió).
+
+    Raises:
+        ValueError: Si el modo o su valor no son válidos.
+    """
+    if "imprimir" not in opciones:
+        return None
+    return configuracion_salida(opciones["imprimir"])
+
+
+def configuracion_graficar(opciones: dict[str, Optional[str]]) -> Optional[dict]:
+    """
+    Obtiene la configuración de `--graficar` y `--graficar-puntos` (None si no se pidió ninguna).
+
+    Raises:
+        ValueError: Si algún valor no es válido.
+    """
+    if "graficar" not in opciones and "graficar-puntos" not in opciones:
+        return None
+    return configuracion_graficos(opciones.get("graficar"), opciones.get("graficar-puntos"))
+
+
+def traducir_archivo(codigo_castella: str, archivo_castella: str, archivo_python: Optional[str],
+                     nivel: int = 0, rapido: bool = False, procesos: Optional[int] = None,
+                     umbral: Optional[int] = None, salida: Optional[dict] = None,
+                     graficos: Optional[dict] = None) -> bool:
+    """
+    Traduce el código a un archivo .py y escribe su mapa de fuente en `<archivo>.py.map`.
+
+    Args:
+        codigo_castella: El código fuente Castella.
+        archivo_castella: Ruta del archivo Castella (se registra en el mapa).
+        archivo_python: Ruta del .py de salida. Si es None, se usa el nombre del archivo Castella.
+        nivel: Nivel de optimización de la traducción.
+        rapido: Compila con Numba las funciones con parámetros numéricos.
+        procesos: Si no es None, traduce el archivo por fragmentos en paralelo con este
+                  número de procesos (0 = uno por CPU; ver castella_fragmentos).
+        umbral: Si no es None, los literales constantes de al menos este tamaño (bytes)
+                se guardan en `<archivo>.datos/` junto al .py (ver castella_literales).
+        salida: Si no es None, configuración de la salida en búfer de `imprimir`
+                (`--imprimir`, ver castella_salida).
+        graficos: Si no es None, configuración de `graficar` (`--graficar`, ver castella_graficos).
+
+    Returns:
+        True si la traducción se completó, False en caso contrario.
+    """
+    if not archivo_python:
+        archivo_python = os.path.splitext(archivo_castella)[0] + ".py"
+    if procesos is not None:
+        resultado = traducir_fragmentado(codigo_castella, procesos or None, nivel_optimizacion=nivel, rapido=rapido,
+                                         con_mapa=True, nombre_fuente=os.path.basename(archivo_castella),
+                                         nombre_generado=os.path.basename(archivo_python))
+        if not resultado.exito:
+            for diagnostico in resultado.diagnosticos:
+                print(diagnostico)
+            print("La traducción falló.")
+            return False
+        codigo_python, mapa = resultado.codigo_python, resultado.mapa
+        print(f"Traducción fragmentada en {resultado.tiempos['total']:.2f} s.")
+    else:
+        try:
+            codigo_python, mapa = traducir_con_mapa(codigo_castella, os.path.basename(archivo_castella),
+                                                    os.path.basename(archivo_python), nivel_optimizacion=nivel,
+                                                    rapido=rapido)
+        except Exception:
+            print("La traducción falló.")
+            return False
+
+    if umbral is not None:
+        directorio_datos = os.path.splitext(archivo_python)[0] + ".datos"
+        codigo_python, archivos = externalizar_literales(codigo_python, directorio_datos, umbral)
+        if archivos:
+            mapa = mapa.desplazar(LINEAS_INSERTADAS)
+            print(f"{len(archivos)} literales grandes guardados en '{directorio_datos}' (debe acompañar al .py).")
+
+    if salida is not None:
+        codigo_python = instrumentar_salida(codigo_python, salida)
+        mapa = mapa.desplazar(LINEAS_SALIDA)
+
+    if graficos is not None:
+        codigo_python = instrumentar_graficos(codigo_python, graficos)
+        mapa = mapa.desplazar(LINEAS_GRAFICOS)
+
+    with open(archivo_python, "w", encoding="utf-8") as f:
+        f.write(codigo_python)
+    mapa.guardar(archivo_python + ".map")
+    print(f"\nCódigo Python guardado en '{archivo_python}' (mapa de fuente: '{archivo_python}.map').")
+    return True
+
+
+def compilar_biblioteca(entradas: list[str], opciones: dict[str, Optional[str]], nivel: int = 0,
+                        rapido: bool = False) -> bool:
+    """
+    Genera un paquete de Python importable a partir de archivos o directorios Castella (--biblioteca).
+
+    Args:
+        entradas: Archivos `.castella` o directorios del proyecto.
+        opciones: Opciones de la línea de comandos (`biblioteca` = nombre del paquete,
+                  `destino` = directorio de salida).
+        nivel: Nivel de optimización de la traducción.
+        rapido: Compila con Numba las funciones con parámetros numéricos.
+
+    Returns:
+        True si el paquete se generó, False en caso contrario.
+    """
+    if not entradas:
+        print("Error: --biblioteca necesita al menos un archivo .castella o un directorio.")
+        return False
+    nombre_paquete = opciones.get("biblioteca")
+    if not nombre_paquete:
+        # Por defecto, el nombre del directorio (o archivo) de la primera entrada.
+        base = os.path.splitext(os.path.basename(os.path.normpath(entradas[0])))[0]
+        nombre_paquete = "".join(c if c.isalnum() or c == "_" else "_" for c in base) or "castella_paquete"
+        if nombre_paquete[0].isdigit():
+            nombre_paquete = "_" + nombre_paquete
+    directorio_destino = opciones.get("destino") or "."
+    os.makedirs(directorio_destino, exist_ok=True)
+    return generar_biblioteca(entradas, nombre_paquete, directorio_destino,
+                              nivel_optimizacion=nivel, rapido=rapido) is not None
+
 
 def main():
     """
@@ -43,6 +315,86 @@ def main():
     """
     print("=== COMPILADOR CASTELLA ===")
 
+    # --- Procesamiento de argumentos de línea de comandos ---
+    # Los argumentos posicionales esperados son:
+    # 1: Ruta al archivo Castella de entrada.
+    # 2: Nombre deseado para el archivo binario de salida (opcional).
+    # 3: Opción de compresión ("s" o "n") (opcional).
+    # Opciones:
+    # --perfilar-reglas[=trace.json]: Sólo traduce, mostrando el coste de cada regla del transformer.
+    # --ejecutar: Traduce y ejecuta el programa directamente, sin generar un binario.
+    # --traducir: Sólo traduce a .py (segundo argumento = ruta del .py) y escribe su mapa de fuente (.py.map).
+    # --fragmentar[=procesos]: Con --traducir, parte un archivo muy grande por sus elementos de
+    #           nivel superior y traduce los fragmentos en paralelo (por defecto, un proceso por CPU).
+    # --perfilar[=prefijo]: Perfila la ejecución (con --ejecutar, o dentro del binario generado)
+    #                       y reporta los puntos calientes en términos de Castella. Con prefijo,
+    #                       exporta además prefijo.prof (pstats) y prefijo.folded (flamegraph).
+    # --memoria[=prefijo]: Perfila la memoria con tracemalloc (con --ejecutar o en el binario):
+    #                      líneas Castella que más memoria retienen (incluidos buffers de NumPy)
+    #                      y picos de RSS. Con prefijo, guarda la línea de tiempo en prefijo.memoria.json.
+    # -O0 / -O1 / -O2: Nivel de optimización de la traducción (por defecto -O0). -O1 pliega
+    #                  constantes y elimina código inalcanzable; -O2 además poda ramas con
+    #                  condiciones literales y vectoriza con NumPy los bucles elemento a
+    #                  elemento sobre arreglos `Matriz`.
+    # --rapido: Compila con Numba (castella_runtime.rapido) las funciones cuyos parámetros
+    #           están anotados con tipos numéricos (int, float, Matriz, Lista[float], ...).
+    #           Las funciones que Numba rechaza se ejecutan como Python normal. En el
+    #           código fuente, `@rapido` hace lo mismo con una función concreta.
+    # --cython: Al generar el binario, compila el programa con Cython (funciones con tipos
+    #           escalares como `cpdef` tipadas) en un módulo de extensión y empaqueta éste.
+    #           Las funciones que Cython no puede tipar se compilan sin tipos; si el
+    #           módulo no compila, se empaqueta el Python traducido.
+    # --formato=onefile|onedir|zipapp: Formato del binario (por defecto onefile, un solo
+    #           ejecutable que se descomprime en cada arranque). onedir deja las dependencias
+    #           ya extraídas en <salida>.dist/ y un lanzador en <salida>: arranca mucho más
+    #           rápido. zipapp genera un .pyz para entornos con Python y las dependencias ya
+    #           instalados (no necesita PyInstaller). UPX sólo se aplica a onefile.
+    # --biblioteca[=paquete] [--destino=dir]: En lugar de un binario, traduce los archivos
+    #           .castella (o directorios) indicados como argumentos a un paquete de Python con
+    #           bytecode precompilado en dir/paquete, más castella_runtime en dir/. Un servicio
+    #           en Python puede importarlo y llamar a las funciones Castella en su propio proceso.
+    # --literales-externos[=KiB]: Con --traducir o al generar un binario, guarda los literales
+    #           constantes (listas, tuplas, diccionarios, conjuntos, np.array([...])) de al menos
+    #           KiB (por defecto 64) en archivos de datos que el programa carga al evaluarlos,
+    #           en lugar de compilarlos en el código (ver castella_literales).
+    # --imprimir[=modo[:valor]]: `imprimir` escribe cada línea de una vez en una salida con
+    #           búfer (con --ejecutar, --traducir o en el binario), que se vacía siempre al
+    #           terminar o ante una excepción. Modos: linea (al final de cada línea), bloque[:KiB]
+    #           (cada KiB de texto, 64 por defecto; el modo por defecto) y tiempo[:segundos]
+    #           (cada tantos segundos, 0.1 por defecto). Ver castella_salida.
+    # --graficar=ventana|archivo[:dir]|lote[:dir]: Cómo dibuja `graficar` (con --ejecutar,
+    #           --traducir o en el binario). ventana (por defecto) muestra cada gráfico y espera
+    #           a que se cierre; archivo escribe cada gráfico en dir/grafico_NNN.png sin ventana
+    #           ni bloqueo; lote reúne varios gráficos por figura en dir/figura_NNN.png (dir por
+    #           defecto: graficos).
+    # --graficar-puntos=N[:minmax|lttb]: Puntos máximos por serie de `graficar` (por defecto
+    #           4000; 0 = todos) y método de reducción de las series más largas (por defecto
+    #           minmax, que conserva los picos). Ver castella_graficos.
+    try:
+        posicionales, opciones = separar_opciones(sys.argv[1:])
+        nivel = nivel_optimizacion(opciones)
+        formato = formato_salida(opciones)
+        procesos = procesos_fragmentado(opciones)
+        umbral = umbral_literales(opciones)
+        salida = salida_imprimir(opciones)
+        graficos = configuracion_graficar(opciones)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    rapido = "rapido" in opciones
+    if salida is not None:
+        print(f"Salida de `imprimir` en búfer: {describir_salida(salida)}.")
+    cython = "cython" in opciones
+
+    # Perfiladores de ejecución solicitados, con el prefijo de sus archivos de salida.
+    perfiladores = {opcion: opciones[opcion] for opcion in ("perfilar", "memoria") if opcion in opciones}
+
+    # Los modos que no generan un binario no necesitan PyInstaller.
+    genera_binario = not any(modo in opciones for modo in ("perfilar-reglas", "ejecutar", "traducir", "biblioteca"))
+    if cython and not genera_binario:
+        print("Advertencia: --cython sólo se aplica al generar un binario; se ignora.")
+
     print("\n--- Verificando dependencias esenciales ---")
 
     # Verificar dependencias clave que necesita el proceso completo:
@@ -62,7 +414,7 @@ def main():
 
     # Verificación de PyInstaller (como comando en el PATH).
     # check_dependency imprime mensajes si falla. Usamos quiet=False para que el usuario vea el resultado.
-    pyinstaller_ok = check_dependency("pyinstaller", "Instálalo con: pip install pyinstaller", quiet=False)
+    pyinstaller_ok = check_dependency("pyinstaller", "Instálalo con: pip install pyinstaller", quiet=False) if genera_binario and formato != "zipapp" else True
 
     # Verificación de UPX (como comando en el PATH). Es opcional.
     # No salimos si falla, solo informamos. Usamos quiet=True para un mensaje más conciso aquí.
@@ -81,23 +433,22 @@ def main():
          print("Por favor, instálalas y asegúrate de que estén accesibles en tu entorno/PATH.")
          sys.exit(1) # Salir con un código de error.
 
-    # --- Procesamiento de argumentos de línea de comandos ---
-    # Los argumentos esperados son:
-    # sys.argv[1]: Ruta al archivo Castella de entrada.
-    # sys.argv[2]: Nombre deseado para el archivo binario de salida (opcional).
-    # sys.argv[3]: Opción de compresión ("s" o "n") (opcional).
+    # --- Modo biblioteca: todos los argumentos posicionales son entradas ---
+    if "biblioteca" in opciones:
+        exito = compilar_biblioteca(posicionales, opciones, nivel, rapido)
+        sys.exit(0 if exito else 1)
 
     input_file_arg = None
     output_name_arg = None
     compress_arg_str = None # Usamos un nombre claro para la cadena del argumento.
 
-    # Leer los argumentos si están presentes.
-    if len(sys.argv) > 1:
-        input_file_arg = sys.argv[1]
-    if len(sys.argv) > 2:
-        output_name_arg = sys.argv[2]
-    if len(sys.argv) > 3:
-        compress_arg_str = sys.argv[3].lower() # Leer el tercer argumento y convertir a minúsculas.
+    # Leer los argumentos posicionales si están presentes.
+    if len(posicionales) > 0:
+        input_file_arg = posicionales[0]
+    if len(posicionales) > 1:
+        output_name_arg = posicionales[1]
+    if len(posicionales) > 2:
+        compress_arg_str = posicionales[2].lower() # Leer el tercer argumento y convertir a minúsculas.
 
     # --- Obtener la ruta del archivo de entrada Castella ---
     archivo_castella_path = input_file_arg
@@ -122,7 +473,7 @@ def main():
 
     # --- Obtener el nombre deseado para el binario de salida ---
     nombre_binario_salida = output_name_arg
-    if not nombre_binario_salida:
+    if genera_binario and not nombre_binario_salida:
          # Si no se proporcionó el nombre de salida como argumento, solicitarlo al usuario.
          # Ofrecer un nombre por defecto basado en el nombre del archivo de entrada.
          base_name = os.path.splitext(os.path.basename(archivo_castella_path))[0]
@@ -160,17 +511,56 @@ def main():
         sys.exit(1) # Salir con un código de error.
 
 
+    # --- Modos que sólo traducen (sin generar binario) ---
+    if "perfilar-reglas" in opciones:
+        exito = perfilar_reglas(codigo_castella, opciones["perfilar-reglas"])
+        sys.exit(0 if exito else 1)
+
+    if "traducir" in opciones:
+        exito = traducir_archivo(codigo_castella, archivo_castella_path, output_name_arg, nivel, rapido, procesos, umbral,
+                                 salida, graficos)
+        sys.exit(0 if exito else 1)
+
+    if "ejecutar" in opciones:
+        codigo_salida = ejecutar_programa(
+            codigo_castella,
+            archivo_castella_path,
+            perfiladores=perfiladores,
+            nivel_optimizacion=nivel,
+            rapido=rapido,
+            salida=salida,
+            graficos=graficos,
+        )
+        sys.exit(codigo_salida)
+
+
     # --- Generar el ejecutable binario ---
     print("\n--- Iniciando proceso de generación de binario ---")
     # Llamar a la función principal del backend. Esta función se encarga de todo:
     # traducir (llamando al parser), guardar temporalmente, ejecutar PyInstaller.
     # Retorna la ruta al binario generado (o None si falló).
-    nombre_binario_generado_path = generar_binario(codigo_castella, nombre_binario_salida)
+    nombre_binario_generado_path = generar_binario(
+        codigo_castella,
+        nombre_binario_salida,
+        perfiladores=perfiladores,
+        nombre_fuente=os.path.basename(archivo_castella_path),
+        nivel_optimizacion=nivel,
+        rapido=rapido,
+        cython=cython,
+        formato=formato,
+        umbral_literales=umbral,
+        salida=salida,
+        graficos=graficos,
+    )
     print("--- Finalizado proceso de generación de binario ---")
 
     # --- Compresión Opcional con UPX ---
     # Solo intentar la compresión si la generación del binario fue exitosa.
-    if nombre_binario_generado_path:
+    # Con onedir/zipapp la salida es un lanzador o un .pyz: no hay nada que comprimir.
+    if nombre_binario_generado_path and formato != "onefile":
+         if compress_arg_str in ("s", "si"):
+              print(f"\nLa compresión con UPX sólo se aplica al formato onefile (formato actual: {formato}). Saltando compresión.")
+    elif nombre_binario_generado_path:
          # Ya verificamos si UPX está disponible al inicio.
          if upx_available:
               # Determinar si se solicita la compresión (desde el argumento o interacción).
@@ -218,4 +608,4 @@ def main():
 # Bloque de entrada principal.
 # Esto asegura que la función main() se ejecute solo cuando el script se llama directamente.
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,176 @@
+# castella_cython.py
+
+"""
+Compilación de programas Castella a módulos de extensión con Cython (`--cython`).
+
+`construir_extension` traduce el programa con `traducir_a_cython`, compila el
+`.pyx` con Cython y el compilador de C local y devuelve la ruta del módulo de
+extensión. Si Cython rechaza una función tipada, esa función se vuelve a generar
+sin tipos y se reintenta (fallback por función); si ni siquiera el módulo sin
+tipos compila, devuelve None y el llamador usa el backend de Python.
+"""
+
+import importlib.machinery
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .castella_parser import traducir_a_cython
+except ImportError as e:
+    print("\nError de Importación en castella_cython:")
+    print("No se pudo importar 'traducir_a_cython' desde 'castella_parser.py'.")
+    print(f"Detalle: {e}")
+    sys.exit(1)
+
+# Compilaciones máximas por programa (cada intento descarta al menos una función tipada).
+MAX_INTENTOS = 10
+
+# Error de Cython: `programa.pyx:12:8: Cannot assign type 'double' to 'long'`.
+_PATRON_ERROR = re.compile(r"\.pyx:(\d+):\d+: (.+)$")
+# Cabecera de una función tipada: `cpdef double f(...)` / `cpdef f(...)`.
+_PATRON_CPDEF = re.compile(r"cpdef (?:[\w ]+ )?(\w+)\(")
+
+
+def cython_disponible() -> bool:
+    """
+    Indica si Cython está instalado (el compilador de C se comprueba al compilar).
+    """
+    return importlib.util.find_spec("Cython") is not None
+
+
+def nombre_modulo_extension(nombre: str) -> str:
+    """
+    Convierte un nombre de programa en un nombre de módulo de extensión válido.
+    """
+    base = re.sub(r"\W", "_", os.path.splitext(os.path.basename(nombre))[0])
+    return f"castella_{base or 'programa'}"
+
+
+def rangos_funciones(codigo_pyx: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Líneas (desde 1, inclusivas) de cada función `cpdef` de nivel superior,
+    incluidos los decoradores que la preceden.
+    """
+    rangos = {}
+    lineas = codigo_pyx.splitlines()
+    actual = None # (nombre, primera línea)
+    inicio_decoradores = None
+    for numero, linea in enumerate(lineas, 1):
+        if not linea or linea[0].isspace():
+            continue
+        if actual:
+            rangos[actual[0]] = (actual[1], numero - 1)
+            actual = None
+        if linea.startswith("@"):
+            inicio_decoradores = inicio_decoradores or numero
+            continue
+        coincidencia = _PATRON_CPDEF.match(linea)
+        if coincidencia:
+            actual = (coincidencia.group(1), inicio_decoradores or numero)
+        inicio_decoradores = None
+    if actual:
+        rangos[actual[0]] = (actual[1], len(lineas))
+    return rangos
+
+
+def compilar_pyx(codigo_pyx: str, nombre_modulo: str, directorio: str) -> Tuple[Optional[str], List[Tuple[int, str]], str]:
+    """
+    Compila un módulo Cython en `directorio` con `cythonize -i`.
+
+    Returns:
+        Una tupla `(ruta_extension, errores, salida)`: la ruta del módulo compilado
+        (None si falló), los errores de Cython como `(línea, mensaje)` y la salida
+        completa del compilador.
+    """
+    ruta_pyx = os.path.join(directorio, nombre_modulo + ".pyx")
+    with open(ruta_pyx, "w", encoding="utf-8") as archivo:
+        archivo.write(codigo_pyx)
+
+    proceso = subprocess.run([sys.executable, "-m", "Cython.Build.Cythonize", "-i", "-q", "-f", ruta_pyx],
+                             cwd=directorio, capture_output=True, text=True)
+    salida = proceso.stdout + proceso.stderr
+    errores = []
+    for linea in salida.splitlines():
+        coincidencia = _PATRON_ERROR.search(linea)
+        if coincidencia:
+            errores.append((int(coincidencia.group(1)), coincidencia.group(2)))
+
+    if proceso.returncode != 0:
+        return None, errores, salida
+    for sufijo in importlib.machinery.EXTENSION_SUFFIXES:
+        ruta_extension = os.path.join(directorio, nombre_modulo + sufijo)
+        if os.path.isfile(ruta_extension):
+            return ruta_extension, errores, salida
+    return None, errores, salida
+
+
+def construir_extension(codigo_castella: str, nombre_modulo: str, directorio: str,
+                        nivel_optimizacion: int = 0) -> Optional[str]:
+    """
+    Traduce y compila un programa Castella como módulo de extensión.
+
+    Args:
+        codigo_castella: Código fuente Castella.
+        nombre_modulo: Nombre del módulo de extensión (ver `nombre_modulo_extension`).
+        directorio: Directorio donde se escriben el `.pyx`, el `.c` y la extensión.
+        nivel_optimizacion: Nivel de optimización de la traducción.
+
+    Returns:
+        La ruta del módulo de extensión, o None si no se pudo compilar (el
+        programa debe usar entonces el backend de Python).
+
+    Raises:
+        Las mismas excepciones que `traducir_a_python` si la traducción falla.
+    """
+    if not cython_disponible():
+        print("Cython no está instalado (pip install cython). Se usará el backend de Python.")
+        return None
+
+    excluir = set()
+    for _ in range(MAX_INTENTOS):
+        codigo_pyx, tipadas = traducir_a_cython(codigo_castella, nivel_optimizacion, excluir)
+        ruta_extension, errores, salida = compilar_pyx(codigo_pyx, nombre_modulo, directorio)
+        if ruta_extension:
+            print(f"Módulo Cython compilado: '{os.path.basename(ruta_extension)}'.")
+            print(f"  Funciones tipadas: {', '.join(tipadas) if tipadas else '(ninguna)'}")
+            if excluir:
+                print(f"  Compiladas sin tipos: {', '.join(sorted(excluir))}")
+            return ruta_extension
+
+        # Fallback por función: descartar los tipos de las funciones con errores.
+        rangos = rangos_funciones(codigo_pyx)
+        culpables = {}
+        for linea, mensaje in errores:
+            for nombre, (inicio, fin) in rangos.items():
+                if inicio <= linea <= fin:
+                    culpables.setdefault(nombre, mensaje)
+        if not culpables:
+            print("Cython no pudo compilar el módulo. Se usará el backend de Python.")
+            print("\n".join(salida.strip().splitlines()[-15:]))
+            return None
+        for nombre, mensaje in culpables.items():
+            print(f"Cython rechazó los tipos de '{nombre}' ({mensaje}); se compilará sin tipos.")
+        excluir.update(culpables)
+
+    print(f"Cython no pudo compilar el módulo tras {MAX_INTENTOS} intentos. Se usará el backend de Python.")
+    return None
+
+
+def script_lanzador(codigo_python: str, nombre_modulo: str) -> str:
+    """
+    Genera el script de entrada de PyInstaller para un programa compilado con Cython.
+
+    PyInstaller no puede analizar las importaciones de un módulo de extensión, así
+    que el lanzador repite las importaciones de nivel superior del Python generado
+    (para que se empaqueten) y después importa la extensión, que ejecuta el programa.
+    """
+    lineas = ["# Lanzador del programa Castella compilado con Cython"]
+    for linea in codigo_python.splitlines():
+        if linea.startswith(("import ", "from ")) and not linea.startswith("from __future__"):
+            lineas.append(linea)
+    lineas.append(f"import {nombre_modulo}")
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,147 @@
+# castella_ejecucion.py
+
+"""
+Ejecución directa de programas Castella, sin generar un binario.
+
+Traduce el programa, compila el Python resultante con un nombre de archivo que
+identifica el origen (`<castella:programa.castella>`) y lo ejecuta en un espacio
+de nombres limpio, como si fuera el script principal. Es el modo que usa
+`castella_compiler --ejecutar` y sobre el que se apoyan las opciones de perfilado.
+"""
+
+import linecache
+import os
+import sys
+import traceback
+from typing import Any, Dict, Optional
+
+try:
+    from .castella_parser import traducir_con_mapa
+    from .castella_runtime.mapa_fuente import MapaFuente
+except ImportError as e:
+    print("\nError de Importación en castella_ejecucion:")
+    print("No se pudo importar 'castella_parser'.")
+    print(f"Detalle: {e}")
+    sys.exit(1)
+
+# Directorio que contiene el paquete `castella_runtime`.
+DIRECTORIO_RUNTIME = os.path.dirname(os.path.abspath(__file__))
+
+
+def asegurar_runtime_importable():
+    """
+    Añade el directorio de `castella_runtime` a sys.path para que el código
+    generado pueda importarlo igual que dentro de un binario.
+    """
+    if DIRECTORIO_RUNTIME not in sys.path:
+        sys.path.insert(0, DIRECTORIO_RUNTIME)
+
+
+def nombre_generado(archivo_castella: str) -> str:
+    """
+    Devuelve el `co_filename` con el que se compila el programa traducido.
+    """
+    return f"<castella:{os.path.basename(archivo_castella)}>"
+
+
+def registrar_fuente(nombre: str, codigo_python: str):
+    """
+    Registra el código generado en linecache para que los tracebacks muestren sus líneas.
+    """
+    lineas = codigo_python.splitlines(keepends=True)
+    linecache.cache[nombre] = (len(codigo_python), None, lineas, nombre)
+
+
+def _crear_perfilador(opcion: str, mapa: MapaFuente):
+    """
+    Crea el perfilador de castella_runtime correspondiente a una opción del compilador.
+
+    Returns:
+        Una tupla `(perfilador, escribir_resultados)`.
+    """
+    if opcion == "memoria":
+        from castella_runtime.memoria import PerfilMemoria, escribir_resultados
+        return PerfilMemoria(mapa.a_dict()), escribir_resultados
+    from castella_runtime.perfil import PerfilCastella, escribir_resultados
+    return PerfilCastella(mapa.a_dict()), escribir_resultados
+
+
+def ejecutar_programa(codigo_castella: str, archivo_castella: str,
+                      perfiladores: Optional[Dict[str, Optional[str]]] = None,
+                      nivel_optimizacion: int = 0, rapido: bool = False,
+                      salida: Optional[Dict[str, Any]] = None,
+                      graficos: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Traduce y ejecuta un programa Castella en el proceso actual.
+
+    Args:
+        codigo_castella: Código fuente Castella.
+        archivo_castella: Ruta del archivo (se usa en tracebacks y reportes).
+        perfiladores: Perfiladores a activar durante la ejecución ("perfilar" = tiempo
+                      con cProfile, "memoria" = tracemalloc), cada uno con el prefijo de
+                      sus archivos de salida (None = sólo reporte).
+        nivel_optimizacion: Nivel de optimización de la traducción (0, 1 o 2).
+        rapido: Compila con Numba las funciones con parámetros numéricos.
+        salida: Si no es None, argumentos de `castella_runtime.salida.activar`: el
+                programa imprime en una salida en búfer (`--imprimir`).
+        graficos: Si no es None, argumentos de `castella_runtime.graficos.configurar`
+                  (`--graficar`).
+
+    Returns:
+        El código de salida del programa (0 si terminó normalmente).
+    """
+    nombre = nombre_generado(archivo_castella)
+    try:
+        codigo_python, mapa = traducir_con_mapa(codigo_castella, os.path.basename(archivo_castella), nombre,
+                                                 nivel_optimizacion=nivel_optimizacion, rapido=rapido)
+        codigo_objeto = compile(codigo_python, nombre, "exec")
+    except Exception as e:
+        if isinstance(e, SyntaxError): # traducir_con_mapa ya reporta sus propios errores.
+            print(f"El código Python generado no es válido: {e}")
+        print("La traducción falló. No se ejecutará el programa.")
+        return 1
+
+    asegurar_runtime_importable()
+    registrar_fuente(nombre, codigo_python)
+    espacio = {"__name__": "__main__", "__file__": archivo_castella, "__builtins__": __builtins__}
+
+    # La memoria se activa primero y se detiene al final para no medir al perfilador de tiempo.
+    activos = []
+    for opcion in sorted(perfiladores or {}, key=lambda o: o != "memoria"):
+        perfilador, escribir_resultados = _crear_perfilador(opcion, mapa)
+        activos.append((perfilador, escribir_resultados, perfiladores[opcion]))
+
+    print(f"\n--- Ejecutando '{archivo_castella}' ---")
+    if salida is not None:
+        from castella_runtime.salida import activar, desactivar, vaciar
+        espacio["print"] = activar(**salida)
+    if graficos is not None:
+        from castella_runtime.graficos import configurar, guardar
+        configurar(**graficos)
+    codigo_salida = 0
+    for perfilador, _, _ in activos:
+        perfilador.iniciar()
+    try:
+        exec(codigo_objeto, espacio)
+    except SystemExit as e:
+        codigo_salida = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException as e:
+        if salida is not None:
+            vaciar() # La salida del programa va antes que el traceback.
+        traceback.print_exc()
+        ubicaciones = mapa.formatear_traceback(e.__traceback__)
+        if ubicaciones:
+            print("Ubicación en el código Castella (de la llamada más externa a la más interna):", file=sys.stderr)
+            for ubicacion in ubicaciones:
+                print(f"  {ubicacion}", file=sys.stderr)
+        codigo_salida = 1
+    finally:
+        if graficos is not None:
+            guardar() # Figura del lote en curso.
+        if salida is not None:
+            desactivar()
+        for perfilador, _, _ in reversed(activos):
+            perfilador.detener()
+        for perfilador, escribir_resultados, prefijo in activos:
+            escribir_resultados(perfilador, prefijo)
+    return codigo_salida
@@ -0,0 +1,337 @@
+# castella_embebido.py
+
+"""
+API para incrustar Castella en un programa de Python.
+
+`ejecutar` y `evaluar` traducen y compilan código Castella y lo ejecutan en el
+proceso actual. Los objetos código compilados se guardan en una caché LRU acotada,
+indexada por el hash del código fuente (y de las opciones de traducción): cuando un
+servicio evalúa muchas veces las mismas expresiones o reglas, sólo la primera paga
+el parseo con Lark, la transformación y `compile()`. El preámbulo fijo del código
+generado (imports de numpy, matplotlib...) se ejecuta una sola vez, en un espacio de
+nombres base que se copia a cada entorno: el código guardado es sólo el cuerpo.
+
+    from CastellaScript.castella_embebido import evaluar, ejecutar, estadisticas_cache
+
+    evaluar("edad >= 18 y pais == 'AR'", {"edad": 30, "pais": "AR"})   # True
+    entorno = ejecutar("funcion doble(x) { retornar x * 2; }")
+    entorno["doble"](21)                                                # 42
+    estadisticas_cache()   # {'aciertos': ..., 'fallos': ..., 'expulsiones': ..., ...}
+"""
+
+import ast
+import hashlib
+import linecache
+import sys
+import threading
+from collections import OrderedDict
+from types import CodeType
+from typing import Any, Dict, Optional
+
+try:
+    from .castella_traductor import traducir
+    from .castella_ejecucion import asegurar_runtime_importable, registrar_fuente
+    from .castella_transformer import CastellaTransformer
+except ImportError as e:
+    print("\nError de Importación en castella_embebido:")
+    print("No se pudieron importar 'castella_traductor', 'castella_ejecucion' o 'castella_transformer'.")
+    print(f"Detalle: {e}")
+    sys.exit(1)
+
+# Entradas de la caché global si no se configura otra capacidad.
+CAPACIDAD_POR_DEFECTO = 256
+
+# Variable en la que `evaluar` deja el valor de la expresión.
+NOMBRE_RESULTADO = "_castella_resultado"
+
+# Preámbulo fijo con el que empieza todo código generado.
+PREAMBULO = CastellaTransformer().preambulo()
+
+# Nombres que define PREAMBULO, una vez ejecutado (ver `espacio_base`).
+_base: Optional[Dict[str, Any]] = None
+_cerrojo_base = threading.Lock()
+
+
+class CacheCodigo:
+    """
+    Caché LRU de objetos código compilados, segura entre hilos.
+
+    Attributes:
+        aciertos: Búsquedas que encontraron el código compilado.
+        fallos: Búsquedas que obligaron a traducir y compilar.
+        expulsiones: Entradas descartadas por superar la capacidad.
+    """
+
+    def __init__(self, capacidad: int = CAPACIDAD_POR_DEFECTO):
+        """
+        Args:
+            capacidad: Número máximo de objetos código guardados (0 desactiva la caché).
+
+        Raises:
+            ValueError: Si la capacidad es negativa.
+        """
+        self._entradas: "OrderedDict[str, CodeType]" = OrderedDict()
+        self._cerrojo = threading.Lock()
+        self._capacidad = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.capacidad = capacidad
+
+    @property
+    def capacidad(self) -> int:
+        return self._capacidad
+
+    @capacidad.setter
+    def capacidad(self, capacidad: int):
+        if capacidad < 0:
+            raise ValueError(f"La capacidad de la caché no puede ser negativa: {capacidad}")
+        with self._cerrojo:
+            self._capacidad = capacidad
+            self._recortar()
+
+    def obtener(self, clave: str) -> Optional[CodeType]:
+        """
+        Devuelve el código guardado con `clave` (marcándolo como el más reciente), o None.
+        """
+        with self._cerrojo:
+            codigo = self._entradas.get(clave)
+            if codigo is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return codigo
+
+    def guardar(self, clave: str, codigo: CodeType):
+        """
+        Guarda un objeto código, expulsando los menos usados si se supera la capacidad.
+        """
+        with self._cerrojo:
+            if self._capacidad == 0:
+                linecache.cache.pop(codigo.co_filename, None)
+                return
+            self._entradas[clave] = codigo
+            self._entradas.move_to_end(clave)
+            self._recortar()
+
+    def limpiar(self):
+        """
+        Vacía la caché y reinicia las estadísticas.
+        """
+        with self._cerrojo:
+            for codigo in self._entradas.values():
+                linecache.cache.pop(codigo.co_filename, None)
+            self._entradas.clear()
+            self.aciertos = self.fallos = self.expulsiones = 0
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """
+        Devuelve aciertos, fallos, expulsiones, entradas, capacidad y tasa de aciertos (0-1).
+        """
+        with self._cerrojo:
+            busquedas = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "expulsiones": self.expulsiones,
+                "entradas": len(self._entradas),
+                "capacidad": self._capacidad,
+                "tasa_aciertos": self.aciertos / busquedas if busquedas else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def _recortar(self):
+        # Llamar con el cerrojo tomado. El código expulsado deja de necesitar sus líneas en linecache.
+        while len(self._entradas) > self._capacidad:
+            _, codigo = self._entradas.popitem(last=False)
+            linecache.cache.pop(codigo.co_filename, None)
+            self.expulsiones += 1
+
+
+# Caché compartida por `ejecutar` y `evaluar` (salvo que se les pase otra).
+CACHE = CacheCodigo()
+
+
+def clave_codigo(codigo_castella: str, modo: str, nivel_optimizacion: int = 0, rapido: bool = False) -> str:
+    """
+    Calcula la clave de caché: hash SHA-256 del código fuente y de las opciones de traducción.
+    """
+    contenido = f"{modo}\0{nivel_optimizacion}\0{int(rapido)}\0{codigo_castella}"
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def _como_expresion(codigo_python: str, nombre: str) -> ast.Module:
+    """
+    Convierte la última sentencia del código generado (una expresión) en una asignación
+    a NOMBRE_RESULTADO, para recuperar su valor tras ejecutar el módulo.
+
+    Raises:
+        ValueError: Si el código no termina en una expresión.
+    """
+    modulo = ast.parse(codigo_python, nombre)
+    if not modulo.body or not isinstance(modulo.body[-1], ast.Expr):
+        raise ValueError("evaluar() espera una expresión Castella (usa ejecutar() para sentencias).")
+    expresion = modulo.body[-1]
+    modulo.body[-1] = ast.copy_location(
+        ast.Assign(targets=[ast.Name(id=NOMBRE_RESULTADO, ctx=ast.Store())], value=expresion.value), expresion)
+    return ast.fix_missing_locations(modulo)
+
+
+def compilar(codigo_castella: str, modo: str = "exec", nivel_optimizacion: int = 0, rapido: bool = False,
+             cache: Optional[CacheCodigo] = None) -> CodeType:
+    """
+    Devuelve el objeto código de un fragmento Castella, traduciéndolo sólo si no está en la caché.
+
+    Args:
+        codigo_castella: Programa (modo "exec") o expresión (modo "eval") en Castella.
+        modo: "exec" o "eval". En modo "eval" el código deja el valor de la expresión
+              en NOMBRE_RESULTADO.
+        nivel_optimizacion: Nivel de optimización de la traducción.
+        rapido: Compila con Numba las funciones numéricas.
+        cache: Caché a usar (por defecto, CACHE).
+
+    Returns:
+        El objeto código, sin el preámbulo: se ejecuta con `exec` en un espacio de
+        nombres que contenga `espacio_base()`.
+
+    Raises:
+        ValueError: Si el modo no es válido o, en modo "eval", el código no es una expresión.
+        La excepción original de la traducción si falla (sus diagnósticos se
+        escriben en stderr).
+    """
+    if modo not in ("exec", "eval"):
+        raise ValueError(f"Modo no válido: {modo!r}. Opciones: 'exec', 'eval'")
+    cache = CACHE if cache is None else cache
+    clave = clave_codigo(codigo_castella, modo, nivel_optimizacion, rapido)
+    codigo = cache.obtener(clave)
+    if codigo is not None:
+        return codigo
+
+    fuente = codigo_castella
+    if modo == "eval" and not fuente.rstrip().endswith(";"):
+        fuente = fuente.rstrip() + ";"
+    # castella_traductor no imprime ni comparte estado: se puede llamar desde varios hilos.
+    resultado = traducir(fuente, nivel_optimizacion=nivel_optimizacion, rapido=rapido)
+    if not resultado.exito:
+        for diagnostico in resultado.diagnosticos:
+            print(diagnostico, file=sys.stderr)
+        resultado.lanzar()
+    codigo_python = resultado.codigo_python
+
+    nombre = f"<castella:embebido:{clave[:12]}>"
+    # El preámbulo ya está en el espacio base: se compila sólo el cuerpo. Las líneas del
+    # preámbulo quedan en blanco para que las de los tracebacks sigan coincidiendo.
+    cuerpo = codigo_python
+    if cuerpo.startswith(PREAMBULO):
+        cuerpo = "\n" * PREAMBULO.count("\n") + cuerpo[len(PREAMBULO):]
+    arbol = _como_expresion(cuerpo, nombre) if modo == "eval" else cuerpo
+    registrar_fuente(nombre, codigo_python)
+    codigo = compile(arbol, nombre, "exec")
+    cache.guardar(clave, codigo)
+    return codigo
+
+
+def espacio_base() -> Dict[str, Any]:
+    """
+    Devuelve los nombres que define PREAMBULO (lo ejecuta la primera vez).
+
+    El código de `compilar` no incluye el preámbulo: hay que copiar estos nombres
+    al espacio de nombres en el que se ejecuta. No se debe modificar.
+    """
+    global _base
+    if _base is None:
+        with _cerrojo_base:
+            if _base is None:
+                espacio = {"__name__": "__castella__", "__builtins__": __builtins__}
+                exec(compile(PREAMBULO, "<castella:preambulo>", "exec"), espacio)
+                _base = {nombre: valor for nombre, valor in espacio.items() if not nombre.startswith("__")}
+    return _base
+
+
+def _preparar_entorno(entorno: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if entorno is None:
+        entorno = {}
+    entorno.setdefault("__name__", "__castella__")
+    entorno.setdefault("__builtins__", __builtins__)
+    # Como si se ejecutara el preámbulo: sus imports sustituyen a los nombres iguales del entorno.
+    entorno.update(espacio_base())
+    return entorno
+
+
+def ejecutar(codigo_castella: str, entorno: Optional[Dict[str, Any]] = None, nivel_optimizacion: int = 0,
+             rapido: bool = False, cache: Optional[CacheCodigo] = None) -> Dict[str, Any]:
+    """
+    Ejecuta código Castella en `entorno` (se crea uno nuevo si es None).
+
+    Args:
+        codigo_castella: Código fuente Castella.
+        entorno: Espacio de nombres global de la ejecución; recibe las variables,
+                 funciones y clases que defina el código.
+        nivel_optimizacion: Nivel de optimización de la traducción.
+        rapido: Compila con Numba las funciones numéricas.
+        cache: Caché de código compilado (por defecto, CACHE).
+
+    Returns:
+        El espacio de nombres tras la ejecución.
+
+    Raises:
+        Las excepciones de la traducción y las que lance el propio código.
+    """
+    codigo = compilar(codigo_castella, "exec", nivel_optimizacion, rapido, cache)
+    asegurar_runtime_importable()
+    entorno = _preparar_entorno(entorno)
+    exec(codigo, entorno)
+    return entorno
+
+
+def evaluar(expresion: str, entorno: Optional[Dict[str, Any]] = None, nivel_optimizacion: int = 0,
+            rapido: bool = False, cache: Optional[CacheCodigo] = None) -> Any:
+    """
+    Evalúa una expresión Castella y devuelve su valor.
+
+    Args:
+        expresion: Expresión Castella (p. ej. `"precio * (1 + iva) > 100"`).
+        entorno: Variables disponibles para la expresión (no se modifica).
+        nivel_optimizacion: Nivel de optimización de la traducción.
+        rapido: Compila con Numba las funciones numéricas.
+        cache: Caché de código compilado (por defecto, CACHE).
+
+    Returns:
+        El valor de la expresión.
+
+    Raises:
+        ValueError: Si el código no es una expresión.
+        Las excepciones de la traducción y las que lance la evaluación.
+    """
+    codigo = compilar(expresion, "eval", nivel_optimizacion, rapido, cache)
+    asegurar_runtime_importable()
+    espacio = _preparar_entorno(dict(entorno or {}))
+    exec(codigo, espacio)
+    return espacio[NOMBRE_RESULTADO]
+
+
+def estadisticas_cache() -> Dict[str, Any]:
+    """
+    Estadísticas de la caché global (ver `CacheCodigo.estadisticas`).
+    """
+    return CACHE.estadisticas()
+
+
+def configurar_cache(capacidad: int):
+    """
+    Cambia la capacidad de la caché global (expulsa entradas si se reduce).
+
+    Raises:
+        ValueError: Si la capacidad es negativa.
+    """
+    CACHE.capacidad = capacidad
+
+
+def limpiar_cache():
+    """
+    Vacía la caché global y reinicia sus estadísticas.
+    """
+    CACHE.limpiar()
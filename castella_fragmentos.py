@@ -0,0 +1,256 @@
+# castella_fragmentos.py
+
+"""
+Traducción en paralelo de archivos Castella muy grandes (`--fragmentar`).
+
+`CastellaTransformer.start` traduce cada elemento de nivel superior (sentencia,
+función, clase) de forma independiente, así que un archivo se puede partir en
+fragmentos por esos límites, parsear y transformar cada fragmento en un proceso
+distinto y concatenar los resultados en orden:
+
+  1. `dividir_en_fragmentos` recorre el texto (sin parsearlo) siguiendo cadenas,
+     comentarios y el anidamiento de paréntesis, corchetes y llaves, y corta sólo en
+     finales de línea donde termina un elemento de nivel superior.
+  2. Cada fragmento se traduce en un `ProcessPoolExecutor`. Se le anteponen tantos
+     saltos de línea como líneas lo preceden, de modo que los errores y el mapa de
+     fuente usan las líneas reales del archivo.
+  3. Se quita el preámbulo de cada fragmento y se emite uno solo, con la unión de
+     las funciones de `castella_runtime` que usaron.
+
+Las optimizaciones de `-O1`/`-O2` se aplican fragmento a fragmento: un bucle sólo se
+vectoriza si las declaraciones que necesita están en su mismo fragmento. Si algún
+fragmento falla (un error real o un corte mal detectado), se traduce el archivo
+completo sin fragmentar y se devuelve ese resultado.
+"""
+
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Set, Tuple
+
+try:
+    from .castella_traductor import (ResultadoTraduccion, crear_parser, normalizar_salida,
+                                     traductor_compartido, _diagnosticar)
+    from .castella_transformer import CastellaTransformer
+    from .castella_mapa_fuente import extraer_marcas
+    from .castella_optimizador import optimizar
+    from .castella_runtime.mapa_fuente import MapaFuente
+except ImportError as e:
+    print("\nError de Importación en castella_fragmentos:")
+    print("No se pudieron importar 'castella_traductor' o 'castella_transformer'.")
+    print(f"Detalle: {e}")
+    sys.exit(1)
+
+# Por debajo de este tamaño (líneas) no compensa arrancar procesos.
+LINEAS_MINIMAS_FRAGMENTO = 2000
+
+# Fragmentos por proceso: más de uno reparte mejor la carga si los fragmentos son desiguales.
+FRAGMENTOS_POR_PROCESO = 4
+
+# Palabras que, tras una `}` de nivel superior, continúan el mismo elemento
+# (`sino`, `capturar`, `finalmente`) o la misma expresión (operadores con nombre).
+_CONTINUACIONES = frozenset(["sino", "capturar", "finalmente", "y", "o", "no", "en", "como", "si"])
+
+_PATRON_PALABRA = re.compile(r"[A-Za-z_áéíóúñÁÉÍÓÚÑ]\w*")
+
+# Parser de cada proceso trabajador (se construye una vez por proceso).
+_parser_proceso = None
+
+
+def _siguiente_significativo(codigo: str, posicion: int) -> int:
+    """
+    Posición del siguiente carácter que no es espacio ni comentario (len(codigo) si no hay).
+    """
+    n = len(codigo)
+    while posicion < n:
+        if codigo[posicion].isspace():
+            posicion += 1
+        elif codigo.startswith("//", posicion):
+            fin = codigo.find("\n", posicion)
+            posicion = n if fin < 0 else fin + 1
+        else:
+            return posicion
+    return n
+
+
+def limites_nivel_superior(codigo: str) -> List[int]:
+    """
+    Posiciones (inicio de línea) donde se puede partir el código entre elementos de nivel superior.
+
+    Un límite es el final de una línea cuyo último elemento significativo es un `;` o
+    una `}` con anidamiento cero, siempre que lo que sigue no continúe el mismo
+    elemento (`} sino {`, `} capturar ...`).
+
+    Returns:
+        Posiciones ordenadas; una lista vacía si el anidamiento no cuadra (el llamador
+        debe traducir sin fragmentar).
+    """
+    limites = []
+    profundidad = 0
+    posicion, n = 0, len(codigo)
+    candidato = False # El último elemento significativo de la línea cierra un elemento.
+    while posicion < n:
+        caracter = codigo[posicion]
+        if caracter == "\n":
+            if candidato and profundidad == 0:
+                siguiente = _siguiente_significativo(codigo, posicion + 1)
+                palabra = _PATRON_PALABRA.match(codigo, siguiente)
+                if siguiente < n and not (palabra and palabra.group() in _CONTINUACIONES):
+                    limites.append(posicion + 1)
+            candidato = False
+            posicion += 1
+            continue
+        if caracter.isspace():
+            posicion += 1
+            continue
+        if codigo.startswith("//", posicion):
+            fin = codigo.find("\n", posicion)
+            posicion = n if fin < 0 else fin # El salto de línea se procesa arriba.
+            continue
+        for apertura, cierre in (("/*", "*/"), ("###", "###")):
+            if codigo.startswith(apertura, posicion):
+                fin = codigo.find(cierre, posicion + len(apertura))
+                if fin < 0:
+                    return []
+                posicion = fin + len(cierre)
+                # Un comentario de bloque puede ser el docstring del elemento siguiente: no se corta tras él.
+                candidato = False
+                break
+        else:
+            if caracter in "\"'":
+                fin = posicion + 1
+                while fin < n and codigo[fin] != caracter:
+                    fin += 2 if codigo[fin] == "\\" else 1
+                if fin >= n:
+                    return [] # Cadena sin cerrar.
+                posicion = fin + 1
+                candidato = False
+                continue
+            if caracter in "([{":
+                profundidad += 1
+            elif caracter in ")]}":
+                profundidad -= 1
+                if profundidad < 0:
+                    return []
+            candidato = profundidad == 0 and caracter in ";}"
+            posicion += 1
+    return limites if profundidad == 0 else []
+
+
+def dividir_en_fragmentos(codigo: str, lineas_por_fragmento: int) -> List[Tuple[int, str]]:
+    """
+    Parte el código en fragmentos de al menos `lineas_por_fragmento` líneas (si se puede).
+
+    Returns:
+        Una lista de `(linea_inicial, texto)` con la línea (desde 1) donde empieza cada
+        fragmento en el archivo original. Un solo fragmento si no se encontraron límites.
+    """
+    fragmentos = []
+    inicio, linea_inicio, linea_actual, anterior = 0, 1, 1, 0
+    for limite in limites_nivel_superior(codigo):
+        linea_actual += codigo.count("\n", anterior, limite)
+        anterior = limite
+        if linea_actual - linea_inicio >= lineas_por_fragmento:
+            fragmentos.append((linea_inicio, codigo[inicio:limite]))
+            inicio, linea_inicio = limite, linea_actual
+    if codigo[inicio:].strip() or not fragmentos:
+        fragmentos.append((linea_inicio, codigo[inicio:]))
+    return fragmentos
+
+
+def _traducir_fragmento(linea_inicial: int, fragmento: str, nivel_optimizacion: int, rapido: bool,
+                        con_mapa: bool) -> Tuple[str, Set[str]]:
+    """
+    Traduce un fragmento en un proceso trabajador.
+
+    Returns:
+        `(cuerpo, nombres_runtime)`: el código generado sin el preámbulo ni las
+        importaciones de castella_runtime, y las funciones de castella_runtime usadas.
+    """
+    global _parser_proceso
+    if _parser_proceso is None:
+        _parser_proceso = crear_parser()
+    # Los saltos de línea iniciales (ignorados por la gramática) conservan las líneas reales.
+    arbol = _parser_proceso.parse("\n" * (linea_inicial - 1) + fragmento)
+    transformer = CastellaTransformer(registrar_origen=con_mapa, rapido=rapido)
+    transformer.validar(arbol)
+    codigo = transformer.transform(optimizar(arbol, nivel_optimizacion))
+
+    prefijo = transformer.preambulo().rstrip() + "\n"
+    if transformer.nombres_runtime:
+        prefijo += transformer._importaciones_runtime().rstrip() + "\n"
+    if not codigo.startswith(prefijo):
+        raise ValueError("El código generado del fragmento no empieza por el preámbulo esperado.")
+    return codigo[len(prefijo):], transformer.nombres_runtime
+
+
+def traducir_fragmentado(codigo_castella: str, procesos: Optional[int] = None, nivel_optimizacion: int = 0,
+                         rapido: bool = False, con_mapa: bool = False, nombre_fuente: str = "<castella>",
+                         nombre_generado: str = "<castella:generado>",
+                         lineas_minimas: int = LINEAS_MINIMAS_FRAGMENTO) -> ResultadoTraduccion:
+    """
+    Traduce un archivo grande repartiendo sus fragmentos entre varios procesos.
+
+    Args:
+        codigo_castella: Código fuente Castella.
+        procesos: Procesos trabajadores (por defecto, uno por CPU).
+        nivel_optimizacion: Nivel de optimización (aplicado a cada fragmento).
+        rapido: Compila con Numba las funciones numéricas.
+        con_mapa: Si es True, construye también el mapa de fuente.
+        nombre_fuente, nombre_generado: Nombres que se guardan en el mapa.
+        lineas_minimas: Tamaño mínimo de un fragmento; un archivo más corto que dos
+                        fragmentos se traduce sin procesos adicionales.
+
+    Returns:
+        Un ResultadoTraduccion (ver castella_traductor). `tiempos` incluye "division",
+        "traduccion" (fase paralela) y "ensamblado".
+    """
+    inicio = time.perf_counter()
+    procesos = procesos or os.cpu_count() or 1
+    opciones = dict(nivel_optimizacion=nivel_optimizacion, rapido=rapido, con_mapa=con_mapa,
+                    nombre_fuente=nombre_fuente, nombre_generado=nombre_generado)
+
+    total_lineas = codigo_castella.count("\n") + 1
+    lineas_por_fragmento = max(lineas_minimas, total_lineas // (procesos * FRAGMENTOS_POR_PROCESO))
+    fragmentos = dividir_en_fragmentos(codigo_castella, lineas_por_fragmento) if procesos > 1 else []
+    tiempos = {"division": time.perf_counter() - inicio}
+    if len(fragmentos) < 2:
+        return traductor_compartido().traducir(codigo_castella, **opciones)
+
+    marca = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(fragmentos))) as ejecutor:
+            futuros = [ejecutor.submit(_traducir_fragmento, linea, texto, nivel_optimizacion, rapido, con_mapa)
+                       for linea, texto in fragmentos]
+            resultados = [futuro.result() for futuro in futuros]
+    except Exception:
+        # Un error real o un corte mal detectado: la traducción completa da el diagnóstico correcto.
+        return traductor_compartido().traducir(codigo_castella, **opciones)
+    tiempos["traduccion"] = time.perf_counter() - marca
+
+    marca = time.perf_counter()
+    ensamblador = CastellaTransformer()
+    for _, nombres_runtime in resultados:
+        ensamblador.nombres_runtime.update(nombres_runtime)
+    partes = [ensamblador.preambulo().rstrip()]
+    if ensamblador.nombres_runtime:
+        partes.append(ensamblador._importaciones_runtime().rstrip())
+    partes.extend(cuerpo.rstrip("\n") for cuerpo, _ in resultados if cuerpo.strip())
+    generado = "\n".join(partes) + "\n"
+
+    mapa = None
+    try:
+        if con_mapa:
+            generado, segmentos = extraer_marcas(generado)
+            codigo_python = normalizar_salida(generado)
+            mapa = MapaFuente.desde_codigo(nombre_fuente, nombre_generado, codigo_python, segmentos)
+        else:
+            codigo_python = normalizar_salida(generado)
+    except Exception as e:
+        tiempos["total"] = time.perf_counter() - inicio
+        return ResultadoTraduccion(None, [_diagnosticar(e, codigo_castella)], tiempos, excepcion=e)
+    tiempos["ensamblado"] = time.perf_counter() - marca
+    tiempos["total"] = time.perf_counter() - inicio
+    return ResultadoTraduccion(codigo_python, [], tiempos, mapa)
@@ -0,0 +1,93 @@
+# castella_graficos.py
+
+"""
+Soporte del compilador para `--graficar=modo[:directorio]` y `--graficar-puntos=N[:metodo]`.
+
+`graficar` se traduce a `castella_runtime.graficos.graficar`, que por defecto dibuja
+en una ventana (como `plt.plot` + `plt.show()`) tras reducir las series de más de
+PUNTOS_POR_DEFECTO valores. Estas opciones anteponen al Python generado una
+llamada a `castella_runtime.graficos.configurar`:
+
+  * `--graficar=archivo[:dir]`: cada gráfico en un archivo de `dir` (por defecto
+    DIRECTORIO_POR_DEFECTO), sin ventana y sin bloquear el programa.
+  * `--graficar=lote[:dir]`: varios gráficos por figura, escritas en `dir`.
+  * `--graficar=ventana`: el comportamiento por defecto.
+  * `--graficar-puntos=N[:minmax|lttb]`: puntos máximos por serie y método de
+    reducción (`--graficar-puntos=0` dibuja todos los puntos).
+"""
+
+import sys
+from typing import Any, Dict, Optional
+
+try:
+    from .castella_runtime.graficos import MODOS, METODOS
+except ImportError as e:
+    print("\nError de Importación en castella_graficos:")
+    print("No se pudo importar 'castella_runtime.graficos'.")
+    print(f"Detalle: {e}")
+    sys.exit(1)
+
+# Directorio de los archivos de `--graficar=archivo|lote` si no se indica otro.
+DIRECTORIO_POR_DEFECTO = "graficos"
+
+# Líneas que `instrumentar_graficos` añade al principio del código.
+LINEAS_INSERTADAS = 2
+
+
+def configuracion_graficos(modo: Optional[str], puntos: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Interpreta los valores de `--graficar` y `--graficar-puntos`.
+
+    Args:
+        modo: Lo que sigue a `--graficar=` (None = "ventana").
+        puntos: Lo que sigue a `--graficar-puntos=` (None = valores por defecto).
+
+    Returns:
+        Los argumentos de `castella_runtime.graficos.configurar`.
+
+    Raises:
+        ValueError: Si algún valor no es válido.
+    """
+    nombre_modo, _, directorio = (modo or "ventana").partition(":")
+    if nombre_modo not in MODOS:
+        raise ValueError(f"Modo de gráficos no válido: --graficar={modo}. Opciones: {', '.join(MODOS)}")
+    configuracion: Dict[str, Any] = {"modo": nombre_modo}
+    if nombre_modo == "ventana":
+        if directorio:
+            raise ValueError(f"El modo 'ventana' no admite directorio: --graficar={modo}")
+    else:
+        configuracion["directorio"] = directorio or DIRECTORIO_POR_DEFECTO
+
+    if puntos is not None:
+        cantidad, _, metodo = puntos.partition(":")
+        if not cantidad.isdigit() or 0 < int(cantidad) < 3:
+            raise ValueError(f"Número de puntos no válido: --graficar-puntos={puntos} (0 o al menos 3)")
+        configuracion["puntos"] = int(cantidad)
+        if metodo:
+            if metodo not in METODOS:
+                raise ValueError(f"Método de reducción no válido: --graficar-puntos={puntos}. Opciones: {', '.join(METODOS)}")
+            configuracion["metodo"] = metodo
+    return configuracion
+
+
+def instrumentar_graficos(codigo_python: str, configuracion: Dict[str, Any]) -> str:
+    """
+    Antepone al Python generado la configuración de `graficar`.
+
+    Las líneas van tras la de codificación (si la hay); el mapa de fuente del código
+    debe desplazarse LINEAS_INSERTADAS líneas.
+
+    Args:
+        codigo_python: Código Python generado.
+        configuracion: Resultado de `configuracion_graficos`.
+
+    Returns:
+        El código Python instrumentado.
+    """
+    argumentos = ", ".join(f"{clave}={valor!r}" for clave, valor in configuracion.items())
+    prologo = ("import castella_runtime.graficos as _castella_graficos\n"
+               f"_castella_graficos.configurar({argumentos})\n")
+    lineas = codigo_python.splitlines(keepends=True)
+    posicion = 1 if lineas and lineas[0].startswith("# -*- coding") else 0
+    lineas.insert(posicion, prologo)
+    return "".join(lineas)
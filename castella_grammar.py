@@ -58,6 +58,11 @@ Y_OP: "y"              // and
 O_OP: "o"              // or
 NO_OP: "no"            // not
 GRAFICAR: "graficar"   // For plotting
+PARALELO_KW: "paralelo" // parallel for (paralelo para)
+ASINCRONO_KW: "asincrono" // async (funcion, para, con)
+ESPERAR_KW: "esperar"  // await
+PRODUCIR_KW: "producir" // yield (producir desde -> yield from)
+COMPACTA_KW: "compacta" // clase compacta (instancias con __slots__)
 
 // Operadores y Puntuación (en español o símbolos comunes)
 IGUAL: "="             // Assignment
@@ -142,14 +147,14 @@ QUOTE: "'"
 
 // Regla de inicio: secuencia de elementos de nivel superior.
 // Los decoradores deben preceder inmediatamente a una definición de función o clase.
-start: (decorator | class_def | func_def | stmt | MULTILINE_STRING)*
+start: (decorator | class_def | func_def | async_func_def | stmt | MULTILINE_STRING)*
 
 // Sentencias principales (stmt). Todas las reglas que terminan en SEMICOLON son tipos de sentencia.
 stmt: declaration | asignacion | importar | graficar | expr_stmt
-    | if_stmt | for_stmt | while_stmt | try_stmt | with_stmt
+    | if_stmt | for_stmt | parallel_for_stmt | async_for_stmt | while_stmt | try_stmt | with_stmt | async_with_stmt
     | BREAK | CONTINUE | PASS_KW
     | print_stmt | unpack_assignment | augmented_assignment
-    | return_stmt
+    | return_stmt | yield_stmt
     | call_stmt // Call as a standalone statement: `mi_funcion();`
 
 
@@ -233,9 +238,16 @@ AUG_ASSIGN_OP: PLUS_EQUAL | MINUS_EQUAL | STAR_EQUAL | SLASH_EQUAL | PERCENT_EQU
 // Sentencia with
 with_stmt: WITH_KW WS? expr [WS? COMO WS? IDENT] WS? block
 
+// Sentencias with y for asíncronas (async with / async for)
+async_with_stmt: ASINCRONO_KW WS? with_stmt
+async_for_stmt: ASINCRONO_KW WS? for_stmt
+
 // Sentencia return
 return_stmt: RETORNAR_KW WS? [expr] WS? SEMICOLON
 
+// Sentencia yield (sólo dentro de funciones): `producir;`, `producir expr;`, `producir desde expr;`
+yield_stmt: PRODUCIR_KW WS? (DESDE WS? expr | expr?) WS? SEMICOLON
+
 // Sentencias de control de flujo simples con punto y coma
 BREAK: ROMPER WS? SEMICOLON -> BREAK_STMT
 CONTINUE: CONTINUAR WS? SEMICOLON -> CONTINUE_STMT
@@ -243,7 +255,7 @@ PASS_KW: PASAR WS? SEMICOLON -> PASS_STMT
 
 
 // Bloque de código delimitado por llaves
-block: LBRACE WS? (MULTILINE_STRING | decorator | class_def | func_def | class_attribute | stmt)* WS? RBRACE
+block: LBRACE WS? (MULTILINE_STRING | decorator | class_def | func_def | async_func_def | class_attribute | stmt)* WS? RBRACE
 
 // Sentencias Condicionales (if/elif/else)
 if_stmt: SI_KW WS? LPAR expr RPAR WS? block (WS? ELIF_KW WS? LPAR expr RPAR WS? block)* [WS? SINO_KW WS? block]?
@@ -251,6 +263,13 @@ if_stmt: SI_KW WS? LPAR expr RPAR WS? block (WS? ELIF_KW WS? LPAR expr RPAR WS?
 // Sentencia Iterativa for
 for_stmt: PARA_KW WS? IDENT WS? EN_KW WS? expr WS? block
 
+// Sentencia Iterativa for paralela: las iteraciones son independientes y se reparten entre
+// procesos o hilos (castella_runtime.paralelo). Opciones: modo ("procesos"/"hilos"),
+// trabajadores, bloque, reducir, inicial. El cuerpo es una función del elemento: `retornar`
+// da el resultado de la iteración, que se recoge en orden en el destino tras `->`.
+// Ejemplo: paralelo("hilos", bloque=8) para url en urls -> paginas { retornar descargar(url); }
+parallel_for_stmt: PARALELO_KW WS? [LPAR WS? argument_list? WS? RPAR WS?] PARA_KW WS? IDENT WS? EN_KW WS? expr WS? [ARROW WS? IDENT WS?] block
+
 // Sentencia Iterativa while
 while_stmt: MIENTRAS_KW WS? LPAR expr RPAR WS? block
 
@@ -267,6 +286,9 @@ decorator: ARROBA WS? access
 func_def: FUNCION_KW WS? IDENT WS? LPAR WS? parameter_list? WS? RPAR WS? return_type? WS? block
 return_type: ARROW WS? type
 
+// Definición de Función asíncrona (async def)
+async_func_def: ASINCRONO_KW WS? func_def
+
 // Items de Parámetro (para definiciones de función/lambda)
 // El orden de las alternativas aquí es importante para el parsing (posicional, default, *, **)
 parameter_item: pos_param | default_param | star_param | double_star_param
@@ -276,9 +298,9 @@ default_param: IDENT WS? type_hint? WS? IGUAL WS? expr
 
 // Definición de Clase
 // El cuerpo de la clase es una secuencia de class_body_element dentro de un block.
-class_def: CLASE_KW WS? IDENT WS? inheritance? WS? block
+class_def: CLASE_KW WS? [COMPACTA_KW WS?] IDENT WS? inheritance? WS? block
 inheritance: DESDE WS? inheritance_list
-class_body_element: decorator | func_def | class_def | MULTILINE_STRING | class_attribute | stmt
+class_body_element: decorator | func_def | async_func_def | class_def | MULTILINE_STRING | class_attribute | stmt
 class_attribute: IDENT WS? type_hint? WS? IGUAL WS? expr WS? SEMICOLON // Class attributes often require initialization.
 
 
@@ -365,7 +387,10 @@ UNARY_OP: MINUS | PLUS | TILDE_OP // Minus/Plus as unary, Bitwise NOT (~)
 // Operador de Potencia (Derecha asociativa)
 // power: access (WS? DOUBLE_STAR WS? power)? // Right-associative pattern
 // Using left-associative pattern matching the _handle_binary_op logic:
-power: access (WS? DOUBLE_STAR WS? unary_expr)*
+power: (await_expr | access) (WS? DOUBLE_STAR WS? unary_expr)*
+
+// Espera de una corrutina (await): liga más fuerte que `**`, como en Python.
+await_expr: ESPERAR_KW WS? access
 
 // Acceso a elementos: acceso a atributos (.), indexación ([]), llamadas a función/método ()
 // Combina una expresión primaria con cero o más sufijos de acceso.
@@ -0,0 +1,248 @@
+# castella_instrumentacion.py
+
+"""
+Instrumentación opcional de CastellaTransformer para perfilar la traducción regla a regla.
+
+Envuelve los métodos del transformer que traducen nodos (reglas y terminales de la
+gramática como `access`, `block`, `argument_list`, y los auxiliares de
+`AUXILIARES_INSTRUMENTABLES`, como `_handle_binary_op` o `_convertir_nodo`) en la
+*instancia* que se quiere medir. La clase no se modifica, por lo que las traducciones
+sin instrumentar no pagan ningún coste adicional.
+
+Por cada regla registra: número de llamadas, tiempo acumulado (incluye las reglas
+anidadas), tiempo propio (excluye las anidadas) y tamaño de la salida generada.
+Los resultados pueden mostrarse como tabla ordenada o exportarse en formato
+Chrome Trace (chrome://tracing, Perfetto, speedscope).
+"""
+
+import functools
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from lark import Lark, Transformer
+
+try:
+    from .castella_grammar import GRAMATICA
+    from .castella_transformer import CastellaTransformer
+except ImportError as e:
+    print("\nError de Importación en castella_instrumentacion:")
+    print("No se pudieron importar 'castella_grammar' o 'castella_transformer'.")
+    print(f"Detalle: {e}")
+    sys.exit(1)
+
+# Columnas por las que se puede ordenar la tabla de resultados.
+CRITERIOS_ORDEN = ("propio", "acumulado", "llamadas", "salida")
+
+# Métodos del transformer que traducen nodos sin ser reglas de la gramática
+# (`for_vectorizado` lo inserta castella_vectorizador con -O2). El resto de
+# auxiliares (infraestructura, preámbulo, validación) no se instrumenta: envuelven a
+# todas las reglas o no forman parte de la traducción regla a regla.
+AUXILIARES_INSTRUMENTABLES = frozenset(["_convertir_nodo", "_handle_binary_op", "for_vectorizado"])
+
+
+class PerfilReglas:
+    """
+    Acumula las estadísticas por regla de una o varias traducciones instrumentadas.
+    """
+
+    def __init__(self, registrar_eventos: bool = False):
+        """
+        Args:
+            registrar_eventos: Si es True, guarda además cada llamada individual
+                               para poder exportar un Chrome Trace. Consume memoria
+                               proporcional al número de nodos del árbol.
+        """
+        # nombre de regla -> [llamadas, acumulado_s, propio_s, salida_caracteres]
+        self.estadisticas: Dict[str, List[float]] = {}
+        self.registrar_eventos = registrar_eventos
+        self._eventos: List[Tuple[str, float, float]] = [] # (nombre, inicio, duración)
+        self._pila: List[List[float]] = [] # [tiempo en reglas hijas] por llamada activa
+        self._origen = time.perf_counter()
+
+    def envolver(self, nombre: str, metodo: Callable) -> Callable:
+        """
+        Devuelve una versión de `metodo` que registra sus llamadas bajo `nombre`.
+        """
+        estadisticas = self.estadisticas.setdefault(nombre, [0, 0.0, 0.0, 0])
+        pila = self._pila
+        eventos = self._eventos if self.registrar_eventos else None
+        reloj = time.perf_counter
+
+        @functools.wraps(metodo)
+        def envoltura(*args, **kwargs):
+            marco = [0.0]
+            pila.append(marco)
+            inicio = reloj()
+            try:
+                resultado = metodo(*args, **kwargs)
+            finally:
+                duracion = reloj() - inicio
+                pila.pop()
+                if pila:
+                    pila[-1][0] += duracion
+                estadisticas[0] += 1
+                estadisticas[1] += duracion
+                estadisticas[2] += duracion - marco[0]
+                if eventos is not None:
+                    eventos.append((nombre, inicio, duracion))
+            estadisticas[3] += _tamano_salida(resultado)
+            return resultado
+
+        return envoltura
+
+    def medir_etapa(self, nombre: str, funcion: Callable[[], Any]) -> Any:
+        """
+        Mide una etapa completa fuera del transformer (p. ej. el parseo) como una regla más.
+        """
+        return self.envolver(nombre, funcion)()
+
+    def filas(self, ordenar_por: str = "propio") -> List[Tuple[str, int, float, float, int]]:
+        """
+        Devuelve las estadísticas como filas `(regla, llamadas, acumulado, propio, salida)`.
+
+        Args:
+            ordenar_por: Uno de CRITERIOS_ORDEN. El orden es descendente.
+        """
+        if ordenar_por not in CRITERIOS_ORDEN:
+            raise ValueError(f"Criterio de orden desconocido '{ordenar_por}'. Opciones: {', '.join(CRITERIOS_ORDEN)}")
+        indice = {"llamadas": 1, "acumulado": 2, "propio": 3, "salida": 4}[ordenar_por]
+        filas = [(nombre, int(e[0]), e[1], e[2], int(e[3])) for nombre, e in self.estadisticas.items() if e[0]]
+        return sorted(filas, key=lambda fila: (-fila[indice], fila[0]))
+
+    def tabla(self, ordenar_por: str = "propio", limite: Optional[int] = None) -> str:
+        """
+        Formatea las estadísticas como una tabla de texto.
+
+        Args:
+            ordenar_por: Columna de orden (ver CRITERIOS_ORDEN).
+            limite: Número máximo de filas a mostrar (None = todas).
+        """
+        filas = self.filas(ordenar_por)
+        if limite is not None:
+            filas = filas[:limite]
+        total_propio = sum(e[2] for e in self.estadisticas.values()) or 1.0
+
+        ancho = max([len("regla")] + [len(fila[0]) for fila in filas])
+        lineas = [f"{'regla':<{ancho}}  {'llamadas':>9}  {'acumulado(ms)':>13}  {'propio(ms)':>11}  {'%propio':>7}  {'salida(car)':>11}"]
+        for nombre, llamadas, acumulado, propio, salida in filas:
+            lineas.append(f"{nombre:<{ancho}}  {llamadas:>9}  {acumulado * 1000:>13.3f}  {propio * 1000:>11.3f}  {propio / total_propio:>7.1%}  {salida:>11}")
+        return "\n".join(lineas)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        Construye un documento en formato Chrome Trace Event ("X" = eventos completos).
+
+        Raises:
+            ValueError: Si el perfil se creó sin `registrar_eventos=True`.
+        """
+        if not self.registrar_eventos:
+            raise ValueError("El perfil se creó sin registrar_eventos=True; no hay eventos individuales que exportar.")
+        eventos = [
+            {
+                "name": nombre,
+                "cat": "castella",
+                "ph": "X",
+                "ts": (inicio - self._origen) * 1e6, # microsegundos
+                "dur": duracion * 1e6,
+                "pid": 1,
+                "tid": 1,
+            }
+            for nombre, inicio, duracion in self._eventos
+        ]
+        return {"traceEvents": eventos, "displayTimeUnit": "ms"}
+
+    def guardar_chrome_trace(self, ruta: str):
+        """
+        Escribe el Chrome Trace en `ruta` (JSON).
+        """
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(self.chrome_trace(), archivo)
+
+
+def _tamano_salida(resultado: Any) -> int:
+    """
+    Estima el tamaño (en caracteres) del código producido por una regla.
+    """
+    if isinstance(resultado, str):
+        return len(resultado)
+    if isinstance(resultado, list):
+        return sum(len(item) for item in resultado if isinstance(item, str))
+    return 0
+
+
+@functools.lru_cache(maxsize=None)
+def _nombres_gramatica() -> frozenset:
+    """
+    Reglas (con sus alias) y terminales de la gramática: los métodos que Lark llama al transformar.
+    """
+    parser = Lark(GRAMATICA, start="start", parser="lalr")
+    nombres = {terminal.name for terminal in parser.terminals}
+    for regla in parser.rules:
+        nombres.add(str(regla.origin.name))
+        if regla.alias:
+            nombres.add(regla.alias)
+    return frozenset(nombres)
+
+
+def metodos_instrumentables(clase: type = CastellaTransformer) -> List[str]:
+    """
+    Lista los métodos definidos por `clase` (y sus bases propias) que se pueden instrumentar:
+    los que llevan el nombre de una regla o terminal de la gramática y los de
+    `AUXILIARES_INSTRUMENTABLES`. Se excluyen los métodos heredados de `lark.Transformer`.
+    """
+    instrumentables = _nombres_gramatica() | AUXILIARES_INSTRUMENTABLES
+    nombres = set()
+    for base in clase.__mro__:
+        if base is Transformer or issubclass(Transformer, base):
+            continue
+        for nombre, valor in vars(base).items():
+            if nombre in instrumentables and callable(valor):
+                nombres.add(nombre)
+    return sorted(nombres)
+
+
+def instrumentar(transformer: CastellaTransformer, perfil: Optional[PerfilReglas] = None) -> PerfilReglas:
+    """
+    Instrumenta una instancia de CastellaTransformer.
+
+    Debe llamarse antes de pasar el transformer a `Lark(...)` si se usa como
+    transformer en línea, porque Lark resuelve los métodos al construir el parser.
+
+    Args:
+        transformer: La instancia a instrumentar (se modifica en el sitio).
+        perfil: Un perfil existente donde acumular. Si es None, se crea uno nuevo.
+
+    Returns:
+        El perfil donde se registran las estadísticas.
+    """
+    perfil = perfil or PerfilReglas()
+    for nombre in metodos_instrumentables(type(transformer)):
+        metodo = getattr(transformer, nombre)
+        setattr(transformer, nombre, perfil.envolver(nombre, metodo))
+    return perfil
+
+
+def perfilar_traduccion(codigo_castella: str, registrar_eventos: bool = False) -> Tuple[Any, PerfilReglas]:
+    """
+    Traduce `codigo_castella` con un transformer instrumentado.
+
+    El parseo se hace sin transformer en línea para poder medirlo por separado
+    (aparece como la pseudo-regla "<parseo>").
+
+    Args:
+        codigo_castella: Código fuente Castella.
+        registrar_eventos: Guarda cada llamada para exportar un Chrome Trace.
+
+    Returns:
+        Una tupla `(codigo_python, perfil)`.
+    """
+    perfil = PerfilReglas(registrar_eventos=registrar_eventos)
+    parser_arbol = perfil.medir_etapa("<construccion_parser>", lambda: Lark(GRAMATICA, start="start", parser="lalr"))
+    arbol = perfil.medir_etapa("<parseo>", lambda: parser_arbol.parse(codigo_castella))
+    transformer = CastellaTransformer()
+    transformer.validar(arbol)
+    instrumentar(transformer, perfil)
+    codigo_python = transformer.transform(arbol)
+    return codigo_python, perfil
@@ -0,0 +1,178 @@
+# castella_literales.py
+
+"""
+Literales grandes fuera del código generado (`--literales-externos[=KiB]`).
+
+Las tablas de datos escritas como literales (`[...]`, `{...}`) se copian tal cual en
+el Python generado: CPython tiene que compilar megabytes de constantes, el `.pyc` y
+el binario de PyInstaller crecen con ellas y cada arranque las vuelve a construir.
+
+`externalizar_literales` recorre el código generado con `ast` y sustituye cada
+literal constante que ocupa al menos `umbral` bytes por una llamada a
+`castella_runtime.literales.cargar_literal`, que lo carga de un archivo del
+directorio de datos cuando se evalúa:
+
+  * `np.array([...])` / `np.asarray([...])` de números: el arreglo se guarda como
+    `.npy` y se carga mapeado en memoria (copia al escribir).
+  * El resto (listas, tuplas, diccionarios y conjuntos de constantes): `.marshal`,
+    que se deserializa mucho más rápido de lo que se compila el literal.
+
+Los literales sustituidos conservan su número de líneas (la llamada ocupa las
+mismas), así que el mapa de fuente sólo se desplaza por la línea del import que se
+añade tras la cabecera (`LINEAS_INSERTADAS`).
+"""
+
+import ast
+import marshal
+import os
+from typing import List, Tuple
+
+# Tamaño mínimo por defecto (en bytes del código generado) de un literal externalizado.
+UMBRAL_POR_DEFECTO = 64 * 1024
+
+# Líneas que se añaden al principio del código cuando se externaliza algún literal.
+LINEAS_INSERTADAS = 1
+
+NOMBRE_CARGADOR = "_castella_cargar_literal"
+
+_IMPORT_CARGADOR = f"from castella_runtime.literales import cargar_literal as {NOMBRE_CARGADOR}\n"
+
+_TIPOS_LITERAL = (ast.List, ast.Tuple, ast.Set, ast.Dict)
+_MODULOS_NUMPY = ("np", "numpy")
+
+
+def _desplazamientos_lineas(codigo_bytes: bytes) -> List[int]:
+    """
+    Desplazamiento (en bytes) del inicio de cada línea; el índice 0 es la línea 1.
+    """
+    inicios = [0]
+    for linea in codigo_bytes.splitlines(keepends=True):
+        inicios.append(inicios[-1] + len(linea))
+    return inicios
+
+
+def _es_llamada_numpy(nodo: ast.AST) -> bool:
+    """
+    `np.array(<literal>)` o `np.asarray(<literal>)` sin más argumentos.
+    """
+    return (isinstance(nodo, ast.Call) and len(nodo.args) == 1 and not nodo.keywords
+            and isinstance(nodo.func, ast.Attribute) and nodo.func.attr in ("array", "asarray")
+            and isinstance(nodo.func.value, ast.Name) and nodo.func.value.id in _MODULOS_NUMPY
+            and isinstance(nodo.args[0], (ast.List, ast.Tuple)))
+
+
+def _arreglo_numerico(valor):
+    """
+    `np.array(valor)` si NumPy está instalado y el resultado es numérico; si no, None.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    try:
+        arreglo = np.array(valor)
+    except (ValueError, TypeError):
+        return None
+    return arreglo if arreglo.dtype.kind in "biufc" else None
+
+
+class _Externalizador:
+    """
+    Recoge los literales a sustituir: `(inicio, fin, extension, valor)` en bytes del código.
+    """
+
+    def __init__(self, inicios_lineas: List[int], umbral: int):
+        self.inicios_lineas = inicios_lineas
+        self.umbral = umbral
+        self.sustituciones: List[Tuple[int, int, str, object]] = []
+
+    def _rango(self, nodo: ast.AST) -> Tuple[int, int]:
+        return (self.inicios_lineas[nodo.lineno - 1] + nodo.col_offset,
+                self.inicios_lineas[nodo.end_lineno - 1] + nodo.end_col_offset)
+
+    def visitar(self, nodo: ast.AST):
+        if isinstance(nodo, _TIPOS_LITERAL + (ast.Call,)):
+            inicio, fin = self._rango(nodo)
+            if fin - inicio >= self.umbral and self._sustituir(nodo, inicio, fin):
+                return
+        for hijo in ast.iter_child_nodes(nodo):
+            self.visitar(hijo)
+
+    def _sustituir(self, nodo: ast.AST, inicio: int, fin: int) -> bool:
+        literal = nodo.args[0] if _es_llamada_numpy(nodo) else nodo
+        if not isinstance(literal, _TIPOS_LITERAL):
+            return False
+        try:
+            valor = ast.literal_eval(literal)
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+            return False # No es constante (contiene nombres, llamadas...).
+        if literal is not nodo:
+            arreglo = _arreglo_numerico(valor)
+            if arreglo is not None:
+                self.sustituciones.append((inicio, fin, ".npy", arreglo))
+                return True
+            # Sin NumPy (o de objetos): se externaliza sólo el literal y se mantiene la llamada.
+            inicio, fin = self._rango(literal)
+        self.sustituciones.append((inicio, fin, ".marshal", valor))
+        return True
+
+
+def externalizar_literales(codigo_python: str, directorio_datos: str,
+                           umbral: int = UMBRAL_POR_DEFECTO) -> Tuple[str, List[str]]:
+    """
+    Guarda los literales grandes del código generado en `directorio_datos` y los sustituye por cargas.
+
+    El código generado busca los datos en un directorio con el nombre de
+    `directorio_datos` junto a su propio archivo (`__file__`), así que el directorio
+    debe acompañar al `.py` (o incluirse en el binario con ese nombre).
+
+    Args:
+        codigo_python: Código Python generado por la traducción.
+        directorio_datos: Directorio donde escribir los archivos de datos (se crea si
+                          hace falta; se borran los datos de una traducción anterior).
+        umbral: Tamaño mínimo en bytes del código de un literal para externalizarlo.
+
+    Returns:
+        Una tupla `(codigo_python, archivos)`. Si `archivos` (las rutas escritas) no
+        está vacía, el código tiene LINEAS_INSERTADAS líneas más al principio.
+
+    Raises:
+        SyntaxError: Si el código generado no es Python válido.
+    """
+    codigo_bytes = codigo_python.encode("utf-8") # ast da las columnas en bytes UTF-8.
+    externalizador = _Externalizador(_desplazamientos_lineas(codigo_bytes), umbral)
+    externalizador.visitar(ast.parse(codigo_python))
+    if not externalizador.sustituciones:
+        return codigo_python, []
+
+    os.makedirs(directorio_datos, exist_ok=True)
+    for nombre in os.listdir(directorio_datos):
+        if nombre.endswith((".npy", ".marshal")):
+            os.remove(os.path.join(directorio_datos, nombre))
+    nombre_directorio = os.path.basename(os.path.normpath(directorio_datos))
+
+    archivos = []
+    partes = []
+    anterior = 0
+    for indice, (inicio, fin, extension, valor) in enumerate(sorted(externalizador.sustituciones, key=lambda s: s[0])):
+        ruta = os.path.join(directorio_datos, f"{indice}{extension}")
+        if extension == ".npy":
+            import numpy as np
+            np.save(ruta, valor, allow_pickle=False)
+        else:
+            with open(ruta, "wb") as archivo:
+                marshal.dump(valor, archivo)
+        archivos.append(ruta)
+        # Los saltos de línea del literal se conservan dentro de los paréntesis de la llamada.
+        saltos = "\n" * codigo_bytes.count(b"\n", inicio, fin)
+        llamada = f"{NOMBRE_CARGADOR}(__file__, {nombre_directorio + '/' + os.path.basename(ruta)!r}{saltos})"
+        partes += [codigo_bytes[anterior:inicio], llamada.encode("utf-8")]
+        anterior = fin
+    partes.append(codigo_bytes[anterior:])
+    codigo = b"".join(partes).decode("utf-8")
+
+    # El import va tras la línea de codificación (que debe seguir siendo la primera).
+    lineas = codigo.splitlines(keepends=True)
+    posicion = 1 if lineas and lineas[0].startswith("# -*- coding") else 0
+    lineas.insert(posicion, _IMPORT_CARGADOR)
+    return "".join(lineas), archivos
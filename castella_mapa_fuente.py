@@ -0,0 +1,60 @@
+# castella_mapa_fuente.py
+
+"""
+Marcas de origen que el transformer inserta en el texto generado.
+
+Cuando se traduce con mapa de fuente, CastellaTransformer antepone a cada sentencia
+una marca con su línea Castella. Las marcas usan caracteres del Área de Uso
+Privado de Unicode, que nunca aparecen en el código generado y que `str.strip()`
+no considera espacios (así no alteran el filtrado de líneas vacías del transformer).
+Al final de la traducción `extraer_marcas` las elimina y devuelve los segmentos
+del mapa (ver `castella_runtime.mapa_fuente`).
+"""
+
+import re
+from typing import List, Tuple
+
+INICIO_MARCA = "\ue000"
+FIN_MARCA = "\ue001"
+
+_PATRON_MARCA = re.compile(INICIO_MARCA + r"L(\d+)" + FIN_MARCA)
+
+
+def marca_origen(linea: int) -> str:
+    """
+    Devuelve la marca que indica que el texto siguiente proviene de `linea`.
+    """
+    return f"{INICIO_MARCA}L{linea}{FIN_MARCA}"
+
+
+def extraer_marcas(codigo_marcado: str) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    Elimina las marcas de origen del código generado.
+
+    Las líneas sin marca heredan el origen de la última línea marcada (p. ej. las
+    líneas de continuación de una misma sentencia).
+
+    Args:
+        codigo_marcado: Código Python con marcas, tal como lo produce el transformer.
+
+    Returns:
+        Una tupla `(codigo_python, segmentos)`, donde `segmentos` son pares
+        `(linea_py, linea_castella)` sólo en los puntos donde cambia el origen.
+    """
+    if INICIO_MARCA not in codigo_marcado:
+        return codigo_marcado, []
+
+    lineas = codigo_marcado.split("\n")
+    segmentos: List[Tuple[int, int]] = []
+    actual = None
+    for indice, linea in enumerate(lineas):
+        if INICIO_MARCA not in linea:
+            continue
+        coincidencia = _PATRON_MARCA.search(linea)
+        lineas[indice] = _PATRON_MARCA.sub("", linea)
+        if coincidencia:
+            origen = int(coincidencia.group(1))
+            if origen != actual:
+                segmentos.append((indice + 1, origen))
+                actual = origen
+    return "\n".join(lineas), segmentos
@@ -0,0 +1,524 @@
+# castella_optimizador.py
+
+"""
+Pasadas de optimización sobre el árbol de Lark, entre el parseo y la emisión de Python.
+
+Niveles (opción `-O` del compilador):
+  * -O0: sin optimizaciones; el árbol llega intacto al transformer.
+  * -O1: plegado de constantes (aritmética y operaciones de bits sobre literales
+         numéricos, `complex_literal` como `3 + 4j`, expresiones entre paréntesis) y
+         eliminación de sentencias inalcanzables tras `retornar`, `romper` o `continuar`.
+  * -O2: lo anterior más la poda de ramas con condición literal (`si (verdadero)`,
+         `sino si (falso)`, `mientras (falso)`) y la vectorización con NumPy de los
+         bucles elemento a elemento sobre arreglos `Matriz` (ver castella_vectorizador).
+
+Las pasadas modifican el árbol en el sitio y conservan los metadatos de posición de
+las sentencias, por lo que el mapa de fuente sigue siendo válido.
+"""
+
+import ast
+import math
+import operator
+import sys
+from typing import Any, Dict, List, Optional
+
+from lark import Token, Tree
+
+try:
+    from .castella_vectorizador import vectorizar
+except ImportError as e:
+    print("\nError de Importación en castella_optimizador:")
+    print("No se pudo importar 'castella_vectorizador'.")
+    print(f"Detalle: {e}")
+    sys.exit(1)
+
+NIVELES_OPTIMIZACION = (0, 1, 2)
+
+# Marcador de "no es un literal conocido en tiempo de compilación".
+_SIN_VALOR = object()
+
+# Cadena de reglas de una expresión, de la menos a la más prioritaria. Una expresión
+# literal plegada se re-emite como una cadena de nodos de un solo hijo hasta `primary`.
+_CADENA_EXPRESION = [
+    "expr", "ternary", "bool_or", "bool_and", "not_expr", "comparison",
+    "bitwise_or_expr", "bitwise_xor_expr", "bitwise_and_expr", "shift_expr",
+    "additive_expr", "multiplicative_expr", "unary_expr", "power", "access", "primary",
+]
+_REGLAS_TRANSPARENTES = frozenset(_CADENA_EXPRESION + ["numero"])
+
+# Reglas binarias (operando, operador, operando, ...) que se pueden plegar.
+_REGLAS_BINARIAS = frozenset([
+    "bitwise_or_expr", "bitwise_xor_expr", "bitwise_and_expr", "shift_expr",
+    "additive_expr", "multiplicative_expr", "power",
+])
+
+_OPERADORES_BINARIOS = {
+    "PLUS": operator.add,
+    "MINUS": operator.sub,
+    "STAR": operator.mul,
+    "SLASH": operator.truediv,
+    "PERCENT": operator.mod,
+    "DOUBLE_SLASH": operator.floordiv,
+    "DOUBLE_STAR": operator.pow,
+    "LSHIFT_OP": operator.lshift,
+    "RSHIFT_OP": operator.rshift,
+    "AMPERSAND_OP": operator.and_,
+    "PIPE_OP": operator.or_,
+    "CARET_OP": operator.xor,
+}
+
+_OPERADORES_UNARIOS = {"-": operator.neg, "+": operator.pos, "~": operator.invert}
+
+_TOKENS_NUMERICOS = frozenset(["INT", "FLOAT", "numero", "imaginary_literal", "complex_literal"])
+_TOKENS_CONSTANTES = {"VERDADERO_KW": True, "FALSO_KW": False, "NINGUNO_KW": None, "NONE_KW": None}
+
+# Límites para no generar literales enormes (p. ej. `2 ** 100000`) ni tardar en calcularlos.
+_MAX_LARGO_LITERAL = 40
+_MAX_BITS_ENTERO = 4096
+
+# Palabras clave de if_stmt (la gramática y el transformer usan nombres distintos).
+_CLAVES_SI = frozenset(["SI_KW", "IF_KW"])
+_CLAVES_SINO_SI = frozenset(["ELIF_KW"])
+_CLAVES_SINO = frozenset(["SINO_KW", "ELSE_KW"])
+
+# Sentencias que terminan el flujo del bloque actual.
+_TERMINADORES = frozenset(["return_stmt", "BREAK", "CONTINUE", "BREAK_STMT", "CONTINUE_STMT"])
+
+# Reglas que siempre vinculan nombres en el ámbito donde aparecen.
+_REGLAS_VINCULANTES = frozenset([
+    "declaration", "declaracion", "unpack_assignment", "for_stmt", "parallel_for_stmt", "func_def", "class_def",
+    "importar", "import_module", "from_import",
+])
+
+
+class OptimizadorCastella:
+    """
+    Aplica las pasadas de optimización de un nivel a un árbol de Lark.
+    """
+
+    def __init__(self, nivel: int = 1):
+        """
+        Args:
+            nivel: Nivel de optimización (ver NIVELES_OPTIMIZACION).
+
+        Raises:
+            ValueError: Si el nivel no es válido.
+        """
+        if nivel not in NIVELES_OPTIMIZACION:
+            raise ValueError(f"Nivel de optimización no válido: {nivel}. Opciones: {', '.join(map(str, NIVELES_OPTIMIZACION))}")
+        self.nivel = nivel
+        self.estadisticas: Dict[str, int] = {
+            "constantes_plegadas": 0, "sentencias_eliminadas": 0, "ramas_podadas": 0, "bucles_vectorizados": 0,
+        }
+
+    def optimizar(self, arbol: Tree) -> Tree:
+        """
+        Optimiza `arbol` en el sitio y lo devuelve.
+        """
+        if self.nivel == 0:
+            return arbol
+        self._plegar_constantes(arbol)
+        self._optimizar_sentencias(arbol, en_funcion=False)
+        if self.nivel >= 2:
+            self.estadisticas["bucles_vectorizados"] = vectorizar(arbol)
+        return arbol
+
+    # --- Plegado de constantes ---
+
+    def _plegar_constantes(self, nodo: Tree):
+        """
+        Pliega las subexpresiones literales de abajo hacia arriba.
+        """
+        for hijo in nodo.children:
+            if isinstance(hijo, Tree):
+                self._plegar_constantes(hijo)
+
+        hijos = nodo.children
+        if nodo.data == "primary":
+            # `(2 + 3)` o un complex_literal `3 + 4j`: reemplazar el contenido del primary.
+            es_parentesis = len(hijos) == 3 and _es_token(hijos[0], "LPAR")
+            es_complejo = len(hijos) == 1 and isinstance(hijos[0], Tree) and hijos[0].data == "complex_literal"
+            if es_parentesis or es_complejo:
+                texto = _texto_literal(valor_literal(nodo))
+                if texto is not None:
+                    nodo.children = [Token("numero", texto)]
+                    self.estadisticas["constantes_plegadas"] += 1
+            return
+
+        if (nodo.data in _REGLAS_BINARIAS and len(hijos) > 1) or (nodo.data == "unary_expr" and len(hijos) == 2):
+            texto = _texto_literal(valor_literal(nodo))
+            if texto is not None:
+                nodo.children = [_cadena_literal(nodo.data, texto)]
+                self.estadisticas["constantes_plegadas"] += 1
+
+    # --- Sentencias: ramas literales y código inalcanzable ---
+
+    def _optimizar_sentencias(self, nodo: Tree, en_funcion: bool):
+        """
+        Recorre los contenedores de sentencias (`start` y `block`) de forma recursiva.
+
+        Args:
+            nodo: Nodo a recorrer.
+            en_funcion: Si el nodo está dentro del cuerpo de una función (afecta a qué
+                        sentencias inalcanzables se pueden eliminar, ver `_eliminar_inalcanzable`).
+        """
+        for hijo in nodo.children:
+            if isinstance(hijo, Tree):
+                if hijo.data in ("func_def", "parallel_for_stmt"):
+                    # El cuerpo de `paralelo para` se traduce como una función del elemento.
+                    self._optimizar_sentencias(hijo, en_funcion=True)
+                elif hijo.data == "class_def":
+                    self._optimizar_sentencias(hijo, en_funcion=False)
+                else:
+                    self._optimizar_sentencias(hijo, en_funcion)
+
+        if nodo.data not in ("start", "block"):
+            return
+        if self.nivel >= 2:
+            self._podar_ramas(nodo, en_funcion)
+        self._eliminar_inalcanzable(nodo, en_funcion)
+
+    def _podar_ramas(self, contenedor: Tree, en_funcion: bool):
+        """
+        Reemplaza los `si`/`mientras` con condiciones literales por el bloque que se ejecutaría.
+
+        Dentro de una función, los bloques descartados que vinculan nombres se conservan,
+        como en `_eliminar_inalcanzable`.
+        """
+        nuevos_hijos = []
+        for hijo in contenedor.children:
+            sentencia = _sentencia_interna(hijo)
+            reemplazo = None
+            if _contiene_producir(sentencia):
+                pass # Eliminar un `producir` (aunque no se ejecute) cambiaría el tipo de la función.
+            elif isinstance(sentencia, Tree) and sentencia.data == "if_stmt":
+                reemplazo = self._podar_si(sentencia, en_funcion)
+            elif isinstance(sentencia, Tree) and sentencia.data == "while_stmt":
+                condicion = next((h for h in sentencia.children if isinstance(h, Tree) and h.data == "expr"), None)
+                valor = valor_literal(condicion) if condicion is not None else _SIN_VALOR
+                # En una función, un cuerpo que vincula nombres los hace locales aunque no se ejecute.
+                if valor is not _SIN_VALOR and not valor and not (en_funcion and _vincula_nombres(sentencia)):
+                    reemplazo = []
+            if reemplazo is None:
+                nuevos_hijos.append(hijo)
+            else:
+                self.estadisticas["ramas_podadas"] += 1
+                nuevos_hijos.extend(reemplazo)
+        contenedor.children = nuevos_hijos
+
+    def _podar_si(self, sentencia: Tree, en_funcion: bool) -> Optional[List[Any]]:
+        """
+        Poda las cláusulas de un if_stmt con condiciones literales (nada, si dentro de
+        una función alguno de los bloques descartados vincula nombres).
+
+        Returns:
+            None si no cambia nada; una lista de elementos a insertar en lugar de la
+            sentencia si se resuelve por completo; o [] para eliminarla. Si sólo se
+            eliminan algunas cláusulas, el if_stmt se modifica en el sitio y se devuelve None.
+        """
+        clausulas, bloque_sino = _clausulas_si(sentencia)
+        if clausulas is None:
+            return None
+
+        conservadas = []
+        descartados = [] # Bloques que desaparecen del código.
+        cambio = False
+        for indice, clausula in enumerate(clausulas):
+            valor = valor_literal(clausula["condicion"])
+            if valor is _SIN_VALOR:
+                conservadas.append(clausula)
+                continue
+            cambio = True
+            if valor:
+                # Condición siempre verdadera: sus hermanas posteriores nunca se evalúan.
+                descartados.extend(posterior["bloque"] for posterior in clausulas[indice + 1:])
+                if bloque_sino is not None:
+                    descartados.append(bloque_sino)
+                bloque_sino = clausula["bloque"]
+                break
+            descartados.append(clausula["bloque"])
+        if not cambio:
+            return None
+        if en_funcion and any(_vincula_nombres(bloque) for bloque in descartados):
+            return None
+        if not conservadas:
+            return _contenido_bloque(bloque_sino) if bloque_sino is not None else []
+
+        primera_clave = clausulas[0]["clave"]
+        hijos = []
+        for indice, clausula in enumerate(conservadas):
+            clave = clausula["clave"]
+            if indice == 0 and clave.type not in _CLAVES_SI:
+                clave = Token(primera_clave.type, primera_clave.value)
+            hijos.extend([clave] + clausula["resto"])
+        if bloque_sino is not None:
+            hijos.extend([_token_sino(sentencia), bloque_sino])
+        sentencia.children = hijos
+        return None
+
+    def _eliminar_inalcanzable(self, contenedor: Tree, en_funcion: bool):
+        """
+        Elimina las sentencias que siguen a un terminador (`retornar`, `romper`, `continuar`).
+
+        Dentro de una función, asignar un nombre lo convierte en local para todo el cuerpo
+        (aunque la asignación nunca se ejecute), y un `producir` la convierte en generadora,
+        así que las sentencias inalcanzables que vinculan nombres o producen se conservan
+        para no cambiar la semántica de Python.
+        """
+        hijos = contenedor.children
+        for indice, hijo in enumerate(hijos):
+            if _termina_flujo(hijo):
+                break
+        else:
+            return
+
+        conservados = hijos[:indice + 1]
+        for hijo in hijos[indice + 1:]:
+            if isinstance(hijo, Token) and hijo.type in ("LBRACE", "RBRACE"):
+                conservados.append(hijo)
+            elif en_funcion and (_vincula_nombres(hijo) or _contiene_producir(hijo)):
+                conservados.append(hijo)
+            else:
+                self.estadisticas["sentencias_eliminadas"] += 1
+        contenedor.children = conservados
+
+
+def optimizar(arbol: Tree, nivel: int) -> Tree:
+    """
+    Aplica las optimizaciones del `nivel` indicado a `arbol` (en el sitio).
+    """
+    return OptimizadorCastella(nivel).optimizar(arbol)
+
+
+# === UTILIDADES ===
+
+def _es_token(nodo: Any, tipo: str) -> bool:
+    return isinstance(nodo, Token) and nodo.type == tipo
+
+
+def valor_literal(nodo: Any) -> Any:
+    """
+    Evalúa `nodo` si es una expresión compuesta sólo por literales.
+
+    Returns:
+        El valor Python de la expresión, o `_SIN_VALOR` si no es constante o no se
+        puede evaluar con seguridad en tiempo de compilación.
+    """
+    while isinstance(nodo, Tree) and nodo.data in _REGLAS_TRANSPARENTES and len(nodo.children) == 1:
+        nodo = nodo.children[0]
+
+    if isinstance(nodo, Token):
+        if nodo.type in _TOKENS_CONSTANTES:
+            return _TOKENS_CONSTANTES[nodo.type]
+        if nodo.type in _TOKENS_NUMERICOS:
+            try:
+                return ast.literal_eval(nodo.value)
+            except (ValueError, SyntaxError):
+                return _SIN_VALOR
+        return _SIN_VALOR
+    if not isinstance(nodo, Tree):
+        return _SIN_VALOR
+
+    hijos = nodo.children
+    if nodo.data == "primary" and len(hijos) == 3 and _es_token(hijos[0], "LPAR"):
+        return valor_literal(hijos[1])
+    if nodo.data == "imaginary_literal" and len(hijos) == 1 and isinstance(hijos[0], Token):
+        try:
+            return complex(hijos[0].value)
+        except ValueError:
+            return _SIN_VALOR
+    if nodo.data == "complex_literal" and len(hijos) == 3 and isinstance(hijos[1], Token):
+        return _evaluar_binario(hijos[1].type, valor_literal(hijos[0]), valor_literal(hijos[2]))
+    if nodo.data == "unary_expr" and len(hijos) == 2 and isinstance(hijos[0], Token):
+        operando = valor_literal(hijos[1])
+        funcion = _OPERADORES_UNARIOS.get(hijos[0].value)
+        if operando is _SIN_VALOR or funcion is None or not _es_numero(operando):
+            return _SIN_VALOR
+        try:
+            return funcion(operando)
+        except (TypeError, ValueError, OverflowError):
+            return _SIN_VALOR
+    if nodo.data == "not_expr" and len(hijos) == 2:
+        operando = valor_literal(hijos[1])
+        return _SIN_VALOR if operando is _SIN_VALOR else (not operando)
+    if nodo.data in _REGLAS_BINARIAS and len(hijos) >= 3 and len(hijos) % 2 == 1:
+        operandos = [valor_literal(h) for h in hijos[0::2]]
+        operadores = [h.type if isinstance(h, Token) else None for h in hijos[1::2]]
+        if nodo.data == "power":
+            # Python evalúa `a ** b ** c` como `a ** (b ** c)`: plegar de derecha a izquierda.
+            resultado = operandos[-1]
+            for operador, operando in zip(reversed(operadores), reversed(operandos[:-1])):
+                resultado = _evaluar_binario(operador, operando, resultado)
+            return resultado
+        resultado = operandos[0]
+        for operador, operando in zip(operadores, operandos[1:]):
+            resultado = _evaluar_binario(operador, resultado, operando)
+        return resultado
+    return _SIN_VALOR
+
+
+def _es_numero(valor: Any) -> bool:
+    return isinstance(valor, (int, float, complex))
+
+
+def _evaluar_binario(operador: Optional[str], izquierda: Any, derecha: Any) -> Any:
+    """
+    Aplica un operador binario a dos literales, o devuelve `_SIN_VALOR` si no es seguro.
+    """
+    funcion = _OPERADORES_BINARIOS.get(operador)
+    if funcion is None or izquierda is _SIN_VALOR or derecha is _SIN_VALOR:
+        return _SIN_VALOR
+    if not (_es_numero(izquierda) and _es_numero(derecha)):
+        return _SIN_VALOR
+    # Evitar cálculos desproporcionados: potencias y desplazamientos enormes.
+    if operador == "DOUBLE_STAR" and isinstance(derecha, int) and isinstance(izquierda, int):
+        if abs(derecha) > 1024 or abs(izquierda).bit_length() * abs(derecha) > _MAX_BITS_ENTERO:
+            return _SIN_VALOR
+    if operador == "LSHIFT_OP" and isinstance(derecha, int) and derecha > _MAX_BITS_ENTERO:
+        return _SIN_VALOR
+    try:
+        return funcion(izquierda, derecha)
+    except (ArithmeticError, TypeError, ValueError):
+        # División por cero, desbordamiento, etc.: se deja para que falle en tiempo de ejecución.
+        return _SIN_VALOR
+
+
+def _texto_literal(valor: Any) -> Optional[str]:
+    """
+    Devuelve el texto Python de un valor numérico plegado, o None si no debe emitirse.
+    """
+    if valor is _SIN_VALOR or isinstance(valor, bool) or not _es_numero(valor):
+        return None
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    if isinstance(valor, complex):
+        if not (math.isfinite(valor.real) and math.isfinite(valor.imag)):
+            return None
+        if valor.real == 0 and math.copysign(1.0, valor.real) < 0:
+            return None # repr no conserva el signo del cero real
+    texto = repr(valor)
+    if len(texto) > _MAX_LARGO_LITERAL:
+        return None
+    if texto.startswith("-"):
+        texto = f"({texto})"
+    return texto
+
+
+def _cadena_literal(regla: str, texto: str) -> Tree:
+    """
+    Construye la cadena de nodos de un solo hijo desde el hijo de `regla` hasta `primary`.
+    """
+    posicion = _CADENA_EXPRESION.index(regla)
+    nodo = Tree("primary", [Token("numero", texto)])
+    for nombre in reversed(_CADENA_EXPRESION[posicion + 1:-1]):
+        nodo = Tree(nombre, [nodo])
+    return nodo
+
+
+def _sentencia_interna(nodo: Any) -> Any:
+    """Devuelve la sentencia concreta dentro de un nodo `stmt` (o el propio nodo)."""
+    if isinstance(nodo, Tree) and nodo.data == "stmt" and len(nodo.children) == 1:
+        return nodo.children[0]
+    return nodo
+
+
+def _clausulas_si(sentencia: Tree):
+    """
+    Divide un if_stmt en cláusulas `{"clave", "condicion", "bloque", "resto"}` y el bloque `sino`.
+
+    Returns:
+        `(clausulas, bloque_sino)`, o `(None, None)` si la estructura no es la esperada.
+    """
+    clausulas = []
+    bloque_sino = None
+    hijos = sentencia.children
+    indice = 0
+    while indice < len(hijos):
+        clave = hijos[indice]
+        if not isinstance(clave, Token):
+            return None, None
+        if clave.type in _CLAVES_SI or clave.type in _CLAVES_SINO_SI:
+            resto = []
+            indice += 1
+            while indice < len(hijos):
+                resto.append(hijos[indice])
+                indice += 1
+                if isinstance(resto[-1], Tree) and resto[-1].data == "block":
+                    break
+            condicion = next((h for h in resto if isinstance(h, Tree) and h.data == "expr"), None)
+            if condicion is None or not (isinstance(resto[-1], Tree) and resto[-1].data == "block"):
+                return None, None
+            clausulas.append({"clave": clave, "condicion": condicion, "bloque": resto[-1], "resto": resto})
+        elif clave.type in _CLAVES_SINO and indice + 1 < len(hijos):
+            bloque_sino = hijos[indice + 1]
+            indice += 2
+        else:
+            return None, None
+    return (clausulas or None), bloque_sino
+
+
+def _token_sino(sentencia: Tree) -> Token:
+    """Devuelve el token `sino` original del if_stmt (o uno nuevo)."""
+    existente = next((h for h in sentencia.children if isinstance(h, Token) and h.type in _CLAVES_SINO), None)
+    return existente if existente is not None else Token("SINO_KW", "sino")
+
+
+def _contenido_bloque(bloque: Tree) -> List[Any]:
+    """Devuelve los elementos de un bloque sin las llaves."""
+    return [h for h in bloque.children if not (isinstance(h, Token) and h.type in ("LBRACE", "RBRACE"))]
+
+
+def _termina_flujo(nodo: Any) -> bool:
+    """
+    Indica si una sentencia termina siempre el flujo del bloque (retornar/romper/continuar,
+    o un `si` con `sino` cuyas ramas terminan todas).
+    """
+    sentencia = _sentencia_interna(nodo)
+    if isinstance(sentencia, Token):
+        return sentencia.type in _TERMINADORES
+    if not isinstance(sentencia, Tree):
+        return False
+    if sentencia.data in _TERMINADORES:
+        return True
+    if sentencia.data == "if_stmt":
+        clausulas, bloque_sino = _clausulas_si(sentencia)
+        if clausulas is None or bloque_sino is None:
+            return False
+        bloques = [c["bloque"] for c in clausulas] + [bloque_sino]
+        return all(any(_termina_flujo(h) for h in _contenido_bloque(b)) for b in bloques)
+    return False
+
+
+def _es_nombre_simple(acceso: Any) -> bool:
+    """Indica si un nodo `access` es un identificador sin sufijos (`x`, no `x.a` ni `x[0]`)."""
+    while isinstance(acceso, Tree) and len(acceso.children) == 1:
+        acceso = acceso.children[0]
+    return isinstance(acceso, Token) and acceso.type == "IDENT"
+
+
+def _contiene_producir(nodo: Any) -> bool:
+    """
+    Indica si una sentencia contiene un `producir` de la función actual (no de una función anidada).
+    """
+    if not isinstance(nodo, Tree):
+        return False
+    if nodo.data == "yield_stmt":
+        return True
+    return any(_contiene_producir(hijo) for hijo in nodo.children
+               if not (isinstance(hijo, Tree) and hijo.data in ("func_def", "async_func_def", "class_def")))
+
+
+def _vincula_nombres(nodo: Any) -> bool:
+    """
+    Indica si una sentencia (o algo anidado en ella) vincula un nombre en el ámbito actual.
+    """
+    if not isinstance(nodo, Tree):
+        return False
+    for subarbol in nodo.iter_subtrees_topdown():
+        if subarbol.data in _REGLAS_VINCULANTES:
+            return True
+        if subarbol.data in ("asignacion", "augmented_assignment") and subarbol.children and _es_nombre_simple(subarbol.children[0]):
+            return True
+        if subarbol.data in ("with_stmt", "except_block") and any(_es_token(h, "COMO") for h in subarbol.children):
+            return True
+    return False
@@ -14,6 +14,10 @@ from lark import Lark, UnexpectedInput, Transformer, Tree, Token # Import Tree a
 try:
     from .castella_grammar import GRAMATICA
     from .castella_transformer import CastellaTransformer
+    from .castella_transformer_cython import CastellaCythonTransformer
+    from .castella_mapa_fuente import extraer_marcas
+    from .castella_optimizador import optimizar
+    from .castella_runtime.mapa_fuente import MapaFuente
 except ImportError as e:
     # Si falla la importación, significa que los archivos no están bien estructurados como paquete
     # o faltan los otros módulos.
@@ -27,18 +31,21 @@ except ImportError as e:
 
 import sys
 import traceback # Importar para imprimir el traceback de errores
+from typing import Callable, Iterable, List, Tuple
 
 # === CONFIGURACIÓN DEL PARSER ===
 # El parser de Lark se crea aquí cuando este módulo es importado.
 # Esto valida la sintaxis de la GRAMATICA y construye el motor de parsing.
 try:
     print("\nIntentando crear el parser de Lark a partir de la gramática definida...")
-    # Instanciamos el transformer y lo pasamos al parser.
     # parser="lalr" indica que usamos el algoritmo LALR (Look-Ahead LR),
     # que es eficiente y adecuado para gramáticas tipo programación.
     # start="start" especifica la regla de inicio en la gramática.
-    # transformer=CastellaTransformer() crea una instancia del transformer.
-    parser = Lark(GRAMATICA, start="start", parser="lalr", transformer=CastellaTransformer())
+    # El parser produce árboles (con posiciones, para el mapa de fuente) y cada traducción
+    # los transforma con un CastellaTransformer nuevo: un transformer en línea compartido
+    # arrastraría de una traducción a otra su estado (funciones de castella_runtime usadas,
+    # contadores de nombres generados).
+    parser = Lark(GRAMATICA, start="start", parser="lalr", propagate_positions=True)
     print("Parser de Lark creado exitosamente. La sintaxis de la gramática es válida para Lark.")
 
 # --- Manejo de Errores Durante la Creación del Parser ---
@@ -57,17 +64,29 @@ except Exception as e:
     sys.exit(1)
 
 
+def obtener_parser_arbol() -> Lark:
+    """
+    Devuelve el parser que produce árboles con posiciones (`propagate_positions=True`).
+    """
+    return parser
+
+
 # === FUNCIÓN DE TRADUCCIÓN ===
 
-def traducir_a_python(codigo_castella: str) -> str:
+def traducir_a_python(codigo_castella: str, nivel_optimizacion: int = 0, rapido: bool = False) -> str:
     """
     Traduce una cadena de código Castella a una cadena de código Python.
 
     Utiliza el parser de Lark configurado globalmente para analizar el código
-    y el transformer asociado para convertir el árbol de sintaxis a código Python.
+    y un CastellaTransformer nuevo para convertir el árbol de sintaxis a código Python.
+    Con un nivel de optimización mayor que 0, el árbol pasa por las optimizaciones
+    de `castella_optimizador` antes de transformarse.
 
     Args:
         codigo_castella: La cadena que contiene el código fuente en Castella.
+        nivel_optimizacion: Nivel de optimización (0, 1 o 2; ver castella_optimizador).
+        rapido: Si es True, las funciones con parámetros numéricos se compilan con
+                Numba (`@rapido` de castella_runtime).
 
     Returns:
         Una cadena que contiene el código Python traducido.
@@ -86,6 +105,89 @@ def traducir_a_python(codigo_castella: str) -> str:
         Exception: Para cualquier otro error inesperado durante el proceso de parseo/transformación.
                    Se imprime el error y el traceback antes de relanzar.
     """
+    def parsear(codigo: str):
+        transformer = CastellaTransformer(rapido=rapido)
+        return transformer.transform(_parsear_arbol(codigo, transformer, nivel_optimizacion))
+
+    return _traducir(codigo_castella, parsear)
+
+
+def traducir_con_mapa(codigo_castella: str, nombre_fuente: str = "<castella>",
+                      nombre_generado: str = "<castella:generado>",
+                      nivel_optimizacion: int = 0, rapido: bool = False) -> Tuple[str, MapaFuente]:
+    """
+    Traduce código Castella a Python y construye su mapa de fuente.
+
+    Cada sentencia generada queda asociada a la línea Castella que la originó,
+    de modo que perfiladores y tracebacks puedan reportar ubicaciones `.castella`.
+
+    Args:
+        codigo_castella: La cadena que contiene el código fuente en Castella.
+        nombre_fuente: Nombre del archivo Castella (se guarda en el mapa).
+        nombre_generado: Nombre del archivo o `co_filename` del Python generado.
+        nivel_optimizacion: Nivel de optimización (0, 1 o 2; ver castella_optimizador).
+        rapido: Compila con Numba las funciones numéricas (ver `traducir_a_python`).
+
+    Returns:
+        Una tupla `(codigo_python, mapa)`.
+
+    Raises:
+        Las mismas excepciones que `traducir_a_python`.
+    """
+    transformer = CastellaTransformer(registrar_origen=True, rapido=rapido)
+    segmentos = []
+
+    def parsear(codigo: str):
+        resultado = transformer.transform(_parsear_arbol(codigo, transformer, nivel_optimizacion))
+        if not isinstance(resultado, str):
+            return resultado # _traducir reporta el tipo inesperado.
+        codigo_python, segmentos_encontrados = extraer_marcas(resultado)
+        segmentos.extend(segmentos_encontrados)
+        return codigo_python
+
+    codigo_python = _traducir(codigo_castella, parsear)
+    return codigo_python, MapaFuente.desde_codigo(nombre_fuente, nombre_generado, codigo_python, segmentos)
+
+
+def traducir_a_cython(codigo_castella: str, nivel_optimizacion: int = 0,
+                      excluir: Iterable[str] = ()) -> Tuple[str, List[str]]:
+    """
+    Traduce código Castella a un módulo Cython (`.pyx`) con las funciones numéricas tipadas.
+
+    Args:
+        codigo_castella: La cadena que contiene el código fuente en Castella.
+        nivel_optimizacion: Nivel de optimización (0, 1 o 2; ver castella_optimizador).
+        excluir: Funciones que se emiten sin tipos (ver `castella_transformer_cython`).
+
+    Returns:
+        Una tupla `(codigo_pyx, funciones_tipadas)`.
+
+    Raises:
+        Las mismas excepciones que `traducir_a_python`.
+    """
+    transformer = CastellaCythonTransformer(excluir=excluir)
+
+    def parsear(codigo: str):
+        return transformer.transform(_parsear_arbol(codigo, transformer, nivel_optimizacion))
+
+    codigo_pyx = _traducir(codigo_castella, parsear)
+    return codigo_pyx, list(transformer.funciones_tipadas)
+
+
+def _parsear_arbol(codigo: str, transformer: CastellaTransformer, nivel_optimizacion: int):
+    """
+    Parsea `codigo`, lo valida con `transformer.validar` y devuelve el árbol optimizado.
+    """
+    arbol = obtener_parser_arbol().parse(codigo)
+    transformer.validar(arbol)
+    return optimizar(arbol, nivel_optimizacion)
+
+
+def _traducir(codigo_castella: str, parsear: Callable[[str], str]) -> str:
+    """
+    Implementación común de la traducción: valida la entrada, llama a `parsear`
+    (parseo + transformación), normaliza el resultado y reporta los errores.
+    """
     # Manejar el caso de entrada vacía o solo con espacios en blanco.
     if not codigo_castella or not codigo_castella.strip():
         # Si no hay código para traducir, retornamos una cadena de comentario simple.
@@ -97,7 +199,7 @@ def traducir_a_python(codigo_castella: str) -> str:
     try:
         # Llamar al método parse del parser de Lark.
         # Esto dispara todo el proceso de parsing y transformación.
-        codigo_python_result = parser.parse(codigo_castella)
+        codigo_python_result = parsear(codigo_castella)
 
         print("--- Código Python generado ---")
 
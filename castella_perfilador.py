@@ -0,0 +1,64 @@
+# castella_perfilador.py
+
+"""
+Soporte del compilador para perfilar programas Castella en ejecución.
+
+Genera las líneas que activan los perfiladores de `castella_runtime` (tiempo con
+`perfil`, memoria con `memoria`) dentro de un binario de PyInstaller. Los
+perfiladores traducen sus resultados a ubicaciones Castella con el mapa de fuente
+que produce `castella_parser.traducir_con_mapa`.
+"""
+
+import sys
+from typing import Optional
+
+try:
+    from .castella_runtime.mapa_fuente import MapaFuente
+except ImportError as e:
+    print("\nError de Importación en castella_perfilador:")
+    print("No se pudo importar 'castella_runtime.mapa_fuente'.")
+    print(f"Detalle: {e}")
+    sys.exit(1)
+
+# Módulo de castella_runtime que implementa cada perfilador.
+PERFILADORES = {
+    "perfilar": "perfil",
+    "memoria": "memoria",
+}
+
+
+def instrumentar_script(codigo_python: str, mapa: MapaFuente, nombre_generado: str,
+                        perfiladores: dict[str, Optional[str]]) -> str:
+    """
+    Antepone al Python generado las líneas que activan los perfiladores al arrancar.
+
+    Se usa al construir binarios con `--perfilar` o `--memoria`: el ejecutable se
+    perfila a sí mismo e imprime el reporte (y exporta los archivos) al terminar.
+
+    Args:
+        codigo_python: Código Python generado.
+        mapa: Mapa de fuente de `codigo_python`.
+        nombre_generado: Nombre del script que se empaquetará (su `co_filename` en el binario).
+        perfiladores: Opción (clave de PERFILADORES) -> prefijo de los archivos de
+                      salida (None = sólo reporte).
+
+    Returns:
+        El código Python instrumentado.
+    """
+    if not perfiladores:
+        return codigo_python
+
+    # Cabecera + 2 líneas por perfilador; el mapa se serializa en una sola línea.
+    desplazamiento = 1 + 2 * len(perfiladores)
+    mapa_script = mapa.desplazar(desplazamiento)
+    mapa_script.generado = nombre_generado
+    mapa_serializado = repr(mapa_script.a_dict())
+
+    lineas = [f"# Perfilado activado por el compilador (--{', --'.join(perfiladores)})"]
+    # La memoria se activa primero: atexit ejecuta los finalizadores en orden inverso, así
+    # el perfilador de tiempo se detiene antes de que se analice la memoria.
+    for opcion in sorted(perfiladores, key=lambda o: o != "memoria"):
+        modulo, salida = PERFILADORES[opcion], perfiladores[opcion]
+        lineas.append(f"import castella_runtime.{modulo} as _castella_{modulo}")
+        lineas.append(f"_castella_{modulo}.activar({mapa_serializado}, salida={salida!r})")
+    return "\n".join(lineas) + "\n" + codigo_python
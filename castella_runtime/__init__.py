@@ -0,0 +1,12 @@
+# castella_runtime/__init__.py
+
+"""
+Biblioteca de tiempo de ejecución de Castella.
+
+Este paquete acompaña a los programas traducidos: el código Python generado lo
+importa cuando necesita funcionalidad que no existe en Python estándar (perfilado,
+utilidades de ejecución, etc.). Sólo depende de la biblioteca estándar y sus
+submódulos se importan bajo demanda, por lo que importarlo es barato.
+
+`generar_binario` lo incluye automáticamente en los ejecutables de PyInstaller.
+"""
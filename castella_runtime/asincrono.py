@@ -0,0 +1,99 @@
+# castella_runtime/asincrono.py
+
+"""
+Bucle de eventos para el código asíncrono de nivel superior de Castella.
+
+Python sólo permite `await` dentro de funciones `async`. Cuando una sentencia de
+nivel superior usa `esperar`, `asincrono para` o `asincrono con`, el transformer la
+envuelve en una corrutina y la ejecuta con `ejecutar_asincrono`:
+
+    let paginas = esperar descargar_todas(urls);
+
+    async def _castella_asincrono_1():
+        global paginas
+        paginas = await descargar_todas(urls)
+    _castella_ejecutar_asincrono(_castella_asincrono_1())
+
+Todas las sentencias del programa comparten un mismo bucle de eventos por hilo, que
+se cierra al terminar el proceso. Así, los objetos ligados al bucle (sesiones,
+conexiones, colas) y las tareas creadas con `asyncio.create_task` siguen vivos de
+una sentencia a la siguiente. Si el hilo ya tiene un bucle en marcha (código Castella
+embebido en un servicio asyncio), la corrutina se ejecuta en un bucle auxiliar en
+otro hilo y el que llama espera a que termine.
+"""
+
+import asyncio
+import atexit
+import threading
+from typing import Any, Coroutine, List, Optional
+
+_local = threading.local()
+_bucles: List[asyncio.AbstractEventLoop] = [] # Bucles creados, para cerrarlos al salir.
+_cerrojo = threading.Lock()
+
+# Bucle auxiliar (en su propio hilo) para cuando el hilo que llama ya tiene uno en marcha.
+_bucle_auxiliar: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _bucle_del_hilo() -> asyncio.AbstractEventLoop:
+    """
+    Devuelve el bucle de eventos persistente del hilo actual (lo crea la primera vez).
+    """
+    bucle = getattr(_local, "bucle", None)
+    if bucle is None or bucle.is_closed():
+        bucle = _local.bucle = asyncio.new_event_loop()
+        asyncio.set_event_loop(bucle)
+        with _cerrojo:
+            _bucles.append(bucle)
+    return bucle
+
+
+def _obtener_bucle_auxiliar() -> asyncio.AbstractEventLoop:
+    global _bucle_auxiliar
+    with _cerrojo:
+        if _bucle_auxiliar is None:
+            _bucle_auxiliar = asyncio.new_event_loop()
+            threading.Thread(target=_bucle_auxiliar.run_forever, name="castella-asincrono", daemon=True).start()
+        return _bucle_auxiliar
+
+
+def ejecutar_asincrono(corrutina: Coroutine) -> Any:
+    """
+    Ejecuta una corrutina de nivel superior hasta que termina.
+
+    Args:
+        corrutina: La corrutina a ejecutar.
+
+    Returns:
+        El valor que devuelve la corrutina (las excepciones se propagan).
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return _bucle_del_hilo().run_until_complete(corrutina)
+    return asyncio.run_coroutine_threadsafe(corrutina, _obtener_bucle_auxiliar()).result()
+
+
+@atexit.register
+def _cerrar_bucles():
+    """
+    Cierra los bucles al salir: termina los generadores asíncronos y el ejecutor por defecto.
+    """
+    with _cerrojo:
+        bucles = list(_bucles)
+        _bucles.clear()
+    for bucle in bucles:
+        if bucle.is_closed() or bucle.is_running():
+            continue
+        try:
+            tareas = [tarea for tarea in asyncio.all_tasks(bucle) if not tarea.done()]
+            for tarea in tareas:
+                tarea.cancel()
+            if tareas:
+                bucle.run_until_complete(asyncio.gather(*tareas, return_exceptions=True))
+            bucle.run_until_complete(bucle.shutdown_asyncgens())
+            bucle.run_until_complete(bucle.shutdown_default_executor())
+        finally:
+            bucle.close()
+    if _bucle_auxiliar is not None:
+        _bucle_auxiliar.call_soon_threadsafe(_bucle_auxiliar.stop)
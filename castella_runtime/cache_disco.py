@@ -0,0 +1,319 @@
+# castella_runtime/cache_disco.py
+
+"""
+Decorador `@cache_disco` de Castella: memorización persistente entre ejecuciones.
+
+    @cache_disco(max_mb=2048, mmap=verdadero)
+    funcion simular(parametros: Diccionario, pasos: int) -> Matriz { ... }
+
+Cada resultado se guarda en un archivo del directorio de la función dentro de
+`directorio` (por defecto `$CASTELLA_CACHE_DISCO`, o `~/.cache/castella/cache_disco`):
+los arreglos de NumPy como `.npy` (con `mmap=verdadero` se devuelven mapeados en
+memoria y de sólo lectura, sin leerlos enteros) y el resto con pickle.
+
+La clave combina un hash estable de los argumentos (con su tipo; los arreglos por su
+contenido) con la versión de la función: el transformer pasa un hash del código
+Castella de la función (`version=...`), así que cambiar su código invalida sus
+resultados. Usado desde Python sin `version`, se usa el código fuente de la función.
+
+Cuando los archivos de una función superan `max_mb`, se borran los usados hace más
+tiempo (LRU según la fecha de modificación, que se actualiza en cada acierto). Las
+escrituras son atómicas, así que varios procesos pueden compartir el directorio.
+"""
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Optional
+
+# Cambiar si cambia el formato de las claves o de los archivos: invalida las cachés existentes.
+VERSION_FORMATO = 1
+
+# Tamaño máximo por defecto de los archivos de una función (MB).
+MAX_MB_POR_DEFECTO = 1024
+
+_EXTENSIONES = (".npy", ".pkl")
+
+
+class ClaveNoCacheable(TypeError):
+    """
+    Un argumento no se puede convertir en una clave estable entre ejecuciones.
+    """
+
+
+def directorio_por_defecto() -> str:
+    """
+    Directorio raíz de la caché: `$CASTELLA_CACHE_DISCO`, o `castella/cache_disco` en la caché del usuario.
+    """
+    configurado = os.environ.get("CASTELLA_CACHE_DISCO")
+    if configurado:
+        return configurado
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "castella", "cache_disco")
+
+
+def _es_arreglo_numpy(valor: Any) -> bool:
+    # Como en castella_runtime.memorizacion: NumPy no se importa, y las subclases de
+    # `ndarray` (`np.memmap` y otras) también cuentan como arreglos.
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and isinstance(valor, numpy.ndarray)
+
+
+def _huella(valor: Any) -> bytes:
+    """
+    Resumen estable de un argumento (igual en todos los procesos, a diferencia de `hash`).
+
+    Raises:
+        ClaveNoCacheable: Si el valor no tiene una representación estable.
+    """
+    tipo = type(valor)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{tipo.__module__}.{tipo.__qualname__}\0".encode())
+    if _es_arreglo_numpy(valor):
+        h.update(f"{valor.dtype.str}{valor.shape}\0".encode())
+        h.update(valor.tobytes())
+    elif valor is None or tipo in (bool, int, float, complex, str):
+        h.update(repr(valor).encode())
+    elif tipo is bytes:
+        h.update(valor)
+    elif tipo in (list, tuple):
+        for elemento in valor:
+            h.update(_huella(elemento))
+    elif tipo is dict:
+        for par in sorted(_huella(k) + _huella(v) for k, v in valor.items()):
+            h.update(par)
+    elif tipo in (set, frozenset):
+        for elemento in sorted(_huella(e) for e in valor):
+            h.update(elemento)
+    else:
+        try:
+            h.update(pickle.dumps(valor, protocol=4))
+        except Exception:
+            raise ClaveNoCacheable(f"argumento de tipo {tipo.__name__} sin representación estable") from None
+    return h.digest()
+
+
+def _version_funcion(funcion: Callable) -> str:
+    """
+    Versión de una función usada desde Python (sin `version`): hash de su código fuente.
+    """
+    try:
+        fuente = inspect.getsource(funcion).encode()
+    except (OSError, TypeError):
+        codigo = funcion.__code__
+        fuente = codigo.co_code + repr(codigo.co_consts).encode()
+    return hashlib.sha256(fuente).hexdigest()[:16]
+
+
+class CacheDisco:
+    """
+    Archivos de resultados de una función, con límite de tamaño y expulsión LRU.
+    """
+
+    def __init__(self, directorio: str, max_mb: Optional[float] = MAX_MB_POR_DEFECTO, mmap: bool = False):
+        if max_mb is not None and max_mb <= 0:
+            raise ValueError(f"El tamaño máximo de la caché de disco debe ser positivo o ninguno: {max_mb}")
+        self.directorio = directorio
+        self.max_bytes = int(max_mb * 2**20) if max_mb is not None else None
+        self.mmap = mmap
+        self._cerrojo = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.escrituras = 0
+        self.expulsiones = 0
+        self.errores = 0
+        self.no_cacheables = 0
+
+    def _ruta(self, clave: str, extension: str) -> str:
+        return os.path.join(self.directorio, clave + extension)
+
+    def leer(self, clave: str) -> tuple:
+        """
+        Devuelve `(True, valor)` si hay un resultado guardado para `clave`, o `(False, None)`.
+        """
+        for extension in _EXTENSIONES:
+            ruta = self._ruta(clave, extension)
+            try:
+                if extension == ".npy":
+                    import numpy as np # Sólo hay archivos .npy si el programa usa NumPy.
+                    valor = np.load(ruta, mmap_mode="r" if self.mmap else None, allow_pickle=False)
+                else:
+                    with open(ruta, "rb") as archivo:
+                        valor = pickle.load(archivo)
+            except FileNotFoundError:
+                continue
+            except Exception:
+                # Archivo dañado (o borrado a medias por otro proceso): se recalcula.
+                with self._cerrojo:
+                    self.errores += 1
+                continue
+            try:
+                os.utime(ruta) # Marca el uso para la expulsión LRU.
+            except OSError:
+                pass
+            with self._cerrojo:
+                self.aciertos += 1
+            return True, valor
+        with self._cerrojo:
+            self.fallos += 1
+        return False, None
+
+    def escribir(self, clave: str, valor: Any):
+        """
+        Guarda un resultado (de forma atómica) y aplica el límite de tamaño.
+        """
+        os.makedirs(self.directorio, exist_ok=True)
+        extension = ".npy" if _es_arreglo_numpy(valor) and not valor.dtype.hasobject else ".pkl"
+        descriptor, temporal = tempfile.mkstemp(dir=self.directorio, prefix=".escribiendo-", suffix=extension)
+        try:
+            with os.fdopen(descriptor, "wb") as archivo:
+                if extension == ".npy":
+                    import numpy as np
+                    np.save(archivo, valor, allow_pickle=False)
+                else:
+                    pickle.dump(valor, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, self._ruta(clave, extension))
+        except Exception:
+            with self._cerrojo:
+                self.errores += 1
+            try:
+                os.unlink(temporal)
+            except OSError:
+                pass
+            return
+        with self._cerrojo:
+            self.escrituras += 1
+        self._aplicar_limite()
+
+    def _archivos(self) -> list:
+        """
+        `(fecha_modificacion, tamaño, ruta)` de los resultados guardados.
+        """
+        archivos = []
+        try:
+            entradas = list(os.scandir(self.directorio))
+        except FileNotFoundError:
+            return archivos
+        for entrada in entradas:
+            if entrada.name.endswith(_EXTENSIONES) and not entrada.name.startswith(".escribiendo-"):
+                try:
+                    informacion = entrada.stat()
+                except FileNotFoundError:
+                    continue
+                archivos.append((informacion.st_mtime, informacion.st_size, entrada.path))
+        return archivos
+
+    def _aplicar_limite(self):
+        if self.max_bytes is None:
+            return
+        archivos = self._archivos()
+        total = sum(tamano for _, tamano, _ in archivos)
+        for _, tamano, ruta in sorted(archivos):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(ruta)
+                with self._cerrojo:
+                    self.expulsiones += 1
+            except FileNotFoundError:
+                pass
+            total -= tamano
+
+    def limpiar(self):
+        """
+        Borra todos los resultados guardados de la función y reinicia los contadores.
+        """
+        for _, _, ruta in self._archivos():
+            try:
+                os.unlink(ruta)
+            except FileNotFoundError:
+                pass
+        with self._cerrojo:
+            self.aciertos = self.fallos = self.escrituras = self.expulsiones = self.errores = self.no_cacheables = 0
+
+    def estadisticas(self) -> Dict[str, Any]:
+        archivos = self._archivos()
+        with self._cerrojo:
+            consultas = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "escrituras": self.escrituras,
+                "expulsiones": self.expulsiones,
+                "errores": self.errores,
+                "no_cacheables": self.no_cacheables,
+                "entradas": len(archivos),
+                "bytes": sum(tamano for _, tamano, _ in archivos),
+                "max_bytes": self.max_bytes,
+                "directorio": self.directorio,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            }
+
+
+def _cachear_funcion(funcion: Callable, directorio: Optional[str], max_mb: Optional[float], mmap: bool,
+                     version: Optional[str]) -> Callable:
+    if inspect.isgeneratorfunction(funcion) or inspect.iscoroutinefunction(funcion) or inspect.isasyncgenfunction(funcion):
+        raise TypeError(f"@cache_disco no admite funciones generadoras ni asíncronas: {funcion.__qualname__}")
+    nombre = f"{funcion.__module__}.{funcion.__qualname__}".replace("<", "_").replace(">", "_")
+    cache = CacheDisco(os.path.join(directorio or directorio_por_defecto(), nombre), max_mb, mmap)
+    prefijo = f"{VERSION_FORMATO}\0{nombre}\0{version or _version_funcion(funcion)}\0".encode()
+
+    @functools.wraps(funcion)
+    def cacheada(*args, **kwargs):
+        try:
+            h = hashlib.sha256(prefijo)
+            for arg in args:
+                h.update(_huella(arg))
+            for nombre_arg, valor in sorted(kwargs.items()):
+                h.update(f"\0{nombre_arg}=".encode())
+                h.update(_huella(valor))
+        except ClaveNoCacheable:
+            with cache._cerrojo:
+                cache.no_cacheables += 1
+            return funcion(*args, **kwargs)
+        clave = h.hexdigest()
+        encontrado, valor = cache.leer(clave)
+        if not encontrado:
+            valor = funcion(*args, **kwargs)
+            cache.escribir(clave, valor)
+        return valor
+
+    cacheada.cache = cache
+    cacheada.estadisticas = cache.estadisticas
+    cacheada.limpiar = cache.limpiar
+    return cacheada
+
+
+def cache_disco(funcion: Optional[Callable] = None, *, directorio: Optional[str] = None,
+                max_mb: Optional[float] = MAX_MB_POR_DEFECTO, mmap: bool = False,
+                version: Optional[str] = None) -> Callable:
+    """
+    Decorador que guarda en disco los resultados de una función pura entre ejecuciones.
+
+    Se usa como `@cache_disco` o con opciones, `@cache_disco(max_mb=..., mmap=...)`.
+
+    Args:
+        funcion: La función a decorar (cuando se usa sin paréntesis).
+        directorio: Directorio raíz de la caché (ver `directorio_por_defecto`).
+        max_mb: Tamaño máximo de los archivos de la función (None = sin límite).
+        mmap: Si es True, los resultados `.npy` se devuelven mapeados en memoria (sólo lectura).
+        version: Versión del código de la función (el transformer pasa un hash del
+                 código Castella; por defecto, un hash del código fuente Python).
+
+    Returns:
+        La función con caché, o el decorador si se llamó con opciones.
+
+    Raises:
+        ValueError: Si `max_mb` no es positivo.
+        TypeError: Si la función es generadora o asíncrona.
+    """
+    if funcion is not None:
+        return _cachear_funcion(funcion, directorio, max_mb, mmap, version)
+    if max_mb is not None and max_mb <= 0:
+        raise ValueError(f"El tamaño máximo de la caché de disco debe ser positivo o ninguno: {max_mb}")
+    return lambda funcion: _cachear_funcion(funcion, directorio, max_mb, mmap, version)
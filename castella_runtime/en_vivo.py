@@ -0,0 +1,492 @@
+# castella_runtime/en_vivo.py
+
+"""
+Gráficos en vivo para simulaciones largas (`graficar_en_vivo`).
+
+Llamar a `graficar` dentro de un bucle crea un gráfico nuevo en cada iteración (y,
+en modo ventana, espera a que se cierre). `graficar_en_vivo(...)` devuelve un
+`GraficoEnVivo` al que el bucle añade puntos; el gráfico se actualiza solo:
+
+    let g = graficar_en_vivo(["energia", "temperatura"], max_fps=20, archivo="sim.mp4");
+    mientras t < t_final {
+        ...
+        g.agregar(energia, temperatura, x=t);
+    }
+    g.cerrar();
+
+Para que vigilar la simulación cueste poco:
+
+  * `agregar` sólo añade los valores a una lista plana (sin tuplas que tenga que
+    recorrer el recolector de basura); se pasan en bloque a arreglos de NumPy al
+    dibujar, que ocurre como mucho `max_fps` veces por segundo.
+  * Cada actualización cambia los datos de las líneas existentes y las redibuja
+    con *blitting* (se restaura el fondo ya dibujado: ejes, rejilla, leyenda). Sólo
+    cuando los datos se salen de los límites se dibuja la figura entera; los límites
+    crecen con margen (el eje x se duplica), así que eso ocurre pocas veces. Si aun
+    así dibujar es caro, las actualizaciones se espacian para no pasar de
+    FRACCION_DIBUJO del tiempo de ejecución.
+  * Las series largas se reducen con min/máx por tramos de forma incremental: en
+    cada actualización sólo se procesan los puntos nuevos y, al llenarse, los
+    tramos se fusionan de dos en dos.
+
+Cada actualización puede escribirse como cuadro de un vídeo (`.mp4`, `.mkv`,
+`.webm`, `.avi` con ffmpeg; `.gif` con Pillow) o de una secuencia de imágenes (una
+ruta con `{}`, p. ej. `"cuadros/cuadro_{:05d}.png"`).
+
+La ventana sólo se abre en el modo `ventana` de `graficar` (ver graficos); con
+`--graficar=archivo|lote`, el gráfico se dibuja sin pantalla y la figura final se
+escribe al cerrarlo (`en_vivo_001.png`, ...). Los gráficos que siguen abiertos al
+terminar el programa se cierran solos.
+"""
+
+import atexit
+import os
+import shutil
+import subprocess
+import time
+import warnings
+from typing import List, Optional, Sequence, Union
+
+from .graficos import _configuracion, _guardar_figura, _ruta
+
+# Actualizaciones por segundo como máximo (y cuadros por segundo de los vídeos).
+MAX_FPS_POR_DEFECTO = 20
+
+# Fracción máxima del tiempo de ejecución dedicada a redibujar (se reduce la frecuencia si hace falta).
+FRACCION_DIBUJO = 0.1
+
+# Puntos reservados por serie en los arreglos (la capacidad se duplica al llenarse).
+CAPACIDAD_INICIAL = 4096
+
+EXTENSIONES_VIDEO = (".mp4", ".mkv", ".webm", ".avi")
+
+_abiertos: List["GraficoEnVivo"] = []
+_cierre_registrado = False
+
+
+# === Escritura de cuadros ===
+
+class _EscritorFFmpeg:
+    """
+    Envía los cuadros RGBA a ffmpeg por una tubería.
+    """
+
+    def __init__(self, ruta: str, fps: int):
+        ejecutable = shutil.which("ffmpeg")
+        if ejecutable is None:
+            raise RuntimeError(f"Para escribir '{ruta}' hace falta ffmpeg en el PATH (o usa .gif o una secuencia de imágenes).")
+        self.ejecutable, self.ruta, self.fps = ejecutable, ruta, fps
+        self.proceso = None
+
+    def escribir(self, rgba: memoryview, ancho: int, alto: int):
+        if self.proceso is None:
+            self.proceso = subprocess.Popen(
+                [self.ejecutable, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgba",
+                 "-s", f"{ancho}x{alto}", "-r", str(self.fps), "-i", "-",
+                 "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", self.ruta],
+                stdin=subprocess.PIPE)
+        self.proceso.stdin.write(rgba)
+
+    def cerrar(self):
+        if self.proceso is not None:
+            self.proceso.stdin.close()
+            self.proceso.wait()
+
+
+class _EscritorGif:
+    """
+    Acumula los cuadros y escribe el GIF animado al cerrar.
+    """
+
+    def __init__(self, ruta: str, fps: int):
+        self.ruta, self.fps = ruta, fps
+        self.cuadros = []
+
+    def escribir(self, rgba: memoryview, ancho: int, alto: int):
+        from PIL import Image
+        self.cuadros.append(Image.frombuffer("RGBA", (ancho, alto), bytes(rgba), "raw", "RGBA", 0, 1).convert("P"))
+
+    def cerrar(self):
+        if self.cuadros:
+            self.cuadros[0].save(self.ruta, save_all=True, append_images=self.cuadros[1:],
+                                 duration=max(1, round(1000 / self.fps)), loop=0)
+            self.cuadros = []
+
+
+class _EscritorImagenes:
+    """
+    Escribe cada cuadro en su propio archivo (`patron.format(numero)`).
+    """
+
+    def __init__(self, patron: str, fps: int):
+        self.patron = patron
+        self.numero = 0
+
+    def escribir(self, rgba: memoryview, ancho: int, alto: int):
+        from PIL import Image
+        Image.frombuffer("RGBA", (ancho, alto), bytes(rgba), "raw", "RGBA", 0, 1).save(self.patron.format(self.numero))
+        self.numero += 1
+
+    def cerrar(self):
+        pass
+
+
+def _crear_escritor(archivo: str, fps: int):
+    directorio = os.path.dirname(archivo.format(0) if "{" in archivo else archivo)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    if "{" in archivo:
+        return _EscritorImagenes(archivo, fps)
+    extension = os.path.splitext(archivo)[1].lower()
+    if extension == ".gif":
+        return _EscritorGif(archivo, fps)
+    if extension in EXTENSIONES_VIDEO:
+        return _EscritorFFmpeg(archivo, fps)
+    raise ValueError(f"Formato de cuadros no válido: '{archivo}'. Usa {', '.join(EXTENSIONES_VIDEO)}, .gif "
+                     "o una ruta con {} para una secuencia de imágenes.")
+
+
+# === Gráfico en vivo ===
+
+class GraficoEnVivo:
+    """
+    Gráfico de líneas que se actualiza a medida que se le añaden puntos.
+    """
+
+    def __init__(self, series: Union[int, Sequence[str]] = 1, titulo: Optional[str] = None,
+                 max_fps: float = MAX_FPS_POR_DEFECTO, archivo: Optional[str] = None,
+                 puntos: Optional[int] = None, esperar: bool = False):
+        """
+        Args:
+            series: Número de series, o sus nombres (para la leyenda).
+            titulo: Título del gráfico.
+            max_fps: Actualizaciones por segundo como máximo (y cuadros por segundo del vídeo).
+            archivo: Vídeo o secuencia de imágenes donde escribir cada actualización (ver el módulo).
+            puntos: Puntos máximos dibujados por serie (0 = todos). Por defecto, dos por columna de
+                    píxeles de la figura (o menos, si `--graficar-puntos` lo limita).
+            esperar: En modo ventana, `cerrar` espera a que se cierre la ventana.
+
+        Raises:
+            ValueError: Si algún valor no es válido.
+            RuntimeError: Si el formato de `archivo` necesita ffmpeg y no está instalado.
+        """
+        import numpy as np
+        nombres = [f"serie {i + 1}" for i in range(series)] if isinstance(series, int) else [str(s) for s in series]
+        if not nombres or max_fps <= 0:
+            raise ValueError("graficar_en_vivo necesita al menos una serie y un `max_fps` positivo.")
+        self.nombres = nombres
+        self.intervalo = 1.0 / max_fps
+        self.esperar = esperar
+        self.escritor = _crear_escritor(archivo, max(1, round(max_fps))) if archivo else None
+        self.mostrar = _configuracion.modo == "ventana"
+
+        self._n = 0 # Puntos ya pasados a los arreglos.
+        # Puntos de `agregar` aún no pasados a los arreglos: valores seguidos (uno por serie) y x
+        # (None = su número de orden).
+        self._pendientes = []
+        self._pendientes_x = []
+        self._x = np.empty(CAPACIDAD_INICIAL)
+        self._y = np.empty((len(nombres), CAPACIDAD_INICIAL))
+        self._dibujados = 0 # Puntos ya tenidos en cuenta en los límites.
+        self._limites_datos = None # [xmin, xmax, ymin, ymax] de los datos.
+        self._proximo = 0.0 # Instante (monotonic) a partir del cual se puede redibujar.
+        # `agregar` sólo mira el reloj cada `_por_consulta` llamadas (quedan `_cuenta`), ajustado
+        # para que lo mire varias veces por intervalo pero no en cada punto de un bucle rápido.
+        self._por_consulta = 1
+        self._cuenta = 1
+        self._ultima_consulta = 0.0
+        # Reducción incremental: tramos de `_tamano` puntos, con los índices de su mínimo y
+        # su máximo (por serie) para los puntos [0, _reducidos).
+        self._tamano = 1
+        self._reducidos = 0
+        self._tramos = [np.empty((0, 2), dtype=np.intp) for _ in nombres]
+        self._cerrado = False
+
+        if self.mostrar:
+            import matplotlib.pyplot as plt
+            self.figura = plt.figure()
+        else:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+            self.figura = Figure()
+            FigureCanvasAgg(self.figura)
+        self.ejes = self.figura.add_subplot()
+        if puntos is None:
+            # Dos puntos (mínimo y máximo) por columna de píxeles bastan; cada punto de más encarece el blitting.
+            ancho = int(self.figura.get_figwidth() * self.figura.dpi)
+            puntos = min(_configuracion.puntos, 2 * ancho) if _configuracion.puntos else 0
+        self.puntos = puntos
+        if titulo:
+            self.ejes.set_title(titulo)
+        # Las líneas "animadas" no forman parte del fondo que se restaura en cada actualización.
+        self.lineas = [self.ejes.plot([], [], label=nombre, animated=True)[0] for nombre in nombres]
+        if len(nombres) > 1 or not isinstance(series, int):
+            self.ejes.legend(loc="upper left")
+        self._fondo = None
+        if self.mostrar:
+            import matplotlib.pyplot as plt
+            plt.show(block=False)
+
+        global _cierre_registrado
+        _abiertos.append(self)
+        if not _cierre_registrado:
+            atexit.register(cerrar_todos)
+            _cierre_registrado = True
+
+    def __len__(self) -> int:
+        return self._n + len(self._pendientes_x)
+
+    def agregar(self, *valores: float, x: Optional[float] = None):
+        """
+        Añade un punto a cada serie (un valor por serie, en orden).
+
+        Args:
+            *valores: Valor de cada serie.
+            x: Coordenada x del punto (por defecto, su número de orden).
+
+        Raises:
+            ValueError: Si el número de valores no coincide con el de series.
+        """
+        if len(valores) != len(self.nombres):
+            raise ValueError(f"agregar: se esperaban {len(self.nombres)} valores (uno por serie) y se recibieron {len(valores)}.")
+        self._pendientes.extend(valores)
+        self._pendientes_x.append(x)
+        self._cuenta -= 1
+        if not self._cuenta:
+            self._consultar_reloj()
+
+    def extender(self, *series: Sequence[float], x: Optional[Sequence[float]] = None):
+        """
+        Añade varios puntos de una vez: una secuencia de valores por serie, todas de la misma longitud.
+
+        Args:
+            *series: Valores nuevos de cada serie.
+            x: Coordenadas x de los puntos (por defecto, su número de orden).
+
+        Raises:
+            ValueError: Si el número de series o las longitudes no coinciden.
+        """
+        import numpy as np
+        if len(series) != len(self.nombres):
+            raise ValueError(f"extender: se esperaban {len(self.nombres)} series y se recibieron {len(series)}.")
+        nuevos = np.asarray(series, dtype=np.float64)
+        if nuevos.ndim != 2:
+            raise ValueError("extender: todas las series deben tener la misma longitud.")
+        self._volcar_pendientes()
+        n, cantidad = self._n, nuevos.shape[1]
+        if x is not None and len(x) != cantidad:
+            raise ValueError("extender: `x` debe tener la misma longitud que las series.")
+        self._crecer(n + cantidad)
+        self._x[n:n + cantidad] = np.arange(n, n + cantidad) if x is None else x
+        self._y[:, n:n + cantidad] = nuevos
+        self._n = n + cantidad
+        if time.monotonic() >= self._proximo:
+            self.dibujar()
+
+    def _consultar_reloj(self):
+        """
+        Redibuja si ya toca y ajusta cada cuántas llamadas a `agregar` se vuelve a mirar el reloj.
+        """
+        ahora = time.monotonic()
+        if ahora >= self._proximo:
+            self.dibujar()
+            ahora = time.monotonic()
+        elif ahora - self._ultima_consulta < self.intervalo / 20:
+            self._por_consulta *= 2
+        elif ahora - self._ultima_consulta > self.intervalo / 5 and self._por_consulta > 1:
+            self._por_consulta //= 2
+        self._ultima_consulta = ahora
+        self._cuenta = self._por_consulta
+
+    def _volcar_pendientes(self):
+        """
+        Pasa a los arreglos los puntos añadidos con `agregar` desde el último dibujo.
+        """
+        import numpy as np
+        if not self._pendientes_x:
+            return
+        n, cantidad = self._n, len(self._pendientes_x)
+        self._crecer(n + cantidad)
+        self._y[:, n:n + cantidad] = np.array(self._pendientes, dtype=np.float64).reshape(cantidad, -1).T
+        x = np.array(self._pendientes_x, dtype=np.float64) # None -> NaN.
+        sin_x = np.isnan(x)
+        self._x[n:n + cantidad] = np.where(sin_x, np.arange(n, n + cantidad), x) if sin_x.any() else x
+        self._pendientes, self._pendientes_x = [], []
+        self._n = n + cantidad
+
+    def _crecer(self, capacidad: int):
+        import numpy as np
+        if capacidad <= len(self._x):
+            return
+        nueva = max(capacidad, 2 * len(self._x))
+        x, y = np.empty(nueva), np.empty((len(self.nombres), nueva))
+        x[:self._n], y[:, :self._n] = self._x[:self._n], self._y[:, :self._n]
+        self._x, self._y = x, y
+
+    # --- Reducción incremental ---
+
+    def _reducir(self):
+        """
+        Añade a los tramos los puntos nuevos y fusiona tramos hasta no superar `puntos / 2`.
+        """
+        import numpy as np
+        n = self._n
+        if self._reducidos == 0:
+            # Primera reducción (o tras un `extender` muy grande): tramos ya del tamaño adecuado.
+            while n // self._tamano > max(1, self.puntos // 2):
+                self._tamano *= 2
+        tamano = self._tamano
+        completos = (n - self._reducidos) // tamano
+        if completos:
+            inicio, fin = self._reducidos, self._reducidos + completos * tamano
+            desplazamientos = np.arange(inicio, fin, tamano)[:, None]
+            for i in range(len(self.nombres)):
+                bloques = self._y[i, inicio:fin].reshape(completos, tamano)
+                nuevos = np.stack([np.argmin(bloques, axis=1), np.argmax(bloques, axis=1)], axis=1) + desplazamientos
+                self._tramos[i] = np.concatenate([self._tramos[i], nuevos])
+            self._reducidos = fin
+        while len(self._tramos[0]) > max(1, self.puntos // 2):
+            # Dos tramos contiguos se fusionan quedándose con el mínimo y el máximo de sus cuatro candidatos.
+            pares = len(self._tramos[0]) // 2
+            for i in range(len(self.nombres)):
+                candidatos = self._tramos[i][:2 * pares].reshape(pares, 4)
+                valores = self._y[i][candidatos]
+                filas = np.arange(pares)
+                self._tramos[i] = np.stack([candidatos[filas, np.argmin(valores, axis=1)],
+                                            candidatos[filas, np.argmax(valores, axis=1)]], axis=1)
+            self._tamano *= 2
+            self._reducidos = pares * self._tamano # Un tramo impar suelto se vuelve a procesar.
+
+    def _datos_serie(self, i: int):
+        """
+        `(x, y)` que se dibujan de la serie `i` (reducidos si la serie es larga).
+        """
+        import numpy as np
+        n = self._n
+        if not self.puntos or n <= self.puntos:
+            return self._x[:n], self._y[i, :n]
+        resto = self._y[i, self._reducidos:n]
+        if len(resto) > 2:
+            # Tramo incompleto del final: también sólo su mínimo y su máximo (y su último punto).
+            ultimos = np.unique([np.argmin(resto), np.argmax(resto), len(resto) - 1]) + self._reducidos
+        else:
+            ultimos = np.arange(self._reducidos, n)
+        indices = np.concatenate([np.sort(self._tramos[i], axis=1).ravel(), ultimos])
+        return self._x[indices], self._y[i, indices]
+
+    # --- Dibujo ---
+
+    def _ajustar_limites(self) -> bool:
+        """
+        Amplía los límites de los ejes si los puntos nuevos se salen. Devuelve True si cambiaron.
+        """
+        import numpy as np
+        nuevos = slice(self._dibujados, self._n)
+        if nuevos.start == nuevos.stop:
+            return False
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning) # Tramos sólo con NaN.
+            x, y = self._x[nuevos], self._y[:, nuevos]
+            limites = [np.nanmin(x), np.nanmax(x), np.nanmin(y), np.nanmax(y)]
+        self._dibujados = self._n
+        if not all(np.isfinite(limites)):
+            return False
+        if self._limites_datos is not None:
+            anteriores = self._limites_datos
+            limites = [min(limites[0], anteriores[0]), max(limites[1], anteriores[1]),
+                       min(limites[2], anteriores[2]), max(limites[3], anteriores[3])]
+        self._limites_datos = limites
+        xmin, xmax, ymin, ymax = limites
+        vista_x, vista_y = self.ejes.get_xlim(), self.ejes.get_ylim()
+        if self._fondo is not None and vista_x[0] <= xmin and xmax <= vista_x[1] and vista_y[0] <= ymin and ymax <= vista_y[1]:
+            return False
+        # El eje x (normalmente el tiempo) se duplica; el y se amplía con un 10 % de margen.
+        ancho = (xmax - xmin) or 1.0
+        margen = 0.1 * ((ymax - ymin) or abs(ymax) or 1.0)
+        self.ejes.set_xlim(xmin, xmin + 2 * ancho)
+        self.ejes.set_ylim(ymin - margen, ymax + margen)
+        return True
+
+    def dibujar(self, completo: bool = False):
+        """
+        Actualiza el gráfico con los puntos añadidos (normalmente lo llama `agregar`).
+
+        Args:
+            completo: Redibuja la figura entera en lugar de sólo las líneas.
+        """
+        if self._cerrado:
+            return
+        inicio = time.monotonic()
+        self._volcar_pendientes()
+        if self.puntos and self._n > self.puntos:
+            self._reducir()
+        for i, linea in enumerate(self.lineas):
+            linea.set_data(*self._datos_serie(i))
+        lienzo = self.figura.canvas
+        completo = self._ajustar_limites() or completo or self._fondo is None
+        if completo:
+            lienzo.draw() # Fondo sin las líneas animadas.
+            self._fondo = lienzo.copy_from_bbox(self.figura.bbox)
+        else:
+            lienzo.restore_region(self._fondo)
+        for linea in self.lineas:
+            self.ejes.draw_artist(linea)
+        if self.mostrar:
+            lienzo.blit(self.figura.bbox)
+            lienzo.flush_events()
+        if self.escritor is not None:
+            renderer = lienzo.get_renderer()
+            self.escritor.escribir(lienzo.buffer_rgba(), int(renderer.width), int(renderer.height))
+        # Si dibujar es caro (muchas series, figura grande), se espacian las actualizaciones
+        # para que no ocupen más de FRACCION_DIBUJO del tiempo de la simulación. Los
+        # redibujados completos (al ampliar los ejes) son pocos y no cuentan.
+        fin = time.monotonic()
+        espera = self.intervalo
+        if not completo:
+            espera = max(espera, (fin - inicio) * (1 - FRACCION_DIBUJO) / FRACCION_DIBUJO)
+        self._proximo = fin + espera
+
+    def cerrar(self) -> Optional[str]:
+        """
+        Dibuja los últimos puntos, termina el vídeo y, sin ventana, escribe la figura final.
+
+        Returns:
+            La ruta de la figura final escrita (sólo sin ventana), o None.
+        """
+        if self._cerrado:
+            return None
+        self.dibujar()
+        self._cerrado = True
+        if self in _abiertos:
+            _abiertos.remove(self)
+        if self.escritor is not None:
+            self.escritor.cerrar()
+        for linea in self.lineas:
+            linea.set_animated(False)
+        if self.mostrar:
+            import matplotlib.pyplot as plt
+            self.figura.canvas.draw_idle()
+            if self.esperar:
+                plt.show()
+            return None
+        _configuracion.en_vivo += 1
+        ruta = _ruta("en_vivo", _configuracion.en_vivo)
+        _guardar_figura(self.figura, ruta)
+        return ruta
+
+
+def graficar_en_vivo(series: Union[int, Sequence[str]] = 1, titulo: Optional[str] = None,
+                     max_fps: float = MAX_FPS_POR_DEFECTO, archivo: Optional[str] = None,
+                     puntos: Optional[int] = None, esperar: bool = False) -> GraficoEnVivo:
+    """
+    Crea un gráfico en vivo (ver GraficoEnVivo).
+    """
+    return GraficoEnVivo(series, titulo, max_fps, archivo, puntos, esperar)
+
+
+def cerrar_todos():
+    """
+    Cierra los gráficos en vivo que siguen abiertos (se llama al terminar el programa).
+    """
+    for grafico in list(_abiertos):
+        grafico.cerrar()
@@ -0,0 +1,291 @@
+# castella_runtime/graficos.py
+
+"""
+Implementación de `graficar` del código generado.
+
+`graficar(x, y);` se traducía a `plt.plot(x, y)` seguido de `plt.show()`: bloquea el
+programa hasta cerrar la ventana, necesita una pantalla y entrega a Matplotlib todos
+los puntos, aunque la serie tenga millones. Ahora se traduce a
+`_castella_graficar(x, y)`, que acepta los mismos argumentos posicionales que
+`plt.plot` (`y`, `x, y`, `x, y, "r--"`, varias series seguidas) y:
+
+  * Reduce las series de más de `puntos` valores antes de dibujarlas: `minmax`
+    conserva el mínimo y el máximo de cada tramo (picos incluidos) y `lttb`
+    (Largest-Triangle-Three-Buckets) elige en cada tramo el punto que mejor conserva
+    la forma de la curva. Las series con `x` desordenada se reducen tomando uno de
+    cada tantos puntos.
+  * Dibuja según el modo (`configurar`, o `--graficar` en el compilador):
+      - `ventana`: `plt.plot` + `plt.show()`, como antes.
+      - `archivo`: cada gráfico en su propio archivo (`grafico_001.png`, ...), sin
+        ventana ni backend interactivo.
+      - `lote`: varios gráficos como subgráficos de una misma figura
+        (`figura_001.png`, ...); la figura se escribe al llenarse y al terminar el programa.
+
+Los modos `archivo` y `lote` construyen las figuras con `matplotlib.figure.Figure`,
+sin pasar por `pyplot`, así que no abren ventanas ni acumulan figuras abiertas.
+"""
+
+import atexit
+import math
+import os
+from typing import Any, List, Optional, Tuple
+
+MODOS = ("ventana", "archivo", "lote")
+METODOS = ("minmax", "lttb")
+
+# Puntos máximos por serie tras la reducción (del orden del ancho en píxeles de un gráfico, por 2).
+PUNTOS_POR_DEFECTO = 4000
+
+# Subgráficos por figura en modo "lote".
+GRAFICOS_POR_FIGURA = 4
+
+
+class _Configuracion:
+    """
+    Estado del módulo: configuración de `graficar` y figura del lote en curso.
+    """
+
+    def __init__(self):
+        self.modo = "ventana"
+        self.directorio = "."
+        self.formato = "png"
+        self.puntos = PUNTOS_POR_DEFECTO
+        self.metodo = "minmax"
+        self.por_figura = GRAFICOS_POR_FIGURA
+        self.dpi = 100
+        self.graficos = 0 # Archivos escritos en modo "archivo".
+        self.figuras = 0 # Figuras escritas en modo "lote".
+        self.en_vivo = 0 # Figuras finales de `graficar_en_vivo` (ver en_vivo).
+        self.figura_lote = None
+        self.rejilla = (1, 1) # Filas y columnas de subgráficos de la figura del lote.
+        self.ejes_en_lote = 0
+        self.archivos: List[str] = []
+        self.guardar_al_salir = False
+
+
+_configuracion = _Configuracion()
+
+
+def configurar(modo: str = "ventana", directorio: str = ".", formato: str = "png",
+               puntos: int = PUNTOS_POR_DEFECTO, metodo: str = "minmax",
+               por_figura: int = GRAFICOS_POR_FIGURA, dpi: int = 100):
+    """
+    Configura cómo dibuja `graficar`. Escribe antes la figura del lote en curso, si la hay.
+
+    Args:
+        modo: "ventana", "archivo" o "lote".
+        directorio: Directorio de los archivos de los modos "archivo" y "lote" (se crea si hace falta).
+        formato: Formato de los archivos ("png", "svg", "pdf"...).
+        puntos: Puntos máximos por serie; las series más largas se reducen (0 = no reducir).
+        metodo: Método de reducción: "minmax" o "lttb".
+        por_figura: Subgráficos por figura en modo "lote".
+        dpi: Resolución de los archivos.
+
+    Raises:
+        ValueError: Si el modo, el método o algún valor no son válidos.
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo de `graficar` no válido: {modo!r}. Opciones: {', '.join(MODOS)}")
+    if metodo not in METODOS:
+        raise ValueError(f"Método de reducción no válido: {metodo!r}. Opciones: {', '.join(METODOS)}")
+    if puntos < 0 or 0 < puntos < 3 or por_figura < 1 or dpi < 1:
+        raise ValueError("`puntos` debe ser 0 o al menos 3, y `por_figura` y `dpi` positivos.")
+    guardar()
+    c = _configuracion
+    c.modo, c.directorio, c.formato = modo, directorio, formato
+    c.puntos, c.metodo, c.por_figura, c.dpi = puntos, metodo, por_figura, dpi
+    if modo == "lote" and not c.guardar_al_salir:
+        atexit.register(guardar)
+        c.guardar_al_salir = True
+
+
+# === Reducción de series ===
+
+def _indices_minmax(y, puntos: int):
+    """
+    Índices del mínimo y el máximo de cada uno de `puntos // 2` tramos (más el primero y el último).
+    """
+    import numpy as np
+    n = len(y)
+    tramos = max(1, puntos // 2)
+    tamano = math.ceil(n / tramos)
+    completo = (n // tamano) * tamano
+    bloques = y[:completo].reshape(-1, tamano)
+    desplazamientos = np.arange(0, completo, tamano)
+    partes = [np.argmin(bloques, axis=1) + desplazamientos, np.argmax(bloques, axis=1) + desplazamientos, [0, n - 1]]
+    if completo < n:
+        resto = y[completo:]
+        partes.append([completo + int(np.argmin(resto)), completo + int(np.argmax(resto))])
+    return np.unique(np.concatenate(partes).astype(np.intp))
+
+
+def _indices_lttb(x, y, puntos: int):
+    """
+    Índices elegidos por Largest-Triangle-Three-Buckets (`puntos` en total).
+    """
+    import numpy as np
+    n = len(y)
+    bordes = np.linspace(1, n - 1, puntos - 1).astype(np.intp) # puntos - 2 tramos entre el primero y el último.
+    seleccion = np.empty(puntos, dtype=np.intp)
+    seleccion[0], seleccion[-1] = 0, n - 1
+    anterior = 0
+    for i in range(puntos - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        # Vértice fijo del triángulo: la media del tramo siguiente (el último punto, para el último tramo).
+        siguiente_fin = bordes[i + 2] if i + 2 < len(bordes) else n
+        x_media, y_media = x[fin:siguiente_fin].mean(), y[fin:siguiente_fin].mean()
+        areas = np.abs((x[anterior] - x_media) * (y[inicio:fin] - y[anterior])
+                       - (x[anterior] - x[inicio:fin]) * (y_media - y[anterior]))
+        anterior = inicio + int(np.argmax(areas))
+        seleccion[i + 1] = anterior
+    return seleccion
+
+
+def reducir_serie(x, y, puntos: int = PUNTOS_POR_DEFECTO, metodo: str = "minmax") -> Tuple[Any, Any]:
+    """
+    Reduce una serie a como mucho unos `puntos` valores (minmax puede devolver alguno más).
+
+    Sólo se reducen las series unidimensionales numéricas; el resto se devuelve tal cual.
+
+    Args:
+        x: Valores del eje x, o None (los índices de `y`).
+        y: Valores de la serie.
+        puntos: Puntos máximos (0 = no reducir).
+        metodo: "minmax" o "lttb". Si `x` no está ordenada, se toma uno de cada tantos puntos.
+
+    Returns:
+        Una tupla `(x, y)`. Si la serie se reduce y `x` era None, `x` pasa a ser los
+        índices de los puntos conservados (para que no se desplacen).
+    """
+    if not puntos or not hasattr(y, "__len__") or len(y) <= puntos:
+        return x, y
+    import numpy as np
+    y_arreglo = np.asarray(y)
+    if y_arreglo.ndim != 1 or y_arreglo.dtype.kind not in "biuf":
+        return x, y
+    n = len(y_arreglo)
+    x_arreglo = np.arange(n) if x is None else np.asarray(x)
+    if x_arreglo.shape != y_arreglo.shape or x_arreglo.dtype.kind not in "biuf":
+        return x, y
+
+    if np.any(np.diff(x_arreglo) < 0):
+        indices = np.arange(0, n, math.ceil(n / puntos))
+    elif metodo == "lttb":
+        indices = _indices_lttb(x_arreglo.astype(np.float64), y_arreglo.astype(np.float64), puntos)
+    else:
+        indices = _indices_minmax(y_arreglo, puntos)
+    return x_arreglo[indices], y_arreglo[indices]
+
+
+def _series(argumentos: tuple) -> List[Tuple[Any, Any, Optional[str]]]:
+    """
+    Separa los argumentos posicionales de `plt.plot` en series `(x o None, y, formato o None)`.
+    """
+    series = []
+    i = 0
+    while i < len(argumentos):
+        if isinstance(argumentos[i], str):
+            raise TypeError(f"graficar: se esperaba una serie de datos y se recibió el formato {argumentos[i]!r}.")
+        if i + 1 < len(argumentos) and not isinstance(argumentos[i + 1], str):
+            x, y = argumentos[i], argumentos[i + 1]
+            i += 2
+        else:
+            x, y = None, argumentos[i]
+            i += 1
+        formato = None
+        if i < len(argumentos) and isinstance(argumentos[i], str):
+            formato = argumentos[i]
+            i += 1
+        series.append((x, y, formato))
+    return series
+
+
+# === Dibujo ===
+
+def _ruta(prefijo: str, numero: int) -> str:
+    os.makedirs(_configuracion.directorio, exist_ok=True)
+    return os.path.join(_configuracion.directorio, f"{prefijo}_{numero:03d}.{_configuracion.formato}")
+
+
+def _guardar_figura(figura, ruta: str):
+    figura.savefig(ruta, dpi=_configuracion.dpi)
+    _configuracion.archivos.append(ruta)
+
+
+def _ejes_lote():
+    """
+    Subgráfico siguiente de la figura del lote (escribe la figura llena y empieza otra).
+    """
+    from matplotlib.figure import Figure
+    c = _configuracion
+    if c.figura_lote is not None and c.ejes_en_lote >= c.por_figura:
+        guardar()
+    if c.figura_lote is None:
+        columnas = math.ceil(math.sqrt(c.por_figura))
+        filas = math.ceil(c.por_figura / columnas)
+        c.figura_lote = Figure(figsize=(5 * columnas, 3.5 * filas), layout="constrained")
+        c.rejilla = (filas, columnas)
+    c.ejes_en_lote += 1
+    filas, columnas = c.rejilla
+    return c.figura_lote.add_subplot(filas, columnas, c.ejes_en_lote)
+
+
+def graficar(*argumentos: Any, **opciones: Any) -> Optional[str]:
+    """
+    Dibuja una o varias series como `plt.plot`, reduciéndolas y según el modo configurado.
+
+    Args:
+        *argumentos: Series como en `plt.plot`: `y`, `x, y` o `x, y, formato`, repetidos.
+        **opciones: Opciones de línea de Matplotlib (`label`, `color`...).
+
+    Returns:
+        En modo "archivo", la ruta del archivo escrito; en los demás, None.
+    """
+    c = _configuracion
+    datos = []
+    for x, y, formato in _series(argumentos):
+        x, y = reducir_serie(x, y, c.puntos, c.metodo)
+        datos += [y] if x is None else [x, y]
+        if formato is not None:
+            datos.append(formato)
+
+    if c.modo == "ventana":
+        import matplotlib.pyplot as plt
+        plt.plot(*datos, **opciones)
+        plt.show()
+        return None
+    if c.modo == "lote":
+        _ejes_lote().plot(*datos, **opciones)
+        return None
+
+    from matplotlib.figure import Figure
+    figura = Figure()
+    figura.add_subplot().plot(*datos, **opciones)
+    c.graficos += 1
+    ruta = _ruta("grafico", c.graficos)
+    _guardar_figura(figura, ruta)
+    return ruta
+
+
+def guardar() -> Optional[str]:
+    """
+    Escribe la figura del lote en curso (aunque no esté llena).
+
+    Returns:
+        La ruta del archivo escrito, o None si no había figura pendiente.
+    """
+    c = _configuracion
+    if c.figura_lote is None:
+        return None
+    figura, c.figura_lote, c.ejes_en_lote = c.figura_lote, None, 0
+    c.figuras += 1
+    ruta = _ruta("figura", c.figuras)
+    _guardar_figura(figura, ruta)
+    return ruta
+
+
+def archivos_generados() -> List[str]:
+    """
+    Rutas de los archivos escritos por `graficar` en este proceso, en orden.
+    """
+    return list(_configuracion.archivos)
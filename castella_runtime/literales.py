@@ -0,0 +1,87 @@
+# castella_runtime/literales.py
+
+"""
+Carga de los literales grandes que el compilador guarda fuera del código generado.
+
+Con `--literales-externos`, las listas, diccionarios, tuplas y conjuntos constantes
+que superan un tamaño se escriben en un directorio de datos junto al programa y el
+código generado los carga donde estaba el literal (ver castella_literales):
+
+    let tabla = [0.5, 0.25, ...];                    # cientos de miles de valores
+
+    tabla = _castella_cargar_literal(__file__, "programa.datos/0.marshal")
+
+Cada evaluación devuelve un objeto nuevo, igual que el literal: los archivos
+`.marshal` se deserializan en cada llamada (los bytes se leen del disco una sola
+vez) y los `.npy` de `np.array([...])` se abren mapeados en memoria en modo copia
+al escribir, así que sólo se leen las páginas que se usan y modificar el arreglo no
+cambia el archivo. Dentro de una aplicación zip (.pyz), donde no se puede mapear,
+se leen enteros.
+"""
+
+import io
+import marshal
+import os
+import threading
+import zipfile
+from typing import Any, Dict, Optional, Tuple
+
+_bytes: Dict[str, bytes] = {} # Contenido de los .marshal ya leídos.
+_cerrojo = threading.Lock()
+
+
+def _en_zip(ruta: str) -> Optional[Tuple[str, str]]:
+    """
+    Si `ruta` está dentro de un archivo zip (p. ej. `app.pyz/datos/0.npy`), devuelve
+    `(archivo_zip, ruta_interna)`; si no, None.
+    """
+    contenedor, interna = ruta, []
+    while True:
+        contenedor, parte = os.path.split(contenedor)
+        if not parte:
+            return None
+        interna.insert(0, parte)
+        if os.path.isfile(contenedor) and zipfile.is_zipfile(contenedor):
+            return contenedor, "/".join(interna)
+
+
+def _leer_bytes(ruta: str) -> bytes:
+    try:
+        with open(ruta, "rb") as archivo:
+            return archivo.read()
+    except (FileNotFoundError, NotADirectoryError):
+        ubicacion = _en_zip(ruta)
+        if ubicacion is None:
+            raise FileNotFoundError(f"No se encontró el archivo de datos del literal: '{ruta}'") from None
+        with zipfile.ZipFile(ubicacion[0]) as contenedor:
+            return contenedor.read(ubicacion[1])
+
+
+def cargar_literal(archivo_programa: str, ruta_datos: str) -> Any:
+    """
+    Carga un literal guardado por el compilador.
+
+    Args:
+        archivo_programa: `__file__` del programa generado (la ruta de los datos es relativa a él).
+        ruta_datos: Ruta relativa del archivo de datos (`.marshal` o `.npy`).
+
+    Returns:
+        Un objeto nuevo con el valor del literal (un `np.ndarray` para los `.npy`).
+
+    Raises:
+        FileNotFoundError: Si falta el archivo de datos.
+    """
+    ruta = os.path.join(os.path.dirname(os.path.abspath(archivo_programa)), *ruta_datos.split("/"))
+    if ruta.endswith(".npy"):
+        import numpy as np # Sólo hay archivos .npy si el programa usa NumPy.
+        if os.path.isfile(ruta):
+            # Mapeado en modo "c" (copia al escribir): escribible como el arreglo original.
+            return np.load(ruta, mmap_mode="c", allow_pickle=False)
+        return np.load(io.BytesIO(_leer_bytes(ruta)), allow_pickle=False)
+
+    contenido = _bytes.get(ruta)
+    if contenido is None:
+        contenido = _leer_bytes(ruta)
+        with _cerrojo:
+            _bytes[ruta] = contenido
+    return marshal.loads(contenido)
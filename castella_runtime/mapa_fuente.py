@@ -0,0 +1,198 @@
+# castella_runtime/mapa_fuente.py
+
+"""
+Mapas de fuente Castella -> Python.
+
+Un mapa de fuente relaciona cada línea del Python generado con la línea del
+programa Castella que la originó. Lo produce `castella_parser.traducir_con_mapa`
+y se guarda junto al código generado (`programa.py.map`). Perfiladores,
+tracebacks y herramientas de cobertura lo usan para reportar ubicaciones `.castella`.
+
+Formato (JSON):
+    {
+      "version": 1,
+      "fuente": "programa.castella",
+      "generado": "programa.py",
+      "lineas": [[linea_py, linea_castella], ...],
+      "funciones": [[py_inicio, py_fin, linea_castella, "nombre"], ...]
+    }
+
+`lineas` es compacto: sólo guarda los puntos donde cambia la línea de origen.
+Cada segmento se aplica desde `linea_py` hasta el inicio del siguiente.
+"""
+
+import bisect
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+VERSION_FORMATO = 1
+
+_PATRON_DEF = re.compile(r"^([ \t]*)(?:async[ \t]+)?def[ \t]+([A-Za-z_]\w*)[ \t]*\(")
+
+
+class MapaFuente:
+    """
+    Mapa de líneas del Python generado a líneas del código Castella.
+    """
+
+    def __init__(self, fuente: str, generado: str, segmentos: List[Tuple[int, int]],
+                 funciones: Optional[List[Tuple[int, int, int, str]]] = None):
+        """
+        Args:
+            fuente: Nombre del archivo Castella.
+            generado: Nombre del archivo (o `co_filename`) del Python generado.
+            segmentos: Pares `(linea_py, linea_castella)` ordenados por `linea_py`.
+            funciones: Rangos de funciones `(py_inicio, py_fin, linea_castella, nombre)`.
+        """
+        self.fuente = fuente
+        self.generado = generado
+        self.segmentos = [tuple(s) for s in segmentos]
+        self.funciones = [tuple(f) for f in (funciones or [])]
+        self._inicios = [s[0] for s in self.segmentos]
+
+    # --- Construcción ---
+
+    @classmethod
+    def desde_codigo(cls, fuente: str, generado: str, codigo_python: str,
+                     segmentos: List[Tuple[int, int]]) -> "MapaFuente":
+        """
+        Crea el mapa y deriva los rangos de funciones a partir de los `def` del código generado.
+        """
+        mapa = cls(fuente, generado, segmentos)
+        mapa.funciones = [
+            (inicio, fin, mapa.ubicar(linea_def) or 1, nombre)
+            for inicio, fin, linea_def, nombre in rangos_de_funciones(codigo_python)
+        ]
+        return mapa
+
+    def desplazar(self, lineas: int) -> "MapaFuente":
+        """
+        Devuelve un mapa equivalente para el código con `lineas` líneas extra al principio.
+        """
+        return MapaFuente(
+            self.fuente,
+            self.generado,
+            [(py + lineas, castella) for py, castella in self.segmentos],
+            [(inicio + lineas, fin + lineas, castella, nombre) for inicio, fin, castella, nombre in self.funciones],
+        )
+
+    # --- Consulta ---
+
+    def ubicar(self, linea_py: int) -> Optional[int]:
+        """
+        Devuelve la línea Castella que originó `linea_py`, o None si es anterior a
+        cualquier sentencia (p. ej. el preámbulo de imports).
+        """
+        indice = bisect.bisect_right(self._inicios, linea_py) - 1
+        if indice < 0:
+            return None
+        return self.segmentos[indice][1]
+
+    def funcion_en(self, linea_py: int) -> Optional[Tuple[int, int, int, str]]:
+        """
+        Devuelve el rango de función más interno que contiene `linea_py`, o None.
+        """
+        mejor = None
+        for funcion in self.funciones:
+            if funcion[0] <= linea_py <= funcion[1] and (mejor is None or funcion[0] >= mejor[0]):
+                mejor = funcion
+        return mejor
+
+    def es_generado(self, archivo: str) -> bool:
+        """
+        Indica si `archivo` (un `co_filename`) corresponde al código generado.
+        """
+        return archivo == self.generado or os.path.basename(archivo) == os.path.basename(self.generado)
+
+    def formatear_traceback(self, tb) -> List[str]:
+        """
+        Traduce los marcos de un traceback que pertenecen al código generado.
+
+        Args:
+            tb: Un objeto traceback (p. ej. `excepcion.__traceback__`).
+
+        Returns:
+            Líneas "programa.castella:12 (en funcion)" del marco más externo al más interno.
+        """
+        lineas = []
+        while tb is not None:
+            codigo = tb.tb_frame.f_code
+            if self.es_generado(codigo.co_filename):
+                linea_castella = self.ubicar(tb.tb_lineno)
+                if linea_castella is not None:
+                    contexto = "programa" if codigo.co_name == "<module>" else codigo.co_name
+                    lineas.append(f"{self.fuente}:{linea_castella} (en {contexto})")
+            tb = tb.tb_next
+        return lineas
+
+    # --- Serialización ---
+
+    def a_dict(self) -> Dict[str, Any]:
+        """Devuelve el mapa como diccionario serializable a JSON."""
+        return {
+            "version": VERSION_FORMATO,
+            "fuente": self.fuente,
+            "generado": self.generado,
+            "lineas": [list(s) for s in self.segmentos],
+            "funciones": [list(f) for f in self.funciones],
+        }
+
+    @classmethod
+    def desde_dict(cls, datos: Dict[str, Any]) -> "MapaFuente":
+        """
+        Reconstruye un mapa a partir de `a_dict()`.
+
+        Raises:
+            ValueError: Si la versión del formato no es compatible.
+        """
+        version = datos.get("version", VERSION_FORMATO)
+        if version != VERSION_FORMATO:
+            raise ValueError(f"Versión de mapa de fuente no soportada: {version} (se esperaba {VERSION_FORMATO}).")
+        return cls(datos.get("fuente", "<castella>"), datos.get("generado", ""), datos.get("lineas", []), datos.get("funciones", []))
+
+    def guardar(self, ruta: str):
+        """Escribe el mapa en `ruta` (JSON compacto)."""
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(self.a_dict(), archivo, separators=(",", ":"))
+
+    @classmethod
+    def cargar(cls, ruta: str) -> "MapaFuente":
+        """Lee un mapa escrito con `guardar`."""
+        with open(ruta, "r", encoding="utf-8") as archivo:
+            return cls.desde_dict(json.load(archivo))
+
+
+def rangos_de_funciones(codigo_python: str) -> List[Tuple[int, int, int, str]]:
+    """
+    Localiza los `def` del código Python como `(inicio, fin, linea_def, nombre)`.
+
+    El rango (1-based, inclusivo) incluye los decoradores y termina en la última
+    línea no vacía con más indentación que el `def`.
+    """
+    lineas = codigo_python.splitlines()
+    resultado = []
+    for indice, linea in enumerate(lineas):
+        coincidencia = _PATRON_DEF.match(linea)
+        if not coincidencia:
+            continue
+        nivel = len(coincidencia.group(1))
+
+        inicio = indice
+        while inicio > 0 and lineas[inicio - 1].lstrip().startswith("@") and _indentacion(lineas[inicio - 1]) == nivel:
+            inicio -= 1
+
+        fin = indice
+        for siguiente in range(indice + 1, len(lineas)):
+            if not lineas[siguiente].strip():
+                continue
+            if _indentacion(lineas[siguiente]) <= nivel:
+                break
+            fin = siguiente
+        resultado.append((inicio + 1, fin + 1, indice + 1, coincidencia.group(2)))
+    return resultado
+
+
+def _indentacion(linea: str) -> int:
+    return len(linea) - len(linea.lstrip(" \t"))
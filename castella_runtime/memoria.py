@@ -0,0 +1,339 @@
+# castella_runtime/memoria.py
+
+"""
+Perfilado de memoria de programas Castella en ejecución.
+
+Activa `tracemalloc` y atribuye la memoria viva a las líneas Castella que la
+asignaron (usando el mapa de fuente del compilador) en el momento de mayor memoria
+trazada: cada vez que una muestra supera en un `MARGEN_INSTANTANEA` la memoria de la
+última instantánea se toma una nueva, y al terminar se reporta la mayor (la memoria
+que queda viva al salir suele ser mucho menor que la del pico). Los buffers de NumPy
+se contabilizan por separado: NumPy registra sus arreglos en tracemalloc bajo un
+dominio propio, así que un `Matriz` grande aparece con su tamaño real.
+
+Mientras el programa corre, un hilo en segundo plano toma muestras periódicas de
+la memoria residente (RSS actual y pico) y de la memoria trazada. Las muestras y
+el resumen final se guardan en un archivo de línea de tiempo (JSON) que puede
+compararse entre versiones del código:
+
+    python -m castella_runtime.memoria comparar base.json nuevo.json
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+from .mapa_fuente import MapaFuente
+
+# Dominio con el que NumPy registra sus buffers en tracemalloc (numpy.lib.tracemalloc_domain).
+DOMINIO_NUMPY = 389047
+
+# Profundidad de las pilas guardadas por tracemalloc: debe alcanzar desde la asignación
+# (a menudo dentro de NumPy u otra biblioteca) hasta el marco del programa Castella.
+PROFUNDIDAD_PILA = 32
+
+VERSION_FORMATO = 1
+
+# Crecimiento de la memoria trazada (respecto a la última instantánea) a partir del
+# cual se toma una instantánea nueva.
+MARGEN_INSTANTANEA = 1.1
+
+
+def rss_actual() -> Optional[int]:
+    """
+    Devuelve la memoria residente actual del proceso en bytes (None si no se puede medir).
+    """
+    try:
+        with open("/proc/self/statm", "r") as archivo:
+            paginas_residentes = int(archivo.read().split()[1])
+        return paginas_residentes * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def rss_pico() -> Optional[int]:
+    """
+    Devuelve el pico de memoria residente del proceso en bytes (None si no se puede medir).
+    """
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KiB; macOS, bytes.
+    return pico if sys.platform == "darwin" else pico * 1024
+
+
+class PerfilMemoria:
+    """
+    Perfilador de memoria de un programa Castella.
+    """
+
+    def __init__(self, mapa: Dict[str, Any], intervalo: float = 0.5):
+        """
+        Args:
+            mapa: Mapa de fuente generado por el compilador (`MapaFuente.a_dict()`).
+            intervalo: Segundos entre muestras de la línea de tiempo.
+        """
+        self.mapa = MapaFuente.desde_dict(mapa)
+        self.intervalo = intervalo
+        self.muestras: List[Dict[str, Any]] = []
+        self.lineas: List[Dict[str, Any]] = []
+        self.t_lineas: Optional[float] = None
+        self._instantanea: Optional[tracemalloc.Snapshot] = None
+        self._trazada_instantanea = 0
+        self._sobrecarga = 0
+        self._pico_previo = 0
+        self._inicio = 0.0
+        self._parar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    def iniciar(self):
+        """Activa tracemalloc y el muestreo periódico."""
+        tracemalloc.start(PROFUNDIDAD_PILA)
+        self._inicio = time.perf_counter()
+        self._muestrear()
+        self._hilo = threading.Thread(target=self._bucle_muestreo, name="castella-memoria", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        """
+        Detiene el muestreo y atribuye a líneas Castella la instantánea de mayor memoria.
+        """
+        self._parar.set()
+        if self._hilo is not None:
+            self._hilo.join()
+        self._muestrear()
+        tracemalloc.stop()
+        if self._instantanea is not None:
+            # La atribución es lenta (agrupa por pila completa): se hace una sola vez, al final.
+            self.lineas = self._atribuir(self._instantanea)
+            self._instantanea = None
+
+    def _bucle_muestreo(self):
+        while not self._parar.wait(self.intervalo):
+            self._muestrear()
+
+    def _muestrear(self):
+        trazada, trazada_pico = tracemalloc.get_traced_memory()
+        # Sin la memoria que ocupa la instantánea guardada (también la traza tracemalloc).
+        trazada -= self._sobrecarga
+        trazada_pico = max(trazada_pico - self._sobrecarga, self._pico_previo)
+        muestra = {
+            "t": round(time.perf_counter() - self._inicio, 4),
+            "rss": rss_actual(),
+            "rss_pico": rss_pico(),
+            "trazada": trazada,
+            "trazada_pico": trazada_pico,
+        }
+        self.muestras.append(muestra)
+        if trazada > self._trazada_instantanea * MARGEN_INSTANTANEA:
+            self._tomar_instantanea(trazada, trazada_pico, muestra["t"])
+
+    def _tomar_instantanea(self, trazada: int, trazada_pico: int, t: float):
+        """
+        Toma una instantánea de la memoria viva que sustituye a la anterior.
+        """
+        self._instantanea = None
+        antes = tracemalloc.get_traced_memory()[0]
+        self._instantanea = tracemalloc.take_snapshot()
+        self._sobrecarga = tracemalloc.get_traced_memory()[0] - antes
+        self.t_lineas = t
+        self._trazada_instantanea = trazada
+        # Crear la instantánea no cuenta en el pico del programa.
+        if hasattr(tracemalloc, "reset_peak"): # Python 3.9+
+            self._pico_previo = trazada_pico
+            tracemalloc.reset_peak()
+
+    def _linea_castella(self, traza: tracemalloc.Traceback) -> Optional[Tuple[int, str]]:
+        """
+        Busca el marco más interno del programa en la pila de una asignación.
+        """
+        for marco in reversed(traza): # Los marcos van del más antiguo al más reciente.
+            if self.mapa.es_generado(marco.filename):
+                linea = self.mapa.ubicar(marco.lineno)
+                if linea is None:
+                    return None
+                funcion = self.mapa.funcion_en(marco.lineno)
+                return linea, funcion[3] if funcion else "<programa>"
+        return None
+
+    def _atribuir(self, instantanea: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        """
+        Agrupa la memoria viva de la instantánea por línea Castella.
+        """
+        por_linea: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        filtro_numpy = tracemalloc.DomainFilter(inclusive=True, domain=DOMINIO_NUMPY)
+        for clave, estadisticas in (
+            ("bytes", instantanea.statistics("traceback")),
+            ("bytes_numpy", instantanea.filter_traces([filtro_numpy]).statistics("traceback")),
+        ):
+            for estadistica in estadisticas:
+                ubicacion = self._linea_castella(estadistica.traceback)
+                if ubicacion is None:
+                    continue
+                entrada = por_linea.setdefault(ubicacion, {"bytes": 0, "bytes_numpy": 0, "bloques": 0})
+                entrada[clave] += estadistica.size
+                if clave == "bytes":
+                    entrada["bloques"] += estadistica.count
+
+        lineas = [
+            {"linea": linea, "funcion": funcion, **valores}
+            for (linea, funcion), valores in por_linea.items()
+        ]
+        lineas.sort(key=lambda entrada: (-entrada["bytes"], entrada["linea"]))
+        return lineas
+
+    def reporte(self, limite: int = 15) -> str:
+        """
+        Formatea las líneas que más memoria retienen y el resumen de la línea de tiempo.
+        """
+        filas = [f"{'memoria':>12}  {'numpy':>12}  {'bloques':>9}  ubicación"]
+        for entrada in self.lineas[:limite]:
+            filas.append(
+                f"{_formatear_bytes(entrada['bytes']):>12}  {_formatear_bytes(entrada['bytes_numpy']):>12}  "
+                f"{entrada['bloques']:>9}  {self.mapa.fuente}:{entrada['linea']} ({entrada['funcion']})"
+            )
+        resumen = resumir(self.muestras)
+        filas.append("")
+        filas.append(
+            f"Pico trazado: {_formatear_bytes(resumen['trazada_pico'])}   "
+            f"Pico RSS: {_formatear_bytes(resumen['rss_pico'])}   "
+            f"Duración: {resumen['duracion']:.2f} s ({len(self.muestras)} muestras)"
+        )
+        if self.t_lineas is not None:
+            filas.append(f"Memoria por línea: instantánea en t = {self.t_lineas:.2f} s "
+                         f"({_formatear_bytes(self._trazada_instantanea)} trazados)")
+        return "\n".join(filas)
+
+    def a_dict(self) -> Dict[str, Any]:
+        """Devuelve la línea de tiempo y el resumen como diccionario serializable."""
+        return {
+            "version": VERSION_FORMATO,
+            "fuente": self.mapa.fuente,
+            "intervalo": self.intervalo,
+            "resumen": resumir(self.muestras),
+            "muestras": self.muestras,
+            "lineas": self.lineas,
+            "t_lineas": self.t_lineas,
+        }
+
+    def guardar_linea_tiempo(self, ruta: str):
+        """Escribe la línea de tiempo en `ruta` (JSON)."""
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(self.a_dict(), archivo, indent=1)
+
+
+def resumir(muestras: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Calcula los picos y la duración de una lista de muestras.
+    """
+    def maximo(campo):
+        valores = [m[campo] for m in muestras if m.get(campo) is not None]
+        return max(valores) if valores else None
+
+    return {
+        "duracion": muestras[-1]["t"] if muestras else 0.0,
+        "trazada_pico": maximo("trazada_pico"),
+        "rss_pico": maximo("rss_pico"),
+    }
+
+
+def _formatear_bytes(valor: Optional[float]) -> str:
+    if valor is None:
+        return "n/d"
+    for unidad in ("B", "KiB", "MiB"):
+        if abs(valor) < 1024:
+            return f"{valor:.0f} {unidad}" if unidad == "B" else f"{valor:.1f} {unidad}"
+        valor /= 1024
+    return f"{valor:.1f} GiB"
+
+
+def comparar_lineas_tiempo(base: Dict[str, Any], nuevo: Dict[str, Any], limite: int = 10) -> str:
+    """
+    Compara dos líneas de tiempo (picos y líneas Castella con más memoria).
+
+    Returns:
+        Un texto con los cambios de los picos y de las líneas principales.
+    """
+    filas = []
+    for campo, titulo in (("trazada_pico", "Pico trazado"), ("rss_pico", "Pico RSS"), ("duracion", "Duración (s)")):
+        valor_base, valor_nuevo = base["resumen"].get(campo), nuevo["resumen"].get(campo)
+        if valor_base is None or valor_nuevo is None:
+            continue
+        cambio = (valor_nuevo - valor_base) / valor_base if valor_base else 0.0
+        if campo == "duracion":
+            filas.append(f"{titulo:<14} {valor_base:>12.2f}  ->  {valor_nuevo:>12.2f}  ({cambio:+.1%})")
+        else:
+            filas.append(f"{titulo:<14} {_formatear_bytes(valor_base):>12}  ->  {_formatear_bytes(valor_nuevo):>12}  ({cambio:+.1%})")
+
+    por_linea_base = {(e["linea"], e["funcion"]): e["bytes"] for e in base.get("lineas", [])}
+    filas.append("")
+    filas.append(f"{'base':>12}  {'nuevo':>12}  ubicación")
+    for entrada in nuevo.get("lineas", [])[:limite]:
+        anterior = por_linea_base.get((entrada["linea"], entrada["funcion"]))
+        filas.append(f"{_formatear_bytes(anterior):>12}  {_formatear_bytes(entrada['bytes']):>12}  "
+                     f"{nuevo.get('fuente', '')}:{entrada['linea']} ({entrada['funcion']})")
+    return "\n".join(filas)
+
+
+def activar(mapa: Dict[str, Any], salida: Optional[str] = None, intervalo: float = 0.5,
+            limite: int = 15) -> PerfilMemoria:
+    """
+    Activa el perfilado de memoria para el resto del proceso (usado por los binarios generados).
+
+    Al terminar el programa se imprime el reporte por stderr y, si se indicó
+    `salida`, se escribe la línea de tiempo en `<salida>.memoria.json`.
+
+    Args:
+        mapa: Mapa de fuente generado por el compilador (`MapaFuente.a_dict()`).
+        salida: Prefijo del archivo de línea de tiempo (None = sólo reporte).
+        intervalo: Segundos entre muestras.
+        limite: Número de líneas Castella a mostrar.
+    """
+    perfil = PerfilMemoria(mapa, intervalo)
+
+    def finalizar():
+        perfil.detener()
+        escribir_resultados(perfil, salida, limite)
+
+    atexit.register(finalizar)
+    perfil.iniciar()
+    return perfil
+
+
+def escribir_resultados(perfil: PerfilMemoria, salida: Optional[str], limite: int = 15):
+    """
+    Imprime el reporte por stderr y guarda la línea de tiempo si se indicó un prefijo.
+    """
+    print("\n--- Perfil de memoria (ubicaciones Castella) ---", file=sys.stderr)
+    print(perfil.reporte(limite), file=sys.stderr)
+    if salida:
+        ruta = salida + ".memoria.json"
+        perfil.guardar_linea_tiempo(ruta)
+        print(f"Línea de tiempo de memoria guardada en '{ruta}'.", file=sys.stderr)
+
+
+def main(argv=None) -> int:
+    """
+    Línea de comandos: `python -m castella_runtime.memoria comparar base.json nuevo.json`.
+    """
+    argumentos = sys.argv[1:] if argv is None else argv
+    if len(argumentos) != 3 or argumentos[0] != "comparar":
+        print("Uso: python -m castella_runtime.memoria comparar base.json nuevo.json", file=sys.stderr)
+        return 2
+    with open(argumentos[1], "r", encoding="utf-8") as archivo:
+        base = json.load(archivo)
+    with open(argumentos[2], "r", encoding="utf-8") as archivo:
+        nuevo = json.load(archivo)
+    print(comparar_lineas_tiempo(base, nuevo))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+# castella_runtime/memorizacion.py
+
+"""
+Decorador `@memorizar` de Castella: caché de resultados con expulsión LRU y caducidad.
+
+    @memorizar
+    funcion fibonacci(n: int) -> int { ... }
+
+    @memorizar(max=1024, ttl=60)
+    funcion espectro(senal: Matriz) -> Matriz { ... }
+
+La clave de la caché incluye el tipo de cada argumento (`1`, `1.0` y `verdadero` son
+claves distintas) y admite argumentos no hashables: listas, diccionarios y conjuntos
+se convierten recursivamente, y los arreglos de NumPy (`Matriz`, también `np.memmap`)
+se identifican por su contenido (tipo de dato, forma y un hash de los bytes), así que
+dos arreglos iguales comparten entrada aunque sean objetos distintos. Si un argumento
+no se puede convertir en clave, la llamada se ejecuta sin caché.
+
+La función decorada expone `estadisticas()` (aciertos, fallos, expulsiones,
+caducados, entradas, ...) y `limpiar()`. Los resultados se comparten entre llamadas:
+la función debe ser pura y quien la llama no debe modificar lo que devuelve.
+"""
+
+import functools
+import hashlib
+import inspect
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Capacidad por defecto (la misma que functools.lru_cache).
+CAPACIDAD_POR_DEFECTO = 128
+
+_NO_ENCONTRADO = object()
+
+
+class ClaveNoCacheable(TypeError):
+    """
+    Un argumento no se puede convertir en clave de la caché.
+    """
+
+
+def _es_arreglo_numpy(valor: Any) -> bool:
+    # Sin importar NumPy (castella_runtime sólo depende de la biblioteca estándar): si no
+    # está importado, no puede haber arreglos. `isinstance` acepta también las subclases,
+    # como `np.memmap` (los literales de `--literales-externos`).
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and isinstance(valor, numpy.ndarray)
+
+
+def clave_argumento(valor: Any) -> Hashable:
+    """
+    Convierte un argumento en una clave hashable que incluye su tipo.
+
+    Raises:
+        ClaveNoCacheable: Si el valor no es hashable ni de un tipo convertible.
+    """
+    tipo = type(valor)
+    if _es_arreglo_numpy(valor):
+        resumen = hashlib.blake2b(valor.tobytes(), digest_size=16).digest()
+        return (tipo, valor.dtype.str, valor.shape, resumen)
+    if tipo in (list, tuple):
+        return (tipo, tuple(clave_argumento(elemento) for elemento in valor))
+    if tipo is dict:
+        return (tipo, frozenset((clave_argumento(k), clave_argumento(v)) for k, v in valor.items()))
+    if tipo in (set, frozenset):
+        return (tipo, frozenset(clave_argumento(elemento) for elemento in valor))
+    try:
+        hash(valor)
+    except TypeError:
+        raise ClaveNoCacheable(f"argumento de tipo {tipo.__name__} no hashable") from None
+    return (tipo, valor)
+
+
+class CacheMemorizar:
+    """
+    Caché LRU con caducidad opcional, segura entre hilos.
+    """
+
+    def __init__(self, capacidad: Optional[int] = CAPACIDAD_POR_DEFECTO, ttl: Optional[float] = None):
+        """
+        Args:
+            capacidad: Entradas máximas (None = sin límite).
+            ttl: Segundos que vale una entrada (None = no caduca).
+
+        Raises:
+            ValueError: Si la capacidad o el ttl no son positivos.
+        """
+        if capacidad is not None and capacidad < 1:
+            raise ValueError(f"La capacidad de la caché debe ser positiva o ninguno: {capacidad}")
+        if ttl is not None and ttl <= 0:
+            raise ValueError(f"El ttl de la caché debe ser positivo o ninguno: {ttl}")
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._entradas: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._cerrojo = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.caducados = 0
+        self.no_cacheables = 0
+
+    def obtener(self, clave: Hashable) -> Any:
+        """
+        Devuelve el valor guardado para `clave`, o `_NO_ENCONTRADO` (cuenta acierto o fallo).
+        """
+        with self._cerrojo:
+            entrada = self._entradas.get(clave, _NO_ENCONTRADO)
+            if entrada is not _NO_ENCONTRADO:
+                valor, caduca = entrada
+                if caduca is None or time.monotonic() < caduca:
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return valor
+                del self._entradas[clave]
+                self.caducados += 1
+            self.fallos += 1
+            return _NO_ENCONTRADO
+
+    def guardar(self, clave: Hashable, valor: Any):
+        caduca = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._cerrojo:
+            self._entradas[clave] = (valor, caduca)
+            self._entradas.move_to_end(clave)
+            if self.capacidad is not None:
+                while len(self._entradas) > self.capacidad:
+                    self._entradas.popitem(last=False)
+                    self.expulsiones += 1
+
+    def limpiar(self):
+        """
+        Vacía la caché y reinicia los contadores.
+        """
+        with self._cerrojo:
+            self._entradas.clear()
+            self.aciertos = self.fallos = self.expulsiones = self.caducados = self.no_cacheables = 0
+
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._cerrojo:
+            consultas = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "expulsiones": self.expulsiones,
+                "caducados": self.caducados,
+                "no_cacheables": self.no_cacheables,
+                "entradas": len(self._entradas),
+                "capacidad": self.capacidad,
+                "ttl": self.ttl,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            }
+
+
+def _memorizar_funcion(funcion: Callable, capacidad: Optional[int], ttl: Optional[float]) -> Callable:
+    if inspect.isgeneratorfunction(funcion) or inspect.iscoroutinefunction(funcion) or inspect.isasyncgenfunction(funcion):
+        raise TypeError(f"@memorizar no admite funciones generadoras ni asíncronas: {funcion.__qualname__}")
+    cache = CacheMemorizar(capacidad, ttl)
+
+    @functools.wraps(funcion)
+    def memorizada(*args, **kwargs):
+        try:
+            clave = tuple(clave_argumento(arg) for arg in args)
+            if kwargs:
+                clave += (_NO_ENCONTRADO,) + tuple((nombre, clave_argumento(valor)) for nombre, valor in sorted(kwargs.items()))
+        except ClaveNoCacheable:
+            with cache._cerrojo:
+                cache.no_cacheables += 1
+            return funcion(*args, **kwargs)
+        valor = cache.obtener(clave)
+        if valor is _NO_ENCONTRADO:
+            # Se calcula fuera del cerrojo: la función puede ser recursiva (y llamarse a sí misma memorizada).
+            valor = funcion(*args, **kwargs)
+            cache.guardar(clave, valor)
+        return valor
+
+    memorizada.cache = cache
+    memorizada.estadisticas = cache.estadisticas
+    memorizada.limpiar = cache.limpiar
+    return memorizada
+
+
+def memorizar(funcion: Optional[Callable] = None, *, max: Optional[int] = CAPACIDAD_POR_DEFECTO,
+              ttl: Optional[float] = None) -> Callable:
+    """
+    Decorador que guarda los resultados de una función pura.
+
+    Se usa como `@memorizar` o con opciones, `@memorizar(max=..., ttl=...)`.
+
+    Args:
+        funcion: La función a decorar (cuando se usa sin paréntesis).
+        max: Entradas máximas; al superarlas se expulsa la usada hace más tiempo
+             (None = sin límite).
+        ttl: Segundos que vale un resultado guardado (None = no caduca).
+
+    Returns:
+        La función memorizada, o el decorador si se llamó con opciones.
+
+    Raises:
+        ValueError: Si `max` o `ttl` no son positivos.
+        TypeError: Si la función es generadora o asíncrona.
+    """
+    if funcion is not None:
+        return _memorizar_funcion(funcion, max, ttl)
+    CacheMemorizar(max, ttl) # Valida las opciones al decorar, no en la primera llamada.
+    return lambda funcion: _memorizar_funcion(funcion, max, ttl)
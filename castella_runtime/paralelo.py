@@ -0,0 +1,182 @@
+# castella_runtime/paralelo.py
+
+"""
+Ejecución de los bucles `paralelo para` de Castella.
+
+El transformer convierte el cuerpo del bucle en una función de un argumento (la
+variable del bucle) y llama a `paralelo_para` con ella y el iterable:
+
+    paralelo("hilos", bloque=8) para url en urls -> paginas { retornar descargar(url); }
+
+    def _castella_paralelo_1(url):
+        return descargar(url)
+    paginas = _castella_paralelo_para(_castella_paralelo_1, urls, "hilos", bloque=8)
+
+Los elementos se reparten en bloques consecutivos; cada tarea procesa un bloque y los
+resultados se devuelven en el orden del iterable. Con `reducir`, cada bloque se
+reduce en su trabajador y los parciales se combinan en orden, así que la operación
+debe ser asociativa (suma, producto, mínimo, máximo, concatenación...).
+
+Con `modo="procesos"` se crea un pool por bucle con el método de arranque `fork`
+(sólo en Linux): los trabajadores heredan la función del cuerpo y las variables que
+captura sin serializarlas, y sólo viajan los elementos y los resultados. Funciona
+igual dentro de los binarios de PyInstaller. En macOS `fork` puede romper el proceso
+hijo (CPython dejó de usarlo por defecto) y en Windows no existe; con `spawn` los
+trabajadores volverían a ejecutar el programa entero para obtener la función del
+cuerpo. Allí, y dentro de un proceso daemon (p. ej. un trabajador de `PoolCastella`,
+que no puede tener hijos), el bucle se ejecuta con hilos, avisando una vez por
+stderr. Los cambios que una iteración haga a variables externas no son visibles
+fuera de su proceso: las iteraciones deben ser independientes y comunicar su
+resultado con `retornar`.
+"""
+
+import functools
+import multiprocessing
+import operator
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+MODOS = ("procesos", "hilos")
+
+# Reducciones con nombre aceptadas por `reducir` (también se acepta cualquier función de dos argumentos).
+REDUCCIONES: Dict[str, Callable[[Any, Any], Any]] = {
+    "suma": operator.add,
+    "producto": operator.mul,
+    "minimo": min,
+    "maximo": max,
+}
+
+# Bloques por trabajador cuando no se indica `bloque`: reparte mejor iteraciones de coste desigual.
+BLOQUES_POR_TRABAJADOR = 4
+
+_SIN_INICIAL = object()
+
+# Funciones de los bucles en curso, heredadas por los trabajadores creados con `fork`.
+_registro: Dict[int, Tuple[Callable, Optional[Callable]]] = {}
+_siguiente_clave = 0
+_cerrojo = threading.Lock()
+_avisado = False
+
+if getattr(sys, "frozen", False):
+    # Binario de PyInstaller: permite que los procesos hijo arranquen sin ejecutar el programa.
+    multiprocessing.freeze_support()
+
+
+def _avisar(mensaje: str):
+    print(f"[castella paralelo] {mensaje}", file=sys.stderr)
+
+
+def _ejecutar_bloque(funcion: Callable, elementos: List[Any], reductor: Optional[Callable]) -> Any:
+    """
+    Aplica la función a cada elemento de un bloque; con reductor devuelve el parcial del bloque.
+    """
+    resultados = [funcion(elemento) for elemento in elementos]
+    return functools.reduce(reductor, resultados) if reductor is not None else resultados
+
+
+def _ejecutar_bloque_registrado(clave: int, elementos: List[Any]) -> Any:
+    """
+    Igual que `_ejecutar_bloque`, con la función tomada del registro heredado del proceso padre.
+    """
+    funcion, reductor = _registro[clave]
+    return _ejecutar_bloque(funcion, elementos, reductor)
+
+
+def _sin_procesos() -> Optional[str]:
+    """
+    Devuelve por qué no se pueden crear procesos trabajadores con `fork`, o None si se puede.
+    """
+    if not sys.platform.startswith("linux") or "fork" not in multiprocessing.get_all_start_methods():
+        return "esta plataforma no permite `fork` con seguridad"
+    if multiprocessing.current_process().daemon:
+        return "un proceso daemon no puede crear procesos hijo"
+    return None
+
+
+def _en_procesos(funcion: Callable, bloques: List[List[Any]], reductor: Optional[Callable],
+                 trabajadores: int) -> List[Any]:
+    """
+    Ejecuta los bloques en un pool de procesos creado con `fork` (ver `_sin_procesos`).
+
+    Returns:
+        Los resultados por bloque.
+    """
+    global _siguiente_clave
+    with _cerrojo:
+        clave = _siguiente_clave
+        _siguiente_clave += 1
+        _registro[clave] = (funcion, reductor)
+    try:
+        # Los trabajadores se crean (fork) después de registrar la función, así que la heredan.
+        with ProcessPoolExecutor(max_workers=trabajadores, mp_context=multiprocessing.get_context("fork")) as ejecutor:
+            return list(ejecutor.map(_ejecutar_bloque_registrado, [clave] * len(bloques), bloques))
+    finally:
+        with _cerrojo:
+            del _registro[clave]
+
+
+def paralelo_para(funcion: Callable[[Any], Any], iterable: Iterable[Any], modo: str = "procesos",
+                  trabajadores: Optional[int] = None, bloque: Optional[int] = None,
+                  reducir: Union[str, Callable[[Any, Any], Any], None] = None, inicial: Any = _SIN_INICIAL) -> Any:
+    """
+    Ejecuta `funcion` sobre cada elemento de `iterable` en un pool de procesos o de hilos.
+
+    Args:
+        funcion: Cuerpo del bucle (recibe el elemento y devuelve el resultado de la iteración).
+        iterable: Elementos a procesar (se consume entero antes de empezar).
+        modo: "procesos" (trabajo de CPU) o "hilos" (trabajo de E/S, o que libera el GIL).
+        trabajadores: Tamaño del pool (por defecto, uno por CPU).
+        bloque: Elementos por tarea (por defecto, los necesarios para unas
+                BLOQUES_POR_TRABAJADOR tareas por trabajador).
+        reducir: Si se indica, combina los resultados con esta función asociativa de dos
+                 argumentos (o el nombre de una de REDUCCIONES) en lugar de devolver la lista.
+        inicial: Valor inicial de la reducción (y resultado si no hay elementos).
+
+    Returns:
+        La lista de resultados en el orden del iterable, o el valor reducido (None si no
+        hay elementos ni valor inicial).
+
+    Raises:
+        ValueError: Si el modo, el número de trabajadores, el bloque o la reducción no son válidos.
+    """
+    global _avisado
+    if modo not in MODOS:
+        raise ValueError(f"Modo de `paralelo para` no válido: {modo!r}. Opciones: {', '.join(MODOS)}")
+    if isinstance(reducir, str):
+        if reducir not in REDUCCIONES:
+            raise ValueError(f"Reducción no válida: {reducir!r}. Opciones: {', '.join(REDUCCIONES)}")
+        reducir = REDUCCIONES[reducir]
+    trabajadores = trabajadores or os.cpu_count() or 1
+    if trabajadores < 1 or (bloque is not None and bloque < 1):
+        raise ValueError("`trabajadores` y `bloque` deben ser enteros positivos.")
+
+    elementos = list(iterable)
+    if not elementos:
+        return ([] if reducir is None else (None if inicial is _SIN_INICIAL else inicial))
+    bloque = bloque or max(1, -(-len(elementos) // (trabajadores * BLOQUES_POR_TRABAJADOR)))
+    bloques = [elementos[i:i + bloque] for i in range(0, len(elementos), bloque)]
+    trabajadores = min(trabajadores, len(bloques))
+
+    if trabajadores == 1:
+        # Un solo bloque o un solo trabajador: no compensa crear un pool.
+        parciales = [_ejecutar_bloque(funcion, elementos_bloque, reducir) for elementos_bloque in bloques]
+    else:
+        motivo = _sin_procesos() if modo == "procesos" else None
+        if modo == "procesos" and motivo is None:
+            parciales = _en_procesos(funcion, bloques, reducir, trabajadores)
+        else:
+            if motivo is not None and not _avisado:
+                _avisado = True
+                _avisar(f"{motivo}: los bucles `paralelo para` se ejecutan con hilos.")
+            with ThreadPoolExecutor(max_workers=trabajadores) as ejecutor:
+                parciales = list(ejecutor.map(_ejecutar_bloque, [funcion] * len(bloques), bloques,
+                                              [reducir] * len(bloques)))
+
+    if reducir is None:
+        return [resultado for resultados in parciales for resultado in resultados]
+    if inicial is _SIN_INICIAL:
+        return functools.reduce(reducir, parciales)
+    return functools.reduce(reducir, parciales, inicial)
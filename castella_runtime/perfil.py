@@ -0,0 +1,245 @@
+# castella_runtime/perfil.py
+
+"""
+Perfilado de programas Castella en ejecución.
+
+Ejecuta el programa traducido bajo `cProfile` y traduce cada entrada del perfil
+(archivo, línea y función del Python generado) a su origen en Castella usando el
+mapa de fuente que genera el compilador. Así los puntos calientes se
+reportan con los nombres de archivo, líneas y funciones que escribió el usuario.
+
+Exporta a:
+  * `.prof`: formato pstats estándar (snakeviz, gprof2dot, `python -m pstats`),
+    con las claves ya traducidas a ubicaciones Castella.
+  * `.folded`: pilas colapsadas ("a;b;c 123") para flamegraph.pl, speedscope o inferno.
+"""
+
+import atexit
+import cProfile
+import marshal
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from .mapa_fuente import MapaFuente
+
+# Clave de pstats: (archivo, línea, función).
+Clave = Tuple[str, int, str]
+
+
+class UbicadorCastella:
+    """
+    Traduce claves de pstats del Python generado a funciones del código Castella.
+
+    Se construye a partir del mapa de fuente que produce el compilador
+    (`MapaFuente.a_dict()`, ver `castella_runtime.mapa_fuente`). Las claves de pstats
+    identifican funciones, así que cada una se traduce a la línea Castella donde
+    se define la función que la contiene.
+    """
+
+    def __init__(self, mapa: Dict[str, Any]):
+        self.mapa = MapaFuente.desde_dict(mapa)
+        self.fuente = self.mapa.fuente
+
+    def es_generado(self, archivo: str) -> bool:
+        """
+        Indica si `archivo` (co_filename de un code object) es el programa traducido.
+        """
+        return self.mapa.es_generado(archivo)
+
+    def ubicar(self, archivo: str, linea_py: int, nombre: str) -> Clave:
+        """
+        Traduce una clave de pstats. Las entradas ajenas al programa se devuelven sin cambios.
+        """
+        if not self.es_generado(archivo):
+            return (archivo, linea_py, nombre)
+        funcion = self.mapa.funcion_en(linea_py)
+        if funcion is None:
+            return (self.fuente, 1, "<programa>")
+        return (self.fuente, funcion[2], funcion[3])
+
+
+class PerfilCastella:
+    """
+    Perfilador de un programa Castella en ejecución.
+    """
+
+    def __init__(self, mapa: Dict[str, Any]):
+        self.ubicador = UbicadorCastella(mapa)
+        self._perfil = cProfile.Profile()
+        self._stats: Optional[Dict[Clave, Any]] = None
+
+    def iniciar(self):
+        """Comienza a perfilar."""
+        self._perfil.enable()
+
+    def detener(self):
+        """
+        Detiene el perfilado y traduce las estadísticas a ubicaciones Castella.
+        """
+        self._perfil.disable()
+        self._perfil.create_stats()
+        self._stats = _remapear(self._perfil.stats, self.ubicador.ubicar)
+
+    @property
+    def stats(self) -> Dict[Clave, Any]:
+        """Estadísticas en formato pstats, con claves Castella."""
+        if self._stats is None:
+            raise RuntimeError("El perfil todavía no se ha detenido.")
+        return self._stats
+
+    def puntos_calientes(self, limite: int = 20, solo_castella: bool = False) -> List[Tuple[Clave, int, float, float]]:
+        """
+        Devuelve las entradas con más tiempo propio como `(clave, llamadas, propio, acumulado)`.
+
+        Args:
+            limite: Número máximo de entradas.
+            solo_castella: Si es True, omite funciones de bibliotecas y de Python.
+        """
+        filas = []
+        for clave, (_, llamadas, propio, acumulado, _) in self.stats.items():
+            if solo_castella and clave[0] != self.ubicador.fuente:
+                continue
+            filas.append((clave, llamadas, propio, acumulado))
+        filas.sort(key=lambda fila: (-fila[2], fila[0]))
+        return filas[:limite]
+
+    def reporte(self, limite: int = 20) -> str:
+        """
+        Formatea los puntos calientes como tabla, en términos de Castella.
+        """
+        lineas = [f"{'llamadas':>10}  {'propio(s)':>10}  {'acumulado(s)':>12}  ubicación"]
+        for (archivo, linea, funcion), llamadas, propio, acumulado in self.puntos_calientes(limite):
+            if archivo == self.ubicador.fuente:
+                ubicacion = f"{archivo}:{linea} ({funcion})"
+            else:
+                ubicacion = f"[python] {os.path.basename(archivo)}:{linea} ({funcion})"
+            lineas.append(f"{llamadas:>10}  {propio:>10.4f}  {acumulado:>12.4f}  {ubicacion}")
+        return "\n".join(lineas)
+
+    def exportar_pstats(self, ruta: str):
+        """
+        Escribe el perfil en formato pstats (compatible con `pstats.Stats(ruta)`).
+        """
+        with open(ruta, "wb") as archivo:
+            marshal.dump(self.stats, archivo)
+
+    def exportar_flamegraph(self, ruta: str):
+        """
+        Escribe el perfil como pilas colapsadas para herramientas de flamegraph.
+        """
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            for pila, microsegundos in sorted(pilas_colapsadas(self.stats).items()):
+                archivo.write(f"{pila} {microsegundos}\n")
+
+
+def _remapear(stats: Dict[Clave, Any], traducir) -> Dict[Clave, Any]:
+    """
+    Aplica `traducir` a todas las claves de un diccionario de pstats (incluidas las
+    de los llamadores), sumando las entradas que colapsan en la misma clave.
+    """
+    resultado: Dict[Clave, Any] = {}
+    for clave, (cc, nc, tt, ct, llamadores) in stats.items():
+        nueva = traducir(*clave)
+        llamadores_nuevos: Dict[Clave, Tuple[int, int, float, float]] = {}
+        for llamador, valores in llamadores.items():
+            llamador_nuevo = traducir(*llamador)
+            previo = llamadores_nuevos.get(llamador_nuevo)
+            llamadores_nuevos[llamador_nuevo] = valores if previo is None else tuple(a + b for a, b in zip(previo, valores))
+
+        if nueva in resultado:
+            cc0, nc0, tt0, ct0, llamadores0 = resultado[nueva]
+            for llamador, valores in llamadores_nuevos.items():
+                previo = llamadores0.get(llamador)
+                llamadores0[llamador] = valores if previo is None else tuple(a + b for a, b in zip(previo, valores))
+            resultado[nueva] = (cc0 + cc, nc0 + nc, tt0 + tt, ct0 + ct, llamadores0)
+        else:
+            resultado[nueva] = (cc, nc, tt, ct, llamadores_nuevos)
+    return resultado
+
+
+def _etiqueta(clave: Clave) -> str:
+    archivo, linea, funcion = clave
+    return f"{funcion} ({os.path.basename(archivo)}:{linea})"
+
+
+def pilas_colapsadas(stats: Dict[Clave, Any], profundidad_maxima: int = 64,
+                     minimo_us: int = 1) -> Dict[str, int]:
+    """
+    Reconstruye pilas aproximadas a partir del grafo llamador -> llamado de pstats.
+
+    cProfile sólo guarda aristas, no pilas completas; el tiempo de cada función se
+    reparte entre sus llamadores en proporción al tiempo acumulado de cada arista
+    (la misma aproximación que usan flameprof y gprof2dot).
+
+    Returns:
+        Un diccionario `"raiz;...;hoja" -> microsegundos de tiempo propio`.
+    """
+    llamados: Dict[Clave, List[Tuple[Clave, float]]] = {}
+    for clave, (_, _, _, _, llamadores) in stats.items():
+        for llamador, (_, _, _, ct_arista) in llamadores.items():
+            llamados.setdefault(llamador, []).append((clave, ct_arista))
+
+    raices = [clave for clave, valores in stats.items() if not valores[4]]
+    pilas: Dict[str, int] = {}
+
+    def recorrer(clave: Clave, fraccion: float, camino: List[str], en_camino: set):
+        tt = stats[clave][2]
+        etiqueta = _etiqueta(clave)
+        camino.append(etiqueta)
+        en_camino.add(clave)
+        propio_us = int(tt * fraccion * 1e6)
+        if propio_us >= minimo_us:
+            pila = ";".join(camino)
+            pilas[pila] = pilas.get(pila, 0) + propio_us
+        if len(camino) < profundidad_maxima:
+            for hijo, ct_arista in llamados.get(clave, []):
+                if hijo in en_camino or hijo not in stats:
+                    continue
+                ct_hijo = stats[hijo][3]
+                if ct_hijo <= 0:
+                    continue
+                fraccion_hijo = fraccion * (ct_arista / ct_hijo)
+                if fraccion_hijo * ct_hijo * 1e6 >= minimo_us:
+                    recorrer(hijo, fraccion_hijo, camino, en_camino)
+        camino.pop()
+        en_camino.discard(clave)
+
+    for raiz in raices:
+        recorrer(raiz, 1.0, [], set())
+    return pilas
+
+
+def activar(mapa: Dict[str, Any], salida: Optional[str] = None, limite: int = 20) -> PerfilCastella:
+    """
+    Activa el perfilado para el resto del proceso (usado por los binarios generados).
+
+    Al terminar el programa (incluido `sys.exit`) se imprime el reporte por stderr
+    y, si se indicó `salida`, se escriben `<salida>.prof` y `<salida>.folded`.
+
+    Args:
+        mapa: Mapa de fuente generado por el compilador (`MapaFuente.a_dict()`).
+        salida: Prefijo de los archivos de exportación (None = sólo reporte).
+        limite: Número de puntos calientes a mostrar.
+    """
+    perfil = PerfilCastella(mapa)
+
+    def finalizar():
+        perfil.detener()
+        escribir_resultados(perfil, salida, limite)
+
+    atexit.register(finalizar)
+    perfil.iniciar()
+    return perfil
+
+
+def escribir_resultados(perfil: PerfilCastella, salida: Optional[str], limite: int = 20):
+    """
+    Imprime el reporte por stderr y exporta los archivos si se indicó un prefijo.
+    """
+    print("\n--- Perfil de ejecución (ubicaciones Castella) ---", file=sys.stderr)
+    print(perfil.reporte(limite), file=sys.stderr)
+    if salida:
+        perfil.exportar_pstats(salida + ".prof")
+        perfil.exportar_flamegraph(salida + ".folded")
+        print(f"Perfil exportado a '{salida}.prof' (pstats) y '{salida}.folded' (flamegraph).", file=sys.stderr)
@@ -0,0 +1,149 @@
+# castella_runtime/rapido.py
+
+"""
+Compilación JIT con Numba de las funciones Castella marcadas con `@rapido`.
+
+El código generado decora las funciones numéricas con `rapido` (explícitamente con
+`@rapido` o con la opción `--rapido` del compilador). La primera llamada compila la
+función con `numba.njit` y guarda el resultado en la caché de disco de Numba, de
+modo que las ejecuciones siguientes del mismo programa no vuelven a compilar.
+
+Si Numba no está instalado, o si rechaza la función (tipos no soportados, objetos
+de Python, etc.), la función se ejecuta como Python normal y se avisa una sola vez
+por stderr. Numba no comprueba los límites de los índices por defecto: un acceso
+fuera de rango en una función compilada no lanza IndexError.
+"""
+
+import functools
+import sys
+import threading
+from typing import Any, Callable, Optional
+
+# Módulo numba una vez importado; False si no está disponible.
+_numba: Any = None
+_cerrojo = threading.Lock()
+
+
+def _avisar(mensaje: str):
+    print(f"[castella rapido] {mensaje}", file=sys.stderr)
+
+
+def _cargar_numba():
+    """
+    Importa Numba la primera vez que se necesita (importarlo cuesta cerca de un segundo).
+
+    Returns:
+        El módulo numba, o None si no está instalado.
+    """
+    global _numba
+    if _numba is None:
+        try:
+            import numba
+            _registrar_tipo(numba)
+            _numba = numba
+        except ImportError:
+            _numba = False
+            _avisar("numba no está instalado: las funciones @rapido se ejecutan como Python normal.")
+    return _numba or None
+
+
+def _registrar_tipo(numba):
+    """
+    Enseña a Numba a tratar una `FuncionRapida` como su función compilada, para que
+    una función `@rapido` pueda llamar a otra sin salir del código compilado.
+    """
+    @numba.extending.typeof_impl.register(FuncionRapida)
+    def _tipo_funcion_rapida(valor, contexto):
+        compilada = valor._preparar()
+        if compilada is None:
+            return None # Numba la rechazará y la función que llama pasará a Python.
+        return numba.extending.typeof_impl(compilada, contexto)
+
+
+class FuncionRapida:
+    """
+    Envoltorio de una función `@rapido`: ejecuta la versión compilada por Numba
+    o, si no es posible, la función Python original.
+
+    Attributes:
+        python: La función Python original.
+        motivo_python: Por qué se ejecuta como Python (None mientras se use Numba).
+    """
+
+    def __init__(self, funcion: Callable, cache: bool = True):
+        functools.update_wrapper(self, funcion)
+        self.python = funcion
+        self.cache = cache
+        self.motivo_python: Optional[str] = None
+        self._compilada = None # Dispatcher de Numba (compila cada firma en su primera llamada).
+
+    def _preparar(self):
+        """
+        Crea el dispatcher de Numba la primera vez.
+
+        Returns:
+            El dispatcher, o None si la función debe ejecutarse como Python.
+        """
+        if self._compilada is not None or self.motivo_python is not None:
+            return self._compilada
+        with _cerrojo:
+            if self._compilada is None and self.motivo_python is None:
+                numba = _cargar_numba()
+                if numba is None:
+                    self.motivo_python = "numba no está instalado"
+                    return None
+                try:
+                    self._compilada = numba.njit(cache=self.cache)(self.python)
+                except RuntimeError:
+                    # Sin archivo fuente en disco (p. ej. `--ejecutar` o un binario) no hay
+                    # dónde guardar la caché: se compila igual, sólo en memoria.
+                    self._compilada = numba.njit(self.python)
+        return self._compilada
+
+    def _pasar_a_python(self, error: Exception):
+        # La primera línea de los errores de Numba sólo nombra la etapa que falló.
+        lineas = [l.strip() for l in str(error).splitlines() if l.strip() and not l.startswith("Failed in")]
+        self.motivo_python = f"{type(error).__name__}: {lineas[0]}" if lineas else type(error).__name__
+        self._compilada = None
+        _avisar(f"Numba rechazó '{self.__qualname__}'; se ejecuta como Python normal ({self.motivo_python}).")
+
+    def __call__(self, *args, **kwargs):
+        compilada = self._preparar()
+        if compilada is None:
+            return self.python(*args, **kwargs)
+        try:
+            return compilada(*args, **kwargs)
+        except _numba.core.errors.NumbaError as e:
+            # Los errores de Numba ocurren al compilar, antes de ejecutar el cuerpo:
+            # repetir la llamada en Python no duplica efectos.
+            self._pasar_a_python(e)
+            return self.python(*args, **kwargs)
+
+    def __get__(self, instancia, propietario=None):
+        # Como las funciones normales, se enlaza al usarse como atributo de una instancia.
+        if instancia is None:
+            return self
+        return functools.partial(self, instancia)
+
+    def __repr__(self):
+        estado = "python" if self.motivo_python else "numba"
+        return f"<funcion rapida {self.__qualname__} ({estado})>"
+
+
+def rapido(funcion: Optional[Callable] = None, *, cache: bool = True):
+    """
+    Decorador `@rapido`: compila la función con `numba.njit` en su primera llamada.
+
+    Se puede usar como `@rapido` o con opciones, `@rapido(cache=falso)`.
+
+    Args:
+        funcion: La función a compilar.
+        cache: Si es True, Numba guarda el código compilado en disco (junto al
+               archivo fuente, o en NUMBA_CACHE_DIR) y lo reutiliza entre ejecuciones.
+
+    Returns:
+        Una `FuncionRapida` (o un decorador, si se llamó sin función).
+    """
+    if funcion is None:
+        return lambda f: FuncionRapida(f, cache=cache)
+    return FuncionRapida(funcion, cache=cache)
@@ -0,0 +1,282 @@
+# castella_runtime/salida.py
+
+"""
+`imprimir` con salida estándar en búfer, para programas que imprimen mucho (`--imprimir`).
+
+`imprimir(...)` se traduce a `print(...)`, que hace una escritura por valor, otra por
+cada separador y otra por el final de línea, y con la salida en un terminal (o sin
+búfer, `python -u`) vacía en cada línea. Con `--imprimir[=modo]`, el compilador
+antepone al programa:
+
+    import castella_runtime.salida as _castella_salida
+    print = _castella_salida.activar(modo="bloque")
+
+`activar` sustituye `sys.stdout` por una `SalidaBuferizada` (así `input()`, las
+bibliotecas y `sys.stdout.write` siguen el mismo orden) y devuelve `imprimir`, que
+da formato a todos los valores de una llamada de una vez y hace una sola escritura.
+El búfer se vacía según el modo:
+
+  * `linea`: al final de cada línea (como un terminal, con menos escrituras).
+  * `bloque`: cuando acumula `tamano` caracteres.
+  * `tiempo`: cuando pasan `intervalo` segundos desde el último vaciado (también si el
+    programa deja de imprimir: un hilo vigila el búfer).
+
+Siempre se vacía al terminar el programa, antes de mostrar una excepción no
+capturada, antes de `input()` y antes de crear procesos con `fork` (los hijos no
+heredan lo pendiente, así que no se duplica). `imprimir_lineas` escribe muchas filas
+con una sola operación de formato.
+"""
+
+import atexit
+import builtins
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional
+
+MODOS = ("linea", "bloque", "tiempo")
+
+# Caracteres acumulados antes de vaciar en modo "bloque".
+TAMANO_POR_DEFECTO = 64 * 1024
+
+# Segundos entre vaciados en modo "tiempo".
+INTERVALO_POR_DEFECTO = 0.1
+
+# Filas que `imprimir_lineas` formatea juntas antes de cada escritura.
+FILAS_POR_ESCRITURA = 4096
+
+_activa: Optional["SalidaBuferizada"] = None
+_excepthook_original = None
+
+
+class SalidaBuferizada:
+    """
+    Sustituto de `sys.stdout` que acumula el texto y lo escribe en `destino` según el modo.
+    """
+
+    def __init__(self, destino, modo: str = "bloque", tamano: int = TAMANO_POR_DEFECTO,
+                 intervalo: float = INTERVALO_POR_DEFECTO):
+        """
+        Args:
+            destino: Flujo de texto real (el `sys.stdout` original).
+            modo: Uno de MODOS.
+            tamano: Caracteres acumulados que provocan un vaciado (modo "bloque").
+            intervalo: Segundos entre vaciados (modo "tiempo").
+
+        Raises:
+            ValueError: Si el modo, el tamaño o el intervalo no son válidos.
+        """
+        if modo not in MODOS:
+            raise ValueError(f"Modo de `imprimir` no válido: {modo!r}. Opciones: {', '.join(MODOS)}")
+        if tamano < 1 or intervalo <= 0:
+            raise ValueError("El tamaño y el intervalo del búfer de `imprimir` deben ser positivos.")
+        self.destino = destino
+        self.modo = modo
+        self.tamano = tamano
+        self.intervalo = intervalo
+        self._partes = []
+        self._pendiente = 0
+        self._ultimo_vaciado = time.monotonic()
+        self._cerrojo = threading.RLock()
+        self._parar = threading.Event()
+        self._vigilante = None
+        if modo == "tiempo":
+            self._vigilante = threading.Thread(target=self._vigilar, name="castella-salida", daemon=True)
+            self._vigilante.start()
+
+    def write(self, texto: str) -> int:
+        if not isinstance(texto, str):
+            raise TypeError(f"write() espera str, no {type(texto).__name__}")
+        with self._cerrojo:
+            self._partes.append(texto)
+            self._pendiente += len(texto)
+            if self.modo == "linea":
+                if "\n" in texto:
+                    self._vaciar()
+            elif self.modo == "bloque":
+                if self._pendiente >= self.tamano:
+                    self._vaciar()
+            elif time.monotonic() - self._ultimo_vaciado >= self.intervalo:
+                self._vaciar()
+        return len(texto)
+
+    def writelines(self, lineas: Iterable[str]):
+        self.write("".join(lineas))
+
+    def flush(self):
+        with self._cerrojo:
+            self._vaciar()
+
+    def _vaciar(self):
+        # Llamar con el cerrojo tomado.
+        if self._partes:
+            texto = "".join(self._partes)
+            self._partes.clear()
+            self._pendiente = 0
+            self.destino.write(texto)
+        self.destino.flush()
+        self._ultimo_vaciado = time.monotonic()
+
+    def _vigilar(self):
+        """
+        Hilo del modo "tiempo": vacía lo pendiente aunque el programa deje de imprimir.
+        """
+        while not self._parar.wait(self.intervalo):
+            if self._partes and time.monotonic() - self._ultimo_vaciado >= self.intervalo:
+                try:
+                    self.flush()
+                except (OSError, ValueError):
+                    return # Salida cerrada.
+
+    def descartar_pendiente(self):
+        """
+        Olvida lo pendiente sin escribirlo (proceso hijo tras `fork`: ya lo escribirá el padre).
+        """
+        self._cerrojo = threading.RLock() # Otro hilo del padre podía tenerlo tomado al bifurcar.
+        self._partes = []
+        self._pendiente = 0
+
+    def detener(self):
+        """
+        Vacía el búfer y detiene el hilo del modo "tiempo".
+        """
+        self._parar.set()
+        self.flush()
+
+    @property
+    def buffer(self):
+        # Quien escribe bytes directamente en `sys.stdout.buffer` no debe adelantarse al texto pendiente.
+        self.flush()
+        return self.destino.buffer
+
+    def writable(self) -> bool:
+        return True
+
+    def __getattr__(self, nombre: str) -> Any:
+        # encoding, errors, fileno, isatty, ... del flujo real.
+        return getattr(self.destino, nombre)
+
+
+def imprimir(*valores: Any, sep: Optional[str] = " ", end: Optional[str] = "\n", file=None, flush: bool = False):
+    """
+    Igual que `print`, pero da formato a la línea completa y hace una sola escritura.
+    """
+    if file is not None and file is not sys.stdout:
+        builtins.print(*valores, sep=sep, end=end, file=file, flush=flush)
+        return
+    salida = sys.stdout
+    if salida is None:
+        return
+    if sep is None:
+        sep = " "
+    if end is None:
+        end = "\n"
+    if len(valores) == 1:
+        salida.write(str(valores[0]) + end)
+    else:
+        salida.write(sep.join(map(str, valores)) + end)
+    if flush:
+        salida.flush()
+
+
+def imprimir_lineas(filas: Iterable[Any], sep: str = " ", end: str = "\n", file=None):
+    """
+    Imprime una fila por línea (los valores de cada fila separados por `sep`) con pocas escrituras.
+
+    Args:
+        filas: Filas a imprimir: secuencias de valores (listas, tuplas, filas de una
+               `Matriz`...) o valores sueltos.
+        sep: Separador entre los valores de una fila.
+        end: Final de cada línea.
+        file: Flujo de salida (por defecto, `sys.stdout`).
+    """
+    salida = file if file is not None else sys.stdout
+    partes = []
+    for fila in filas:
+        if isinstance(fila, (str, bytes)) or not hasattr(fila, "__iter__"):
+            partes.append(str(fila))
+        else:
+            partes.append(sep.join(map(str, fila)))
+        if len(partes) >= FILAS_POR_ESCRITURA:
+            salida.write(end.join(partes) + end)
+            partes.clear()
+    if partes:
+        salida.write(end.join(partes) + end)
+
+
+def vaciar():
+    """
+    Escribe lo pendiente de la salida en búfer (si está activa).
+    """
+    if _activa is not None:
+        try:
+            _activa.flush()
+        except (OSError, ValueError):
+            pass # La salida real ya está cerrada (p. ej. una tubería rota).
+
+
+def _excepthook(tipo, valor, rastro):
+    # La salida pendiente va antes que el traceback (que se escribe en stderr).
+    vaciar()
+    (_excepthook_original or sys.__excepthook__)(tipo, valor, rastro)
+
+
+def _antes_de_bifurcar():
+    vaciar()
+
+
+def _tras_bifurcar_hijo():
+    if _activa is not None:
+        _activa.descartar_pendiente()
+
+
+def activar(modo: str = "bloque", tamano: int = TAMANO_POR_DEFECTO,
+            intervalo: float = INTERVALO_POR_DEFECTO) -> Callable[..., None]:
+    """
+    Pone `sys.stdout` en búfer y devuelve `imprimir`.
+
+    Llamarla de nuevo cambia la configuración (tras vaciar lo pendiente).
+
+    Args:
+        modo: Cuándo se vacía el búfer: "linea", "bloque" o "tiempo".
+        tamano: Caracteres acumulados que provocan un vaciado (modo "bloque").
+        intervalo: Segundos entre vaciados (modo "tiempo").
+
+    Returns:
+        La función `imprimir`, para sustituir a `print` en el programa.
+
+    Raises:
+        ValueError: Si el modo, el tamaño o el intervalo no son válidos.
+    """
+    global _activa, _excepthook_original
+    destino = sys.stdout
+    if _activa is not None:
+        _activa.detener()
+        destino = _activa.destino
+    elif _excepthook_original is None:
+        # Primera activación del proceso.
+        _excepthook_original = sys.excepthook
+        sys.excepthook = _excepthook
+        atexit.register(vaciar)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(before=_antes_de_bifurcar, after_in_child=_tras_bifurcar_hijo)
+    _activa = SalidaBuferizada(destino, modo, tamano, intervalo)
+    sys.stdout = _activa
+    return imprimir
+
+
+def desactivar():
+    """
+    Vacía el búfer y devuelve `sys.stdout` al flujo original.
+    """
+    global _activa
+    if _activa is None:
+        return
+    salida, _activa = _activa, None
+    try:
+        salida.detener()
+    except (OSError, ValueError):
+        pass
+    if sys.stdout is salida:
+        sys.stdout = salida.destino
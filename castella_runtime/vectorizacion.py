@@ -0,0 +1,61 @@
+# castella_runtime/vectorizacion.py
+
+"""
+Comprobaciones en tiempo de ejecución para los bucles vectorizados con -O2.
+
+El compilador (`castella_vectorizador`) sólo demuestra estáticamente que un bucle
+`para i en ...` es elemento a elemento. Que los nombres `Matriz` sean de verdad
+arreglos de NumPy, que los índices estén dentro de los límites o que dos arreglos
+no compartan memoria sólo se puede saber al ejecutar: si alguna condición falla,
+el código generado ejecuta el bucle original.
+"""
+
+import numbers
+from typing import Any, Optional, Sequence
+
+
+def tramo_vectorizable(rango: Any, arreglos: Sequence[Any], escritos: Sequence[Any],
+                       escalares: Sequence[Any], una_dimension: bool) -> Optional[slice]:
+    """
+    Decide si un bucle elemento a elemento puede ejecutarse como una sola operación de NumPy.
+
+    Args:
+        rango: El iterable del bucle ya evaluado (debe ser un `range` no vacío y creciente).
+        arreglos: Todos los arreglos indexados con la variable del bucle.
+        escritos: Los arreglos asignados en el cuerpo (subconjunto de `arreglos`).
+        escalares: Los demás nombres leídos en el cuerpo (deben ser números).
+        una_dimension: Si la variable del bucle aparece sola en una expresión (se
+                       reemplaza por `np.arange`, que sólo es equivalente en 1-D).
+
+    Returns:
+        El `slice` que sustituye a la variable del bucle, o None si hay que ejecutar
+        el bucle original.
+    """
+    # Un rango vacío no ejecuta el cuerpo: el bucle original tampoco evalúa nada.
+    if type(rango) is not range or not rango or rango.step <= 0:
+        return None
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+
+    ultimo = rango[-1]
+    for arreglo in arreglos:
+        if not isinstance(arreglo, np.ndarray) or arreglo.ndim == 0 or arreglo.dtype == object:
+            return None
+        if una_dimension and arreglo.ndim != 1:
+            return None
+        # Índices negativos o fuera de rango: el bucle original indexa (o falla) de otra forma.
+        if rango.start < 0 or ultimo >= len(arreglo):
+            return None
+    for escalar in escalares:
+        if not isinstance(escalar, numbers.Number):
+            return None
+    for escrito in escritos:
+        if not escrito.flags.writeable:
+            return None
+        # Vistas solapadas (p. ej. `b = a[1:]`) crean dependencias entre iteraciones.
+        for otro in arreglos:
+            if otro is not escrito and np.may_share_memory(escrito, otro):
+                return None
+    return slice(rango.start, rango.stop, rango.step)
@@ -0,0 +1,100 @@
+# castella_salida.py
+
+"""
+Soporte del compilador para `--imprimir[=modo[:valor]]` (salida de `imprimir` en búfer).
+
+Antepone al Python generado las líneas que activan `castella_runtime.salida`, que
+sustituye `print` (la traducción de `imprimir`) por una versión que escribe cada
+línea de una vez en una salida estándar con búfer:
+
+  * `--imprimir=linea`: vacía al final de cada línea.
+  * `--imprimir=bloque[:KiB]`: vacía cada KiB de texto (por defecto 64). Es el modo de `--imprimir`.
+  * `--imprimir=tiempo[:segundos]`: vacía cada tantos segundos (por defecto 0.1).
+"""
+
+import sys
+from typing import Any, Dict, Optional
+
+try:
+    from .castella_runtime.salida import MODOS, TAMANO_POR_DEFECTO, INTERVALO_POR_DEFECTO
+except ImportError as e:
+    print("\nError de Importación en castella_salida:")
+    print("No se pudo importar 'castella_runtime.salida'.")
+    print(f"Detalle: {e}")
+    sys.exit(1)
+
+MODO_POR_DEFECTO = "bloque"
+
+# Líneas que `instrumentar_salida` añade al principio del código.
+LINEAS_INSERTADAS = 2
+
+
+def configuracion_salida(valor: Optional[str]) -> Dict[str, Any]:
+    """
+    Interpreta el valor de `--imprimir[=modo[:valor]]`.
+
+    Args:
+        valor: Lo que sigue a `--imprimir=` (None si la opción no lleva valor).
+
+    Returns:
+        Los argumentos de `castella_runtime.salida.activar` (`modo` y, si se indicó, `tamano` o `intervalo`).
+
+    Raises:
+        ValueError: Si el modo o su valor no son válidos.
+    """
+    modo, _, parametro = (valor or MODO_POR_DEFECTO).partition(":")
+    if modo not in MODOS:
+        raise ValueError(f"Modo de salida no válido: --imprimir={valor}. Opciones: {', '.join(MODOS)}")
+    configuracion: Dict[str, Any] = {"modo": modo}
+    if not parametro:
+        return configuracion
+    if modo == "bloque":
+        if not parametro.isdigit() or int(parametro) < 1:
+            raise ValueError(f"Tamaño de bloque no válido: --imprimir={valor} (KiB, entero positivo)")
+        configuracion["tamano"] = int(parametro) * 1024
+    elif modo == "tiempo":
+        try:
+            intervalo = float(parametro)
+        except ValueError:
+            intervalo = 0.0
+        if not intervalo > 0:
+            raise ValueError(f"Intervalo no válido: --imprimir={valor} (segundos, número positivo)")
+        configuracion["intervalo"] = intervalo
+    else:
+        raise ValueError(f"El modo 'linea' no admite valor: --imprimir={valor}")
+    return configuracion
+
+
+def instrumentar_salida(codigo_python: str, configuracion: Dict[str, Any]) -> str:
+    """
+    Antepone al Python generado las líneas que activan la salida en búfer.
+
+    Las líneas van tras la de codificación (si la hay); el mapa de fuente del código
+    debe desplazarse LINEAS_INSERTADAS líneas.
+
+    Args:
+        codigo_python: Código Python generado.
+        configuracion: Resultado de `configuracion_salida`.
+
+    Returns:
+        El código Python instrumentado.
+    """
+    argumentos = ", ".join(f"{clave}={valor!r}" for clave, valor in configuracion.items())
+    prologo = ("import castella_runtime.salida as _castella_salida\n"
+               f"print = _castella_salida.activar({argumentos})\n")
+    lineas = codigo_python.splitlines(keepends=True)
+    posicion = 1 if lineas and lineas[0].startswith("# -*- coding") else 0
+    lineas.insert(posicion, prologo)
+    return "".join(lineas)
+
+
+def describir(configuracion: Dict[str, Any]) -> str:
+    """
+    Texto breve de la configuración para los mensajes del compilador.
+    """
+    modo = configuracion["modo"]
+    if modo == "bloque":
+        return f"bloque de {configuracion.get('tamano', TAMANO_POR_DEFECTO) // 1024} KiB"
+    if modo == "tiempo":
+        return f"cada {configuracion.get('intervalo', INTERVALO_POR_DEFECTO)} s"
+    return "por línea"
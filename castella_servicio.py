@@ -0,0 +1,371 @@
+# castella_servicio.py
+
+"""
+Servicio de ejecución de trabajos Castella con un pool de procesos ya arrancados.
+
+Un trabajo Castella corto paga, en un proceso nuevo, el arranque del intérprete y
+las importaciones del preámbulo del código generado (NumPy, Matplotlib,
+TensorFlow si está instalado), que a menudo cuestan más que el propio trabajo.
+`PoolCastella` mantiene varios procesos trabajadores que ya importaron esos
+módulos y le entrega cada trabajo a uno libre, que lo traduce (con la caché de
+`castella_embebido`) y lo ejecuta en un espacio de nombres nuevo:
+
+    with PoolCastella(trabajadores=4, tiempo_maximo=10) as pool:
+        resultado = pool.ejecutar('imprimir("hola");')
+        resultado.salida          # "hola\\n"
+        pool.metricas()           # trabajos por segundo, latencias, reciclajes...
+
+Cada trabajador se recicla (se reemplaza por uno nuevo) tras `max_trabajos`
+trabajos, si agota el tiempo máximo (se le mata) o si muere. El estado global de
+los módulos importados (semillas de `random`, figuras abiertas...) puede pasar de
+un trabajo al siguiente dentro del mismo trabajador; las figuras de Matplotlib se
+cierran después de cada trabajo.
+"""
+
+import collections
+import contextlib
+import io
+import multiprocessing
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from .castella_embebido import compilar, espacio_base
+    from .castella_ejecucion import asegurar_runtime_importable
+except ImportError as e:
+    print("\nError de Importación en castella_servicio:")
+    print("No se pudieron importar 'castella_embebido' o 'castella_ejecucion'.")
+    print(f"Detalle: {e}")
+    sys.exit(1)
+
+# Módulos pesados que importa el preámbulo del código generado (ver CastellaTransformer.start).
+MODULOS_PREAMBULO = ("numpy", "matplotlib.pyplot", "tensorflow")
+
+# Latencias recientes que se conservan para los percentiles de `metricas`.
+MAX_LATENCIAS = 10000
+
+# Segundos que se espera a que un trabajador termine de importar los módulos al arrancar.
+TIEMPO_ARRANQUE = 120
+
+
+class ResultadoTrabajo:
+    """
+    Resultado de un trabajo ejecutado por el pool.
+
+    Attributes:
+        codigo_salida: 0 si el programa terminó normalmente; el código de `sys.exit`;
+                       1 si lanzó una excepción o no se pudo traducir; None si se agotó el tiempo.
+        salida: Lo que el programa escribió en stdout.
+        errores: Lo que escribió en stderr (incluido el traceback, si falló).
+        duracion: Segundos desde que se entregó el trabajo hasta tener el resultado.
+        pid: Proceso trabajador que lo ejecutó.
+        tiempo_agotado: True si el trabajo superó el tiempo máximo y se mató al trabajador.
+    """
+
+    def __init__(self, codigo_salida: Optional[int], salida: str = "", errores: str = "",
+                 duracion: float = 0.0, pid: Optional[int] = None, tiempo_agotado: bool = False):
+        self.codigo_salida = codigo_salida
+        self.salida = salida
+        self.errores = errores
+        self.duracion = duracion
+        self.pid = pid
+        self.tiempo_agotado = tiempo_agotado
+
+    @property
+    def exito(self) -> bool:
+        return self.codigo_salida == 0
+
+    def __repr__(self) -> str:
+        estado = "tiempo agotado" if self.tiempo_agotado else f"código {self.codigo_salida}"
+        return f"<ResultadoTrabajo {estado}, {self.duracion * 1000:.1f} ms, pid {self.pid}>"
+
+
+def _precargar(modulos: Iterable[str]):
+    """
+    Importa los módulos indicados (los que no están instalados se omiten).
+    """
+    # Un trabajador no tiene ventana: Matplotlib debe usar un backend sin interfaz.
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    for modulo in modulos:
+        try:
+            __import__(modulo)
+        except ImportError:
+            pass
+    if "matplotlib" in sys.modules:
+        sys.modules["matplotlib"].use("Agg")
+
+
+def _ejecutar_trabajo(codigo_castella: str, nivel_optimizacion: int, rapido: bool) -> Dict[str, Any]:
+    """
+    Traduce (o toma de la caché) y ejecuta un trabajo en un espacio de nombres nuevo.
+    """
+    salida, errores = io.StringIO(), io.StringIO()
+    codigo_salida = 0
+    with contextlib.redirect_stdout(salida), contextlib.redirect_stderr(errores):
+        try:
+            codigo = compilar(codigo_castella, "exec", nivel_optimizacion, rapido)
+            espacio = {"__name__": "__main__", "__builtins__": __builtins__}
+            espacio.update(espacio_base())
+            exec(codigo, espacio)
+        except SystemExit as e:
+            codigo_salida = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except BaseException:
+            traceback.print_exc()
+            codigo_salida = 1
+    if "matplotlib.pyplot" in sys.modules:
+        sys.modules["matplotlib.pyplot"].close("all")
+    return {"codigo_salida": codigo_salida, "salida": salida.getvalue(), "errores": errores.getvalue()}
+
+
+def _bucle_trabajador(conexion, precargar: List[str], max_trabajos: int, nivel_optimizacion: int, rapido: bool):
+    """
+    Proceso trabajador: importa los módulos pesados, avisa que está listo y ejecuta
+    trabajos hasta recibir None o completar `max_trabajos` (0 = sin límite).
+    """
+    asegurar_runtime_importable()
+    _precargar(precargar)
+    conexion.send(os.getpid())
+    completados = 0
+    while not max_trabajos or completados < max_trabajos:
+        try:
+            codigo_castella = conexion.recv()
+        except EOFError:
+            break
+        if codigo_castella is None:
+            break
+        conexion.send(_ejecutar_trabajo(codigo_castella, nivel_optimizacion, rapido))
+        completados += 1
+    conexion.close()
+
+
+class _Trabajador:
+    """
+    Un proceso trabajador y su conexión.
+    """
+
+    def __init__(self, contexto, precargar: List[str], max_trabajos: int, nivel_optimizacion: int, rapido: bool):
+        self.conexion, extremo = contexto.Pipe()
+        self.proceso = contexto.Process(target=_bucle_trabajador, daemon=True,
+                                        args=(extremo, precargar, max_trabajos, nivel_optimizacion, rapido))
+        self.proceso.start()
+        extremo.close()
+        self.max_trabajos = max_trabajos
+        self.trabajos = 0
+        self.listo = False
+
+    def esperar_listo(self):
+        """
+        Espera el aviso de que el trabajador terminó de importar los módulos.
+
+        Raises:
+            RuntimeError: Si el trabajador murió o no avisó a tiempo.
+        """
+        if self.listo:
+            return
+        if not self.conexion.poll(TIEMPO_ARRANQUE):
+            raise RuntimeError(f"El trabajador no arrancó en {TIEMPO_ARRANQUE} s.")
+        try:
+            self.conexion.recv()
+        except EOFError:
+            raise RuntimeError(f"El trabajador terminó al arrancar (código {self.proceso.exitcode}).")
+        self.listo = True
+
+    def procesar(self, codigo_castella: str, tiempo_maximo: Optional[float]) -> ResultadoTrabajo:
+        """
+        Entrega un trabajo y espera su resultado (mata al trabajador si se agota el tiempo).
+        """
+        inicio = time.perf_counter()
+        try:
+            self.esperar_listo()
+            self.conexion.send(codigo_castella)
+            self.trabajos += 1
+            if not self.conexion.poll(tiempo_maximo):
+                self.matar()
+                return ResultadoTrabajo(None, errores=f"Tiempo agotado ({tiempo_maximo} s): el trabajo se canceló.",
+                                        duracion=time.perf_counter() - inicio, pid=self.proceso.pid,
+                                        tiempo_agotado=True)
+            datos = self.conexion.recv()
+        except (EOFError, OSError, RuntimeError) as e:
+            self.matar()
+            return ResultadoTrabajo(1, errores=f"El trabajador terminó inesperadamente: {e or type(e).__name__}",
+                                    duracion=time.perf_counter() - inicio, pid=self.proceso.pid)
+        return ResultadoTrabajo(datos["codigo_salida"], datos["salida"], datos["errores"],
+                                time.perf_counter() - inicio, self.proceso.pid)
+
+    @property
+    def agotado(self) -> bool:
+        """True si el trabajador ya no acepta trabajos (murió o completó `max_trabajos`)."""
+        return not self.proceso.is_alive() or (self.max_trabajos and self.trabajos >= self.max_trabajos)
+
+    def matar(self):
+        self.proceso.kill()
+        self.proceso.join()
+        self.conexion.close()
+
+    def cerrar(self):
+        """
+        Pide al trabajador que termine y lo espera (lo mata si no responde).
+        """
+        if self.proceso.is_alive():
+            with contextlib.suppress(OSError):
+                self.conexion.send(None)
+            self.proceso.join(5)
+        if self.proceso.is_alive():
+            self.proceso.kill()
+            self.proceso.join()
+        self.conexion.close()
+
+
+class PoolCastella:
+    """
+    Pool de procesos trabajadores para ejecutar trabajos Castella cortos.
+
+    Es seguro llamar a `ejecutar` desde varios hilos a la vez: cada llamada espera a
+    que haya un trabajador libre. `mapear` reparte una lista de trabajos entre todos.
+    """
+
+    def __init__(self, trabajadores: Optional[int] = None, max_trabajos: int = 100,
+                 tiempo_maximo: Optional[float] = 60.0, precargar: Iterable[str] = MODULOS_PREAMBULO,
+                 nivel_optimizacion: int = 0, rapido: bool = False):
+        """
+        Args:
+            trabajadores: Número de procesos (por defecto, uno por CPU).
+            max_trabajos: Trabajos tras los que se recicla un trabajador (0 = nunca).
+            tiempo_maximo: Segundos por trabajo antes de cancelarlo (None = sin límite).
+            precargar: Módulos que cada trabajador importa al arrancar.
+            nivel_optimizacion: Nivel de optimización de la traducción.
+            rapido: Compila con Numba las funciones numéricas.
+
+        Raises:
+            ValueError: Si el número de trabajadores o `max_trabajos` no es válido.
+        """
+        self.num_trabajadores = trabajadores or os.cpu_count() or 1
+        if self.num_trabajadores < 1:
+            raise ValueError(f"El número de trabajadores debe ser al menos 1: {trabajadores}")
+        if max_trabajos < 0:
+            raise ValueError(f"max_trabajos no puede ser negativo: {max_trabajos}")
+        self.max_trabajos = max_trabajos
+        self.tiempo_maximo = tiempo_maximo
+        self._argumentos = (list(precargar), max_trabajos, nivel_optimizacion, rapido)
+
+        # forkserver: los trabajadores nacen de un proceso limpio (sin los hilos del
+        # servicio) que ya importó los módulos pesados, así reciclar uno es barato.
+        metodos = multiprocessing.get_all_start_methods()
+        self._contexto = multiprocessing.get_context("forkserver" if "forkserver" in metodos else "spawn")
+        if "forkserver" in metodos:
+            self._contexto.set_forkserver_preload([__name__] + list(precargar))
+
+        self._cerrojo = threading.Lock()
+        self._libres: "queue.Queue[_Trabajador]" = queue.Queue()
+        self._cerrado = False
+        self._latencias = collections.deque(maxlen=MAX_LATENCIAS)
+        self._contadores = collections.Counter()
+        self._inicio = time.perf_counter()
+
+        trabajadores_iniciales = [self._nuevo_trabajador() for _ in range(self.num_trabajadores)]
+        for trabajador in trabajadores_iniciales:
+            trabajador.esperar_listo()
+            self._libres.put(trabajador)
+
+    def _nuevo_trabajador(self) -> _Trabajador:
+        with self._cerrojo:
+            self._contadores["trabajadores_iniciados"] += 1
+        return _Trabajador(self._contexto, *self._argumentos)
+
+    def ejecutar(self, codigo_castella: str, tiempo_maximo: Optional[float] = None) -> ResultadoTrabajo:
+        """
+        Ejecuta un programa Castella en un trabajador libre y devuelve su resultado.
+
+        Args:
+            codigo_castella: Código fuente Castella.
+            tiempo_maximo: Segundos antes de cancelar el trabajo (por defecto, el del pool).
+
+        Returns:
+            Un ResultadoTrabajo (los errores del programa no se lanzan: quedan en el resultado).
+
+        Raises:
+            RuntimeError: Si el pool está cerrado.
+        """
+        if self._cerrado:
+            raise RuntimeError("El pool está cerrado.")
+        tiempo_maximo = self.tiempo_maximo if tiempo_maximo is None else tiempo_maximo
+        trabajador = self._libres.get()
+        try:
+            resultado = trabajador.procesar(codigo_castella, tiempo_maximo)
+        finally:
+            if trabajador.agotado:
+                trabajador.cerrar()
+                with self._cerrojo:
+                    self._contadores["reciclados"] += 1
+                # El reemplazo arranca ahora; el trabajo que lo reciba esperará a que esté listo.
+                trabajador = self._nuevo_trabajador()
+            self._libres.put(trabajador)
+
+        with self._cerrojo:
+            self._latencias.append(resultado.duracion)
+            self._contadores["completados"] += 1
+            if resultado.tiempo_agotado:
+                self._contadores["tiempo_agotado"] += 1
+            elif not resultado.exito:
+                self._contadores["fallidos"] += 1
+        return resultado
+
+    def mapear(self, codigos: Iterable[str], tiempo_maximo: Optional[float] = None) -> List[ResultadoTrabajo]:
+        """
+        Ejecuta varios trabajos repartidos entre todos los trabajadores.
+
+        Returns:
+            Los resultados, en el mismo orden que `codigos`.
+        """
+        with ThreadPoolExecutor(max_workers=self.num_trabajadores) as ejecutor:
+            return list(ejecutor.map(lambda codigo: self.ejecutar(codigo, tiempo_maximo), codigos))
+
+    def metricas(self) -> Dict[str, Any]:
+        """
+        Métricas de rendimiento desde que se creó el pool.
+
+        Returns:
+            Trabajos completados, fallidos y con tiempo agotado, trabajadores iniciados y
+            reciclados, trabajos por segundo y latencias (media, p50, p95, en segundos).
+        """
+        with self._cerrojo:
+            latencias = sorted(self._latencias)
+            contadores = dict(self._contadores)
+        transcurrido = time.perf_counter() - self._inicio
+        completados = contadores.get("completados", 0)
+        return {
+            "trabajadores": self.num_trabajadores,
+            "completados": completados,
+            "fallidos": contadores.get("fallidos", 0),
+            "tiempo_agotado": contadores.get("tiempo_agotado", 0),
+            "trabajadores_iniciados": contadores.get("trabajadores_iniciados", 0),
+            "reciclados": contadores.get("reciclados", 0),
+            "segundos": transcurrido,
+            "trabajos_por_segundo": completados / transcurrido if transcurrido > 0 else 0.0,
+            "latencia_media": statistics.fmean(latencias) if latencias else 0.0,
+            "latencia_p50": latencias[len(latencias) // 2] if latencias else 0.0,
+            "latencia_p95": latencias[min(len(latencias) - 1, int(len(latencias) * 0.95))] if latencias else 0.0,
+        }
+
+    def cerrar(self):
+        """
+        Termina todos los trabajadores (espera a que los trabajos en curso devuelvan su trabajador).
+        """
+        if self._cerrado:
+            return
+        self._cerrado = True
+        for _ in range(self.num_trabajadores):
+            self._libres.get().cerrar()
+
+    def __enter__(self) -> "PoolCastella":
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
@@ -0,0 +1,288 @@
+# castella_traductor.py
+
+"""
+API de traducción reentrante y segura entre hilos.
+
+`castella_parser.traducir_a_python` está pensada para la línea de comandos: usa un
+parser global, imprime el código generado y los errores y relanza las
+excepciones. Este módulo ofrece la misma traducción para
+servicios que traducen desde muchos hilos a la vez:
+
+    from CastellaScript.castella_traductor import TraductorCastella
+
+    traductor = TraductorCastella()            # un parser compartido por todos los hilos
+    resultado = traductor.traducir(codigo, con_mapa=True)
+    if resultado.exito:
+        resultado.codigo_python, resultado.mapa, resultado.tiempos
+    else:
+        for diagnostico in resultado.diagnosticos:
+            print(diagnostico)
+
+No imprime nada ni modifica estado global: los errores se devuelven como
+`Diagnostico`s dentro del `ResultadoTraduccion`. El parser de Lark (LALR, sin
+transformer en línea) no guarda estado entre llamadas, así que se puede compartir;
+cada traducción usa su propio transformer. Con `parser="por_hilo"` cada hilo
+construye y reutiliza su propio parser.
+"""
+
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from lark import Lark, UnexpectedInput, Token
+from lark.exceptions import VisitError
+
+try:
+    from .castella_grammar import GRAMATICA
+    from .castella_transformer import CastellaTransformer
+    from .castella_mapa_fuente import extraer_marcas
+    from .castella_optimizador import NIVELES_OPTIMIZACION, optimizar
+    from .castella_runtime.mapa_fuente import MapaFuente
+except ImportError as e:
+    print("\nError de Importación en castella_traductor:")
+    print("No se pudieron importar los módulos de gramática, transformer u optimizador.")
+    print(f"Detalle: {e}")
+    sys.exit(1)
+
+# Modos de parser de TraductorCastella.
+MODOS_PARSER = ("compartido", "por_hilo")
+
+# Código que se genera para una entrada vacía (igual que `traducir_a_python`).
+CODIGO_VACIO = "# Código Castella vacío o solo con espacios en blanco."
+
+
+def crear_parser() -> Lark:
+    """
+    Construye un parser LALR de la gramática Castella que conserva las posiciones en el árbol.
+    """
+    return Lark(GRAMATICA, start="start", parser="lalr", propagate_positions=True)
+
+
+def normalizar_salida(codigo_python: str) -> str:
+    """
+    Elimina las líneas vacías finales y deja exactamente un salto de línea al final.
+    """
+    lineas = codigo_python.splitlines()
+    while lineas and not lineas[-1].strip():
+        lineas.pop()
+    lineas.append('')
+    return "\n".join(lineas)
+
+
+class Diagnostico:
+    """
+    Un error (o aviso) encontrado al traducir.
+
+    Attributes:
+        tipo: "sintaxis" (el parser rechazó la entrada), "no_implementado" (regla sin
+              traducción), "validacion" (error estructural o semántico detectado por el
+              transformer) o "interno" (cualquier otro error del traductor).
+        mensaje: Descripción del problema.
+        linea, columna: Posición en el código Castella (desde 1), si se conoce.
+        esperado: Tokens que el parser esperaba (sólo errores de sintaxis).
+        contexto: Fragmento del código alrededor del error (sólo errores de sintaxis).
+        gravedad: "error" o "advertencia".
+    """
+
+    def __init__(self, tipo: str, mensaje: str, linea: Optional[int] = None, columna: Optional[int] = None,
+                 esperado: Optional[List[str]] = None, contexto: str = "", gravedad: str = "error"):
+        self.tipo = tipo
+        self.mensaje = mensaje
+        self.linea = linea
+        self.columna = columna
+        self.esperado = esperado or []
+        self.contexto = contexto
+        self.gravedad = gravedad
+
+    def a_dict(self) -> Dict[str, Any]:
+        return {"tipo": self.tipo, "mensaje": self.mensaje, "linea": self.linea, "columna": self.columna,
+                "esperado": self.esperado, "contexto": self.contexto, "gravedad": self.gravedad}
+
+    def __str__(self) -> str:
+        posicion = f"línea {self.linea}, columna {self.columna}: " if self.linea is not None else ""
+        texto = f"{self.gravedad} de {self.tipo}: {posicion}{self.mensaje}"
+        if self.esperado:
+            texto += f" (se esperaba uno de: {', '.join(self.esperado)})"
+        return texto
+
+    def __repr__(self) -> str:
+        return f"<Diagnostico {self}>"
+
+
+class ResultadoTraduccion:
+    """
+    Resultado de `TraductorCastella.traducir`.
+
+    Attributes:
+        codigo_python: Código generado, o None si la traducción falló.
+        diagnosticos: Errores encontrados (vacío si la traducción tuvo éxito).
+        tiempos: Segundos de cada fase ("parseo", "optimizacion", "transformacion",
+                 "mapa" si se pidió y "total").
+        mapa: Mapa de fuente (`MapaFuente`), si se pidió con `con_mapa=True`.
+        excepcion: La excepción original si la traducción falló (ver `lanzar`).
+    """
+
+    def __init__(self, codigo_python: Optional[str], diagnosticos: List[Diagnostico], tiempos: Dict[str, float],
+                 mapa: Optional[MapaFuente] = None, excepcion: Optional[BaseException] = None):
+        self.codigo_python = codigo_python
+        self.diagnosticos = diagnosticos
+        self.tiempos = tiempos
+        self.mapa = mapa
+        self.excepcion = excepcion
+
+    @property
+    def exito(self) -> bool:
+        return self.codigo_python is not None
+
+    def lanzar(self):
+        """
+        Relanza la excepción original si la traducción falló (no hace nada si tuvo éxito).
+        """
+        if self.excepcion is not None:
+            raise self.excepcion
+
+    def __repr__(self) -> str:
+        estado = "éxito" if self.exito else f"{len(self.diagnosticos)} error(es)"
+        return f"<ResultadoTraduccion {estado}, {self.tiempos.get('total', 0.0) * 1000:.1f} ms>"
+
+
+def _diagnosticar(excepcion: Exception, codigo_castella: str) -> Diagnostico:
+    """
+    Convierte una excepción de la traducción en un Diagnostico.
+    """
+    if isinstance(excepcion, UnexpectedInput):
+        token = getattr(excepcion, "token", None)
+        mensaje = f"Token inesperado '{token}' (tipo: {token.type})" if isinstance(token, Token) else "Entrada inesperada"
+        try:
+            contexto = excepcion.get_context(codigo_castella, span=50)
+        except Exception:
+            contexto = ""
+        esperado = sorted(str(nombre) for nombre in (getattr(excepcion, "expected", None) or []))
+        return Diagnostico("sintaxis", mensaje, excepcion.line, excepcion.column, esperado, contexto)
+    if isinstance(excepcion, NotImplementedError):
+        return Diagnostico("no_implementado", str(excepcion))
+    if isinstance(excepcion, ValueError):
+        return Diagnostico("validacion", str(excepcion))
+    return Diagnostico("interno", f"{type(excepcion).__name__}: {excepcion}")
+
+
+class TraductorCastella:
+    """
+    Traductor de Castella a Python reutilizable y seguro entre hilos.
+    """
+
+    def __init__(self, parser: str = "compartido"):
+        """
+        Args:
+            parser: "compartido" (un parser para todos los hilos, construido ahora) o
+                    "por_hilo" (cada hilo construye el suyo al traducir por primera vez).
+
+        Raises:
+            ValueError: Si el modo de parser no es válido.
+        """
+        if parser not in MODOS_PARSER:
+            raise ValueError(f"Modo de parser no válido: {parser!r}. Opciones: {', '.join(MODOS_PARSER)}")
+        self.modo_parser = parser
+        self._parser = crear_parser() if parser == "compartido" else None
+        self._local = threading.local()
+
+    def _obtener_parser(self) -> Lark:
+        if self._parser is not None:
+            return self._parser
+        parser = getattr(self._local, "parser", None)
+        if parser is None:
+            parser = self._local.parser = crear_parser()
+        return parser
+
+    def traducir(self, codigo_castella: str, nivel_optimizacion: int = 0, rapido: bool = False,
+                 con_mapa: bool = False, nombre_fuente: str = "<castella>",
+                 nombre_generado: str = "<castella:generado>") -> ResultadoTraduccion:
+        """
+        Traduce código Castella a Python sin imprimir ni lanzar excepciones de traducción.
+
+        Args:
+            codigo_castella: Código fuente Castella.
+            nivel_optimizacion: Nivel de optimización (0, 1 o 2; ver castella_optimizador).
+            rapido: Compila con Numba las funciones numéricas.
+            con_mapa: Si es True, construye también el mapa de fuente.
+            nombre_fuente: Nombre del archivo Castella (se guarda en el mapa).
+            nombre_generado: Nombre del Python generado (se guarda en el mapa).
+
+        Returns:
+            Un ResultadoTraduccion con el código o los diagnósticos.
+
+        Raises:
+            ValueError: Si el nivel de optimización no es válido (error del llamador,
+                        no del código Castella).
+        """
+        if nivel_optimizacion not in NIVELES_OPTIMIZACION:
+            raise ValueError(f"Nivel de optimización no válido: {nivel_optimizacion}")
+        inicio = time.perf_counter()
+        tiempos: Dict[str, float] = {}
+
+        if not codigo_castella or not codigo_castella.strip():
+            tiempos["total"] = time.perf_counter() - inicio
+            mapa = MapaFuente.desde_codigo(nombre_fuente, nombre_generado, CODIGO_VACIO, []) if con_mapa else None
+            return ResultadoTraduccion(CODIGO_VACIO, [], tiempos, mapa)
+
+        try:
+            marca = time.perf_counter()
+            arbol = self._obtener_parser().parse(codigo_castella)
+            tiempos["parseo"] = time.perf_counter() - marca
+
+            transformer = CastellaTransformer(registrar_origen=con_mapa, rapido=rapido)
+            transformer.validar(arbol)
+
+            marca = time.perf_counter()
+            arbol = optimizar(arbol, nivel_optimizacion)
+            tiempos["optimizacion"] = time.perf_counter() - marca
+
+            marca = time.perf_counter()
+            generado = transformer.transform(arbol)
+            if not isinstance(generado, str):
+                raise TypeError(f"El transformer devolvió un tipo inesperado: {type(generado).__name__}")
+            tiempos["transformacion"] = time.perf_counter() - marca
+
+            mapa = None
+            if con_mapa:
+                marca = time.perf_counter()
+                generado, segmentos = extraer_marcas(generado)
+                codigo_python = normalizar_salida(generado)
+                mapa = MapaFuente.desde_codigo(nombre_fuente, nombre_generado, codigo_python, segmentos)
+                tiempos["mapa"] = time.perf_counter() - marca
+            else:
+                codigo_python = normalizar_salida(generado)
+        except Exception as e:
+            tiempos["total"] = time.perf_counter() - inicio
+            if isinstance(e, VisitError):
+                e = e.orig_exc # Error lanzado por una regla del transformer.
+            return ResultadoTraduccion(None, [_diagnosticar(e, codigo_castella)], tiempos, excepcion=e)
+
+        tiempos["total"] = time.perf_counter() - inicio
+        return ResultadoTraduccion(codigo_python, [], tiempos, mapa)
+
+
+# Traductor compartido de `traducir`: se construye la primera vez (bajo cerrojo) y
+# después sólo se lee.
+_traductor: Optional[TraductorCastella] = None
+_cerrojo_traductor = threading.Lock()
+
+
+def traductor_compartido() -> TraductorCastella:
+    """
+    Devuelve el TraductorCastella compartido del proceso (parser "compartido").
+    """
+    global _traductor
+    if _traductor is None:
+        with _cerrojo_traductor:
+            if _traductor is None:
+                _traductor = TraductorCastella()
+    return _traductor
+
+
+def traducir(codigo_castella: str, **opciones) -> ResultadoTraduccion:
+    """
+    Traduce con el traductor compartido (ver `TraductorCastella.traducir` para las opciones).
+    """
+    return traductor_compartido().traducir(codigo_castella, **opciones)
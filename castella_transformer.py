@@ -21,6 +21,19 @@ except ImportError:
     class tf:
         class Tensor: pass # Need a placeholder for the class used in string formatting.
 
+import ast
+import hashlib
+import re
+import sys
+
+try:
+    from .castella_mapa_fuente import marca_origen, extraer_marcas, INICIO_MARCA, FIN_MARCA
+except ImportError as e:
+    print("\nError de Importación en castella_transformer:")
+    print("No se pudo importar 'castella_mapa_fuente'.")
+    print(f"Detalle: {e}")
+    sys.exit(1)
+
 
 # Note: The necessary imports for the *generated Python code* (like math, matplotlib.pyplot, requests, tensorflow try/except)
 # are added as a preamble in the `start` method of this transformer, not imported here.
@@ -31,6 +44,192 @@ class CastellaTransformer(Transformer):
     """
     INDENT_SPACES = 4 # Define el número de espacios para la indentación en Python.
 
+    # Reglas cuyo resultado empieza una línea del código generado. Con `registrar_origen`
+    # se les antepone una marca con su línea Castella para construir el mapa de fuente.
+    REGLAS_CON_ORIGEN = frozenset(['stmt', 'func_def', 'class_def', 'class_attribute', 'decorator'])
+
+    # Funciones de castella_runtime que puede usar el código generado: nombre -> módulo.
+    # Se importan en el preámbulo (con prefijo `_castella_`) sólo si la traducción las usa.
+    NOMBRES_RUNTIME = {
+        'tramo_vectorizable': 'castella_runtime.vectorizacion',
+        'rapido': 'castella_runtime.rapido',
+        'paralelo_para': 'castella_runtime.paralelo',
+        'ejecutar_asincrono': 'castella_runtime.asincrono',
+        'memorizar': 'castella_runtime.memorizacion',
+        'cache_disco': 'castella_runtime.cache_disco',
+        'graficar': 'castella_runtime.graficos',
+        'graficar_en_vivo': 'castella_runtime.en_vivo',
+    }
+
+    # Funciones de castella_runtime que el programa llama por su nombre (`nombre(...)`).
+    FUNCIONES_RUNTIME = ('graficar_en_vivo',)
+
+    # Decoradores de Castella que son funciones de castella_runtime (`@nombre` o `@nombre(...)`).
+    DECORADORES_RUNTIME = ('rapido', 'memorizar', 'cache_disco')
+
+    # Nodos de Python que abren un ámbito propio: un `await` dentro de ellos no es de nivel superior.
+    AMBITOS_PYTHON = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+
+    # Marca de origen completa (ver castella_mapa_fuente).
+    PATRON_MARCA = re.compile(INICIO_MARCA + r"[^" + FIN_MARCA + r"]*" + FIN_MARCA)
+
+    # Reglas que empiezan un bucle propio: `romper`/`continuar` dentro de ellas no salen del cuerpo.
+    REGLAS_CON_BUCLE_PROPIO = frozenset(['for_stmt', 'while_stmt', 'parallel_for_stmt', 'func_def', 'class_def'])
+
+    # Tipos (ya traducidos) que marcan un parámetro como numérico para `--rapido`:
+    # escalares, `Matriz`, tipos de NumPy y `Lista[...]` de escalares.
+    PATRON_TIPO_NUMERICO = re.compile(
+        r"(int|float|complex|bool|np\.ndarray"
+        r"|(np|numpy)\.(u?int\d*|float\d*|complex\d*|bool_)"
+        r"|List\[(int|float|complex|bool)\])$")
+
+    def __init__(self, registrar_origen: bool = False, rapido: bool = False):
+        """
+        Args:
+            registrar_origen: Si es True, marca cada sentencia con su línea Castella
+                              (requiere un árbol parseado con `propagate_positions=True`).
+                              Las marcas se eliminan con `castella_mapa_fuente.extraer_marcas`.
+            rapido: Si es True, decora con `@rapido` (Numba) las funciones cuyos
+                    parámetros están todos anotados con tipos numéricos.
+        """
+        super().__init__()
+        self.registrar_origen = registrar_origen
+        self.rapido = rapido
+        self.nombres_runtime = set() # Claves de NOMBRES_RUNTIME usadas en la traducción.
+        self.bucles_paralelos = 0 # Contador para nombrar las funciones de los bucles `paralelo para`.
+        self.bloques_asincronos = 0 # Contador para nombrar las corrutinas de nivel superior.
+        self.aumentadas_explicitas = False # Emitir `a op= b` como `a = a op (b)` (bucles vectorizados).
+
+    def _con_origen(self, nodo: Tree, resultado):
+        """
+        Antepone la marca de origen de `nodo` a su traducción, si corresponde.
+        """
+        if not self.registrar_origen or nodo.data not in self.REGLAS_CON_ORIGEN:
+            return resultado
+        linea = getattr(nodo.meta, 'line', None)
+        if linea is None or not isinstance(resultado, str) or not resultado.strip():
+            return resultado
+        return marca_origen(linea) + resultado
+
+    def _usar_runtime(self, nombre: str) -> str:
+        """
+        Registra el uso de una función de castella_runtime y devuelve su nombre en el código generado.
+        """
+        self.nombres_runtime.add(nombre)
+        return f"_castella_{nombre}"
+
+    def _importaciones_runtime(self) -> str:
+        """
+        Devuelve las líneas de importación de las funciones de castella_runtime usadas.
+        """
+        lineas = [f"from {self.NOMBRES_RUNTIME[nombre]} import {nombre} as _castella_{nombre}\n"
+                  for nombre in sorted(self.nombres_runtime)]
+        return "".join(lineas) + ("\n" if lineas else "")
+
+    def _es_funcion_numerica(self, func_def_node: Tree) -> bool:
+        """
+        Indica si una función tiene al menos un parámetro y todos (y el retorno, si
+        lo declara) están anotados con tipos de PATRON_TIPO_NUMERICO.
+        """
+        param_list_node = next((arg for arg in func_def_node.children if isinstance(arg, Tree) and arg.data == 'parameter_list'), None)
+        if param_list_node is None or not param_list_node.children:
+            return False
+        tipos = []
+        for param_node in param_list_node.children:
+            if not isinstance(param_node, Tree) or param_node.data not in ['pos_param', 'default_param']:
+                return False # *args / **kwargs no son compilables como parámetros numéricos.
+            tipo_node = next((arg for arg in param_node.children if isinstance(arg, Tree) and arg.data == 'type'), None)
+            if tipo_node is None:
+                return False
+            tipos.append(tipo_node)
+        # El tipo de retorno es el nodo 'type' hijo directo de func_def (tras ARROW).
+        tipos.extend(arg for arg in func_def_node.children if isinstance(arg, Tree) and arg.data == 'type')
+        return all(self.PATRON_TIPO_NUMERICO.match(self._convertir_nodo(tipo).replace(" ", "")) for tipo in tipos)
+
+    def _decoradores_con_rapido(self, item: Tree, pending_decorators: list[str]) -> list[str]:
+        """
+        Con `rapido`, añade `@rapido` a las funciones numéricas sin otros decoradores
+        (un decorador arbitrario puede devolver algo que Numba no sabe compilar).
+        """
+        if not self.rapido or item.data != 'func_def' or pending_decorators:
+            return pending_decorators
+        if not self._es_funcion_numerica(item):
+            return pending_decorators
+        return [f"@{self._usar_runtime('rapido')}"]
+
+    def _decoradores_con_version(self, item: Tree, pending_decorators: list[str]) -> list[str]:
+        """
+        Pasa a `@cache_disco` la versión de la función: un hash de su código Castella
+        (sus tokens, sin espacios ni comentarios), para que al cambiarlo se invaliden
+        los resultados guardados en disco.
+        """
+        nombre = '_castella_cache_disco' # El decorador ya registró su uso con _usar_runtime.
+        # Con `registrar_origen`, cada decorador empieza con la marca de su línea Castella.
+        separados = []
+        for decorator_line in pending_decorators:
+            marca = decorator_line[:decorator_line.index(FIN_MARCA) + 1] if decorator_line.startswith(INICIO_MARCA) else ""
+            separados.append((marca, decorator_line[len(marca):]))
+        if not any(d == f"@{nombre}" or d.startswith(f"@{nombre}(") for _, d in separados):
+            return pending_decorators
+        tokens = "\0".join(f"{token.type}:{token.value}" for token in item.scan_values(lambda v: isinstance(v, Token) and v.type != 'WS'))
+        version = f'version="{hashlib.sha256(tokens.encode("utf-8")).hexdigest()[:16]}"'
+        resultado = []
+        for marca, decorator_line in separados:
+            if decorator_line == f"@{nombre}":
+                decorator_line = f"@{nombre}({version})"
+            elif decorator_line.startswith(f"@{nombre}("):
+                argumentos = decorator_line[len(nombre) + 2:]
+                decorator_line = f"@{nombre}({version}{', ' if argumentos.strip() != ')' else ''}{argumentos}"
+            resultado.append(marca + decorator_line)
+        return resultado
+
+    def validar(self, arbol: Tree) -> None:
+        """
+        Validaciones que dependen del contexto (la traducción regla a regla no lo conoce).
+        Se llama sobre el árbol recién parseado, antes de optimizarlo y de `transform`.
+
+        Raises:
+            ValueError: Si el programa usa una construcción fuera de lugar.
+        """
+        self._validar_producir(arbol)
+
+    def _validar_producir(self, nodo, ambito: Optional[str] = None):
+        """
+        Comprueba que `producir` sólo aparece en el cuerpo de una función (y que
+        `producir desde` no aparece en una función asíncrona, como en Python).
+
+        Args:
+            nodo: Subárbol a recorrer.
+            ambito: None fuera de funciones, "funcion" o "asincrona".
+
+        Raises:
+            ValueError: Si hay un `producir` fuera de lugar.
+        """
+        for hijo in nodo.children:
+            if not isinstance(hijo, Tree):
+                continue
+            if hijo.data == 'yield_stmt':
+                linea = getattr(hijo.meta, 'line', None)
+                posicion = f" (línea {linea})" if linea is not None else ""
+                if ambito is None:
+                    raise ValueError(f"Error de gramática{posicion}: `producir` sólo puede usarse dentro del cuerpo de una `funcion`.")
+                if ambito == 'asincrona' and any(isinstance(h, Token) and h.type == 'DESDE' for h in hijo.children):
+                    raise ValueError(f"Error de gramática{posicion}: `producir desde` no puede usarse en una `asincrono funcion`.")
+            if hijo.data == 'async_func_def':
+                self._validar_producir(hijo, 'asincrona')
+            elif hijo.data == 'func_def':
+                # El func_def hijo de async_func_def es la propia función asíncrona.
+                self._validar_producir(hijo, ambito if nodo.data == 'async_func_def' else 'funcion')
+            elif hijo.data in ['class_def', 'parallel_for_stmt']:
+                # El cuerpo de una clase no es una función; el de `paralelo para` debe devolver valores, no generadores.
+                self._validar_producir(hijo, None)
+            else:
+                self._validar_producir(hijo, ambito)
+
+    def _call_userfunc(self, tree, new_children=None):
+        # Transformación de abajo hacia arriba (Transformer.transform): marcar el resultado de cada regla.
+        return self._con_origen(tree, super()._call_userfunc(tree, new_children))
+
     def _indent_lines(self, lines_list: list[str], level: int) -> str:
         """
         Añade indentación a una lista de líneas de código.
@@ -168,7 +367,7 @@ class CastellaTransformer(Transformer):
                   raise NotImplementedError(f"No hay método de transformer definido para la regla '{nodo.data}'")
 
             # Call the method, passing the node's children as arguments.
-            return transformer_method(nodo.children)
+            return self._con_origen(nodo, transformer_method(nodo.children))
 
         elif nodo is None:
              # Represents an optional part of the grammar that was not matched.
@@ -214,14 +413,10 @@ class CastellaTransformer(Transformer):
 
     # === TOP LEVEL ===
 
-    def start(self, items):
+    def preambulo(self) -> str:
         """
-        Procesa los elementos de nivel superior (definiciones, sentencias, decoradores).
-        Añade el preámbulo de Python (imports, etc.).
+        Devuelve el preámbulo fijo del código generado (imports de tipos y librerías).
         """
-        translated_output_lines = []
-        pending_decorators = []
-
         # Add standard Python imports at the top of the generated file.
         import_preamble = "# -*- coding: utf-8 -*-\n"
         import_preamble += "# Traducción de Castella a Python\n"
@@ -237,14 +432,21 @@ class CastellaTransformer(Transformer):
         import_preamble += "import math\n"
         # Imports for specific mapped types and common calculation libraries
         import_preamble += "import numpy as np\n" # Matriz -> np.ndarray, used in calculations
-        import_preamble += "import matplotlib.pyplot as plt\n" # Needed if `graficar` translates to matplotlib calls
+        import_preamble += "import matplotlib.pyplot as plt\n" # `graficar` dibuja con castella_runtime.graficos; plt queda para títulos, ejes, etc.
         # import_preamble += "import requests\n" # Keep if potentially used by Castella standard library features
         # Example import for Tensor type hint - include placeholder if not installed
         import_preamble += "try:\n    import tensorflow as tf\nexcept ImportError:\n    class tf: # Placeholder if tf is not installed\n        class Tensor: pass\n    # print('Warning: tensorflow not found. Tensor type hint might not work correctly.') # Avoid printing from translated code\n"
 
         import_preamble += "\n"
+        return import_preamble
 
-        translated_output_lines.append(import_preamble)
+    def start(self, items):
+        """
+        Procesa los elementos de nivel superior (definiciones, sentencias, decoradores).
+        Añade el preámbulo de Python (imports, etc.).
+        """
+        translated_output_lines = [self.preambulo()]
+        pending_decorators = []
 
         for item in items:
             if isinstance(item, Token) and item.type in ['WS', 'LINE_COMMENT']:
@@ -256,7 +458,9 @@ class CastellaTransformer(Transformer):
                     pending_decorators.append(translated_decorator)
                 continue
 
-            if isinstance(item, Tree) and item.data in ['func_def', 'class_def']:
+            if isinstance(item, Tree) and item.data in ['func_def', 'async_func_def', 'class_def']:
+                pending_decorators = self._decoradores_con_rapido(item, pending_decorators)
+                pending_decorators = self._decoradores_con_version(item, pending_decorators)
                 for decorator_line in pending_decorators:
                     translated_output_lines.append(decorator_line)
                 pending_decorators = []
@@ -283,7 +487,7 @@ class CastellaTransformer(Transformer):
                 translated_item = self._convertir_nodo(item)
 
                 if translated_item is not None:
-                    translated_output_lines.append(str(translated_item))
+                    translated_output_lines.append(self._envolver_asincrono(str(translated_item)))
 
             else:
                 # Handle other unexpected top-level node types defensively.
@@ -299,6 +503,10 @@ class CastellaTransformer(Transformer):
              decorator_example = pending_decorators[0]
              raise ValueError(f"Error de gramática: Decoradores ({decorator_example}) sin una definición de función o clase que los siga al final del archivo.")
 
+        # Las funciones de castella_runtime se conocen al terminar de traducir el cuerpo.
+        if self.nombres_runtime:
+             translated_output_lines.insert(1, self._importaciones_runtime())
+
         python_lines = [line.rstrip() for line in translated_output_lines if line is not None]
         while python_lines and not python_lines[-1].strip():
              python_lines.pop()
@@ -306,6 +514,109 @@ class CastellaTransformer(Transformer):
 
         return "\n".join(python_lines)
 
+    def _espera_en_nivel_superior(self, nodo) -> bool:
+        """
+        Indica si un árbol `ast` de Python usa `await`, `async for` o `async with` fuera de toda función.
+        """
+        if isinstance(nodo, (ast.Await, ast.AsyncFor, ast.AsyncWith)):
+            return True
+        if isinstance(nodo, self.AMBITOS_PYTHON):
+            return False
+        return any(self._espera_en_nivel_superior(hijo) for hijo in ast.iter_child_nodes(nodo))
+
+    def _nombres_vinculados(self, nodo, nombres: set) -> set:
+        """
+        Reúne los nombres que un árbol `ast` de Python vincula en su ámbito (sin entrar en funciones ni clases).
+        """
+        if isinstance(nodo, ast.Name) and isinstance(nodo.ctx, (ast.Store, ast.Del)):
+            nombres.add(nodo.id)
+        elif isinstance(nodo, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            nombres.add(nodo.name)
+            return nombres
+        elif isinstance(nodo, (ast.Import, ast.ImportFrom)):
+            nombres.update((alias.asname or alias.name.split('.')[0]) for alias in nodo.names if alias.name != '*')
+        elif isinstance(nodo, ast.ExceptHandler) and nodo.name:
+            nombres.add(nodo.name)
+        elif isinstance(nodo, (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+            return nombres
+        for hijo in ast.iter_child_nodes(nodo):
+            self._nombres_vinculados(hijo, nombres)
+        return nombres
+
+    def _anotaciones_globales(self, nodo, anotaciones: list) -> list:
+        """
+        Reúne las asignaciones anotadas (`x: int = ...`) de un árbol `ast` de Python que
+        vinculan un nombre de su ámbito (sin entrar en funciones ni clases).
+        """
+        if isinstance(nodo, ast.AnnAssign) and isinstance(nodo.target, ast.Name) and nodo.simple:
+            anotaciones.append(nodo)
+        elif isinstance(nodo, self.AMBITOS_PYTHON):
+            return anotaciones
+        for hijo in ast.iter_child_nodes(nodo):
+            self._anotaciones_globales(hijo, anotaciones)
+        return anotaciones
+
+    def _quitar_anotacion(self, linea: str, nodo) -> Optional[str]:
+        """
+        Quita la anotación de la asignación `nodo` en `linea` (que puede llevar marcas
+        de origen): `x: int = valor` pasa a `x = valor`, y `x: int`, a `pass`.
+
+        Returns:
+            La línea sin anotación, o None si la sentencia ocupa más de una línea.
+        """
+        fin = nodo.value if nodo.value is not None else nodo
+        if nodo.end_lineno != nodo.lineno or fin.lineno != nodo.lineno:
+            return None
+        marcas = "".join(self.PATRON_MARCA.findall(linea))
+        # Las columnas de `ast` cuentan bytes UTF-8.
+        texto = self.PATRON_MARCA.sub("", linea).encode('utf-8')
+        if nodo.value is None:
+            texto = texto[:nodo.col_offset] + b"pass" + texto[nodo.end_col_offset:]
+        else:
+            texto = texto[:nodo.target.end_col_offset] + b" = " + texto[nodo.value.col_offset:]
+        texto = texto.decode('utf-8')
+        sangria = len(texto) - len(texto.lstrip())
+        return texto[:sangria] + marcas + texto[sangria:]
+
+    def _envolver_asincrono(self, codigo: str) -> str:
+        """
+        Envuelve una sentencia de nivel superior que usa `esperar`, `asincrono para` o
+        `asincrono con` en una corrutina que ejecuta castella_runtime.asincrono (Python no
+        permite `await` fuera de una función `async`). Los nombres que vincula la sentencia
+        se declaran `global`, así que siguen siendo variables del módulo; como Python no
+        permite anotar un nombre `global`, las anotaciones (`let x: int = esperar f();`) se
+        declaran en el módulo antes de la corrutina.
+        """
+        if 'await' not in codigo and 'async' not in codigo:
+            return codigo
+        try:
+            arbol = compile(extraer_marcas(codigo)[0], '<castella>', 'exec',
+                            flags=ast.PyCF_ONLY_AST | ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+        except SyntaxError:
+            return codigo # Lo reportará la compilación del código generado.
+        if not self._espera_en_nivel_superior(arbol):
+            return codigo
+
+        self.bloques_asincronos += 1
+        corrutina = f"_castella_asincrono_{self.bloques_asincronos}"
+        # La cabecera hereda la marca de origen de la sentencia.
+        marca = codigo[:codigo.index(FIN_MARCA) + 1] if codigo.startswith(INICIO_MARCA) else ""
+        cuerpo = []
+        nombres = sorted(self._nombres_vinculados(arbol, set()))
+        if nombres:
+            cuerpo.append(f"global {', '.join(nombres)}")
+        lineas = codigo.split('\n')
+        declaraciones = []
+        for nodo in self._anotaciones_globales(arbol, []):
+            sin_anotacion = self._quitar_anotacion(lineas[nodo.lineno - 1], nodo)
+            if sin_anotacion is None:
+                return codigo # Lo reportará la compilación del código generado.
+            lineas[nodo.lineno - 1] = sin_anotacion
+            declaraciones.append(f"{marca}{nodo.target.id}: {ast.unparse(nodo.annotation)}\n")
+        cuerpo.append('\n'.join(lineas))
+        return (f"{''.join(declaraciones)}{marca}async def {corrutina}():\n{self._indent_lines(cuerpo, 1)}\n"
+                f"{self._usar_runtime('ejecutar_asincrono')}({corrutina}())")
+
     # === STATEMENT RULES ===
 
     def stmt(self, args):
@@ -344,8 +655,8 @@ class CastellaTransformer(Transformer):
         nodes_between_ident_and_igual = args[2:igual_idx]
 
         if nodes_between_ident_and_igual:
-             if len(nodes_between_ident_and_igual) == 2 and isinstance(nodes_between_ident_and_igual[0], Token) and nodes_between_ident_and_igual[0].type == 'COLON' and isinstance(nodes_between_ident_and_igual[1], Tree) and nodes_between_ident_and_iguales[1].data == 'type':
-                  type_node = nodes_between_ident_and_iguales[1]
+             if len(nodes_between_ident_and_igual) == 2 and isinstance(nodes_between_ident_and_igual[0], Token) and nodes_between_ident_and_igual[0].type == 'COLON' and isinstance(nodes_between_ident_and_igual[1], Tree) and nodes_between_ident_and_igual[1].data == 'type':
+                  type_node = nodes_between_ident_and_igual[1]
              else:
                  raise ValueError(f"Error en declaracion: Estructura incorrecta para declaración con tipo. Esperado [COLON, type] entre IDENT y IGUAL. Recibido: {nodes_between_ident_and_igual}. Args: {args}")
 
@@ -448,6 +759,8 @@ class CastellaTransformer(Transformer):
         op_str = self._convertir_nodo(args[1]) # AUG_ASSIGN_OP token value is already correct.
         value_expr_str = self._convertir_nodo(args[2])
 
+        if self.aumentadas_explicitas:
+            return f"{access_target_str} = {access_target_str} {op_str[:-1]} ({value_expr_str})"
         return f"{access_target_str} {op_str} {value_expr_str}"
 
     # Note: BREAK, CONTINUE, PASS_KW rule methods are handled by _convertir_nodo
@@ -489,6 +802,20 @@ class CastellaTransformer(Transformer):
         return f"return {translated_expr_str}".strip()
 
 
+    def yield_stmt(self, args): # PRODUCIR_KW [DESDE expr | expr] SEMICOLON
+        if not isinstance(args[0], Token) or args[0].type != 'PRODUCIR_KW' or not isinstance(args[-1], Token) or args[-1].type != 'SEMICOLON':
+             raise ValueError(f"Error en yield_stmt: Estructura inicial/final incorrecta (PRODUCIR_KW/SEMICOLON). Recibido: {args}")
+
+        nodes_between = args[1:-1]
+        if not nodes_between:
+             return "yield"
+        if len(nodes_between) == 2 and isinstance(nodes_between[0], Token) and nodes_between[0].type == 'DESDE' and isinstance(nodes_between[1], Tree) and nodes_between[1].data == 'expr':
+             return f"yield from {self._convertir_nodo(nodes_between[1])}"
+        if len(nodes_between) == 1 and isinstance(nodes_between[0], Tree) and nodes_between[0].data == 'expr':
+             return f"yield {self._convertir_nodo(nodes_between[0])}"
+        raise ValueError(f"Error en yield_stmt: Estructura incorrecta. Esperado PRODUCIR_KW [DESDE] [expr] SEMICOLON. Recibido: {args}")
+
+
     # === BLOCK AND CONTROL FLOW RULES ===
 
     def block(self, args):
@@ -508,7 +835,9 @@ class CastellaTransformer(Transformer):
                    continue
 
               # Handle definitions (functions, classes) which can be decorated.
-              if isinstance(item_node, Tree) and item_node.data in ['func_def', 'class_def'] :
+              if isinstance(item_node, Tree) and item_node.data in ['func_def', 'async_func_def', 'class_def'] :
+                 pending_decorators = self._decoradores_con_rapido(item_node, pending_decorators)
+                 pending_decorators = self._decoradores_con_version(item_node, pending_decorators)
                  if pending_decorators:
                       for decorator_line in pending_decorators:
                            translated_block_elements.append(decorator_line)
@@ -626,6 +955,107 @@ class CastellaTransformer(Transformer):
 
         return f"for {var_name} in {iterable_expr_str}:\n{indented_block}"
 
+    def for_vectorizado(self, args): # for_stmt PlanVectorizacion (insertado por castella_vectorizador con -O2)
+        if len(args) != 2 or not isinstance(args[0], Tree) or args[0].data != 'for_stmt':
+            raise ValueError(f"Error en for_vectorizado: Estructura incorrecta. Esperado [for_stmt, PlanVectorizacion]. Recibido: {args}")
+
+        plan = args[1]
+        tramo_vectorizable = self._usar_runtime('tramo_vectorizable')
+
+        def tupla(nombres):
+            return "(" + ", ".join(nombres) + ("," if len(nombres) == 1 else "") + ")"
+
+        # Versión vectorizada: una operación de NumPy por sentencia; la variable del bucle
+        # queda con el último valor del rango, como tras el bucle original.
+        # `c[t] += expr` sobre un slice opera en el sitio y NumPy rechaza un resultado de otro
+        # tipo (un float en un arreglo de enteros: UFuncTypeError), mientras que el bucle original
+        # asigna elemento a elemento y convierte. `c[t] = c[t] + (expr)` convierte igual que él.
+        self.aumentadas_explicitas = True
+        try:
+            lineas_vectorizadas = [self._convertir_nodo(sentencia) for sentencia in plan.sentencias]
+        finally:
+            self.aumentadas_explicitas = False
+        lineas_vectorizadas.append(f"if {plan.rango}:\n{self._indent_lines([f'{plan.variable} = {plan.rango}[-1]'], 1)}")
+        bucle_original = f"for {plan.variable} in {plan.rango}:\n{self._indent_lines(self._convertir_nodo(plan.bloque), 1)}"
+
+        return "\n".join([
+            f"{plan.rango} = {self._convertir_nodo(plan.iterable)}",
+            f"{plan.tramo} = {tramo_vectorizable}({plan.rango}, {tupla(plan.arreglos)}, {tupla(plan.escritos)}, "
+            f"{tupla(plan.escalares)}, {plan.usa_indice})",
+            f"if {plan.tramo} is not None:",
+            self._indent_lines(lineas_vectorizadas, 1),
+            "else:",
+            self._indent_lines([bucle_original], 1),
+        ])
+
+    def _salto_fuera_del_cuerpo(self, nodo):
+        """
+        Devuelve el primer `romper`/`continuar` de `nodo` que no está dentro de un bucle anidado (o None).
+        """
+        for hijo in nodo.children:
+            if isinstance(hijo, Token) and hijo.type in ['BREAK', 'CONTINUE', 'BREAK_STMT', 'CONTINUE_STMT']:
+                return hijo
+            if isinstance(hijo, Tree) and hijo.data not in self.REGLAS_CON_BUCLE_PROPIO:
+                salto = self._salto_fuera_del_cuerpo(hijo)
+                if salto is not None:
+                    return salto
+        return None
+
+    def parallel_for_stmt(self, args): # PARALELO_KW [LPAR [argument_list] RPAR] PARA_KW IDENT EN_KW expr [ARROW IDENT] block
+        if not args or not isinstance(args[0], Token) or args[0].type != 'PARALELO_KW' or not isinstance(args[-1], Tree) or args[-1].data != 'block':
+            raise ValueError(f"Error en parallel_for_stmt: Estructura inicial/final incorrecta. Esperado PARALELO_KW ... block. Recibido: {args}")
+
+        # Find components by type/data (optional parts may be absent or None placeholders).
+        args = [arg for arg in args if arg is not None]
+        para_node = next((arg for arg in args if isinstance(arg, Token) and arg.type == 'PARA_KW'), None)
+        if para_node is None:
+            raise ValueError(f"Error en parallel_for_stmt: Falta PARA_KW después de PARALELO_KW. Recibido: {args}")
+        idx_para = args.index(para_node)
+        loop_nodes = args[idx_para + 1:-1] # IDENT EN_KW expr [ARROW IDENT]
+        if (len(loop_nodes) not in [3, 5] or
+            not isinstance(loop_nodes[0], Token) or loop_nodes[0].type != 'IDENT' or
+            not isinstance(loop_nodes[1], Token) or loop_nodes[1].type != 'EN_KW' or
+            not isinstance(loop_nodes[2], Tree) or loop_nodes[2].data != 'expr'):
+            raise ValueError(f"Error en parallel_for_stmt: Estructura incorrecta. Esperado PARA_KW IDENT EN_KW expr [ARROW IDENT] block. Recibido: {args}")
+        if len(loop_nodes) == 5 and not (isinstance(loop_nodes[3], Token) and loop_nodes[3].type == 'ARROW' and
+                                         isinstance(loop_nodes[4], Token) and loop_nodes[4].type == 'IDENT'):
+            raise ValueError(f"Error en parallel_for_stmt: Se esperaba `-> nombre` antes del bloque. Recibido: {loop_nodes[3:]}")
+
+        block_node = args[-1]
+        salto = self._salto_fuera_del_cuerpo(block_node)
+        if salto is not None:
+            raise ValueError(f"Error en parallel_for_stmt: `romper`/`continuar` no se pueden usar en el cuerpo de `paralelo para` "
+                             f"(las iteraciones son independientes; usa `retornar` para terminar una iteración). Recibido: {salto}")
+
+        var_name = self._convertir_nodo(loop_nodes[0])
+        iterable_expr_str = self._convertir_nodo(loop_nodes[2])
+        target_name = self._convertir_nodo(loop_nodes[4]) if len(loop_nodes) == 5 else None
+
+        # Options between PARALELO_KW and PARA_KW: LPAR [argument_list] RPAR.
+        arg_list_node = next((arg for arg in args[1:idx_para] if isinstance(arg, Tree) and arg.data == 'argument_list'), None)
+        options_str = self._convertir_nodo(arg_list_node) if arg_list_node is not None else ""
+
+        self.bucles_paralelos += 1
+        body_func_name = f"_castella_paralelo_{self.bucles_paralelos}"
+        indented_block = self._indent_lines(self._convertir_nodo(block_node), 1)
+
+        call_args = ", ".join(part for part in [body_func_name, iterable_expr_str, options_str] if part)
+        call_str = f"{self._usar_runtime('paralelo_para')}({call_args})"
+        if target_name:
+            call_str = f"{target_name} = {call_str}"
+
+        return f"def {body_func_name}({var_name}):\n{indented_block}\n{call_str}"
+
+    def async_for_stmt(self, args): # ASINCRONO_KW for_stmt
+        if len(args) != 2 or not isinstance(args[0], Token) or args[0].type != 'ASINCRONO_KW' or not isinstance(args[1], Tree) or args[1].data != 'for_stmt':
+            raise ValueError(f"Error en async_for_stmt: Estructura incorrecta. Esperado [ASINCRONO_KW, for_stmt]. Recibido: {args}")
+        return f"async {self._convertir_nodo(args[1])}"
+
+    def async_with_stmt(self, args): # ASINCRONO_KW with_stmt
+        if len(args) != 2 or not isinstance(args[0], Token) or args[0].type != 'ASINCRONO_KW' or not isinstance(args[1], Tree) or args[1].data != 'with_stmt':
+            raise ValueError(f"Error en async_with_stmt: Estructura incorrecta. Esperado [ASINCRONO_KW, with_stmt]. Recibido: {args}")
+        return f"async {self._convertir_nodo(args[1])}"
+
     def while_stmt(self, args): # WHILE_KW LPAR expr RPAR block
         if (len(args) != 5 or
             not isinstance(args[0], Token) or args[0].type != 'MIENTRAS_KW' or
@@ -745,6 +1175,14 @@ class CastellaTransformer(Transformer):
 
     # === DEFINITION RULES (FUNCTION, CLASS) ===
 
+    def async_func_def(self, args): # ASINCRONO_KW func_def
+        if len(args) != 2 or not isinstance(args[0], Token) or args[0].type != 'ASINCRONO_KW' or not isinstance(args[1], Tree) or args[1].data != 'func_def':
+            raise ValueError(f"Error en async_func_def: Estructura incorrecta. Esperado [ASINCRONO_KW, func_def]. Recibido: {args}")
+        translated_func = str(self._convertir_nodo(args[1]))
+        # func_def may start with its source marker: insert `async` right before `def`.
+        marker = translated_func[:translated_func.index(FIN_MARCA) + 1] if translated_func.startswith(INICIO_MARCA) else ""
+        return f"{marker}async {translated_func[len(marker):]}"
+
     def func_def(self, args): # FUNCTION_KW IDENT LPAR [parameter_list] RPAR [ARROW type] block
         if len(args) < 4 or not isinstance(args[0], Token) or args[0].type != 'FUNCTION_KW' or not isinstance(args[1], Token) or args[1].type != 'IDENT':
             raise ValueError(f"Error en func_def: Estructura inicial incorrecta. Esperado FUNCTION_KW IDENT ... Recibido: {args}")
@@ -897,7 +1335,11 @@ class CastellaTransformer(Transformer):
         ident_str = self._convertir_nodo(args[1])
         return f"**{ident_str}"
 
-    def class_def(self, args): # CLASS_KW IDENT [DESDE inheritance_list] LBRACE (class_body_element)* RBRACE
+    def class_def(self, args): # CLASS_KW [COMPACTA_KW] IDENT [DESDE inheritance_list] LBRACE (class_body_element)* RBRACE
+        args = [arg for arg in args if arg is not None] # Placeholder de [COMPACTA_KW] ausente.
+        compacta = len(args) > 1 and isinstance(args[1], Token) and args[1].type == 'COMPACTA_KW'
+        if compacta:
+             args = [args[0]] + args[2:]
         if len(args) < 2 or not isinstance(args[0], Token) or args[0].type != 'CLASS_KW' or not isinstance(args[1], Token) or args[1].type != 'IDENT':
              raise ValueError(f"Error en class_def: Estructura inicial incorrecta. Esperado CLASS_KW IDENT. Recibido: {args}")
 
@@ -923,6 +1365,7 @@ class CastellaTransformer(Transformer):
 
         translated_body_elements = []
         pending_decorators_class = [] # Decorators specifically for methods/classes within the class body.
+        campos_compacta = [] # Atributos declarados (`clase compacta`), en orden y sin repetir.
 
         for body_node in body_elements_nodes:
              if isinstance(body_node, Token) and body_node.type in ['WS', 'LINE_COMMENT', 'LBRACE', 'RBRACE']: # Include LBRACE/RBRACE as ignored here too for safety
@@ -934,12 +1377,16 @@ class CastellaTransformer(Transformer):
                        pending_decorators_class.append(translated_decorator)
                    continue
 
-             if isinstance(body_node, Tree) and body_node.data in ['func_def', 'class_def'] :
+             if isinstance(body_node, Tree) and body_node.data in ['func_def', 'async_func_def', 'class_def'] :
+                 pending_decorators_class = self._decoradores_con_version(body_node, pending_decorators_class)
                  if pending_decorators_class:
                       for decorator_line in pending_decorators_class:
                            translated_body_elements.append(decorator_line)
                       pending_decorators_class = []
 
+                 if compacta and self._nombre_definicion(body_node) == '__new__':
+                      raise ValueError(f"Error en class_def: La clase compacta '{class_name}' no puede definir __new__ (lo genera la traducción para inicializar sus atributos).")
+
                  translated_element = self._convertir_nodo(body_node)
                  if translated_element is not None:
                      translated_body_elements.append(str(translated_element))
@@ -953,6 +1400,10 @@ class CastellaTransformer(Transformer):
                  translated_element = self._convertir_nodo(body_node)
                  if translated_element is not None:
                        translated_body_elements.append(str(translated_element))
+                 if compacta and isinstance(body_node, Tree):
+                       campo = str(self._convertir_nodo(body_node.children[0]))
+                       if campo not in campos_compacta:
+                            campos_compacta.append(campo)
 
              # Handle basic statements inside the class body (pass, assignments, etc.)
              elif isinstance(body_node, Tree) and body_node.data in ['stmt']:
@@ -978,10 +1429,45 @@ class CastellaTransformer(Transformer):
               decorator_example = pending_decorators_class[0]
               raise ValueError(f"Error de gramática: Decoradores ({decorator_example}) sin definición de función o clase que los siga al final del cuerpo de la clase.")
 
+        if compacta:
+             translated_body_elements.extend(self._miembros_compacta(campos_compacta))
+
         indented_body_str = self._indent_lines(translated_body_elements, 1)
 
         return f"class {class_name}{base_classes_str}:\n{indented_body_str}"
 
+    def _nombre_definicion(self, node: Tree) -> str | None:
+        """
+        Nombre de una definición (func_def, async_func_def o class_def): su primer IDENT.
+        """
+        token = next(node.scan_values(lambda v: isinstance(v, Token) and v.type == 'IDENT'), None)
+        return token.value if token is not None else None
+
+    def _miembros_compacta(self, campos: list[str]) -> list[str]:
+        """
+        Miembros que se añaden al final de una `clase compacta`.
+
+        Los atributos declarados pasan a `__slots__` (las instancias no tienen `__dict__`).
+        Un slot no puede tener valor en la clase, así que los valores declarados (evaluados
+        una vez, al crear la clase, como cualquier atributo de clase) se guardan en una
+        tupla privada y se borran del cuerpo; `__new__` los copia en cada instancia nueva
+        antes de `__init__`, así que `__init__` puede usarlos o sobrescribirlos.
+        """
+        if not campos:
+            return ["__slots__ = ()"]
+        coma_final = "," if len(campos) == 1 else ""
+        # `__castella_valores` es privado (name mangling): cada clase compacta de una jerarquía tiene el suyo.
+        destinos = ", ".join(f"instancia.{campo}" for campo in campos)
+        return [
+            f"__castella_valores = ({', '.join(campos)}{coma_final})",
+            f"del {', '.join(campos)}",
+            f"__slots__ = ({', '.join(repr(campo) for campo in campos)}{coma_final})",
+            "def __new__(cls, *args, **kwargs):\n"
+            "    instancia = super().__new__(cls)\n"
+            f"    {destinos}{coma_final} = cls.__castella_valores\n"
+            "    return instancia",
+        ]
+
     def inheritance_list(self, args): # access (COMMA access)*
          return ", ".join(self._convertir_nodo(arg) for arg in args)
 
@@ -1017,6 +1503,11 @@ class CastellaTransformer(Transformer):
         if len(args) != 2 or not isinstance(args[0], Token) or args[0].type != 'ARROBA' or not isinstance(args[1], Tree) or args[1].data != 'access':
              raise ValueError(f"Error en decorator: Estructura incorrecta. Esperado [ARROBA, access]. Recibido: {args}")
         access_str = self._convertir_nodo(args[1])
+        # `@rapido` (Numba), `@memorizar` y `@cache_disco` (cachés de resultados) son decoradores de castella_runtime.
+        for nombre in self.DECORADORES_RUNTIME:
+            if access_str == nombre or access_str.startswith(nombre + '('):
+                access_str = self._usar_runtime(nombre) + access_str[len(nombre):]
+                break
         return f"@{access_str}"
 
 
@@ -1225,12 +1716,19 @@ class CastellaTransformer(Transformer):
         # _handle_binary_op processes this pattern correctly as left-associative.
         return self._handle_binary_op(args)
 
+    def await_expr(self, args): # ESPERAR_KW access
+        if len(args) != 2 or not isinstance(args[0], Token) or args[0].type != 'ESPERAR_KW' or not isinstance(args[1], Tree) or args[1].data != 'access':
+            raise ValueError(f"Error en await_expr: Estructura incorrecta. Esperado [ESPERAR_KW, access]. Recibido: {args}")
+        return f"await {self._convertir_nodo(args[1])}"
+
     # === ACCESS RULES (Attribute, Index, Call) ===
     def access(self, args): # primary (DOT_ACCESS | INDEX_ACCESS | CALL_SUFFIX)*
          if not args or not isinstance(args[0], Tree) or args[0].data != 'primary':
               raise ValueError(f"Error en access: Expected primary node as first arg. Recibido: {args}")
 
          result = self._convertir_nodo(args[0]) # Translate the primary expression.
+         if result in self.FUNCIONES_RUNTIME and len(args) > 1 and isinstance(args[1], Tree) and args[1].data == 'CALL_SUFFIX':
+              result = self._usar_runtime(result)
 
          for suffix_node in args[1:]:
               if not isinstance(suffix_node, Tree) or suffix_node.data not in ['DOT_ACCESS', 'INDEX_ACCESS', 'CALL_SUFFIX']:
@@ -1545,18 +2043,21 @@ class CastellaTransformer(Transformer):
         return f"{class_access_str}{arguments_str}"
 
     # === Other rule methods ===
-    # graficar rule translation. Assumes matplotlib.pyplot is imported as plt in the preamble.
-    def graficar(self, args): # GRAFICAR expr SEMICOLON
-        if len(args) != 3 or not isinstance(args[0], Token) or args[0].type != 'GRAFICAR' or not isinstance(args[1], Tree) or args[1].data != 'expr' or not isinstance(args[2], Token) or args[2].type != 'SEMICOLON':
-             raise ValueError(f"Error en graficar: Estructura incorrecta. Esperado [GRAFICAR, expr, SEMICOLON]. Recibido: {args}")
-
-        plot_data_expr_str = self._convertir_nodo(args[1])
-
-        # Returns a list of lines for the plotting calls.
-        return [
-            f"plt.plot({plot_data_expr_str})",
-            "plt.show()"
-        ]
+    # graficar rule translation. The runtime function takes the same positional arguments as
+    # plt.plot, downsamples large series and draws to a window, files or batched figures.
+    def graficar(self, args): # GRAFICAR LPAR [expression_list] RPAR SEMICOLON
+        if not args or not isinstance(args[0], Token) or args[0].type != 'GRAFICAR' or not isinstance(args[-1], Token) or args[-1].type != 'SEMICOLON':
+             raise ValueError(f"Error en graficar: Estructura incorrecta. Esperado GRAFICAR, LPAR, ..., RPAR, SEMICOLON. Recibido: {args}")
+
+        expr_nodes = []
+        for arg in args[1:-1]:
+            if isinstance(arg, Tree) and arg.data == 'expr':
+                expr_nodes.append(arg)
+            elif isinstance(arg, Tree) and arg.data == 'expression_list_items':
+                expr_nodes.extend(hijo for hijo in arg.children if isinstance(hijo, Tree) and hijo.data == 'expr')
+
+        plot_args_str = ", ".join(self._convertir_nodo(node) for node in expr_nodes)
+        return f"{self._usar_runtime('graficar')}({plot_args_str})"
 
 
     # The methods for terminals like AT_OP, AT_EQUAL, imaginary_literal, complex_literal,
@@ -0,0 +1,202 @@
+# castella_transformer_cython.py
+
+"""
+Generador de código Cython (`.pyx`) a partir del árbol de Castella.
+
+Extiende `CastellaTransformer`: el módulo generado es el mismo Python que produce
+el backend normal (Cython lo compila tal cual), salvo las funciones de nivel
+superior sin decoradores anotadas con tipos escalares, que se emiten como `cpdef` con tipos de C:
+
+    funcion f(n: int, x: float) -> float { let k : int = 0; ... }
+    =>  cpdef double f(long n, double x):
+            cdef long k
+            ...
+
+Los tipos declarados se respetan como en C: `int` es un `long` (sin precisión
+arbitraria) y asignar un float a una variable `int` trunca el valor. Las
+funciones listadas en `excluir` (p. ej. las que Cython rechazó en un intento
+anterior, ver `castella_cython`) se emiten sin tipos, como Python normal.
+"""
+
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lark import Tree, Token
+
+try:
+    from .castella_transformer import CastellaTransformer
+except ImportError as e:
+    print("\nError de Importación en castella_transformer_cython:")
+    print("No se pudo importar 'CastellaTransformer' desde 'castella_transformer.py'.")
+    print(f"Detalle: {e}")
+    sys.exit(1)
+
+# Tipos Castella (ya traducidos) con equivalente directo en C.
+TIPOS_C = {
+    'int': 'long',
+    'float': 'double',
+    'bool': 'bint',
+    'complex': 'double complex',
+}
+
+# Directivas del módulo: Python 3 y anotaciones ignoradas (sólo se tipan las variables
+# declaradas con `cdef`, así las funciones sin tipar se comportan como en Python).
+DIRECTIVAS_CYTHON = "# cython: language_level=3, annotation_typing=False\n"
+
+# Construcciones no admitidas dentro de una función `cpdef`: las que crean clausuras
+# (`paralelo para` se traduce con una función anidada), `producir` y las asíncronas.
+NODOS_NO_TIPABLES = frozenset([
+    'func_def', 'async_func_def', 'class_def',
+    'lambda_expr', 'lambda_expr_definition',
+    'generator_expression', 'generator_expression_expr',
+    'parallel_for_stmt', 'yield_stmt',
+    'async_for_stmt', 'async_with_stmt', 'await_expr',
+])
+
+
+class CastellaCythonTransformer(CastellaTransformer):
+    """
+    Transforma el árbol de Castella a código Cython con las funciones numéricas tipadas.
+
+    Attributes:
+        funciones_tipadas: Nombres de las funciones emitidas con `cpdef`, en orden.
+    """
+
+    def __init__(self, excluir: Iterable[str] = ()):
+        """
+        Args:
+            excluir: Funciones de nivel superior que se emiten sin tipos.
+        """
+        super().__init__()
+        self.excluir = set(excluir)
+        self.funciones_tipadas: List[str] = []
+        self._profundidad = 0 # Anidamiento en funciones/clases: sólo se tipa el nivel superior.
+        self._decorada = False # La próxima definición lleva decoradores.
+
+    def start(self, items):
+        return DIRECTIVAS_CYTHON + super().start(items)
+
+    def class_def(self, args):
+        # Los métodos de una clase Python no pueden ser `cpdef`.
+        self._profundidad += 1
+        try:
+            return super().class_def(args)
+        finally:
+            self._profundidad -= 1
+
+    def async_func_def(self, args):
+        # Una corrutina no puede ser `cpdef` (`async cpdef` es un error de sintaxis en Cython).
+        self._profundidad += 1
+        try:
+            return super().async_func_def(args)
+        finally:
+            self._profundidad -= 1
+
+    def _decoradores_con_version(self, item, pending_decorators):
+        # Último paso de los decoradores antes de traducir cada definición (ver `start` y `block`).
+        decoradores = super()._decoradores_con_version(item, pending_decorators)
+        self._decorada = bool(decoradores)
+        return decoradores
+
+    def func_def(self, args):
+        # Cython no admite decoradores en funciones `cpdef` (`@memorizar`, `@rapido`, `@cache_disco`...).
+        decorada, self._decorada = self._decorada, False
+        firma = None
+        if self._profundidad == 0 and not decorada:
+            firma = self._firma_c(args)
+        self._profundidad += 1
+        try:
+            traducido = super().func_def(args)
+        finally:
+            self._profundidad -= 1
+        if firma is None:
+            return traducido
+
+        nombre, parametros, retorno, locales = firma
+        cabecera = f"cpdef {retorno + ' ' if retorno else ''}{nombre}({', '.join(parametros)}):"
+        indentacion = " " * self.INDENT_SPACES
+        declaraciones = "".join(f"{indentacion}cdef {tipo} {variable}\n" for variable, tipo in locales.items())
+        _, _, cuerpo = traducido.partition("\n")
+        self.funciones_tipadas.append(nombre)
+        return f"{cabecera}\n{declaraciones}{cuerpo}"
+
+    def _tipo_c(self, tipo_node: Optional[Tree]) -> Optional[str]:
+        """
+        Devuelve el tipo C de un nodo 'type' (o 'type_hint'), o None si no tiene equivalente escalar.
+        """
+        if tipo_node is not None and tipo_node.data == 'type_hint':
+            tipo_node = next((hijo for hijo in tipo_node.children if isinstance(hijo, Tree) and hijo.data == 'type'), None)
+        if tipo_node is None:
+            return None
+        return TIPOS_C.get(self._convertir_nodo(tipo_node).replace(" ", ""))
+
+    def _firma_c(self, args) -> Optional[Tuple[str, List[str], Optional[str], Dict[str, str]]]:
+        """
+        Calcula la firma `cpdef` de una función de nivel superior.
+
+        Returns:
+            `(nombre, parametros, tipo_retorno, locales)` con los parámetros ya
+            escritos en sintaxis Cython y las variables locales que se declaran con
+            `cdef`; o None si la función debe emitirse sin tipos (está excluida, no
+            tiene ninguna anotación escalar o usa construcciones no admitidas).
+        """
+        nombre = self._convertir_nodo(args[1])
+        if nombre in self.excluir or nombre == "iniciar":
+            return None
+        param_list_node = next((arg for arg in args if isinstance(arg, Tree) and arg.data == 'parameter_list'), None)
+        block_node = next((arg for arg in args if isinstance(arg, Tree) and arg.data == 'block'), None)
+        if block_node is None:
+            return None
+        arrow_index = next((i for i, arg in enumerate(args) if isinstance(arg, Token) and arg.type == 'ARROW'), None)
+        retorno = None
+        if arrow_index is not None and arrow_index + 1 < len(args):
+            retorno = self._tipo_c(args[arrow_index + 1])
+
+        parametros, nombres_parametros, parametros_tipados = [], set(), 0
+        for param_node in (param_list_node.children if param_list_node else []):
+            if not isinstance(param_node, Tree) or param_node.data not in ['pos_param', 'default_param']:
+                return None # *args / **kwargs
+            nombre_param = self._convertir_nodo(param_node.children[0])
+            nombres_parametros.add(nombre_param)
+            tipo_node = next((arg for arg in param_node.children if isinstance(arg, Tree) and arg.data == 'type'), None)
+            tipo = self._tipo_c(tipo_node)
+            texto = f"{tipo} {nombre_param}" if tipo else nombre_param
+            parametros_tipados += tipo is not None
+            if param_node.data == 'default_param':
+                valor = self._convertir_nodo(param_node.children[-1])
+                if "\n" in valor:
+                    return None
+                texto += f"={valor}"
+            parametros.append(texto)
+
+        locales = self._locales_c(block_node, nombres_parametros)
+        if locales is None:
+            return None
+        if not retorno and not locales and not parametros_tipados:
+            return None # Nada que tipar: se deja como `def`.
+        return nombre, parametros, retorno, locales
+
+    def _locales_c(self, block_node: Tree, nombres_parametros: set) -> Optional[Dict[str, str]]:
+        """
+        Recoge las variables `let` con tipo escalar del cuerpo de una función.
+
+        Una variable declarada con tipos distintos en dos sitios no se tipa.
+
+        Returns:
+            Nombre -> tipo C, o None si el cuerpo contiene construcciones no tipables.
+        """
+        locales: Dict[str, Optional[str]] = {}
+        for nodo in block_node.iter_subtrees_topdown():
+            if nodo.data in NODOS_NO_TIPABLES:
+                return None
+            if nodo.data not in ('declaration', 'declaracion'):
+                continue
+            ident = next((hijo for hijo in nodo.children if isinstance(hijo, Token) and hijo.type == 'IDENT'), None)
+            tipo_node = next((hijo for hijo in nodo.children if isinstance(hijo, Tree) and hijo.data in ('type', 'type_hint')), None)
+            if ident is None or tipo_node is None or ident.value in nombres_parametros:
+                continue
+            tipo = self._tipo_c(tipo_node)
+            if ident.value in locales and locales[ident.value] != tipo:
+                tipo = None
+            locales[ident.value] = tipo
+        return {variable: tipo for variable, tipo in locales.items() if tipo}
@@ -0,0 +1,383 @@
+# castella_vectorizador.py
+
+"""
+Vectorización con NumPy de bucles `para` elemento a elemento (parte de -O2).
+
+Reconoce bucles como
+
+    para i en range(n) { c[i] = a[i] * b[i] + k; }
+
+donde los arreglos son nombres declarados con el tipo `Matriz` y los reemplaza
+por un nodo `for_vectorizado` que el transformer emite como una sola operación
+de NumPy sobre un slice (`c[t] = a[t] * b[t] + k`), protegida por una
+comprobación en tiempo de ejecución (`castella_runtime.vectorizacion`) y con el
+bucle original como alternativa. Las asignaciones aumentadas se emiten como
+`c[t] = c[t] op (expr)`: así el resultado se convierte al tipo del arreglo como en
+el bucle original, en lugar de fallar al operar en el sitio con otro tipo.
+
+Un bucle sólo se vectoriza si se puede demostrar que no hay dependencias entre
+iteraciones:
+  * el cuerpo contiene únicamente asignaciones (simples o aumentadas) a `M[i]`,
+  * todos los arreglos se indexan exactamente con la variable del bucle (`a[i]`,
+    nunca `a[i - 1]` ni `a[j]`), así que cada iteración sólo toca su elemento,
+  * las expresiones son aritméticas (operadores, literales, nombres escalares que
+    el cuerpo no modifica, `abs(...)`), sin llamadas ni atributos arbitrarios.
+Además, una operación entre escalares que puede lanzar una excepción (`/`, `//`,
+`%`, `**`, desplazamientos) impide vectorizar: con enteros de Python fallaría en
+la primera iteración, mientras que la versión vectorizada ya habría escrito otros
+elementos. Los enteros de la variable del bucle pasan a ser `int64` de NumPy, así
+que un valor fuera de ese rango se desborda en lugar de fallar al asignarse.
+"""
+
+import copy
+from typing import List, Optional, Set
+
+from lark import Token, Tree
+
+# Reglas de un solo hijo que no cambian el significado de la expresión.
+_REGLAS_TRANSPARENTES = frozenset([
+    "expr", "ternary", "bool_or", "bool_and", "not_expr", "comparison",
+    "bitwise_or_expr", "bitwise_xor_expr", "bitwise_and_expr", "shift_expr",
+    "additive_expr", "multiplicative_expr", "unary_expr", "power", "access", "primary",
+    "numero", "slice_part_opt",
+])
+
+_REGLAS_BINARIAS = frozenset([
+    "comparison", "bitwise_or_expr", "bitwise_xor_expr", "bitwise_and_expr", "shift_expr",
+    "additive_expr", "multiplicative_expr", "power",
+])
+
+# Operadores que, entre dos escalares de Python, pueden lanzar una excepción.
+_OPERADORES_CON_EXCEPCION = frozenset(["/", "//", "%", "**", "<<", ">>"])
+
+# Operadores de comparación admitidos (los de pertenencia e identidad no son elemento a elemento).
+_COMPARACIONES = frozenset(["<", "<=", ">", ">=", "==", "!="])
+
+_ASIGNACIONES_AUMENTADAS = frozenset(["+=", "-=", "*=", "/=", "//=", "%=", "**="])
+
+_TOKENS_NUMERICOS = frozenset(["INT", "FLOAT", "numero", "imaginary_literal", "complex_literal"])
+
+# Funciones integradas que se aplican elemento a elemento sobre arreglos sin cambiar su resultado.
+_FUNCIONES_ELEMENTALES = frozenset(["abs"])
+
+
+class PlanVectorizacion:
+    """
+    Lo que el transformer necesita para emitir un bucle vectorizado.
+    """
+
+    def __init__(self, numero: int, variable: str, iterable: Tree, bloque: Tree, sentencias: List[Tree],
+                 arreglos: List[str], escritos: List[str], escalares: List[str], usa_indice: bool):
+        """
+        Args:
+            numero: Identificador del bucle (para nombres auxiliares únicos en el archivo).
+            variable: Nombre de la variable del bucle.
+            iterable: Expresión del iterable (sin modificar).
+            bloque: Cuerpo original (para el bucle alternativo).
+            sentencias: Copias de las sentencias del cuerpo con `i` sustituido por el slice.
+            arreglos: Arreglos indexados con la variable del bucle.
+            escritos: Arreglos asignados en el cuerpo.
+            escalares: Otros nombres leídos en el cuerpo.
+            usa_indice: Si la variable del bucle aparece sola en alguna expresión.
+        """
+        self.numero = numero
+        self.variable = variable
+        self.iterable = iterable
+        self.bloque = bloque
+        self.sentencias = sentencias
+        self.arreglos = arreglos
+        self.escritos = escritos
+        self.escalares = escalares
+        self.usa_indice = usa_indice
+
+    @property
+    def rango(self) -> str:
+        """Nombre auxiliar que guarda el iterable evaluado."""
+        return f"_castella_rango_{self.numero}"
+
+    @property
+    def tramo(self) -> str:
+        """Nombre auxiliar del slice que sustituye a la variable del bucle."""
+        return f"_castella_tramo_{self.numero}"
+
+    @property
+    def indices(self) -> str:
+        """Expresión que sustituye a la variable del bucle cuando aparece sola."""
+        return f"np.arange({self.rango}.start, {self.rango}.stop, {self.rango}.step)"
+
+
+class _AnalisisCuerpo:
+    """
+    Recorre el cuerpo de un bucle y decide si es elemento a elemento.
+    """
+
+    def __init__(self, variable: str, matrices: Set[str]):
+        self.variable = variable
+        self.matrices = matrices
+        self.arreglos: List[str] = []
+        self.escritos: List[str] = []
+        self.escalares: List[str] = []
+        self.usa_indice = False
+
+    def sentencia(self, nodo) -> bool:
+        """Analiza una sentencia del cuerpo (`M[i] = expr;` o `M[i] op= expr;`)."""
+        if not (isinstance(nodo, Tree) and nodo.data == "stmt" and len(nodo.children) == 1):
+            return False
+        asignacion = nodo.children[0]
+        if not isinstance(asignacion, Tree) or asignacion.data not in ("asignacion", "augmented_assignment"):
+            return False
+        hijos = [h for h in asignacion.children if not _es_token(h, "SEMICOLON")]
+        if len(hijos) != 3 or not isinstance(hijos[1], Token):
+            return False
+        if asignacion.data == "augmented_assignment" and hijos[1].value not in _ASIGNACIONES_AUMENTADAS:
+            return False
+        destino = self._arreglo_indexado(hijos[0])
+        if destino is None:
+            return False
+        if self.expresion(hijos[2]) is None:
+            return False
+        _agregar(self.arreglos, destino)
+        _agregar(self.escritos, destino)
+        return True
+
+    def expresion(self, nodo) -> Optional[bool]:
+        """
+        Analiza una expresión del cuerpo.
+
+        Returns:
+            None si no es vectorizable; si lo es, indica si contiene la lectura de un arreglo.
+        """
+        if isinstance(nodo, Token):
+            if nodo.type in _TOKENS_NUMERICOS or nodo.type in ("VERDADERO_KW", "FALSO_KW"):
+                return False
+            return None
+        if not isinstance(nodo, Tree):
+            return None
+        hijos = nodo.children
+
+        if nodo.data == "access":
+            arreglo = self._arreglo_indexado(nodo)
+            if arreglo is not None:
+                _agregar(self.arreglos, arreglo)
+                return True
+            if len(hijos) == 2 and _nombre(hijos[0]) in _FUNCIONES_ELEMENTALES:
+                argumento = _argumento_unico(hijos[1])
+                return None if argumento is None else self.expresion(argumento)
+            if len(hijos) != 1:
+                return None
+            return self.expresion(hijos[0])
+
+        if nodo.data == "primary":
+            if len(hijos) == 3 and _es_token(hijos[0], "LPAR"):
+                return self.expresion(hijos[1])
+            if len(hijos) == 1 and _es_token(hijos[0], "IDENT"):
+                nombre = hijos[0].value
+                if nombre == self.variable:
+                    self.usa_indice = True
+                elif nombre in self.matrices:
+                    return None # Un arreglo completo dentro del cuerpo cambiaría la forma del resultado.
+                else:
+                    _agregar(self.escalares, nombre)
+                return False
+            if len(hijos) == 1:
+                return self.expresion(hijos[0])
+            return None
+
+        if nodo.data == "unary_expr" and len(hijos) == 2:
+            if not isinstance(hijos[0], Token) or hijos[0].value not in ("-", "+", "~"):
+                return None
+            return self.expresion(hijos[1])
+
+        if nodo.data in _REGLAS_BINARIAS and len(hijos) >= 3 and len(hijos) % 2 == 1:
+            if nodo.data == "comparison" and (len(hijos) != 3 or getattr(hijos[1], "value", None) not in _COMPARACIONES):
+                return None # `a < b < c` usa `and`, que no funciona sobre arreglos.
+            operandos = [self.expresion(h) for h in hijos[0::2]]
+            operadores = [h.value if isinstance(h, Token) else None for h in hijos[1::2]]
+            if any(o is None for o in operandos) or None in operadores or "@" in operadores:
+                return None
+            if nodo.data == "power": # Asociativa por la derecha.
+                operandos, operadores = operandos[::-1], operadores[::-1]
+            acumulado = operandos[0]
+            for operador, operando in zip(operadores, operandos[1:]):
+                if operador in _OPERADORES_CON_EXCEPCION and not (acumulado or operando):
+                    return None
+                acumulado = acumulado or operando
+            return acumulado
+
+        if nodo.data in _REGLAS_TRANSPARENTES and len(hijos) == 1:
+            return self.expresion(hijos[0])
+        return None
+
+    def _arreglo_indexado(self, nodo) -> Optional[str]:
+        """Devuelve `M` si `nodo` es exactamente `M[i]` con `M` de tipo Matriz."""
+        if not (isinstance(nodo, Tree) and nodo.data == "access" and len(nodo.children) == 2):
+            return None
+        nombre = _nombre(nodo.children[0])
+        if nombre not in self.matrices or not _es_indice_simple(nodo.children[1], self.variable):
+            return None
+        return nombre
+
+
+class VectorizadorCastella:
+    """
+    Busca bucles vectorizables en un árbol y los reemplaza por nodos `for_vectorizado`.
+    """
+
+    def __init__(self):
+        self.vectorizados = 0
+
+    def vectorizar(self, arbol: Tree) -> int:
+        """
+        Vectoriza los bucles de `arbol` (en el sitio).
+
+        Returns:
+            El número de bucles vectorizados.
+        """
+        self._recorrer(arbol, _matrices_declaradas(arbol))
+        return self.vectorizados
+
+    def _recorrer(self, nodo: Tree, matrices: Set[str]):
+        for indice, hijo in enumerate(nodo.children):
+            if not isinstance(hijo, Tree):
+                continue
+            if hijo.data == "func_def":
+                # Los parámetros y declaraciones `Matriz` de la función se suman a los globales.
+                self._recorrer(hijo, matrices | _matrices_declaradas(hijo))
+            elif hijo.data == "class_def":
+                self._recorrer(hijo, set())
+            elif hijo.data == "for_stmt":
+                self._recorrer(hijo, matrices)
+                plan = self._planificar(hijo, matrices)
+                if plan is not None:
+                    nodo.children[indice] = Tree("for_vectorizado", [hijo, plan], hijo.meta)
+            else:
+                self._recorrer(hijo, matrices)
+
+    def _planificar(self, bucle: Tree, matrices: Set[str]) -> Optional[PlanVectorizacion]:
+        """
+        Construye el plan de un bucle `para` si su cuerpo es elemento a elemento.
+        """
+        if not matrices:
+            return None
+        variable = next((h for h in bucle.children if _es_token(h, "IDENT")), None)
+        iterable = next((h for h in bucle.children if isinstance(h, Tree) and h.data == "expr"), None)
+        bloque = next((h for h in bucle.children if isinstance(h, Tree) and h.data == "block"), None)
+        if variable is None or iterable is None or bloque is None:
+            return None
+
+        analisis = _AnalisisCuerpo(variable.value, matrices)
+        sentencias = [h for h in bloque.children if not (_es_token(h, "LBRACE") or _es_token(h, "RBRACE"))]
+        if not sentencias or not all(analisis.sentencia(s) for s in sentencias):
+            return None
+
+        plan = PlanVectorizacion(self.vectorizados, variable.value, iterable, bloque, [],
+                                 analisis.arreglos, analisis.escritos, analisis.escalares, analisis.usa_indice)
+        plan.sentencias = [_sustituir_indice(copy.deepcopy(s), variable.value, plan) for s in sentencias]
+        self.vectorizados += 1
+        return plan
+
+
+def vectorizar(arbol: Tree) -> int:
+    """
+    Vectoriza los bucles elemento a elemento de `arbol` (en el sitio).
+
+    Returns:
+        El número de bucles vectorizados.
+    """
+    return VectorizadorCastella().vectorizar(arbol)
+
+
+# === UTILIDADES ===
+
+def _es_token(nodo, tipo: str) -> bool:
+    return isinstance(nodo, Token) and nodo.type == tipo
+
+
+def _agregar(lista: List[str], nombre: str):
+    if nombre not in lista:
+        lista.append(nombre)
+
+
+def _nombre(nodo) -> Optional[str]:
+    """Devuelve el identificador de un `primary` (o cadena de un solo hijo) que es sólo un nombre."""
+    while isinstance(nodo, Tree) and len(nodo.children) == 1:
+        nodo = nodo.children[0]
+    return nodo.value if _es_token(nodo, "IDENT") else None
+
+
+def _contenido_indice(sufijo) -> Optional[Tree]:
+    """Devuelve el `slice_expr` de un sufijo `INDEX_ACCESS`."""
+    if not (isinstance(sufijo, Tree) and sufijo.data == "INDEX_ACCESS"):
+        return None
+    return next((h for h in sufijo.children if isinstance(h, Tree) and h.data in ("slice_expr", "slice_items")), None)
+
+
+def _es_indice_simple(sufijo, variable: str) -> bool:
+    """Indica si un sufijo es exactamente `[variable]` (sin slices ni aritmética)."""
+    contenido = _contenido_indice(sufijo)
+    if contenido is None or any(_es_token(h, "COLON") for h in contenido.children):
+        return False
+    partes = [h for h in contenido.children if h is not None]
+    return len(partes) == 1 and _nombre(partes[0]) == variable
+
+
+def _argumento_unico(sufijo) -> Optional[Tree]:
+    """Devuelve la única expresión posicional de una llamada `f(x)`, o None."""
+    if not (isinstance(sufijo, Tree) and sufijo.data == "CALL_SUFFIX"):
+        return None
+    argumentos = [h for h in sufijo.children if isinstance(h, Tree)]
+    if len(argumentos) != 1 or argumentos[0].data != "argument_list":
+        return None
+    grupos = [h for h in argumentos[0].children if isinstance(h, Tree)]
+    if len(grupos) != 1 or grupos[0].data != "positional_args_list":
+        return None
+    expresiones = [h for h in grupos[0].children if isinstance(h, Tree)]
+    return expresiones[0] if len(expresiones) == 1 else None
+
+
+def _sustituir_indice(nodo: Tree, variable: str, plan: PlanVectorizacion) -> Tree:
+    """
+    Sustituye en una copia de la sentencia `[i]` por `[tramo]` y la `i` suelta por `np.arange(...)`.
+
+    Los textos se insertan como cadenas: el transformer las devuelve tal cual.
+    """
+    for subarbol in nodo.iter_subtrees_topdown():
+        if subarbol.data == "access" and len(subarbol.children) == 2 and _es_indice_simple(subarbol.children[1], variable):
+            _contenido_indice(subarbol.children[1]).children = [plan.tramo]
+        elif subarbol.data == "primary" and len(subarbol.children) == 1 and _es_token(subarbol.children[0], "IDENT") \
+                and subarbol.children[0].value == variable:
+            subarbol.children = [plan.indices]
+    return nodo
+
+
+def _es_tipo_matriz(tipo) -> bool:
+    """Indica si un nodo `type` (o `type_hint`) es `Matriz` (con o sin argumentos)."""
+    while isinstance(tipo, Tree) and tipo.children:
+        if tipo.data == "type_hint": # COLON type
+            tipo = next((h for h in tipo.children if isinstance(h, Tree)), None)
+        else:
+            tipo = tipo.children[0]
+    return _es_token(tipo, "MATRIZ_TYPE")
+
+
+def _matrices_declaradas(nodo: Tree) -> Set[str]:
+    """
+    Nombres declarados con tipo `Matriz` en el ámbito de `nodo` (sin entrar en funciones
+    ni clases anidadas): `let a: Matriz = ...;` y parámetros `a: Matriz` de la función.
+    """
+    nombres = set()
+    pendientes = [nodo]
+    while pendientes:
+        actual = pendientes.pop()
+        for hijo in actual.children:
+            if not isinstance(hijo, Tree):
+                continue
+            if hijo.data in ("func_def", "class_def"):
+                continue # Funciones y clases anidadas: ámbito propio.
+            if hijo.data in ("declaration", "declaracion", "pos_param", "default_param"):
+                identificador = next((h for h in hijo.children if _es_token(h, "IDENT")), None)
+                tipo = next((h for h in hijo.children if isinstance(h, Tree) and h.data in ("type", "type_hint")), None)
+                if identificador is not None and _es_tipo_matriz(tipo):
+                    nombres.add(identificador.value)
+            pendientes.append(hijo)
+    return nombres